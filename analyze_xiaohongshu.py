@@ -1,67 +1,85 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/analyze_xiaohongshu.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 小红书爬取数据分析脚本：基于 tools.data_analysis 的聚合结果绘制图表
+
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 import re
-from collections import Counter
-import jieba
 import warnings
+
+from tools.data_analysis import AnalysisEngine
+from tools.keyword_matcher import KeywordMatcher
+
 warnings.filterwarnings('ignore')
 
 # 设置中文字体
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'Arial Unicode MS']
 plt.rcParams['axes.unicode_minus'] = False
 
-def extract_locations(text):
-    """提取上海区域信息"""
-    shanghai_districts = ['徐汇', '静安', '黄浦', '长宁', '普陀', '虹口', '杨浦', '浦东', '闵行', '宝山', '嘉定', '松江', '青浦', '奉贤', '金山', '崇明']
-    locations = []
+SHANGHAI_DISTRICTS = ['徐汇', '静安', '黄浦', '长宁', '普陀', '虹口', '杨浦', '浦东', '闵行', '宝山', '嘉定', '松江', '青浦', '奉贤', '金山', '崇明']
 
-    if pd.isna(text):
-        return locations
+# 具体地点关键词
+LOCATION_PATTERNS = [
+    r'(\w+路)', r'(\w+广场)', r'(\w+商场)', r'(\w+购物中心)',
+    r'(\w+大学)', r'(\w+公园)', r'图书馆', r'地铁站'
+]
+
+CAFE_FEATURES = {
+    '插座': ['插座', '电源', '充电', 'plug'],
+    '安静': ['安静', '清净', '不吵', 'silent', 'quiet'],
+    '网络': ['wifi', 'wi-fi', '网速', '网络'],
+    '停车位': ['停车', 'parking', '停车券'],
+    '宠物友好': ['宠物', '狗', '猫', 'pet', '宠物友好'],
+    '有厕所': ['厕所', '卫生间', '洗手间', 'wc'],
+    '营业时间': ['营业', '开门', '关门', '24小时'],
+    '价格': ['价格', '便宜', '贵', '实惠', '人均'],
+}
 
-    for district in shanghai_districts:
-        if district in str(text):
-            locations.append(district)
+SENTIMENT_WORDS = {
+    'positive': ['推荐', '好', '不错', '舒服', '安静', '棒', '喜欢', '适合', '方便'],
+    'negative': ['吵', '贵', '差', '不好', '失望', '慢', '挤'],
+}
 
-    # 提取具体地点关键词
-    location_patterns = [
-        r'(\w+路)', r'(\w+广场)', r'(\w+商场)', r'(\w+购物中心)',
-        r'(\w+大学)', r'(\w+公园)', r'图书馆', r'地铁站'
-    ]
+# 关键词词典只编译一次
+_DISTRICT_MATCHER = KeywordMatcher({district: [district] for district in SHANGHAI_DISTRICTS}, ignore_case=False)
+_FEATURE_MATCHER = KeywordMatcher(CAFE_FEATURES)
 
-    for pattern in location_patterns:
-        matches = re.findall(pattern, str(text))
-        locations.extend(matches)
 
+def extract_locations(text):
+    """提取上海区域信息"""
+    if pd.isna(text):
+        return []
+    text = str(text)
+    locations = [district for district in SHANGHAI_DISTRICTS if district in _DISTRICT_MATCHER.match(text)]
+    for pattern in LOCATION_PATTERNS:
+        locations.extend(re.findall(pattern, text))
     return locations
 
 def analyze_cafe_features(text):
     """分析咖啡厅特征"""
-    features = {
-        '插座': ['插座', '电源', '充电', 'plug'],
-        '安静': ['安静', '清净', '不吵', 'silent', 'quiet'],
-        '网络': ['wifi', 'wi-fi', '网速', '网络'],
-        '停车位': ['停车', 'parking', '停车券'],
-        '宠物友好': ['宠物', '狗', '猫', 'pet', '宠物友好'],
-        '有厕所': ['厕所', '卫生间', '洗手间', 'wc'],
-        '营业时间': ['营业', '开门', '关门', '24小时'],
-        '价格': ['价格', '便宜', '贵', '实惠', '人均'],
-    }
-
-    found_features = []
     if pd.isna(text):
-        return found_features
-
-    text_lower = str(text).lower()
-
-    for feature, keywords in features.items():
-        for keyword in keywords:
-            if keyword in text_lower:
-                found_features.append(feature)
-                break
-
-    return found_features
+        return []
+    found = _FEATURE_MATCHER.match(str(text))
+    return [feature for feature in CAFE_FEATURES if feature in found]
 
 def analyze_xiaohongshu_data(contents_file, comments_file):
     """综合分析小红书数据"""
@@ -70,9 +88,10 @@ def analyze_xiaohongshu_data(contents_file, comments_file):
     print("📊 小红书上海适合办公的咖啡厅数据分析报告")
     print("=" * 80)
 
-    # 读取数据
-    df_contents = pd.read_csv(contents_file)
-    df_comments = pd.read_csv(comments_file)
+    # 读取数据，点赞数等计数列会转换为数字（"1.2万" -> 12000）
+    engine = AnalysisEngine.from_files([contents_file], [comments_file])
+    df_contents = engine.contents
+    df_comments = engine.comments
 
     print(f"\n✅ 数据加载成功!")
     print(f"   帖子数据: {len(df_contents)} 条")
@@ -83,25 +102,21 @@ def analyze_xiaohongshu_data(contents_file, comments_file):
     print("📈 一、基础数据统计")
     print("=" * 80)
 
+    stats = engine.engagement_stats()
     print(f"\n帖子互动数据:")
-    print(f"  平均点赞数: {df_contents['liked_count'].mean():.1f}")
-    print(f"  平均收藏数: {df_contents['collected_count'].mean():.1f}")
-    print(f"  平均评论数: {df_contents['comment_count'].mean():.1f}")
-    print(f"  最高点赞: {df_contents['liked_count'].max()}")
-    print(f"  最高收藏: {df_contents['collected_count'].max()}")
+    print(f"  平均点赞数: {stats['liked_count']['mean']:.1f}")
+    print(f"  平均收藏数: {stats['collected_count']['mean']:.1f}")
+    print(f"  平均评论数: {stats['comment_count']['mean']:.1f}")
+    print(f"  最高点赞: {stats['liked_count']['max']:.0f}")
+    print(f"  最高收藏: {stats['collected_count']['max']:.0f}")
 
     # 2. 提取地理位置信息
     print("\n" + "=" * 80)
     print("📍 二、地理位置分析")
     print("=" * 80)
 
-    all_locations = []
-    for idx, row in df_contents.iterrows():
-        text = f"{row.get('title', '')} {row.get('desc', '')} {row.get('ip_location', '')}"
-        locations = extract_locations(text)
-        all_locations.extend(locations)
-
-    location_counter = Counter(all_locations)
+    location_counter = engine.keyword_counts({district: [district] for district in SHANGHAI_DISTRICTS}, ignore_case=False)
+    location_counter.update(engine.pattern_counts(LOCATION_PATTERNS))
 
     if location_counter:
         print(f"\n提及最多的上海区域 (Top 10):")
@@ -113,13 +128,7 @@ def analyze_xiaohongshu_data(contents_file, comments_file):
     print("☕ 三、咖啡厅特征分析")
     print("=" * 80)
 
-    all_features = []
-    for idx, row in df_contents.iterrows():
-        text = f"{row.get('title', '')} {row.get('desc', '')}"
-        features = analyze_cafe_features(text)
-        all_features.extend(features)
-
-    feature_counter = Counter(all_features)
+    feature_counter = engine.keyword_counts(CAFE_FEATURES)
 
     if feature_counter:
         print(f"\n用户最关心的特征 (Top 10):")
@@ -131,27 +140,15 @@ def analyze_xiaohongshu_data(contents_file, comments_file):
     print("💬 四、评论热点分析")
     print("=" * 80)
 
-    positive_words = ['推荐', '好', '不错', '舒服', '安静', '棒', '喜欢', '适合', '方便']
-    negative_words = ['吵', '贵', '差', '不好', '失望', '慢', '挤']
-
-    positive_count = 0
-    negative_count = 0
+    sentiment_counter = engine.keyword_counts(SENTIMENT_WORDS, table="comments")
+    positive_count = sentiment_counter['positive']
+    negative_count = sentiment_counter['negative']
 
-    for idx, row in df_comments.head(100).iterrows():
-        comment = str(row.get('content', ''))
-        for word in positive_words:
-            if word in comment:
-                positive_count += 1
-                break
-        for word in negative_words:
-            if word in comment:
-                negative_count += 1
-                break
-
-    print(f"\n评论情感倾向 (基于前100条评论):")
+    print(f"\n评论情感倾向 (基于全部 {len(df_comments)} 条评论):")
     print(f"  积极评价: {positive_count} 条")
     print(f"  消极评价: {negative_count} 条")
-    print(f"  积极占比: {positive_count/(positive_count+negative_count)*100:.1f}%")
+    if positive_count + negative_count:
+        print(f"  积极占比: {positive_count/(positive_count+negative_count)*100:.1f}%")
 
     # 5. 创建可视化
     print("\n" + "=" * 80)
@@ -241,11 +238,11 @@ def analyze_xiaohongshu_data(contents_file, comments_file):
 
     # 洞察1: 最受欢迎的内容
     if len(df_contents) > 0:
-        top_liked = df_contents.nlargest(3, 'liked_count')[['title', 'liked_count']]
+        top_liked = engine.top('liked_count', n=3, columns=['title'])
         print("\n🔥 最受欢迎的帖子 Top 3:")
-        for idx, row in top_liked.iterrows():
-            print(f"\n  {row['title'][:50]}...")
-            print(f"  👍 {row['liked_count']} 个赞")
+        for title, liked_count in top_liked[['title', 'liked_count']].itertuples(index=False):
+            print(f"\n  {str(title)[:50]}...")
+            print(f"  👍 {liked_count:.0f} 个赞")
 
     # 洞察2: 用户最关心的特征
     if feature_counter:
@@ -271,6 +268,8 @@ def analyze_xiaohongshu_data(contents_file, comments_file):
     print("✅ 分析完成!")
     print("=" * 80)
 
+    engine.close()
+
     return {
         'contents': len(df_contents),
         'comments': len(df_comments),
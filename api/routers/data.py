@@ -17,34 +17,35 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
 import os
-import json
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
+
+from tools.data_export import EXPORT_FORMATS, PARQUET_AVAILABLE, export_file
+from tools.data_file_index import get_file_index
 
 router = APIRouter(prefix="/data", tags=["data"])
 
 # Data directory
 DATA_DIR = Path(__file__).parent.parent.parent / "data"
 
+# Maximum number of records returned by one preview page
+MAX_PREVIEW_LIMIT = 1000
+
 
 def get_file_info(file_path: Path) -> dict:
-    """Get file information"""
+    """Get file information, the record count comes from the sidecar index and is None for files not indexed yet"""
     stat = file_path.stat()
     record_count = None
+    columns = None
 
-    # Try to get record count
     try:
-        if file_path.suffix == ".json":
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                if isinstance(data, list):
-                    record_count = len(data)
-        elif file_path.suffix == ".csv":
-            with open(file_path, "r", encoding="utf-8") as f:
-                record_count = sum(1 for _ in f) - 1  # Subtract header row
+        index = get_file_index(str(file_path), build=False)
+        if index is not None:
+            record_count = index.rows
+            columns = index.columns
     except Exception:
         pass
 
@@ -54,10 +55,22 @@ def get_file_info(file_path: Path) -> dict:
         "size": stat.st_size,
         "modified_at": stat.st_mtime,
         "record_count": record_count,
+        "columns": columns,
         "type": file_path.suffix[1:] if file_path.suffix else "unknown"
     }
 
 
+def parse_filters(filters: Optional[List[str]]) -> Dict[str, str]:
+    """Parse `field:value` query parameters"""
+    parsed = {}
+    for item in filters or []:
+        field, sep, value = item.partition(":")
+        if not sep or not field:
+            raise HTTPException(status_code=400, detail=f"Invalid filter {item!r}, expected field:value")
+        parsed[field] = value
+    return parsed
+
+
 @router.get("/files")
 async def list_data_files(platform: Optional[str] = None, file_type: Optional[str] = None):
     """Get data file list"""
@@ -65,7 +78,7 @@ async def list_data_files(platform: Optional[str] = None, file_type: Optional[st
         return {"files": []}
 
     files = []
-    supported_extensions = {".json", ".csv", ".xlsx", ".xls"}
+    supported_extensions = {".json", ".jsonl", ".csv", ".xlsx", ".xls", ".parquet"}
 
     for root, dirs, filenames in os.walk(DATA_DIR):
         root_path = Path(root)
@@ -96,8 +109,18 @@ async def list_data_files(platform: Optional[str] = None, file_type: Optional[st
 
 
 @router.get("/files/{file_path:path}")
-async def get_file_content(file_path: str, preview: bool = True, limit: int = 100):
-    """Get file content or preview"""
+async def get_file_content(
+    file_path: str,
+    preview: bool = True,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PREVIEW_LIMIT),
+    filter: Optional[List[str]] = Query(None, description="field:value, may be repeated"),
+):
+    """
+    Get file content or a page of records (offset / limit apply after the filters)
+    `total` is the number of records in the file, with filters it is None (counting the matches would scan
+    the whole file), page with `has_more` instead
+    """
     full_path = DATA_DIR / file_path
 
     if not full_path.exists():
@@ -113,47 +136,27 @@ async def get_file_content(file_path: str, preview: bool = True, limit: int = 10
         raise HTTPException(status_code=403, detail="Access denied")
 
     if preview:
-        # Return preview data
+        if full_path.suffix.lower() not in (".json", ".jsonl", ".csv", ".xlsx", ".xls", ".parquet"):
+            raise HTTPException(status_code=400, detail="Unsupported file type for preview")
+        filters = parse_filters(filter)
         try:
-            if full_path.suffix == ".json":
-                with open(full_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        return {"data": data[:limit], "total": len(data)}
-                    return {"data": data, "total": 1}
-            elif full_path.suffix == ".csv":
-                import csv
-                with open(full_path, "r", encoding="utf-8") as f:
-                    reader = csv.DictReader(f)
-                    rows = []
-                    for i, row in enumerate(reader):
-                        if i >= limit:
-                            break
-                        rows.append(row)
-                    # Re-read to get total count
-                    f.seek(0)
-                    total = sum(1 for _ in f) - 1
-                    return {"data": rows, "total": total}
-            elif full_path.suffix.lower() in (".xlsx", ".xls"):
-                import pandas as pd
-                # Read first limit rows
-                df = pd.read_excel(full_path, nrows=limit)
-                # Get total row count (only read first column to save memory)
-                df_count = pd.read_excel(full_path, usecols=[0])
-                total = len(df_count)
-                # Convert to list of dictionaries, handle NaN values
-                rows = df.where(pd.notnull(df), None).to_dict(orient='records')
-                return {
-                    "data": rows,
-                    "total": total,
-                    "columns": list(df.columns)
-                }
-            else:
-                raise HTTPException(status_code=400, detail="Unsupported file type for preview")
-        except json.JSONDecodeError:
+            index = get_file_index(str(full_path))
+            # One extra record tells whether there is a next page
+            rows = index.read(offset=offset, limit=limit + 1, filters=filters)
+        except ValueError:
+            # json.JSONDecodeError is a ValueError
             raise HTTPException(status_code=400, detail="Invalid JSON file")
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
+        return {
+            "data": rows[:limit],
+            "total": None if filters else index.rows,
+            "filtered": bool(filters),
+            "columns": index.columns,
+            "offset": offset,
+            "limit": limit,
+            "has_more": len(rows) > limit,
+        }
     else:
         # Return file download
         return FileResponse(
@@ -187,6 +190,49 @@ async def download_file(file_path: str):
     )
 
 
+@router.get("/export/{file_path:path}")
+async def export_data_file(
+    file_path: str,
+    format: str = Query("jsonl", description="csv / jsonl / parquet"),
+    filter: Optional[List[str]] = Query(None, description="field:value, may be repeated"),
+):
+    """Stream a data file converted to another format, the file is read incrementally"""
+    full_path = DATA_DIR / file_path
+
+    if not full_path.exists():
+        raise HTTPException(status_code=404, detail="File not found")
+
+    if not full_path.is_file():
+        raise HTTPException(status_code=400, detail="Not a file")
+
+    # Security check
+    try:
+        full_path.resolve().relative_to(DATA_DIR.resolve())
+    except ValueError:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    export_format = format.lower()
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format, expected one of {list(EXPORT_FORMATS)}")
+    if export_format == "parquet" and not PARQUET_AVAILABLE:
+        raise HTTPException(status_code=400, detail="pyarrow is not installed")
+    if full_path.suffix.lower() not in (".json", ".jsonl", ".csv", ".xlsx", ".xls", ".parquet"):
+        raise HTTPException(status_code=400, detail="Unsupported file type for export")
+    filters = parse_filters(filter)
+
+    try:
+        index = get_file_index(str(full_path))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON file")
+
+    # Without a Content-Length the response is sent with chunked transfer encoding
+    return StreamingResponse(
+        export_file(index, export_format, filters),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{full_path.stem}.{export_format}"'},
+    )
+
+
 @router.get("/stats")
 async def get_data_stats():
     """Get data statistics"""
@@ -200,7 +246,7 @@ async def get_data_stats():
         "by_type": {}
     }
 
-    supported_extensions = {".json", ".csv", ".xlsx", ".xls"}
+    supported_extensions = {".json", ".jsonl", ".csv", ".xlsx", ".xls", ".parquet"}
 
     for root, dirs, filenames in os.walk(DATA_DIR):
         root_path = Path(root)
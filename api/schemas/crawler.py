@@ -54,6 +54,7 @@ class SaveDataOptionEnum(str, Enum):
     SQLITE = "sqlite"
     MONGODB = "mongodb"
     EXCEL = "excel"
+    PARQUET = "parquet"
 
 
 class CrawlerStartRequest(BaseModel):
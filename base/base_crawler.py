@@ -17,10 +17,18 @@
 # 详细许可条款请参阅项目根目录下的LICENSE文件。
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
+import asyncio
+import os
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
 
-from playwright.async_api import BrowserContext, BrowserType, Playwright
+from playwright.async_api import Browser, BrowserContext, BrowserType, Page, Playwright
+
+import config
+from tools import utils
+from tools.crawl_pipeline import CrawlPipeline, StageHandler
+from tools.session_pool import CrawlSession, SessionPool, session_state_path
+from var import source_keyword_var
 
 
 class AbstractCrawler(ABC):
@@ -63,6 +71,124 @@ class AbstractCrawler(ABC):
         # Default implementation: fallback to standard mode
         return await self.launch_browser(playwright.chromium, playwright_proxy, user_agent, headless)
 
+    async def open_session(self, browser_context: BrowserContext, context_page: Page, httpx_proxy: Optional[str],
+                           login_type: str, cookie_str: str) -> Any:
+        """
+        Log one account in on the given browser context and create its API client
+        Platforms implement this to support a session pool (SESSION_POOL_SIZE > 1)
+        :param browser_context: browser context of the account
+        :param context_page: page used for login and request signing
+        :param httpx_proxy: httpx proxy of the account
+        :param login_type: qrcode | phone | cookie
+        :param cookie_str: cookies for the cookie login
+        :return: API client
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support session pools")
+
+    async def create_session_pool(self, playwright: Playwright, platform: str, client: Any,
+                                  quarantine_on: Tuple[Type[BaseException], ...] = ()) -> Any:
+        """
+        Open SESSION_POOL_SIZE - 1 more accounts next to the crawler's own session, each in its own browser context
+        of the same browser, and spread the API calls over all of them
+        :param playwright: playwright instance
+        :param platform: platform name, e.g. xhs
+        :param client: API client of the crawler's own session
+        :param quarantine_on: errors that quarantine a session at once (IP block, captcha)
+        :return: client itself with a single session, otherwise a SessionPoolClient standing in for it
+        """
+        if config.SESSION_POOL_SIZE <= 1:
+            return client
+        pool = SessionPool.get_instance(platform, quarantine_on)
+        pool.add(CrawlSession(0, client, self.browser_context, self.context_page))
+        browser = self.browser_context.browser
+        if browser is None:
+            # A persistent context (SAVE_LOGIN_STATE) has no Browser object to open more contexts on
+            utils.logger.warning(f"[{type(self).__name__}.create_session_pool] Launching a browser for the extra sessions")
+            browser = pool.owned_browser = await playwright.chromium.launch(headless=config.HEADLESS)
+        # The platform login classes overwrite config.LOGIN_TYPE, accounts without cookies log in by QR code
+        default_login_type = "qrcode" if config.LOGIN_TYPE == "cookie" else config.LOGIN_TYPE
+        for session_id in range(1, config.SESSION_POOL_SIZE):
+            try:
+                pool.add(await self._open_pool_session(platform, browser, session_id, default_login_type))
+            except Exception as e:
+                utils.logger.error(f"[{type(self).__name__}.create_session_pool] Open session {session_id} failed, err: {e}")
+        utils.logger.info(f"[{type(self).__name__}.create_session_pool] {len(pool.sessions)} sessions ready")
+        return pool.client()
+
+    async def _open_pool_session(self, platform: str, browser: Browser, session_id: int,
+                                 default_login_type: str) -> CrawlSession:
+        playwright_proxy, httpx_proxy = None, None
+        ip_proxy_pool = getattr(self, "ip_proxy_pool", None)
+        if ip_proxy_pool:
+            playwright_proxy, httpx_proxy = utils.format_proxy_info(await ip_proxy_pool.get_proxy())
+        state_path = session_state_path(platform, session_id)
+        browser_context = await browser.new_context(
+            viewport={"width": 1920, "height": 1080},
+            # Same user agent as the crawler's own session
+            user_agent=await self.context_page.evaluate("() => navigator.userAgent"),
+            proxy=playwright_proxy,
+            storage_state=state_path if config.SAVE_LOGIN_STATE and os.path.exists(state_path) else None,
+        )
+        try:
+            if os.path.exists("libs/stealth.min.js"):
+                await browser_context.add_init_script(path="libs/stealth.min.js")
+            context_page = await browser_context.new_page()
+            cookie_str = config.SESSION_POOL_COOKIES[session_id - 1] if session_id <= len(config.SESSION_POOL_COOKIES) else ""
+            login_type = "cookie" if cookie_str else default_login_type
+            client = await self.open_session(browser_context, context_page, httpx_proxy, login_type, cookie_str)
+            if config.SAVE_LOGIN_STATE:
+                os.makedirs(os.path.dirname(state_path), exist_ok=True)
+                await browser_context.storage_state(path=state_path)
+        except BaseException:
+            await browser_context.close()
+            raise
+        return CrawlSession(session_id, client, browser_context, context_page, owns_context=True)
+
+    async def crawl_keywords(self, search_keyword: Callable[[str], Awaitable[None]]) -> None:
+        """
+        Run search_keyword for every keyword in config.KEYWORDS, up to KEYWORD_CONCURRENCY_NUM keywords at a time
+        Every keyword runs in its own task, so source_keyword_var is set per keyword and stored items are attributed
+        to the right keyword. Keywords share the crawler's client, signer and rate limiter.
+        :param search_keyword: crawl all pages of one keyword
+        :return:
+        """
+        semaphore = asyncio.Semaphore(max(1, config.KEYWORD_CONCURRENCY_NUM))
+
+        async def run(keyword: str):
+            async with semaphore:
+                source_keyword_var.set(keyword)
+                await search_keyword(keyword)
+
+        keywords = config.KEYWORDS.split(",")
+        results = await asyncio.gather(*[run(keyword) for keyword in keywords], return_exceptions=True)
+        errors = [(keyword, result) for keyword, result in zip(keywords, results) if isinstance(result, BaseException)]
+        for keyword, error in errors:
+            utils.logger.error(f"[{type(self).__name__}.crawl_keywords] keyword: {keyword} failed, err: {error}")
+        if errors:
+            raise errors[0][1]
+
+    def create_crawl_pipeline(
+        self,
+        detail_handler: StageHandler,
+        comment_handler: Optional[StageHandler] = None,
+        media_handler: Optional[StageHandler] = None,
+    ) -> CrawlPipeline:
+        """
+        Create the search pipeline: the search producer feeds the "detail" stage, detail handlers feed the
+        "comment" and "media" stages. Every stage has its own bounded queue and worker count.
+        :param detail_handler: fetch and store one search result
+        :param comment_handler: crawl the comments of one content item
+        :param media_handler: submit the media of one content item to the MediaDownloader
+        :return: crawl pipeline, started with pipeline.run(producer)
+        """
+        pipeline = CrawlPipeline(type(self).__name__)
+        pipeline.add_stage("detail", detail_handler, config.MAX_CONCURRENCY_NUM, config.CRAWL_PIPELINE_QUEUE_SIZE)
+        if comment_handler and config.ENABLE_GET_COMMENTS:
+            pipeline.add_stage("comment", comment_handler, config.MAX_CONCURRENCY_NUM, config.CRAWL_PIPELINE_QUEUE_SIZE)
+        if media_handler and config.ENABLE_GET_MEIDAS:
+            pipeline.add_stage("media", media_handler, config.CRAWL_PIPELINE_MEDIA_WORKERS, config.CRAWL_PIPELINE_QUEUE_SIZE)
+        return pipeline
+
 
 class AbstractLogin(ABC):
 
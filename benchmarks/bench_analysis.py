@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/benchmarks/bench_analysis.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Benchmark: the old per-row analysis of analyze_xiaohongshu.py (df.iterrows + one `in` test per keyword + re.findall)
+vs. AnalysisEngine (vectorized count parsing, SQL aggregations, one KeywordMatcher pass per text), on synthetic notes
+
+Usage:
+    python -m benchmarks.bench_analysis --rows 1000000 --legacy-rows 100000
+"""
+
+import argparse
+import random
+import re
+import time
+from collections import Counter
+
+import pandas as pd
+
+from analyze_xiaohongshu import CAFE_FEATURES, LOCATION_PATTERNS, SHANGHAI_DISTRICTS
+from tools.data_analysis import AnalysisEngine
+
+_WORDS = ["咖啡", "适合办公", "环境", "拿铁", "周末", "打卡", "推荐", "朋友", "下午", "窗边", "座位", "甜品"]
+_EXTRAS = ["插座很多", "很安静", "wifi快", "有停车券", "宠物友好", "人均50", "24小时营业", "洗手间干净",
+           "衡山路", "人民广场", "复旦大学", "中山公园", "图书馆", "地铁站"]
+
+
+def make_contents(rows: int, seed: int = 1) -> pd.DataFrame:
+    rng = random.Random(seed)
+
+    def text() -> str:
+        parts = rng.sample(_WORDS, 4) + rng.sample(SHANGHAI_DISTRICTS, 1) + rng.sample(_EXTRAS, 2)
+        rng.shuffle(parts)
+        return " ".join(parts)
+
+    def count() -> str:
+        value = rng.randint(0, 30000)
+        return f"{value / 10000:.1f}万" if value >= 10000 else str(value)
+
+    return pd.DataFrame({
+        "note_id": [str(i) for i in range(rows)],
+        "title": [text()[:20] for _ in range(rows)],
+        "desc": [text() for _ in range(rows)],
+        "ip_location": [rng.choice(["上海", "北京", "浙江", "江苏"]) for _ in range(rows)],
+        "liked_count": [count() for _ in range(rows)],
+        "collected_count": [count() for _ in range(rows)],
+        "comment_count": [str(rng.randint(0, 500)) for _ in range(rows)],
+    })
+
+
+def legacy_analysis(df: pd.DataFrame):
+    """The loops analyze_xiaohongshu.py used to run"""
+    locations, features = [], []
+    for _, row in df.iterrows():
+        text = f"{row.get('title', '')} {row.get('desc', '')} {row.get('ip_location', '')}"
+        for district in SHANGHAI_DISTRICTS:
+            if district in text:
+                locations.append(district)
+        for pattern in LOCATION_PATTERNS:
+            locations.extend(re.findall(pattern, text))
+    for _, row in df.iterrows():
+        text = f"{row.get('title', '')} {row.get('desc', '')}".lower()
+        for feature, keywords in CAFE_FEATURES.items():
+            for keyword in keywords:
+                if keyword in text:
+                    features.append(feature)
+                    break
+    return Counter(locations), Counter(features)
+
+
+def engine_analysis(df: pd.DataFrame):
+    engine = AnalysisEngine(df)
+    stats = engine.engagement_stats()
+    locations = engine.keyword_counts({d: [d] for d in SHANGHAI_DISTRICTS}, ignore_case=False)
+    locations.update(engine.pattern_counts(LOCATION_PATTERNS))
+    features = engine.keyword_counts(CAFE_FEATURES)
+    top = engine.top("liked_count", n=3)
+    engine.close()
+    return stats, locations, features, top
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analysis benchmark")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--legacy-rows", type=int, default=100000,
+                        help="rows the per-row version runs on, its time is extrapolated to --rows")
+    args = parser.parse_args()
+
+    df = make_contents(args.rows)
+    print(f"{args.rows} synthetic notes")
+
+    legacy_rows = min(args.legacy_rows, args.rows)
+    start = time.perf_counter()
+    legacy_locations, legacy_features = legacy_analysis(df.head(legacy_rows))
+    legacy_s = (time.perf_counter() - start) * args.rows / legacy_rows
+    print(f"{'iterrows + keyword loops':<28} {legacy_s:8.2f}s" + (" (extrapolated)" if legacy_rows < args.rows else ""))
+
+    start = time.perf_counter()
+    engine_analysis(df)
+    engine_s = time.perf_counter() - start
+    print(f"{'AnalysisEngine':<28} {engine_s:8.2f}s   speedup x{legacy_s / engine_s:.1f}")
+
+    # Same feature counts on the rows both versions saw
+    _, _, features, _ = engine_analysis(df.head(legacy_rows))
+    assert features == legacy_features, (features, legacy_features)
+
+
+if __name__ == "__main__":
+    main()
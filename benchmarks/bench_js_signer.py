@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/benchmarks/bench_js_signer.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Benchmark: Douyin a_bogus / Zhihu x-zse-96 signing, execjs .call() per request (the former path, one node process
+per call, run on the event loop) vs. JsSignerPool (persistent node workers)
+Also reports the longest event loop stall seen by a 10 ms heartbeat
+
+Usage:
+    python -m benchmarks.bench_js_signer --calls 200 --pool-size 2
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+from media_platform.douyin.help import douyin_sign_obj
+from media_platform.zhihu import help as zhihu_help
+from tools.js_signer import JsSignerPool
+
+UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+DOUYIN_PARAMS = "device_platform=webapp&aid=6383&channel=channel_pc_web&aweme_id={i}&msToken="
+ZHIHU_URL = "/api/v4/search_v3?gk_version=gz-gaokao&t=general&q=python&offset={i}&limit=20"
+ZHIHU_COOKIES = "d_c0=AJBSmFJmxxxxPmlxxxxKV1wjH1xxxxxBbxo=|1700000000;"
+
+
+async def run_case(name: str, sign: Callable[[int], Awaitable[str]], calls: int, concurrency: int):
+    max_stall = 0.0
+    done = False
+
+    async def heartbeat():
+        nonlocal max_stall
+        while not done:
+            before = time.perf_counter()
+            await asyncio.sleep(0.01)
+            max_stall = max(max_stall, time.perf_counter() - before - 0.01)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            assert await sign(i)
+
+    ticker = asyncio.create_task(heartbeat())
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    elapsed = time.perf_counter() - started
+    done = True
+    await ticker
+    print(f"{name:<32} {elapsed:7.2f}s  {calls / elapsed:8.1f} sign/s  max loop stall: {max_stall * 1000:7.1f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--pool-size", type=int, default=2)
+    args = parser.parse_args()
+    print(f"{args.calls} calls, concurrency {args.concurrency}, pool size {args.pool_size}")
+
+    douyin_pool = JsSignerPool("libs/douyin.js", size=args.pool_size)
+    zhihu_pool = JsSignerPool("libs/zhihu.js", size=args.pool_size)
+
+    async def douyin_execjs(i: int) -> str:
+        return douyin_sign_obj.call("sign_datail", DOUYIN_PARAMS.format(i=i), UA)
+
+    async def douyin_pooled(i: int) -> str:
+        return await douyin_pool.call("sign_datail", DOUYIN_PARAMS.format(i=i), UA)
+
+    async def zhihu_execjs(i: int) -> str:
+        return zhihu_help.sign(ZHIHU_URL.format(i=i), ZHIHU_COOKIES)["x-zse-96"]
+
+    async def zhihu_pooled(i: int) -> str:
+        return (await zhihu_pool.call("get_sign", ZHIHU_URL.format(i=i), ZHIHU_COOKIES))["x-zse-96"]
+
+    try:
+        await run_case("douyin a_bogus, execjs", douyin_execjs, args.calls, args.concurrency)
+        await run_case("douyin a_bogus, JsSignerPool", douyin_pooled, args.calls, args.concurrency)
+        await run_case("zhihu x-zse-96, execjs", zhihu_execjs, args.calls, args.concurrency)
+        await run_case("zhihu x-zse-96, JsSignerPool", zhihu_pooled, args.calls, args.concurrency)
+    finally:
+        await douyin_pool.close()
+        await zhihu_pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/benchmarks/bench_mongo_bulk.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Benchmark: per-document update_one(upsert=True) (MongoDBStoreBase.save_or_update) vs. buffered unordered
+bulk_write (MongoDBStoreBase.save_or_update_many)
+
+Usage:
+    # against a local mongod (database mediacrawler_bench is dropped afterwards)
+    python -m benchmarks.bench_mongo_bulk --comments 20000 --uri mongodb://localhost:27017
+    # without a server: in-memory stand-in, every server call waits --simulate-rtt-ms (round trips only)
+    python -m benchmarks.bench_mongo_bulk --comments 5000 --simulate-rtt-ms 1
+"""
+
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+
+import config
+from database.mongodb_store_base import MongoBulkWriter, MongoDBConnection, MongoDBStoreBase
+
+BENCH_DB_NAME = "mediacrawler_bench"
+
+
+def make_comments(count: int) -> List[Dict]:
+    return [
+        {
+            "comment_id": f"c{i}",
+            "note_id": f"n{i % 100}",
+            "content": f"comment content {i}",
+            "user_id": f"u{i % 997}",
+            "create_time": 1700000000000 + i,
+            "like_count": str(i % 50),
+        }
+        for i in range(count)
+    ]
+
+
+class _SimulatedCollection:
+    """
+    Stand-in for a server without mongod: documents live in a dict keyed by the upsert filter and every call
+    waits one round trip, so the numbers only reflect the number of round trips
+    """
+
+    def __init__(self, name: str, rtt_sec: float):
+        self.name = name
+        self.rtt_sec = rtt_sec
+        self.documents: Dict[tuple, Dict] = {}
+
+    def _apply(self, query: Dict, update: Dict):
+        key = tuple(query.items())
+        upserted = key not in self.documents
+        self.documents.setdefault(key, dict(query)).update(update["$set"])
+        return upserted
+
+    async def update_one(self, query, update, upsert=False):
+        await asyncio.sleep(self.rtt_sec)
+        self._apply(query, update)
+
+    async def bulk_write(self, operations, ordered=True):
+        await asyncio.sleep(self.rtt_sec)
+        upserted = sum(self._apply(op._filter, op._doc) for op in operations)
+        return SimpleNamespace(upserted_count=upserted, modified_count=len(operations) - upserted)
+
+    async def create_index(self, keys, unique=False):
+        await asyncio.sleep(self.rtt_sec)
+
+    async def drop(self):
+        self.documents.clear()
+
+
+def _use_simulated_database(rtt_sec: float):
+    collections: Dict[str, _SimulatedCollection] = {}
+
+    class _SimulatedDb:
+        def __getitem__(self, name):
+            if name not in collections:
+                collections[name] = _SimulatedCollection(name, rtt_sec)
+            return collections[name]
+
+    async def _get_db(self):
+        return _SimulatedDb()
+
+    MongoDBConnection.get_db = _get_db
+
+
+def _use_real_database(uri: str):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(uri, serverSelectionTimeoutMS=5000)
+
+    async def _get_db(self):
+        return client[BENCH_DB_NAME]
+
+    MongoDBConnection.get_db = _get_db
+
+
+async def per_document(store: MongoDBStoreBase, comments: List[Dict], page_size: int):
+    for item in comments:
+        await store.save_or_update("comments", {"comment_id": item["comment_id"]}, item)
+
+
+async def bulk(store: MongoDBStoreBase, comments: List[Dict], page_size: int):
+    for i in range(0, len(comments), page_size):
+        await store.save_or_update_many("comments", comments[i:i + page_size], key_fields=["comment_id"])
+    await MongoDBStoreBase.flush_all()
+
+
+async def run_case(name: str, store_fn, comments: List[Dict], page_size: int):
+    timings = []
+    for prefix in ("insert", "upsert"):
+        store = MongoDBStoreBase(collection_prefix=f"bench_{store_fn.__name__}")
+        started = time.perf_counter()
+        await store_fn(store, comments, page_size)
+        timings.append((prefix, time.perf_counter() - started))
+    collection = await store.get_collection("comments")
+    await collection.drop()
+    print(f"{name:<32}" + "   ".join(f"{prefix}: {t:7.2f}s ({len(comments) / t:9.0f} docs/s)" for prefix, t in timings))
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--comments", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=20, help="items per save_or_update_many call (one comment page)")
+    parser.add_argument("--batch-size", type=int, default=config.MONGODB_BULK_WRITE_BATCH_SIZE)
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--simulate-rtt-ms", type=float, default=None, help="no server, simulate this round trip per call")
+    args = parser.parse_args()
+
+    if args.simulate_rtt_ms is not None:
+        _use_simulated_database(args.simulate_rtt_ms / 1000)
+    else:
+        _use_real_database(args.uri)
+    config.MONGODB_BULK_WRITE_BATCH_SIZE = args.batch_size
+    MongoBulkWriter._instances = {}
+
+    comments = make_comments(args.comments)
+    print(f"{args.comments} comments, page size {args.page_size}, bulk batch size {args.batch_size}")
+    await run_case("update_one per document", per_document, comments, args.page_size)
+    await run_case("save_or_update_many (bulk)", bulk, comments, args.page_size)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/benchmarks/bench_sql_upsert.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Benchmark: per-row SELECT-then-INSERT/UPDATE (the old store path) vs. bulk_upsert, on SQLite
+
+Usage:
+    python -m benchmarks.bench_sql_upsert --comments 20000 --page-size 20
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from database.bulk_upsert import bulk_upsert
+from database.models import Base, XhsNoteComment
+
+
+def make_comments(count: int, note_count: int = 100) -> List[Dict]:
+    return [
+        {
+            "comment_id": f"c{i}",
+            "note_id": f"n{i % note_count}",
+            "content": f"comment content {i}",
+            "user_id": f"u{i % 997}",
+            "nickname": "nickname",
+            "create_time": 1700000000000 + i,
+            "like_count": str(i % 50),
+            "sub_comment_count": 0,
+            "add_ts": 1,
+            "last_modify_ts": 1,
+        }
+        for i in range(count)
+    ]
+
+
+async def legacy_store(session_factory, comments: List[Dict]):
+    """One session, one SELECT and one INSERT/UPDATE plus a commit per comment"""
+    for item in comments:
+        async with session_factory() as session:
+            result = await session.execute(select(XhsNoteComment).where(XhsNoteComment.comment_id == item["comment_id"]))
+            if result.first() is not None:
+                await session.execute(
+                    update(XhsNoteComment).where(XhsNoteComment.comment_id == item["comment_id"]).values(
+                        like_count=item["like_count"], last_modify_ts=item["last_modify_ts"]
+                    )
+                )
+            else:
+                session.add(XhsNoteComment(**item))
+            await session.commit()
+
+
+async def bulk_store(session_factory, comments: List[Dict], page_size: int):
+    """One statement and one commit per comment page"""
+    for i in range(0, len(comments), page_size):
+        async with session_factory() as session:
+            await bulk_upsert(session, XhsNoteComment, comments[i:i + page_size], key_columns=["comment_id"],
+                              update_columns=["like_count", "last_modify_ts"])
+            await session.commit()
+
+
+async def run_case(name: str, store_fn, comments: List[Dict], *args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp_dir, 'bench.db')}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        timings = []
+        # First pass inserts everything, second pass (re-crawl) updates everything
+        for _ in range(2):
+            start = time.perf_counter()
+            await store_fn(session_factory, comments, *args)
+            timings.append(time.perf_counter() - start)
+        await engine.dispose()
+
+    insert_s, update_s = timings
+    print(f"{name:<28} insert: {insert_s:7.2f}s ({len(comments) / insert_s:9.0f} rows/s)   "
+          f"re-crawl: {update_s:7.2f}s ({len(comments) / update_s:9.0f} rows/s)")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="SQL store upsert benchmark (SQLite)")
+    parser.add_argument("--comments", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=20, help="comments per page (one bulk statement each)")
+    args = parser.parse_args()
+
+    comments = make_comments(args.comments)
+    print(f"{args.comments} comments, page size {args.page_size}")
+    await run_case("per-row select + insert", legacy_store, comments)
+    await run_case(f"bulk_upsert (page={args.page_size})", bulk_store, comments, args.page_size)
+    await run_case("bulk_upsert (batch=100)", bulk_store, comments, 100)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/benchmarks/bench_tieba_transport.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Benchmark: Tieba transport, blocking requests in asyncio.to_thread (the former BaiduTieBaClient.request) vs.
+the pooled async httpx client, against a local stub server serving media_platform/tieba/test_data
+
+Usage:
+    python -m benchmarks.bench_tieba_transport --requests 400 --concurrency 64 --latency-ms 50
+"""
+
+import argparse
+import asyncio
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Awaitable, Callable, Dict
+
+import requests
+
+import config
+from media_platform.tieba.client import BaiduTieBaClient
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "media_platform", "tieba", "test_data")
+
+# Request path -> fixture, the first matching prefix wins
+ROUTES = (
+    ("/f/search/res", "search_keyword_notes.html"),
+    ("/p/comment", "note_sub_comments.html"),
+    ("/p/", "note_detail.html"),
+    ("/f", "tieba_note_list.html"),
+)
+
+URIS = ("/f/search/res?qw=python", "/p/comment?tid=1&pid=2", "/p/9117888152", "/f?kw=python")
+
+
+def start_stub_server(latency_sec: float) -> ThreadingHTTPServer:
+    fixtures: Dict[str, bytes] = {}
+    for _, file_name in ROUTES:
+        with open(os.path.join(TEST_DATA_DIR, file_name), "rb") as f:
+            fixtures[file_name] = f.read()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def do_GET(self):
+            time.sleep(latency_sec)  # server think time + network latency
+            body = next(fixtures[name] for prefix, name in ROUTES if self.path.startswith(prefix))
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def client_thread_count() -> int:
+    # Threads of the stub server run process_request_thread
+    return sum(1 for t in threading.enumerate() if "process_request_thread" not in t.name)
+
+
+async def run_case(name: str, fetch: Callable[[str], Awaitable[str]], total: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    peak_threads = client_thread_count()
+    done = False
+
+    async def sample_threads():
+        nonlocal peak_threads
+        while not done:
+            peak_threads = max(peak_threads, client_thread_count())
+            await asyncio.sleep(0.01)
+
+    async def one(i: int):
+        async with semaphore:
+            text = await fetch(URIS[i % len(URIS)])
+            assert text
+
+    sampler = asyncio.create_task(sample_threads())
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - started
+    done = True
+    await sampler
+    print(f"{name:<36} {elapsed:7.2f}s  {total / elapsed:8.1f} req/s  peak client threads: {peak_threads}")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=64, help="in-flight requests, like MAX_CONCURRENCY_NUM")
+    parser.add_argument("--latency-ms", type=float, default=50, help="stub server delay per response")
+    args = parser.parse_args()
+    # Measure the transport only, not the request pacing
+    config.ENABLE_ADAPTIVE_RATE_LIMIT = False
+
+    server = start_stub_server(args.latency_ms / 1000)
+    host = f"http://127.0.0.1:{server.server_address[1]}"
+    headers = {"User-Agent": "MediaCrawler-benchmark", "Cookie": ""}
+    print(f"{args.requests} requests, concurrency {args.concurrency}, server latency {args.latency_ms:.0f} ms")
+
+    async def legacy_fetch(uri: str) -> str:
+        response = await asyncio.to_thread(requests.request, "GET", f"{host}{uri}", headers=headers, timeout=10)
+        return response.text
+
+    client = BaiduTieBaClient(headers=headers)
+    client._host = host
+
+    async def pooled_fetch(uri: str) -> str:
+        return await client.get(uri, return_ori_content=True)
+
+    try:
+        # The pooled client runs first, the executor threads started by the legacy transport stay alive afterwards
+        await run_case("pooled async httpx (BaiduTieBaClient)", pooled_fetch, args.requests, args.concurrency)
+        await run_case("requests + asyncio.to_thread", legacy_fetch, args.requests, args.concurrency)
+    finally:
+        await client.close_http_client()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -74,6 +74,7 @@ class SaveDataOptionEnum(str, Enum):
     MONGODB = "mongodb"
     EXCEL = "excel"
     POSTGRES = "postgres"
+    PARQUET = "parquet"
 
 
 class InitDbOptionEnum(str, Enum):
@@ -208,11 +209,20 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
                 show_default=True,
             ),
         ] = str(config.HEADLESS),
+        resume: Annotated[
+            str,
+            typer.Option(
+                "--resume",
+                help="Whether to continue the last interrupted crawl of the same platform and type, supports yes/true/t/y/1 or no/false/f/n/0",
+                rich_help_panel="Runtime Configuration",
+                show_default=True,
+            ),
+        ] = str(config.RESUME_CRAWL),
         save_data_option: Annotated[
             SaveDataOptionEnum,
             typer.Option(
                 "--save_data_option",
-                help="Data save option (csv=CSV file | db=MySQL database | json=JSON file | sqlite=SQLite database | mongodb=MongoDB database | excel=Excel file | postgres=PostgreSQL database)",
+                help="Data save option (csv=CSV file | db=MySQL database | json=JSON file | sqlite=SQLite database | mongodb=MongoDB database | excel=Excel file | postgres=PostgreSQL database | parquet=Parquet files)",
                 rich_help_panel="Storage Configuration",
             ),
         ] = _coerce_enum(
@@ -256,6 +266,7 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
         enable_comment = _to_bool(get_comment)
         enable_sub_comment = _to_bool(get_sub_comment)
         enable_headless = _to_bool(headless)
+        enable_resume = _to_bool(resume)
         init_db_value = init_db.value if init_db else None
 
         # Parse specified_id and creator_id into lists
@@ -272,6 +283,7 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
         config.ENABLE_GET_SUB_COMMENTS = enable_sub_comment
         config.HEADLESS = enable_headless
         config.CDP_HEADLESS = enable_headless
+        config.RESUME_CRAWL = enable_resume
         config.SAVE_DATA_OPTION = save_data_option.value
         config.COOKIES = cookies
 
@@ -309,6 +321,7 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
             get_comment=config.ENABLE_GET_COMMENTS,
             get_sub_comment=config.ENABLE_GET_SUB_COMMENTS,
             headless=config.HEADLESS,
+            resume=config.RESUME_CRAWL,
             save_data_option=config.SAVE_DATA_OPTION,
             init_db=init_db_value,
             cookies=config.COOKIES,
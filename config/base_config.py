@@ -34,6 +34,21 @@ IP_PROXY_POOL_COUNT = 2
 # 代理IP提供商名称
 IP_PROXY_PROVIDER_NAME = "kuaidaili"  # kuaidaili | wandouhttp
 
+# 代理IP有效性检测地址，可以换成本地的检测服务
+IP_PROXY_VALIDATE_URL = "https://echo.apifox.cn/"
+
+# 同时检测的代理IP数量
+IP_PROXY_VALIDATE_CONCURRENCY = 5
+
+# 代理IP检测的超时时间（秒）
+IP_PROXY_VALIDATE_TIMEOUT = 10
+
+# 后台预取并保持可用的代理IP数量，低于该数量时在后台补充
+IP_PROXY_PREFETCH_COUNT = 2
+
+# 代理IP在过期前多少秒被移出代理池
+IP_PROXY_EVICT_BUFFER_SECONDS = 60
+
 # 设置为True不会打开浏览器（无头浏览器）
 # 设置False会打开一个浏览器
 # 小红书如果一直扫码登录不通过，打开浏览器手动过一下滑动验证码
@@ -43,6 +58,19 @@ HEADLESS = False
 # 是否保存登录状态
 SAVE_LOGIN_STATE = True
 
+# 多账号会话池：同一个浏览器进程中登录的账号数量，每个账号使用独立的浏览器上下文、cookies 和代理
+# 请求会分配给空闲的账号，1 表示只使用一个账号
+SESSION_POOL_SIZE = 1
+
+# 会话池中第 2..N 个账号的 cookies（按顺序），缺少 cookies 的账号使用扫码登录
+SESSION_POOL_COOKIES = []
+
+# 账号连续请求失败多少次后被隔离
+SESSION_POOL_MAX_FAILURES = 3
+
+# 账号被隔离的时长（秒），遇到IP封禁或验证码时立即隔离
+SESSION_POOL_QUARANTINE_SECONDS = 300
+
 # ==================== CDP (Chrome DevTools Protocol) 配置 ====================
 # 是否启用CDP模式 - 使用用户现有的Chrome/Edge浏览器进行爬取，提供更好的反检测能力
 # 启用后将自动检测并启动用户的Chrome/Edge浏览器，通过CDP协议进行控制
@@ -70,8 +98,75 @@ BROWSER_LAUNCH_TIMEOUT = 60
 # 设置为False可以保持浏览器运行，便于调试
 AUTO_CLOSE_BROWSER = True
 
-# 数据保存类型选项配置,支持六种类型：csv、db、json、sqlite、excel、postgres, 最好保存到DB，有排重的功能。
-SAVE_DATA_OPTION = "csv"  # csv or db or json or sqlite or excel or postgres
+# 数据保存类型选项配置,支持七种类型：csv、db、json、sqlite、excel、postgres、parquet, 最好保存到DB，有排重的功能。
+SAVE_DATA_OPTION = "csv"  # csv or db or json or sqlite or excel or postgres or parquet
+
+# JSON 存储格式，仅在 SAVE_DATA_OPTION = "json" 时生效
+# jsonl: 每条数据追加写入一行 (data/{platform}/json/*.jsonl)，写入开销与已保存的数据量无关（推荐）
+# json: 每条数据都会重新读取并重写整个 JSON 数组文件（旧版行为，数据量大时非常慢）
+JSON_STORE_FORMAT = "jsonl"  # jsonl or json
+
+# 爬取结束后是否将 jsonl 文件合并转换为标准的 JSON 数组文件 (.json)
+ENABLE_JSONL_FINALIZE = False
+
+# 数据文件索引（data/ 下每个文件旁的 .idx 文件）中每隔多少条记录保存一次文件偏移量，WebUI 分页预览只需读取这一段
+DATA_INDEX_STRIDE = 100
+
+# parquet 存储（SAVE_DATA_OPTION = "parquet"，需要安装 pyarrow）：数据先缓存在内存中，缓存条数达到 PARQUET_FLUSH_ROWS
+# 或距上次写入超过 PARQUET_FLUSH_INTERVAL_SEC 秒时写出一个 parquet 文件，目录为 data/{platform}/parquet/{类型}/date=日期/keyword=关键词/
+PARQUET_FLUSH_ROWS = 5000
+PARQUET_FLUSH_INTERVAL_SEC = 60
+# 是否按搜索关键词分区（没有关键词的数据写入 keyword=__none__）
+PARQUET_PARTITION_BY_KEYWORD = True
+
+# WebUI 导出接口（/data/export）转换为 parquet 时每个 row group 的行数，也是导出时内存中最多缓存的记录数
+DATA_EXPORT_BATCH_SIZE = 10000
+
+# 是否开启数据写入管道（write-behind），开启后爬虫只负责把数据放入队列，由后台任务批量写入文件/数据库，无需等待写入完成
+ENABLE_STORE_PIPELINE = True
+
+# 写入管道每批最多写入的数据条数
+STORE_PIPELINE_BATCH_SIZE = 100
+
+# 写入管道凑批的最长等待时间（秒），达到条数或时间任一条件即写入
+STORE_PIPELINE_FLUSH_INTERVAL_SEC = 1.0
+
+# 写入管道队列的最大长度，队列满时爬虫会等待写入（背压），避免内存无限增长
+STORE_PIPELINE_QUEUE_MAX_SIZE = 1000
+
+# 平台 API 客户端的 httpx 连接池：最大连接数（每个平台客户端复用同一个连接池，避免每次请求重新建立 TCP/TLS 连接）
+HTTP_MAX_CONNECTIONS = 100
+
+# httpx 连接池：最多保持的 keep-alive 空闲连接数
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+
+# httpx 连接池：keep-alive 空闲连接的过期时间（秒）
+HTTP_KEEPALIVE_EXPIRY_SEC = 30.0
+
+# 是否启用 HTTP/2（需要安装 h2：pip install "httpx[http2]"，未安装时自动回退到 HTTP/1.1）
+ENABLE_HTTP2 = False
+
+# 媒体（图片/视频）下载的最大并发数，媒体下载在后台进行，不阻塞帖子和评论的爬取
+MEDIA_DOWNLOAD_CONCURRENCY = 4
+
+# 单个媒体文件的最大下载尝试次数，未下载完的文件会保留为 .part 并通过 Range 请求续传
+MEDIA_DOWNLOAD_MAX_RETRIES = 3
+
+# 是否启用媒体去重存储：文件按内容哈希只保存一份（MEDIA_STORE_DIR/blobs），已下载过的 URL 直接跳过，
+# 原有的 data/<平台>/images|videos 目录下的文件以硬链接形式指向该文件
+ENABLE_MEDIA_DEDUP = True
+
+# 媒体去重存储目录（内容文件 blobs/ 与索引 media_index.db）
+MEDIA_STORE_DIR = "data/media"
+
+# 抖音 a_bogus / 知乎 x-zse-96 签名使用的常驻 Node.js 进程数（未安装 node 时回退到 execjs）
+JS_SIGNER_POOL_SIZE = 2
+
+# MongoDB 批量写入：每批最多写入的文档数（unordered bulk_write）
+MONGODB_BULK_WRITE_BATCH_SIZE = 500
+
+# MongoDB 批量写入：凑批的最长等待时间（秒），设置为 0 时每次调用立即写入
+MONGODB_BULK_WRITE_LINGER_SEC = 1.0
 
 # 用户浏览器缓存的浏览器文件配置
 USER_DATA_DIR = "%s_user_data_dir"  # %s will be replaced by platform name
@@ -98,6 +193,15 @@ CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES = 10
 # 老版本项目使用了 db, 则需参考 schema/tables.sql line 287 增加表字段
 ENABLE_GET_SUB_COMMENTS = False
 
+# 同时爬取的二级评论楼层数（单视频/帖子），一级评论翻页不再等待二级评论爬取完成
+SUB_COMMENT_CONCURRENCY = 4
+
+# 爬取二级评论的数量控制(单视频/帖子)
+CRAWLER_MAX_SUB_COMMENTS_COUNT_SINGLENOTES = 500
+
+# 爬取二级评论的数量控制(单条一级评论)
+CRAWLER_MAX_SUB_COMMENTS_COUNT_PER_COMMENT = 100
+
 # 词云相关
 # 是否开启生成评论词云图
 ENABLE_GET_WORDCLOUD = False
@@ -108,6 +212,11 @@ CUSTOM_WORDS = {
     "高频词": "专业术语",  # 示例自定义词
 }
 
+# 评论词频在保存评论时增量统计：每累计多少条评论提交一次分词任务
+WORDCLOUD_BATCH_SIZE = 200
+# 分词进程数（每个进程只加载一次 jieba 词典），0 表示在线程中分词
+WORDCLOUD_WORKERS = 2
+
 # 停用(禁用)词文件路径
 STOP_WORDS_FILE = "./docs/hit_stopwords.txt"
 
@@ -117,6 +226,55 @@ FONT_PATH = "./docs/STZHONGS.TTF"
 # 爬取间隔时间
 CRAWLER_MAX_SLEEP_SEC = 2
 
+# 是否启用自适应限速：按平台和接口类型（搜索/评论/其他）共享令牌桶，请求成功时逐步提速，
+# 遇到验证码(461/471)、IP 封禁或 HTTP 429 时降速并暂停，启用后不再使用 CRAWLER_MAX_SLEEP_SEC 固定等待
+ENABLE_ADAPTIVE_RATE_LIMIT = True
+
+# 自适应限速：初始 / 最小 / 最大请求速率（次/秒）
+RATE_LIMIT_INITIAL_RPS = 0.5
+RATE_LIMIT_MIN_RPS = 0.1
+RATE_LIMIT_MAX_RPS = 5.0
+
+# 自适应限速：每次成功请求增加的速率（次/秒），被限流时速率与并发数乘以的系数
+RATE_LIMIT_INCREASE_RPS = 0.02
+RATE_LIMIT_DECREASE_FACTOR = 0.5
+
+# 自适应限速：被限流后暂停请求的时间（秒）
+RATE_LIMIT_PENALTY_SEC = 30
+
+# 自适应限速状态文件，运行结束时保存每个平台/接口的速率，下次运行从该速率开始（设为空字符串不保存）
+RATE_LIMIT_STATE_FILE = "data/rate_limiter_state.json"
+
+# 是否记录爬取进度（关键词页码、笔记评论游标、创作者游标、未完成的笔记），用于中断后通过 --resume 继续爬取
+ENABLE_CRAWL_CHECKPOINT = True
+
+# 爬取进度数据库路径
+CRAWL_CHECKPOINT_DB = "data/crawl_checkpoint.db"
+
+# 是否从上次中断的位置继续爬取（命令行 --resume），不继续时会先清空当前平台和爬取类型的进度
+RESUME_CRAWL = False
+
+# 增量爬取：记录已爬取内容的评论数、更新时间等指纹，再次搜索到未变化的内容时跳过详情和评论请求
+# 适合定时重复爬取相同关键词的任务
+ENABLE_INCREMENTAL_CRAWL = False
+
+# 已爬取内容索引的数据库路径
+SEEN_INDEX_DB = "data/seen_index.db"
+
+# 内存布隆过滤器的容量和误判率，新内容不查询数据库即可判断
+SEEN_INDEX_BLOOM_CAPACITY = 1000000
+SEEN_INDEX_BLOOM_ERROR_RATE = 0.001
+
+# 同时爬取的关键词数量，同一浏览器会话内的关键词共享客户端、签名器和限速器，设为 1 则按顺序逐个爬取
+KEYWORD_CONCURRENCY_NUM = 3
+
+# 关键词搜索流水线：搜索翻页、详情获取、评论爬取、媒体下载分阶段并行执行，每个阶段一个有界队列
+# 队列满时上游阶段等待（背压），详情和评论阶段的并发数为 MAX_CONCURRENCY_NUM
+CRAWL_PIPELINE_QUEUE_SIZE = 50
+
+# 媒体阶段的并发数（只负责解析媒体地址并提交给 MediaDownloader）
+CRAWL_PIPELINE_MEDIA_WORKERS = 2
+
 from .bilibili_config import *
 from .xhs_config import *
 from .dy_config import *
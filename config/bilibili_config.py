@@ -18,6 +18,9 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 # bilili 平台配置
 
+# WBI 签名密钥（img_key / sub_key）缓存时间（秒），过期后在后台刷新，签名被拒绝时立即刷新
+BILI_WBI_KEY_TTL_SEC = 3600
+
 # 每天爬取视频/帖子的数量控制
 MAX_NOTES_PER_DAY = 1
 
@@ -35,3 +35,6 @@ XHS_CREATOR_ID_LIST = [
     "https://www.xiaohongshu.com/user/profile/5f58bd990000000001003753?xsec_token=ABYVg1evluJZZzpMX-VWzchxQ1qSNVW3r-jOEnKqMcgZw=&xsec_source=pc_search"
     # ........................
 ]
+
+# 签名批处理：并发请求排队时，一次 page.evaluate 最多签名的请求数
+XHS_SIGN_MAX_BATCH_SIZE = 16
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/database/bulk_upsert.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Dialect-aware bulk upsert for the SQL stores (MySQL / PostgreSQL / SQLite)
+A batch of rows is written with one INSERT ... ON DUPLICATE KEY UPDATE / ON CONFLICT DO UPDATE statement
+instead of one SELECT plus one INSERT/UPDATE per row
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Table, bindparam, inspect, select, tuple_, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from tools import utils
+
+# Columns that are only written when a row is inserted, never overwritten by an update
+INSERT_ONLY_COLUMNS = ("id", "add_ts")
+
+# Keep every statement below the bind parameter limit of SQLite / asyncpg
+_MAX_BIND_PARAMS = 30000
+
+
+# (database url, table name, key columns) -> whether the database has a unique key on those columns
+_unique_key_cache: Dict[Tuple[str, str, Tuple[str, ...]], bool] = {}
+
+
+def has_unique_key(inspector, table_name: str, key_columns: Sequence[str]) -> bool:
+    """
+    Whether the database has a primary key, unique constraint or unique index on exactly the given columns
+    ON CONFLICT / ON DUPLICATE KEY only deduplicate on such a key
+    """
+    key_set = set(key_columns)
+    if set(inspector.get_pk_constraint(table_name).get("constrained_columns") or []) == key_set:
+        return True
+    for constraint in inspector.get_unique_constraints(table_name):
+        if set(constraint["column_names"]) == key_set:
+            return True
+    for index in inspector.get_indexes(table_name):
+        if index.get("unique") and set(index["column_names"]) == key_set:
+            return True
+    return False
+
+
+def clear_unique_key_cache():
+    """Forget cached schema lookups, e.g. after the unique keys were added by a migration"""
+    _unique_key_cache.clear()
+
+
+async def _table_has_unique_key(session: AsyncSession, table: Table, key_columns: Sequence[str]) -> bool:
+    cache_key = (str(session.bind.url), table.name, tuple(key_columns))
+    if cache_key not in _unique_key_cache:
+        def _inspect(sync_session) -> bool:
+            return has_unique_key(inspect(sync_session.connection()), table.name, key_columns)
+
+        _unique_key_cache[cache_key] = await session.run_sync(_inspect)
+        if not _unique_key_cache[cache_key]:
+            utils.logger.warning(
+                f"[bulk_upsert] Table {table.name} has no unique key on {list(key_columns)}, "
+                f"falling back to lookup + insert/update. Run `main.py --init_db <db>` to add the unique keys."
+            )
+    return _unique_key_cache[cache_key]
+
+
+def _row_key(row: Dict, key_columns: Sequence[str]) -> Tuple:
+    # Compare keys as strings, stores sometimes pass ints for String columns and vice versa
+    return tuple(str(row.get(k)) for k in key_columns)
+
+
+def _prepare_rows(table: Table, rows: Iterable[Dict], key_columns: Sequence[str]) -> List[Dict]:
+    """Drop unknown keys and rows without a key, keep only the last row per key"""
+    column_names = set(table.c.keys())
+    deduped: Dict[Tuple, Dict] = {}
+    for row in rows:
+        clean = {k: v for k, v in row.items() if k in column_names}
+        if any(clean.get(k) is None for k in key_columns):
+            continue
+        key = _row_key(clean, key_columns)
+        deduped.pop(key, None)
+        deduped[key] = clean
+    return list(deduped.values())
+
+
+def _group_by_columns(rows: List[Dict]) -> List[List[Dict]]:
+    """Multi-row statements need the same columns in every row"""
+    groups: Dict[Tuple[str, ...], List[Dict]] = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row.keys())), []).append(row)
+    return list(groups.values())
+
+
+def _chunks(rows: List[Dict], column_count: int) -> Iterable[List[Dict]]:
+    size = max(1, _MAX_BIND_PARAMS // max(1, column_count))
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def _resolve_update_columns(row: Dict, key_columns: Sequence[str], update_columns: Optional[Sequence[str]]) -> List[str]:
+    if update_columns is None:
+        candidates = row.keys()
+    else:
+        candidates = update_columns
+    return [c for c in candidates if c in row and c not in key_columns and c not in INSERT_ONLY_COLUMNS]
+
+
+async def bulk_upsert(
+    session: AsyncSession,
+    model,
+    rows: Iterable[Dict],
+    key_columns: Sequence[str],
+    update_columns: Optional[Sequence[str]] = None,
+) -> int:
+    """
+    Insert rows, or update the existing rows with the same natural key
+
+    Args:
+        session: Async session, committed by the caller (get_session commits on exit)
+        model: ORM model class, e.g. XhsNoteComment
+        rows: Row dicts keyed by column name, unknown keys are ignored
+        key_columns: Natural key of the table, e.g. ["comment_id"]
+        update_columns: Columns overwritten when the row already exists, default all given columns
+                        except the key and INSERT_ONLY_COLUMNS
+
+    Returns:
+        number of rows written
+    """
+    table: Table = model.__table__
+    prepared = _prepare_rows(table, rows, key_columns)
+    if not prepared:
+        return 0
+
+    dialect = session.bind.dialect.name
+    if dialect not in ("mysql", "postgresql", "sqlite") or not await _table_has_unique_key(session, table, key_columns):
+        await _upsert_by_lookup(session, table, prepared, key_columns, update_columns)
+        return len(prepared)
+
+    for group in _group_by_columns(prepared):
+        set_columns = _resolve_update_columns(group[0], key_columns, update_columns)
+        if dialect == "mysql":
+            stmt = mysql.insert(table)
+            if set_columns:
+                stmt = stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in set_columns})
+            else:
+                stmt = stmt.prefix_with("IGNORE")
+        else:
+            dialect_module = postgresql if dialect == "postgresql" else sqlite
+            stmt = dialect_module.insert(table)
+            if set_columns:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=list(key_columns),
+                    set_={c: stmt.excluded[c] for c in set_columns},
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=list(key_columns))
+        # executemany keeps the compiled statement cacheable, SQLAlchemy batches it into multi-row VALUES
+        for chunk in _chunks(group, len(group[0])):
+            await session.execute(stmt, chunk)
+    return len(prepared)
+
+
+async def bulk_update(
+    session: AsyncSession,
+    model,
+    rows: Iterable[Dict],
+    key_columns: Sequence[str],
+    update_columns: Optional[Sequence[str]] = None,
+) -> int:
+    """
+    Update existing rows matched by their natural key with one executemany, rows that do not exist are ignored
+
+    Returns:
+        number of rows submitted
+    """
+    table: Table = model.__table__
+    prepared = _prepare_rows(table, rows, key_columns)
+    for group in _group_by_columns(prepared):
+        await _execute_update(session, table, group, key_columns, update_columns)
+    return len(prepared)
+
+
+async def _execute_update(session: AsyncSession, table: Table, rows: List[Dict], key_columns: Sequence[str],
+                          update_columns: Optional[Sequence[str]]):
+    set_columns = _resolve_update_columns(rows[0], key_columns, update_columns)
+    if not set_columns or not rows:
+        return
+    # bindparam names must differ from the column names used in SET/WHERE
+    stmt = update(table).values({c: bindparam(f"b_{c}") for c in set_columns})
+    for k in key_columns:
+        stmt = stmt.where(table.c[k] == bindparam(f"k_{k}"))
+    params = [
+        {**{f"b_{c}": row[c] for c in set_columns}, **{f"k_{k}": row[k] for k in key_columns}}
+        for row in rows
+    ]
+    await session.execute(stmt, params)
+
+
+async def _upsert_by_lookup(session: AsyncSession, table: Table, rows: List[Dict], key_columns: Sequence[str],
+                            update_columns: Optional[Sequence[str]]):
+    """
+    Fallback when the table has no unique key on key_columns (databases created before the unique keys existed):
+    one SELECT for all keys of the batch, then one executemany INSERT and one executemany UPDATE
+    """
+    existing = set()
+    for chunk in _chunks(rows, len(key_columns)):
+        if len(key_columns) == 1:
+            column = table.c[key_columns[0]]
+            stmt = select(column).where(column.in_([row[key_columns[0]] for row in chunk]))
+        else:
+            columns = [table.c[k] for k in key_columns]
+            stmt = select(*columns).where(tuple_(*columns).in_([tuple(row[k] for k in key_columns) for row in chunk]))
+        result = await session.execute(stmt)
+        existing.update(tuple(str(v) for v in r) for r in result.all())
+
+    new_rows = [row for row in rows if _row_key(row, key_columns) not in existing]
+    old_rows = [row for row in rows if _row_key(row, key_columns) in existing]
+
+    for group in _group_by_columns(new_rows):
+        for chunk in _chunks(group, len(group[0])):
+            await session.execute(table.insert(), chunk)
+    for group in _group_by_columns(old_rows):
+        await _execute_update(session, table, group, key_columns, update_columns)
@@ -18,8 +18,11 @@
 
 """MongoDB storage base class: Provides connection management and common storage methods"""
 import asyncio
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence, Set, Tuple
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase, AsyncIOMotorCollection
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+import config
 from config import db_config
 from tools import utils
 
@@ -85,8 +88,92 @@ class MongoDBConnection:
             utils.logger.info("[MongoDBConnection] Connection closed")
 
 
+class MongoBulkWriter:
+    """Buffered upserts of one collection, written as unordered bulk_write batches (one instance per collection)"""
+    _instances: Dict[str, "MongoBulkWriter"] = {}
+
+    def __init__(self, collection: AsyncIOMotorCollection):
+        self.collection = collection
+        self.batch_size = max(1, config.MONGODB_BULK_WRITE_BATCH_SIZE)
+        self.linger_sec = config.MONGODB_BULK_WRITE_LINGER_SEC
+        # query key -> (query, $set data), several updates of one document are merged into one operation,
+        # two upserts of the same new document in one unordered batch would race on the unique index
+        self._pending: Dict[Tuple, Tuple[Dict, Dict]] = {}
+        self._lock = asyncio.Lock()
+        self._linger_task: Optional[asyncio.Task] = None
+        self.written_count = 0
+
+    @classmethod
+    def get_instance(cls, collection: AsyncIOMotorCollection) -> "MongoBulkWriter":
+        writer = cls._instances.get(collection.name)
+        if writer is None:
+            writer = cls._instances[collection.name] = cls(collection)
+        # Always write through the collection of the current connection (it is recreated after a reconnect)
+        writer.collection = collection
+        return writer
+
+    @classmethod
+    async def flush_all(cls):
+        """Write every buffered operation, should be called at the end of crawler execution"""
+        for writer in list(cls._instances.values()):
+            await writer.flush()
+            if writer._linger_task is not None and not writer._linger_task.done():
+                writer._linger_task.cancel()
+            writer._linger_task = None
+
+    async def add(self, items: Sequence[Tuple[Dict, Dict]]):
+        """
+        Buffer (query, data) upserts, flushed once batch_size operations are pending or after linger_sec
+        Args:
+            items: list of (query, data) pairs, data is written with $set
+        """
+        async with self._lock:
+            for query, data in items:
+                key = tuple(query.items())
+                pending = self._pending.pop(key, None)
+                self._pending[key] = (query, {**pending[1], **data} if pending else data)
+            full = len(self._pending) >= self.batch_size or self.linger_sec <= 0
+        if full:
+            await self.flush()
+        elif self._linger_task is None or self._linger_task.done():
+            self._linger_task = asyncio.create_task(self._flush_after_linger())
+
+    async def _flush_after_linger(self):
+        await asyncio.sleep(self.linger_sec)
+        await self.flush()
+
+    async def flush(self):
+        # The lock is held while writing so that batches of the same collection never overtake each other
+        async with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+            for i in range(0, len(pending), self.batch_size):
+                await self._write([UpdateOne(query, {"$set": data}, upsert=True) for query, data in pending[i:i + self.batch_size]])
+
+    async def _write(self, operations: List[UpdateOne]):
+        try:
+            result = await self.collection.bulk_write(operations, ordered=False)
+            self.written_count += len(operations)
+            utils.logger.info(
+                f"[MongoBulkWriter.flush] {self.collection.name}: {len(operations)} operations, "
+                f"upserted {result.upserted_count}, modified {result.modified_count}"
+            )
+        except BulkWriteError as e:
+            # Unordered: every operation except the failed ones has been applied
+            write_errors = e.details.get("writeErrors", [])
+            self.written_count += len(operations) - len(write_errors)
+            utils.logger.error(
+                f"[MongoBulkWriter.flush] {self.collection.name}: {len(write_errors)} of {len(operations)} operations failed, "
+                f"first error: {write_errors[0].get('errmsg') if write_errors else e}"
+            )
+        except Exception as e:
+            utils.logger.error(f"[MongoBulkWriter.flush] {self.collection.name}: bulk write of {len(operations)} operations failed: {e}")
+
+
 class MongoDBStoreBase:
     """MongoDB storage base class: Provides common CRUD operations"""
+    # (collection name, key fields) whose unique index has been ensured in this process
+    _unique_indexes: Set[Tuple[str, Tuple[str, ...]]] = set()
 
     def __init__(self, collection_prefix: str):
         """Initialize storage base class
@@ -112,6 +199,48 @@ class MongoDBStoreBase:
             utils.logger.error(f"[MongoDBStoreBase] Save failed ({self.collection_prefix}_{collection_suffix}): {e}")
             return False
 
+    async def save_or_update_many(self, collection_suffix: str, items: List[Dict], key_fields: Sequence[str]) -> int:
+        """Save or update many items (buffered upserts written with unordered bulk_write)
+        Args:
+            collection_suffix: Collection suffix (contents/comments/creators ...)
+            items: Documents to store, items missing a key field are skipped
+            key_fields: Natural key of the documents, e.g. ["note_id"], a unique index is created on first use
+
+        Returns:
+            number of buffered items
+        """
+        try:
+            collection = await self.get_collection(collection_suffix)
+            await self._ensure_unique_index(collection, key_fields)
+            operations = []
+            for item in items:
+                query = {field: item.get(field) for field in key_fields}
+                if any(not value for value in query.values()):
+                    continue
+                operations.append((query, item))
+            if operations:
+                await MongoBulkWriter.get_instance(collection).add(operations)
+            return len(operations)
+        except Exception as e:
+            utils.logger.error(f"[MongoDBStoreBase] Save many failed ({self.collection_prefix}_{collection_suffix}): {e}")
+            return 0
+
+    async def _ensure_unique_index(self, collection: AsyncIOMotorCollection, key_fields: Sequence[str]):
+        index_key = (collection.name, tuple(key_fields))
+        if index_key in self._unique_indexes:
+            return
+        self._unique_indexes.add(index_key)
+        try:
+            await collection.create_index([(field, 1) for field in key_fields], unique=True)
+        except Exception as e:
+            # e.g. duplicates written by older versions, upserts keep working without the index
+            utils.logger.warning(f"[MongoDBStoreBase] Create unique index {list(key_fields)} on {collection.name} failed: {e}")
+
+    @staticmethod
+    async def flush_all():
+        """Write all buffered bulk operations"""
+        await MongoBulkWriter.flush_all()
+
     async def find_one(self, collection_suffix: str, query: Dict) -> Optional[Dict]:
         """Query a single record"""
         try:
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/database/schema_migration.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Bring the indexes of an existing database up to date with database/models.py
+Base.metadata.create_all only creates missing tables, so databases created before the natural keys became unique
+keep their plain indexes. This upgrades them in place: duplicate rows are removed (the newest row per key is kept),
+the old non-unique index is dropped and the unique / composite indexes are created.
+Runs as part of `main.py --init_db <db>`.
+"""
+
+from typing import Dict, List
+
+from sqlalchemy import Table, inspect, text
+from sqlalchemy.engine import Connection
+
+from database.bulk_upsert import clear_unique_key_cache
+from database.models import Base
+from tools import utils
+
+
+def _drop_index(conn: Connection, table: Table, index_name: str):
+    preparer = conn.dialect.identifier_preparer
+    if conn.dialect.name == "mysql":
+        conn.execute(text(f"DROP INDEX {preparer.quote(index_name)} ON {preparer.quote(table.name)}"))
+    else:
+        conn.execute(text(f"DROP INDEX {preparer.quote(index_name)}"))
+
+
+def _delete_duplicates(conn: Connection, table: Table, key_columns: List[str]) -> int:
+    """
+    Delete every row whose key also appears on a newer row (higher id), so a unique index can be created
+    Rows with a NULL key are left alone, unique indexes accept several NULLs
+    """
+    preparer = conn.dialect.identifier_preparer
+    table_name = preparer.quote(table.name)
+    keys = ", ".join(preparer.quote(column) for column in key_columns)
+    not_null = " AND ".join(f"{preparer.quote(column)} IS NOT NULL" for column in key_columns)
+    # The extra derived table is required by MySQL, which cannot select from the table it deletes from
+    result = conn.execute(text(
+        f"DELETE FROM {table_name} WHERE {not_null} AND id NOT IN ("
+        f"SELECT keep_id FROM (SELECT MAX(id) AS keep_id FROM {table_name} GROUP BY {keys}) AS keep_rows)"
+    ))
+    return result.rowcount or 0
+
+
+def _migrate_table(conn: Connection, table: Table) -> List[str]:
+    inspector = inspect(conn)
+    db_indexes: Dict[str, Dict] = {index["name"]: index for index in inspector.get_indexes(table.name)}
+    changes = []
+    for index in sorted(table.indexes, key=lambda ix: ix.name):
+        key_columns = [column.name for column in index.columns]
+        existing = db_indexes.get(index.name)
+        if existing is not None and bool(existing.get("unique")) == bool(index.unique):
+            continue
+        if index.unique:
+            deleted = _delete_duplicates(conn, table, key_columns)
+            if deleted:
+                changes.append(f"deleted {deleted} duplicate rows on {key_columns}")
+        if existing is not None:
+            _drop_index(conn, table, index.name)
+        index.create(conn)
+        changes.append(f"created {'unique ' if index.unique else ''}index {index.name}")
+    return changes
+
+
+def migrate_indexes(conn: Connection) -> Dict[str, List[str]]:
+    """
+    Create the missing unique / composite indexes of every existing table, to be used with AsyncConnection.run_sync
+    Args:
+        conn: sync connection inside a transaction
+
+    Returns:
+        table name -> list of applied changes
+
+    """
+    existing_tables = set(inspect(conn).get_table_names())
+    applied: Dict[str, List[str]] = {}
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        changes = _migrate_table(conn, table)
+        if changes:
+            applied[table.name] = changes
+            utils.logger.info(f"[schema_migration.migrate_indexes] {table.name}: {'; '.join(changes)}")
+    clear_unique_key_cache()
+    return applied
@@ -43,7 +43,15 @@ from media_platform.tieba import TieBaCrawler
 from media_platform.weibo import WeiboCrawler
 from media_platform.xhs import XiaoHongShuCrawler
 from media_platform.zhihu import ZhihuCrawler
+from store.write_pipeline import StoreWritePipeline
 from tools.async_file_writer import AsyncFileWriter
+from tools.crawl_checkpoint import CrawlCheckpoint
+from tools.js_signer import JsSignerPool
+from tools.media_downloader import MediaDownloader
+from tools.rate_limiter import RateLimiterRegistry
+from tools.seen_index import SeenIndex
+from tools.session_pool import SessionPool
+from tools.words import WordFrequencyCounter
 from var import crawler_type_var
 
 
@@ -70,6 +78,38 @@ class CrawlerFactory:
 crawler: Optional[AbstractCrawler] = None
 
 
+async def _flush_store_pipelines() -> None:
+    try:
+        await StoreWritePipeline.flush_all()
+    except Exception as e:
+        print(f"[Main] Error flushing store pipelines: {e}")
+
+
+def _prepare_crawl_checkpoint() -> None:
+    # Without --resume the crawl starts from the beginning, the progress of the last run is discarded
+    if not config.RESUME_CRAWL:
+        CrawlCheckpoint.get_instance().reset()
+
+
+async def _wait_media_downloads() -> None:
+    try:
+        await MediaDownloader.wait_all()
+    except Exception as e:
+        print(f"[Main] Error waiting for media downloads: {e}")
+
+
+async def _flush_mongodb_if_needed() -> None:
+    if config.SAVE_DATA_OPTION != "mongodb":
+        return
+
+    try:
+        from database.mongodb_store_base import MongoDBStoreBase
+
+        await MongoDBStoreBase.flush_all()
+    except Exception as e:
+        print(f"[Main] Error flushing MongoDB bulk writes: {e}")
+
+
 def _flush_excel_if_needed() -> None:
     if config.SAVE_DATA_OPTION != "excel":
         return
@@ -83,6 +123,28 @@ def _flush_excel_if_needed() -> None:
         print(f"[Main] Error flushing Excel data: {e}")
 
 
+def _flush_parquet_if_needed() -> None:
+    if config.SAVE_DATA_OPTION != "parquet":
+        return
+
+    try:
+        from store.parquet_store_base import ParquetStoreBase
+
+        ParquetStoreBase.flush_all()
+    except Exception as e:
+        print(f"[Main] Error flushing Parquet data: {e}")
+
+
+async def _close_json_writers_if_needed() -> None:
+    if config.SAVE_DATA_OPTION != "json":
+        return
+
+    try:
+        await AsyncFileWriter.close_all(finalize=config.ENABLE_JSONL_FINALIZE)
+    except Exception as e:
+        print(f"[Main] Error closing JSON files: {e}")
+
+
 async def _generate_wordcloud_if_needed() -> None:
     if config.SAVE_DATA_OPTION != "json" or not config.ENABLE_GET_WORDCLOUD:
         return
@@ -107,18 +169,55 @@ async def main() -> None:
         return
 
     crawler = CrawlerFactory.create_crawler(platform=config.PLATFORM)
+    _prepare_crawl_checkpoint()
     await crawler.start()
 
+    # Images and videos are downloaded in the background while crawling
+    await _wait_media_downloads()
+
+    await _flush_store_pipelines()
+
+    await _flush_mongodb_if_needed()
+
     _flush_excel_if_needed()
 
+    _flush_parquet_if_needed()
+
     # Generate wordcloud after crawling is complete
     # Only for JSON save mode
     await _generate_wordcloud_if_needed()
 
+    await _close_json_writers_if_needed()
+
+
+async def _close_api_clients(crawler_instance) -> None:
+    # Platform API clients keep a pooled httpx client (see ProxyRefreshMixin.get_http_client)
+    from proxy.proxy_mixin import ProxyRefreshMixin
+
+    for value in list(vars(crawler_instance).values()):
+        if isinstance(value, ProxyRefreshMixin):
+            try:
+                await value.close_http_client()
+            except Exception as e:
+                print(f"[Main] Error closing API client: {e}")
+
 
 async def async_cleanup() -> None:
     global crawler
+    # Unfinished downloads keep their .part file and are resumed by the next run
+    await MediaDownloader.close()
+
+    try:
+        await SessionPool.close_all()
+    except Exception as e:
+        print(f"[Main] Error closing session pools: {e}")
+
     if crawler:
+        await _close_api_clients(crawler)
+
+        if getattr(crawler, "ip_proxy_pool", None):
+            await crawler.ip_proxy_pool.close()
+
         if getattr(crawler, "cdp_manager", None):
             try:
                 await crawler.cdp_manager.cleanup(force=True)
@@ -135,9 +234,34 @@ async def async_cleanup() -> None:
                 if "closed" not in error_msg and "disconnected" not in error_msg:
                     print(f"[Main] Error closing browser context: {e}")
 
+    await _flush_store_pipelines()
+
+    await _flush_mongodb_if_needed()
+
+    # Rows still buffered when the crawl was interrupted
+    _flush_parquet_if_needed()
+
+    await _close_json_writers_if_needed()
+
     if config.SAVE_DATA_OPTION in ("db", "sqlite"):
         await db.close()
 
+    await JsSignerPool.close_all()
+
+    try:
+        await WordFrequencyCounter.close_all()
+    except Exception as e:
+        print(f"[Main] Error closing word counter workers: {e}")
+
+    CrawlCheckpoint.close_all()
+
+    SeenIndex.close_all()
+
+    try:
+        RateLimiterRegistry.save_state()
+    except Exception as e:
+        print(f"[Main] Error saving rate limiter state: {e}")
+
 if __name__ == "__main__":
     from tools.app_runner import run
 
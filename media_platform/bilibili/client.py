@@ -22,9 +22,10 @@
 # @Time    : 2023/12/2 18:44
 # @Desc    : bilibili request client
 import asyncio
+import functools
 import json
 import random
-from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlencode
 
 import httpx
@@ -34,13 +35,19 @@ import config
 from base.base_crawler import AbstractApiClient
 from proxy.proxy_mixin import ProxyRefreshMixin
 from tools import utils
+from tools.media_downloader import download_to_file
+from tools.rate_limiter import RateLimiterRegistry, crawl_sleep
+from tools.sub_comment_fanout import SubCommentBudget, SubCommentFanout
 
 if TYPE_CHECKING:
     from proxy.proxy_ip_pool import ProxyIpPool
 
-from .exception import DataFetchError
+from .exception import DataFetchError, WbiSignError
 from .field import CommentOrderType, SearchOrderType
-from .help import BilibiliSign
+from .help import WbiKeyManager
+
+# -352: risk control check failed, -403: access denied, both are returned for outdated wbi keys
+WBI_SIGN_ERROR_CODES = (-352, -403)
 
 
 class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
@@ -61,6 +68,7 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
         self._host = "https://api.bilibili.com"
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
+        self.wbi_key_manager = WbiKeyManager(self.get_wbi_keys, ttl_sec=config.BILI_WBI_KEY_TTL_SEC)
         # Initialize proxy pool (from ProxyRefreshMixin)
         self.init_proxy_pool(proxy_ip_pool)
 
@@ -68,13 +76,20 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
         # Check if proxy has expired before each request
         await self._refresh_proxy_if_expired()
 
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
+        client = self.get_http_client()
+        async with RateLimiterRegistry.slot("bilibili", url) as limiter:
             response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        limiter.observe_status(response.status_code)
         try:
             data: Dict = response.json()
         except json.JSONDecodeError:
             utils.logger.error(f"[BilibiliClient.request] Failed to decode JSON from response. status_code: {response.status_code}, response_text: {response.text}")
             raise DataFetchError(f"Failed to decode JSON, content: {response.text}")
+        if data.get("code") == -412:
+            # Request blocked by risk control
+            limiter.record_throttle("code -412")
+        if data.get("code") in WBI_SIGN_ERROR_CODES:
+            raise WbiSignError(data.get("message", "wbi sign error"))
         if data.get("code") != 0:
             raise DataFetchError(data.get("message", "unkonw error"))
         else:
@@ -90,21 +105,27 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
         """
         if not req_data:
             return {}
-        img_key, sub_key = await self.get_wbi_keys()
-        return BilibiliSign(img_key, sub_key).sign(req_data)
+        signer = await self.wbi_key_manager.get_signer()
+        return signer.sign(dict(req_data))
 
-    async def get_wbi_keys(self) -> Tuple[str, str]:
+    async def get_wbi_keys(self, force_http: bool = False) -> Tuple[str, str]:
         """
-        Get the latest img_key and sub_key
+        Get the latest img_key and sub_key, called by the WbiKeyManager when its keys expire
+        :param force_http: skip localStorage and ask the nav api (localStorage may hold the rejected keys)
         :return:
         """
-        local_storage = await self.playwright_page.evaluate("() => window.localStorage")
-        wbi_img_urls = local_storage.get("wbi_img_urls", "")
-        if not wbi_img_urls:
-            img_url_from_storage = local_storage.get("wbi_img_url")
-            sub_url_from_storage = local_storage.get("wbi_sub_url")
-            if img_url_from_storage and sub_url_from_storage:
-                wbi_img_urls = f"{img_url_from_storage}-{sub_url_from_storage}"
+        wbi_img_urls = ""
+        if not force_http:
+            local_storage = await self.playwright_page.evaluate(
+                "() => ({wbi_img_urls: localStorage.getItem('wbi_img_urls'), "
+                "wbi_img_url: localStorage.getItem('wbi_img_url'), wbi_sub_url: localStorage.getItem('wbi_sub_url')})"
+            )
+            wbi_img_urls = local_storage.get("wbi_img_urls") or ""
+            if not wbi_img_urls:
+                img_url_from_storage = local_storage.get("wbi_img_url")
+                sub_url_from_storage = local_storage.get("wbi_sub_url")
+                if img_url_from_storage and sub_url_from_storage:
+                    wbi_img_urls = f"{img_url_from_storage}-{sub_url_from_storage}"
         if wbi_img_urls and "-" in wbi_img_urls:
             img_url, sub_url = wbi_img_urls.split("-")
         else:
@@ -116,18 +137,34 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
         return img_key, sub_key
 
     async def get(self, uri: str, params=None, enable_params_sign: bool = True) -> Dict:
-        final_uri = uri
-        if enable_params_sign:
-            params = await self.pre_request_data(params)
-        if isinstance(params, dict):
-            final_uri = (f"{uri}?"
-                         f"{urlencode(params)}")
-        return await self.request(method="GET", url=f"{self._host}{final_uri}", headers=self.headers)
+        async def send() -> Dict:
+            final_uri = uri
+            final_params = await self.pre_request_data(params) if enable_params_sign else params
+            if isinstance(final_params, dict):
+                final_uri = (f"{uri}?"
+                             f"{urlencode(final_params)}")
+            return await self.request(method="GET", url=f"{self._host}{final_uri}", headers=self.headers)
+
+        if not enable_params_sign or not params:
+            return await send()
+        return await self._send_signed(uri, send)
 
     async def post(self, uri: str, data: dict) -> Dict:
-        data = await self.pre_request_data(data)
-        json_str = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
-        return await self.request(method="POST", url=f"{self._host}{uri}", data=json_str, headers=self.headers)
+        async def send() -> Dict:
+            json_str = json.dumps(await self.pre_request_data(data), separators=(',', ':'), ensure_ascii=False)
+            return await self.request(method="POST", url=f"{self._host}{uri}", data=json_str, headers=self.headers)
+
+        return await self._send_signed(uri, send)
+
+    async def _send_signed(self, uri: str, send: Callable[[], Awaitable[Dict]]) -> Dict:
+        """Send a signed request, when the signature is rejected refresh the wbi keys from the nav api and send it once more"""
+        try:
+            return await send()
+        except WbiSignError:
+            utils.logger.warning(f"[BilibiliClient._send_signed] Wbi signature rejected for {uri}, refreshing wbi keys")
+            self.wbi_key_manager.invalidate()
+            await self.wbi_key_manager.refresh(force_http=True)
+            return await send()
 
     async def pong(self) -> bool:
         """get a note to check if login state is ok"""
@@ -148,6 +185,8 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        # Fresh login state, fetch the wbi keys of the new session on the next signed request
+        self.wbi_key_manager.invalidate()
 
     async def search_video_by_keyword(
         self,
@@ -222,19 +261,31 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
 
     async def get_video_media(self, url: str) -> Union[bytes, None]:
         # Follow CDN 302 redirects and treat any 2xx as success (some endpoints return 206)
-        async with httpx.AsyncClient(proxy=self.proxy, follow_redirects=True) as client:
-            try:
-                response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
-                response.raise_for_status()
-                if 200 <= response.status_code < 300:
-                    return response.content
-                utils.logger.error(
-                    f"[BilibiliClient.get_video_media] Unexpected status {response.status_code} for {url}"
-                )
-                return None
-            except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
-                utils.logger.error(f"[BilibiliClient.get_video_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")  # Keep original exception type name for developer debugging
-                return None
+        client = self.get_http_client()
+        try:
+            response = await client.request("GET", url, timeout=self.timeout, headers=self.headers, follow_redirects=True)
+            response.raise_for_status()
+            if 200 <= response.status_code < 300:
+                return response.content
+            utils.logger.error(
+                f"[BilibiliClient.get_video_media] Unexpected status {response.status_code} for {url}"
+            )
+            return None
+        except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
+            utils.logger.error(f"[BilibiliClient.get_video_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")  # Keep original exception type name for developer debugging
+            return None
+
+    async def download_media(self, url: str, save_path: str) -> bool:
+        """
+        Stream a video to save_path (used by MediaDownloader), large videos are resumed with Range requests
+        Args:
+            url: video URL
+            save_path: final file path
+
+        Returns:
+            True if the file was saved
+        """
+        return await download_to_file(self.get_http_client(), url, save_path, headers=self.headers, timeout=self.timeout)
 
     async def get_video_comments(
         self,
@@ -274,55 +325,59 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
         is_end = False
         next_page = 0
         max_retries = 3
-        while not is_end and len(result) < max_count:
-            comments_res = None
-            for attempt in range(max_retries):
-                try:
-                    comments_res = await self.get_video_comments(video_id, CommentOrderType.DEFAULT, next_page)
-                    break  # Success
-                except DataFetchError as e:
-                    if attempt < max_retries - 1:
-                        delay = 5 * (2**attempt) + random.uniform(0, 1)
-                        utils.logger.warning(f"[BilibiliClient.get_video_all_comments] Retrying video_id {video_id} in {delay:.2f}s... (Attempt {attempt + 1}/{max_retries})")
-                        await asyncio.sleep(delay)
-                    else:
-                        utils.logger.error(f"[BilibiliClient.get_video_all_comments] Max retries reached for video_id: {video_id}. Skipping comments. Error: {e}")
-                        is_end = True
-                        break
-            if not comments_res:
-                break
-
-            cursor_info: Dict = comments_res.get("cursor")
-            if not cursor_info:
-                utils.logger.warning(f"[BilibiliClient.get_video_all_comments] Could not find 'cursor' in response for video_id: {video_id}. Skipping.")
-                break
-
-            comment_list: List[Dict] = comments_res.get("replies", [])
-
-            # Check if is_end and next exist
-            if "is_end" not in cursor_info or "next" not in cursor_info:
-                utils.logger.warning(f"[BilibiliClient.get_video_all_comments] 'is_end' or 'next' not in cursor for video_id: {video_id}. Assuming end of comments.")
-                is_end = True
-            else:
-                is_end = cursor_info.get("is_end")
-                next_page = cursor_info.get("next")
-
-            if not isinstance(is_end, bool):
-                utils.logger.warning(f"[BilibiliClient.get_video_all_comments] 'is_end' is not a boolean for video_id: {video_id}. Assuming end of comments.")
-                is_end = True
-            if is_fetch_sub_comments:
-                for comment in comment_list:
-                    comment_id = comment['rpid']
-                    if (comment.get("rcount", 0) > 0):
-                        {await self.get_video_all_level_two_comments(video_id, comment_id, CommentOrderType.DEFAULT, 10, crawl_interval, callback)}
-            if len(result) + len(comment_list) > max_count:
-                comment_list = comment_list[:max_count - len(result)]
-            if callback:  # If there is a callback function, execute it
-                await callback(video_id, comment_list)
-            await asyncio.sleep(crawl_interval)
-            if not is_fetch_sub_comments:
+        async with SubCommentFanout() as sub_comment_fanout:
+            while not is_end and len(result) < max_count:
+                comments_res = None
+                for attempt in range(max_retries):
+                    try:
+                        comments_res = await self.get_video_comments(video_id, CommentOrderType.DEFAULT, next_page)
+                        break  # Success
+                    except DataFetchError as e:
+                        if attempt < max_retries - 1:
+                            delay = 5 * (2**attempt) + random.uniform(0, 1)
+                            utils.logger.warning(f"[BilibiliClient.get_video_all_comments] Retrying video_id {video_id} in {delay:.2f}s... (Attempt {attempt + 1}/{max_retries})")
+                            await asyncio.sleep(delay)
+                        else:
+                            utils.logger.error(f"[BilibiliClient.get_video_all_comments] Max retries reached for video_id: {video_id}. Skipping comments. Error: {e}")
+                            is_end = True
+                            break
+                if not comments_res:
+                    break
+
+                cursor_info: Dict = comments_res.get("cursor")
+                if not cursor_info:
+                    utils.logger.warning(f"[BilibiliClient.get_video_all_comments] Could not find 'cursor' in response for video_id: {video_id}. Skipping.")
+                    break
+
+                comment_list: List[Dict] = comments_res.get("replies", [])
+
+                # Check if is_end and next exist
+                if "is_end" not in cursor_info or "next" not in cursor_info:
+                    utils.logger.warning(f"[BilibiliClient.get_video_all_comments] 'is_end' or 'next' not in cursor for video_id: {video_id}. Assuming end of comments.")
+                    is_end = True
+                else:
+                    is_end = cursor_info.get("is_end")
+                    next_page = cursor_info.get("next")
+
+                if not isinstance(is_end, bool):
+                    utils.logger.warning(f"[BilibiliClient.get_video_all_comments] 'is_end' is not a boolean for video_id: {video_id}. Assuming end of comments.")
+                    is_end = True
+
+                if len(result) + len(comment_list) > max_count:
+                    comment_list = comment_list[:max_count - len(result)]
+                if callback:  # If there is a callback function, execute it
+                    await callback(video_id, comment_list)
+                await crawl_sleep(crawl_interval)
                 result.extend(comment_list)
-                continue
+                if is_fetch_sub_comments:
+                    # Level two comments are crawled in the background while the level one pages are paginated
+                    for comment in comment_list:
+                        if comment.get("rcount", 0) > 0:
+                            sub_comment_fanout.submit(functools.partial(
+                                self.get_video_all_level_two_comments,
+                                video_id, comment['rpid'], CommentOrderType.DEFAULT, 10, crawl_interval, callback,
+                            ))
+        result.extend(sub_comment_fanout.results)
         return result
 
     async def get_video_all_level_two_comments(
@@ -333,6 +388,7 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
         ps: int = 10,
         crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
+        budget: Optional[SubCommentBudget] = None,
     ) -> Dict:
         """
         get video all level two comments for a level one comment
@@ -342,16 +398,19 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
         :param ps: Number of comments per page
         :param crawl_interval:
         :param callback:
+        :param budget: Caps the crawled level two comments, no limit when None
         :return:
         """
 
         pn = 1
-        while True:
+        while budget is None or not budget.exhausted:
             result = await self.get_video_level_two_comments(video_id, level_one_comment_id, pn, ps, order_mode)
-            comment_list: List[Dict] = result.get("replies", [])
+            comment_list: List[Dict] = result.get("replies") or []
+            if budget is not None:
+                comment_list = budget.take(comment_list)
             if callback:  # If there is a callback function, execute it
                 await callback(video_id, comment_list)
-            await asyncio.sleep(crawl_interval)
+            await crawl_sleep(crawl_interval)
             if (int(result["page"]["count"]) <= pn * ps):
                 break
 
@@ -501,7 +560,7 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
                 fans_list = fans_list[:max_count - len(result)]
             if callback:  # If there is a callback function, execute it
                 await callback(creator_info, fans_list)
-            await asyncio.sleep(crawl_interval)
+            await crawl_sleep(crawl_interval)
             if not fans_list:
                 break
             result.extend(fans_list)
@@ -535,7 +594,7 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
                 followings_list = followings_list[:max_count - len(result)]
             if callback:  # If there is a callback function, execute it
                 await callback(creator_info, followings_list)
-            await asyncio.sleep(crawl_interval)
+            await crawl_sleep(crawl_interval)
             if not followings_list:
                 break
             result.extend(followings_list)
@@ -570,6 +629,6 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
                 dynamics_list = dynamics_list[:max_count - len(result)]
             if callback:
                 await callback(creator_info, dynamics_list)
-            await asyncio.sleep(crawl_interval)
+            await crawl_sleep(crawl_interval)
             result.extend(dynamics_list)
         return result
@@ -45,10 +45,13 @@ from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import bilibili as bilibili_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
-from var import crawler_type_var, source_keyword_var
+from tools.media_downloader import MediaDownloader
+from tools.rate_limiter import crawl_sleep
+from tools.seen_index import SeenIndex, content_fingerprint
+from var import crawler_type_var
 
 from .client import BilibiliClient
-from .exception import DataFetchError
+from .exception import DataFetchError, IPBlockError
 from .field import SearchOrderType
 from .help import parse_video_info_from_url, parse_creator_info_from_url
 from .login import BilibiliLogin
@@ -92,20 +95,14 @@ class BilibiliCrawler(AbstractCrawler):
                 await self.browser_context.add_init_script(path="libs/stealth.min.js")
 
             self.context_page = await self.browser_context.new_page()
-            await self.context_page.goto(self.index_url)
-
-            # Create a client to interact with the xiaohongshu website.
-            self.bili_client = await self.create_bilibili_client(httpx_proxy_format)
-            if not await self.bili_client.pong():
-                login_obj = BilibiliLogin(
-                    login_type=config.LOGIN_TYPE,
-                    login_phone="",  # your phone number
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=config.COOKIES,
-                )
-                await login_obj.begin()
-                await self.bili_client.update_cookies(browser_context=self.browser_context)
+
+            # Create a client to interact with the bilibili website.
+            self.bili_client = await self.open_session(
+                self.browser_context, self.context_page, httpx_proxy_format, config.LOGIN_TYPE, config.COOKIES
+            )
+            self.bili_client = await self.create_session_pool(
+                playwright, "bili", self.bili_client, quarantine_on=(IPBlockError,)
+            )
 
             crawler_type_var.set(config.CRAWLER_TYPE)
             if config.CRAWLER_TYPE == "search":
@@ -186,8 +183,28 @@ class BilibiliCrawler(AbstractCrawler):
         if config.CRAWLER_MAX_NOTES_COUNT < bili_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = bili_limit_count
         start_page = config.START_PAGE  # start page number
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
+        detail_semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        media_semaphore = asyncio.Semaphore(config.CRAWL_PIPELINE_MEDIA_WORKERS)
+        comment_semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        seen_index = SeenIndex.get_instance("bili")
+
+        async def fetch_video_info(aid: int):
+            video_item = await self.get_video_info_task(aid=aid, bvid="", semaphore=detail_semaphore)
+            if not video_item:
+                return
+            await bilibili_store.update_bilibili_video(video_item)
+            await bilibili_store.update_up_info(video_item)
+            await pipeline.put("media", video_item)
+            if not await pipeline.put("comment", video_item.get("View").get("aid")):
+                seen_index.mark_crawled(aid)
+
+        async def fetch_video(video_item: Dict):
+            await self.get_bilibili_video(video_item, media_semaphore)
+
+        async def fetch_video_comments(video_id: str):
+            await self.get_comments(video_id, comment_semaphore)
+
+        async def search_keyword(keyword: str):
             utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Current search keyword: {keyword}")
             page = 1
             while (page - start_page + 1) * bili_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
@@ -197,7 +214,6 @@ class BilibiliCrawler(AbstractCrawler):
                     continue
 
                 utils.logger.info(f"[BilibiliCrawler.search_by_keywords] search bilibili keyword: {keyword}, page: {page}")
-                video_id_list: List[str] = []
                 videos_res = await self.bili_client.search_video_by_keyword(
                     keyword=keyword,
                     page=page,
@@ -212,26 +228,17 @@ class BilibiliCrawler(AbstractCrawler):
                     utils.logger.info(f"[BilibiliCrawler.search_by_keywords] No more videos for '{keyword}', moving to next keyword.")
                     break
 
-                semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-                task_list = []
-                try:
-                    task_list = [self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=semaphore) for video_item in video_list]
-                except Exception as e:
-                    utils.logger.warning(f"[BilibiliCrawler.search_by_keywords] error in the task list. The video for this page will not be included. {e}")
-                video_items = await asyncio.gather(*task_list)
-                for video_item in video_items:
-                    if video_item:
-                        video_id_list.append(video_item.get("View").get("aid"))
-                        await bilibili_store.update_bilibili_video(video_item)
-                        await bilibili_store.update_up_info(video_item)
-                        await self.get_bilibili_video(video_item, semaphore)
+                for video_item in video_list:
+                    # Incremental mode: videos whose comment count ("review") did not change are skipped
+                    if seen_index.should_crawl(video_item.get("aid"), content_fingerprint(video_item.get("review"))):
+                        await pipeline.put("detail", video_item.get("aid"))
                 page += 1
 
                 # Sleep after page navigation
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
+                await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
 
-                await self.batch_get_video_comments(video_id_list)
+        pipeline = self.create_crawl_pipeline(fetch_video_info, fetch_video_comments, fetch_video)
+        await pipeline.run(lambda: self.crawl_keywords(search_keyword))
 
     async def search_by_keywords_in_time_range(self, daily_limit: bool):
         """
@@ -242,8 +249,7 @@ class BilibiliCrawler(AbstractCrawler):
         bili_limit_count = 20
         start_page = config.START_PAGE
 
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
+        async def search_keyword(keyword: str):
             utils.logger.info(f"[BilibiliCrawler.search_by_keywords_in_time_range] Current search keyword: {keyword}")
             total_notes_crawled_for_keyword = 0
 
@@ -309,8 +315,7 @@ class BilibiliCrawler(AbstractCrawler):
                         page += 1
 
                         # Sleep after page navigation
-                        await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                        utils.logger.info(f"[BilibiliCrawler.search_by_keywords_in_time_range] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
+                        await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
 
                         await self.batch_get_video_comments(video_id_list)
 
@@ -318,6 +323,8 @@ class BilibiliCrawler(AbstractCrawler):
                         utils.logger.error(f"[BilibiliCrawler.search] Error searching on {day.ctime()}: {e}")
                         break
 
+        await self.crawl_keywords(search_keyword)
+
     async def batch_get_video_comments(self, video_id_list: List[str]):
         """
         batch get video comments
@@ -346,8 +353,7 @@ class BilibiliCrawler(AbstractCrawler):
         async with semaphore:
             try:
                 utils.logger.info(f"[BilibiliCrawler.get_comments] begin get video_id: {video_id} comments ...")
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[BilibiliCrawler.get_comments] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching comments for video {video_id}")
+                await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
                 await self.bili_client.get_video_all_comments(
                     video_id=video_id,
                     crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
@@ -355,6 +361,7 @@ class BilibiliCrawler(AbstractCrawler):
                     callback=bilibili_store.batch_update_bilibili_video_comments,
                     max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
                 )
+                SeenIndex.get_instance("bili").mark_crawled(video_id)
 
             except DataFetchError as ex:
                 utils.logger.error(f"[BilibiliCrawler.get_comments] get video_id: {video_id} comment error: {ex}")
@@ -376,8 +383,7 @@ class BilibiliCrawler(AbstractCrawler):
             await self.get_specified_videos(video_bvids_list)
             if int(result["page"]["count"]) <= pn * ps:
                 break
-            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-            utils.logger.info(f"[BilibiliCrawler.get_creator_videos] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {pn}")
+            await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
             pn += 1
 
     async def get_specified_videos(self, video_url_list: List[str]):
@@ -425,8 +431,7 @@ class BilibiliCrawler(AbstractCrawler):
                 result = await self.bili_client.get_video_info(aid=aid, bvid=bvid)
 
                 # Sleep after fetching video details
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[BilibiliCrawler.get_video_info_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching video details {bvid or aid}")
+                await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
 
                 return result
             except DataFetchError as ex:
@@ -455,14 +460,49 @@ class BilibiliCrawler(AbstractCrawler):
                 utils.logger.error(f"[BilibiliCrawler.get_video_play_url_task] have not fund play url from :{aid}|{cid}, err: {ex}")
                 return None
 
-    async def create_bilibili_client(self, httpx_proxy: Optional[str]) -> BilibiliClient:
+    async def open_session(
+        self,
+        browser_context: BrowserContext,
+        context_page: Page,
+        httpx_proxy: Optional[str],
+        login_type: str,
+        cookie_str: str,
+    ) -> BilibiliClient:
+        """
+        log one account in and create its bilibili client
+        :param browser_context: browser context of the account
+        :param context_page: page of the account
+        :param httpx_proxy: httpx proxy
+        :param login_type: qrcode | phone | cookie
+        :param cookie_str: cookies for the cookie login
+        :return: bilibili client
+        """
+        await context_page.goto(self.index_url)
+        bili_client = await self.create_bilibili_client(httpx_proxy, browser_context, context_page)
+        if not await bili_client.pong():
+            login_obj = BilibiliLogin(
+                login_type=login_type,
+                login_phone="",  # your phone number
+                browser_context=browser_context,
+                context_page=context_page,
+                cookie_str=cookie_str,
+            )
+            await login_obj.begin()
+            await bili_client.update_cookies(browser_context=browser_context)
+        return bili_client
+
+    async def create_bilibili_client(
+        self, httpx_proxy: Optional[str], browser_context: BrowserContext, context_page: Page
+    ) -> BilibiliClient:
         """
         create bilibili client
         :param httpx_proxy: httpx proxy
+        :param browser_context: browser context the cookies are read from
+        :param context_page: page used for signing
         :return: bilibili client
         """
         utils.logger.info("[BilibiliCrawler.create_bilibili_client] Begin create bilibili API client ...")
-        cookie_str, cookie_dict = utils.convert_cookies(await self.browser_context.cookies())
+        cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         bilibili_client_obj = BilibiliClient(
             proxy=httpx_proxy,
             headers={
@@ -472,7 +512,7 @@ class BilibiliCrawler(AbstractCrawler):
                 "Referer": "https://www.bilibili.com",
                 "Content-Type": "application/json;charset=UTF-8",
             },
-            playwright_page=self.context_page,
+            playwright_page=context_page,
             cookie_dict=cookie_dict,
             proxy_ip_pool=self.ip_proxy_pool,  # 传递代理池用于自动刷新
         )
@@ -550,6 +590,9 @@ class BilibiliCrawler(AbstractCrawler):
 
     async def close(self):
         """Close browser context"""
+        # Release the pooled keep-alive connections of the API client
+        if getattr(self, "bili_client", None):
+            await self.bili_client.close_http_client()
         try:
             # If using CDP mode, special handling is required
             if self.cdp_manager:
@@ -592,13 +635,8 @@ class BilibiliCrawler(AbstractCrawler):
             utils.logger.info("[BilibiliCrawler.get_bilibili_video] get video url failed")
             return
 
-        content = await self.bili_client.get_video_media(video_url)
-        await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-        utils.logger.info(f"[BilibiliCrawler.get_bilibili_video] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching video {aid}")
-        if content is None:
-            return
-        extension_file_name = f"video.mp4"
-        await bilibili_store.store_video(aid, content, extension_file_name)
+        save_path = bilibili_store.get_bilibili_video_path(aid, "video.mp4")
+        MediaDownloader.get_instance().submit(self.bili_client.download_media, video_url, save_path, "bili", str(aid), "video", 0)
 
     async def get_all_creator_details(self, creator_url_list: List[str]):
         """
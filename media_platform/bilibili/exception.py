@@ -32,3 +32,7 @@ class DataFetchError(RequestError):
 
 class IPBlockError(RequestError):
     """fetch so fast that the server block us ip"""
+
+
+class WbiSignError(DataFetchError):
+    """the server rejected the wbi signature (outdated img_key / sub_key)"""
@@ -23,10 +23,12 @@
 # @Time    : 2023/12/2 23:26
 # @Desc    : bilibili request parameter signing
 # Reverse engineering implementation reference: https://socialsisteryi.github.io/bilibili-API-collect/docs/misc/sign/wbi.html#wbi%E7%AD%BE%E5%90%8D%E7%AE%97%E6%B3%95
+import asyncio
 import re
+import time
 import urllib.parse
 from hashlib import md5
-from typing import Dict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
 
 from model.m_bilibili import VideoUrlInfo, CreatorUrlInfo
 from tools import utils
@@ -42,18 +44,23 @@ class BilibiliSign:
             61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
             36, 20, 34, 44, 52
         ]
+        # The mixin key only depends on the key pair, computed once
+        self.salt = self._compute_salt()
 
-    def get_salt(self) -> str:
-        """
-        Get the salted key
-        :return:
-        """
+    def _compute_salt(self) -> str:
         salt = ""
         mixin_key = self.img_key + self.sub_key
         for mt in self.map_table:
             salt += mixin_key[mt]
         return salt[:32]
 
+    def get_salt(self) -> str:
+        """
+        Get the salted key
+        :return:
+        """
+        return self.salt
+
     def sign(self, req_data: Dict) -> Dict:
         """
         Add current timestamp to request parameters, sort keys in dictionary order,
@@ -71,12 +78,60 @@ class BilibiliSign:
             in req_data.items()
         }
         query = urllib.parse.urlencode(req_data)
-        salt = self.get_salt()
+        salt = self.salt
         wbi_sign = md5((query + salt).encode()).hexdigest()  # Calculate w_rid
         req_data['w_rid'] = wbi_sign
         return req_data
 
 
+class WbiKeyManager:
+    """
+    Caches the WBI key pair and its BilibiliSign, so signed requests need no browser round trip
+    Keys older than ttl_sec are still used while a background task refreshes them,
+    invalidate() forces a refresh before the next signature (e.g. after a signature failure response)
+    """
+
+    def __init__(self, fetch_keys: Callable[[bool], Awaitable[Tuple[str, str]]], ttl_sec: float = 3600):
+        """
+        Args:
+            fetch_keys: async callable returning (img_key, sub_key), the argument asks for the nav API instead of localStorage
+            ttl_sec: age after which the keys are refreshed in the background
+        """
+        self._fetch_keys = fetch_keys
+        self.ttl_sec = ttl_sec
+        self._signer: Optional[BilibiliSign] = None
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def get_signer(self) -> BilibiliSign:
+        if self._signer is None:
+            await self.refresh()
+        elif time.monotonic() - self._fetched_at > self.ttl_sec and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self._background_refresh())
+        return self._signer
+
+    def invalidate(self):
+        self._signer = None
+
+    async def refresh(self, force_http: bool = False):
+        """Fetch the keys, concurrent callers wait for the same fetch"""
+        fetched_at = self._fetched_at
+        async with self._lock:
+            if self._signer is not None and self._fetched_at != fetched_at:
+                return
+            img_key, sub_key = await self._fetch_keys(force_http)
+            if self._signer is None or (self._signer.img_key, self._signer.sub_key) != (img_key, sub_key):
+                self._signer = BilibiliSign(img_key, sub_key)
+            self._fetched_at = time.monotonic()
+
+    async def _background_refresh(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            utils.logger.warning(f"[WbiKeyManager._background_refresh] Refresh wbi keys failed, keep using the cached keys: {e}")
+
+
 def parse_video_info_from_url(url: str) -> VideoUrlInfo:
     """
     Parse video ID from Bilibili video URL
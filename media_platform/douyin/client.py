@@ -19,6 +19,7 @@
 
 import asyncio
 import copy
+import functools
 import json
 import urllib.parse
 from typing import TYPE_CHECKING, Any, Callable, Dict, Union, Optional
@@ -29,6 +30,9 @@ from playwright.async_api import BrowserContext
 from base.base_crawler import AbstractApiClient
 from proxy.proxy_mixin import ProxyRefreshMixin
 from tools import utils
+from tools.media_downloader import download_to_file
+from tools.rate_limiter import RateLimiterRegistry, crawl_sleep
+from tools.sub_comment_fanout import SubCommentBudget, SubCommentFanout
 from var import request_keyword_var
 
 if TYPE_CHECKING:
@@ -116,10 +120,13 @@ class DouYinClient(AbstractApiClient, ProxyRefreshMixin):
         # 每次请求前检测代理是否过期
         await self._refresh_proxy_if_expired()
 
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
+        client = self.get_http_client()
+        async with RateLimiterRegistry.slot("douyin", url) as limiter:
             response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        limiter.observe_status(response.status_code)
         try:
             if response.text == "" or response.text == "blocked":
+                limiter.record_throttle("blocked")
                 utils.logger.error(f"request params incrr, response.text: {response.text}")
                 raise Exception("account blocked")
             return response.json()
@@ -256,45 +263,56 @@ class DouYinClient(AbstractApiClient, ProxyRefreshMixin):
         result = []
         comments_has_more = 1
         comments_cursor = 0
-        while comments_has_more and len(result) < max_count:
-            comments_res = await self.get_aweme_comments(aweme_id, comments_cursor)
-            comments_has_more = comments_res.get("has_more", 0)
-            comments_cursor = comments_res.get("cursor", 0)
-            comments = comments_res.get("comments", [])
-            if not comments:
-                continue
-            if len(result) + len(comments) > max_count:
-                comments = comments[:max_count - len(result)]
-            result.extend(comments)
-            if callback:  # 如果有回调函数，就执行回调函数
-                await callback(aweme_id, comments)
-
-            await asyncio.sleep(crawl_interval)
-            if not is_fetch_sub_comments:
-                continue
-            # 获取二级评论
-            for comment in comments:
-                reply_comment_total = comment.get("reply_comment_total")
-
-                if reply_comment_total > 0:
-                    comment_id = comment.get("cid")
-                    sub_comments_has_more = 1
-                    sub_comments_cursor = 0
-
-                    while sub_comments_has_more:
-                        sub_comments_res = await self.get_sub_comments(aweme_id, comment_id, sub_comments_cursor)
-                        sub_comments_has_more = sub_comments_res.get("has_more", 0)
-                        sub_comments_cursor = sub_comments_res.get("cursor", 0)
-                        sub_comments = sub_comments_res.get("comments", [])
-
-                        if not sub_comments:
-                            continue
-                        result.extend(sub_comments)
-                        if callback:  # 如果有回调函数，就执行回调函数
-                            await callback(aweme_id, sub_comments)
-                        await asyncio.sleep(crawl_interval)
+        # 二级评论在后台并发抓取，不阻塞一级评论翻页
+        async with SubCommentFanout() as sub_comment_fanout:
+            while comments_has_more and len(result) < max_count:
+                comments_res = await self.get_aweme_comments(aweme_id, comments_cursor)
+                comments_has_more = comments_res.get("has_more", 0)
+                comments_cursor = comments_res.get("cursor", 0)
+                comments = comments_res.get("comments", [])
+                if not comments:
+                    continue
+                if len(result) + len(comments) > max_count:
+                    comments = comments[:max_count - len(result)]
+                result.extend(comments)
+                if callback:  # 如果有回调函数，就执行回调函数
+                    await callback(aweme_id, comments)
+
+                await crawl_sleep(crawl_interval)
+                if not is_fetch_sub_comments:
+                    continue
+                for comment in comments:
+                    if comment.get("reply_comment_total", 0) > 0:
+                        sub_comment_fanout.submit(functools.partial(
+                            self._crawl_sub_comment_thread, aweme_id, comment.get("cid"), crawl_interval, callback
+                        ))
+        result.extend(sub_comment_fanout.results)
         return result
 
+    async def _crawl_sub_comment_thread(
+        self,
+        aweme_id: str,
+        comment_id: str,
+        crawl_interval: float,
+        callback: Optional[Callable],
+        budget: SubCommentBudget,
+    ):
+        """
+        翻页抓取一条一级评论下的二级评论，达到数量上限后停止
+        """
+        sub_comments_has_more = 1
+        sub_comments_cursor = 0
+        while sub_comments_has_more and not budget.exhausted:
+            sub_comments_res = await self.get_sub_comments(aweme_id, comment_id, sub_comments_cursor)
+            sub_comments_has_more = sub_comments_res.get("has_more", 0)
+            sub_comments_cursor = sub_comments_res.get("cursor", 0)
+            sub_comments = budget.take(sub_comments_res.get("comments", []))
+            if not sub_comments:
+                break
+            if callback:  # 如果有回调函数，就执行回调函数
+                await callback(aweme_id, sub_comments)
+            await crawl_sleep(crawl_interval)
+
     async def get_user_info(self, sec_user_id: str):
         uri = "/aweme/v1/web/user/profile/other/"
         params = {
@@ -333,18 +351,30 @@ class DouYinClient(AbstractApiClient, ProxyRefreshMixin):
         return result
 
     async def get_aweme_media(self, url: str) -> Union[bytes, None]:
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            try:
-                response = await client.request("GET", url, timeout=self.timeout, follow_redirects=True)
-                response.raise_for_status()
-                if not response.reason_phrase == "OK":
-                    utils.logger.error(f"[DouYinClient.get_aweme_media] request {url} err, res:{response.text}")
-                    return None
-                else:
-                    return response.content
-            except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
-                utils.logger.error(f"[DouYinClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")  # 保留原始异常类型名称，以便开发者调试
+        client = self.get_http_client()
+        try:
+            response = await client.request("GET", url, timeout=self.timeout, follow_redirects=True)
+            response.raise_for_status()
+            if not response.reason_phrase == "OK":
+                utils.logger.error(f"[DouYinClient.get_aweme_media] request {url} err, res:{response.text}")
                 return None
+            else:
+                return response.content
+        except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
+            utils.logger.error(f"[DouYinClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")  # 保留原始异常类型名称，以便开发者调试
+            return None
+
+    async def download_media(self, url: str, save_path: str) -> bool:
+        """
+        流式下载图片或视频到 save_path（供 MediaDownloader 调用）
+        Args:
+            url: 媒体地址
+            save_path: 保存路径
+
+        Returns:
+            是否保存成功
+        """
+        return await download_to_file(self.get_http_client(), url, save_path, timeout=self.timeout)
 
     async def resolve_short_url(self, short_url: str) -> str:
         """
@@ -354,19 +384,19 @@ class DouYinClient(AbstractApiClient, ProxyRefreshMixin):
         Returns:
             重定向后的完整URL
         """
-        async with httpx.AsyncClient(proxy=self.proxy, follow_redirects=False) as client:
-            try:
-                utils.logger.info(f"[DouYinClient.resolve_short_url] Resolving short URL: {short_url}")
-                response = await client.get(short_url, timeout=10)
-
-                # 短链接通常返回302重定向
-                if response.status_code in [301, 302, 303, 307, 308]:
-                    redirect_url = response.headers.get("Location", "")
-                    utils.logger.info(f"[DouYinClient.resolve_short_url] Resolved to: {redirect_url}")
-                    return redirect_url
-                else:
-                    utils.logger.warning(f"[DouYinClient.resolve_short_url] Unexpected status code: {response.status_code}")
-                    return ""
-            except Exception as e:
-                utils.logger.error(f"[DouYinClient.resolve_short_url] Failed to resolve short URL: {e}")
+        client = self.get_http_client()
+        try:
+            utils.logger.info(f"[DouYinClient.resolve_short_url] Resolving short URL: {short_url}")
+            response = await client.get(short_url, timeout=10, follow_redirects=False)
+
+            # 短链接通常返回302重定向
+            if response.status_code in [301, 302, 303, 307, 308]:
+                redirect_url = response.headers.get("Location", "")
+                utils.logger.info(f"[DouYinClient.resolve_short_url] Resolved to: {redirect_url}")
+                return redirect_url
+            else:
+                utils.logger.warning(f"[DouYinClient.resolve_short_url] Unexpected status code: {response.status_code}")
                 return ""
+        except Exception as e:
+            utils.logger.error(f"[DouYinClient.resolve_short_url] Failed to resolve short URL: {e}")
+            return ""
@@ -19,7 +19,6 @@
 
 import asyncio
 import os
-import random
 from asyncio import Task
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -37,10 +36,13 @@ from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import douyin as douyin_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
-from var import crawler_type_var, source_keyword_var
+from tools.media_downloader import MediaDownloader
+from tools.rate_limiter import crawl_sleep
+from tools.seen_index import SeenIndex, content_fingerprint
+from var import crawler_type_var
 
 from .client import DouYinClient
-from .exception import DataFetchError
+from .exception import DataFetchError, IPBlockError
 from .field import PublishTimeType
 from .help import parse_video_info_from_url, parse_creator_info_from_url
 from .login import DouYinLogin
@@ -88,19 +90,13 @@ class DouYinCrawler(AbstractCrawler):
                 await self.browser_context.add_init_script(path="libs/stealth.min.js")
 
             self.context_page = await self.browser_context.new_page()
-            await self.context_page.goto(self.index_url)
-
-            self.dy_client = await self.create_douyin_client(httpx_proxy_format)
-            if not await self.dy_client.pong(browser_context=self.browser_context):
-                login_obj = DouYinLogin(
-                    login_type=config.LOGIN_TYPE,
-                    login_phone="",  # you phone number
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=config.COOKIES,
-                )
-                await login_obj.begin()
-                await self.dy_client.update_cookies(browser_context=self.browser_context)
+
+            self.dy_client = await self.open_session(
+                self.browser_context, self.context_page, httpx_proxy_format, config.LOGIN_TYPE, config.COOKIES
+            )
+            self.dy_client = await self.create_session_pool(
+                playwright, "dy", self.dy_client, quarantine_on=(IPBlockError,)
+            )
             crawler_type_var.set(config.CRAWLER_TYPE)
             if config.CRAWLER_TYPE == "search":
                 # Search for notes and retrieve their comment information.
@@ -120,8 +116,25 @@ class DouYinCrawler(AbstractCrawler):
         if config.CRAWLER_MAX_NOTES_COUNT < dy_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = dy_limit_count
         start_page = config.START_PAGE  # start page number
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
+        comment_semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+
+        seen_index = SeenIndex.get_instance("dy")
+
+        async def save_aweme(aweme_info: Dict):
+            # Search results already contain the full aweme info, no detail request needed
+            await douyin_store.update_douyin_aweme(aweme_item=aweme_info)
+            await pipeline.put("media", aweme_info)
+            aweme_id = aweme_info.get("aweme_id", "")
+            # Incremental mode: comments are only crawled again when the comment count changed
+            comment_count = (aweme_info.get("statistics") or {}).get("comment_count")
+            if seen_index.should_crawl(aweme_id, content_fingerprint(comment_count)):
+                if not await pipeline.put("comment", aweme_id):
+                    seen_index.mark_crawled(aweme_id)
+
+        async def fetch_aweme_comments(aweme_id: str):
+            await self.get_comments(aweme_id, comment_semaphore)
+
+        async def search_keyword(keyword: str):
             utils.logger.info(f"[DouYinCrawler.search] Current keyword: {keyword}")
             aweme_list: List[str] = []
             page = 0
@@ -151,25 +164,21 @@ class DouYinCrawler(AbstractCrawler):
                     utils.logger.error(f"[DouYinCrawler.search] search douyin keyword: {keyword} failed，账号也许被风控了。")
                     break
                 dy_search_id = posts_res.get("extra", {}).get("logid", "")
-                page_aweme_list = []
                 for post_item in posts_res.get("data"):
                     try:
                         aweme_info: Dict = (post_item.get("aweme_info") or post_item.get("aweme_mix_info", {}).get("mix_items")[0])
                     except TypeError:
                         continue
                     aweme_list.append(aweme_info.get("aweme_id", ""))
-                    page_aweme_list.append(aweme_info.get("aweme_id", ""))
-                    await douyin_store.update_douyin_aweme(aweme_item=aweme_info)
-                    await self.get_aweme_media(aweme_item=aweme_info)
-                
-                # Batch get note comments for the current page
-                await self.batch_get_note_comments(page_aweme_list)
+                    await pipeline.put("detail", aweme_info)
 
                 # Sleep after each page navigation
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[DouYinCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
+                await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
             utils.logger.info(f"[DouYinCrawler.search] keyword:{keyword}, aweme_list:{aweme_list}")
 
+        pipeline = self.create_crawl_pipeline(save_aweme, fetch_aweme_comments, self.get_aweme_media)
+        await pipeline.run(lambda: self.crawl_keywords(search_keyword))
+
     async def get_specified_awemes(self):
         """Get the information and comments of the specified post from URLs or IDs"""
         utils.logger.info("[DouYinCrawler.get_specified_awemes] Parsing video URLs...")
@@ -211,8 +220,7 @@ class DouYinCrawler(AbstractCrawler):
             try:
                 result = await self.dy_client.get_video_by_id(aweme_id)
                 # Sleep after fetching aweme detail
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[DouYinCrawler.get_aweme_detail] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching aweme {aweme_id}")
+                await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
                 return result
             except DataFetchError as ex:
                 utils.logger.error(f"[DouYinCrawler.get_aweme_detail] Get aweme detail error: {ex}")
@@ -250,9 +258,9 @@ class DouYinCrawler(AbstractCrawler):
                     callback=douyin_store.batch_update_dy_aweme_comments,
                     max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
                 )
+                SeenIndex.get_instance("dy").mark_crawled(aweme_id)
                 # Sleep after fetching comments
-                await asyncio.sleep(crawl_interval)
-                utils.logger.info(f"[DouYinCrawler.get_comments] Sleeping for {crawl_interval} seconds after fetching comments for aweme {aweme_id}")
+                await crawl_sleep(crawl_interval)
                 utils.logger.info(f"[DouYinCrawler.get_comments] aweme_id: {aweme_id} comments have all been obtained and filtered ...")
             except DataFetchError as e:
                 utils.logger.error(f"[DouYinCrawler.get_comments] aweme_id: {aweme_id} get comments failed, error: {e}")
@@ -296,20 +304,45 @@ class DouYinCrawler(AbstractCrawler):
                 await douyin_store.update_douyin_aweme(aweme_item=aweme_item)
                 await self.get_aweme_media(aweme_item=aweme_item)
 
-    async def create_douyin_client(self, httpx_proxy: Optional[str]) -> DouYinClient:
+    async def open_session(
+        self,
+        browser_context: BrowserContext,
+        context_page: Page,
+        httpx_proxy: Optional[str],
+        login_type: str,
+        cookie_str: str,
+    ) -> DouYinClient:
+        """登录一个账号并创建它的抖音客户端"""
+        await context_page.goto(self.index_url)
+        dy_client = await self.create_douyin_client(httpx_proxy, browser_context, context_page)
+        if not await dy_client.pong(browser_context=browser_context):
+            login_obj = DouYinLogin(
+                login_type=login_type,
+                login_phone="",  # you phone number
+                browser_context=browser_context,
+                context_page=context_page,
+                cookie_str=cookie_str,
+            )
+            await login_obj.begin()
+            await dy_client.update_cookies(browser_context=browser_context)
+        return dy_client
+
+    async def create_douyin_client(
+        self, httpx_proxy: Optional[str], browser_context: BrowserContext, context_page: Page
+    ) -> DouYinClient:
         """Create douyin client"""
-        cookie_str, cookie_dict = utils.convert_cookies(await self.browser_context.cookies())  # type: ignore
+        cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())  # type: ignore
         douyin_client = DouYinClient(
             proxy=httpx_proxy,
             headers={
-                "User-Agent": await self.context_page.evaluate("() => navigator.userAgent"),
+                "User-Agent": await context_page.evaluate("() => navigator.userAgent"),
                 "Cookie": cookie_str,
                 "Host": "www.douyin.com",
                 "Origin": "https://www.douyin.com/",
                 "Referer": "https://www.douyin.com/",
                 "Content-Type": "application/json;charset=UTF-8",
             },
-            playwright_page=self.context_page,
+            playwright_page=context_page,
             cookie_dict=cookie_dict,
             proxy_ip_pool=self.ip_proxy_pool,  # 传递代理池用于自动刷新
         )
@@ -378,6 +411,9 @@ class DouYinCrawler(AbstractCrawler):
 
     async def close(self) -> None:
         """Close browser context"""
+        # Release the pooled keep-alive connections of the API client
+        if getattr(self, "dy_client", None):
+            await self.dy_client.close_http_client()
         # 如果使用CDP模式，需要特殊处理
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
@@ -421,17 +457,12 @@ class DouYinCrawler(AbstractCrawler):
 
         if not note_download_url:
             return
-        picNum = 0
-        for url in note_download_url:
+        downloader = MediaDownloader.get_instance()
+        for pic_num, url in enumerate(note_download_url):
             if not url:
                 continue
-            content = await self.dy_client.get_aweme_media(url)
-            await asyncio.sleep(random.random())
-            if content is None:
-                continue
-            extension_file_name = f"{picNum:>03d}.jpeg"
-            picNum += 1
-            await douyin_store.update_dy_aweme_image(aweme_id, content, extension_file_name)
+            save_path = douyin_store.get_dy_aweme_image_path(aweme_id, f"{pic_num:>03d}.jpeg")
+            downloader.submit(self.dy_client.download_media, url, save_path, "douyin", aweme_id, "image", pic_num)
 
     async def get_aweme_video(self, aweme_item: Dict):
         """
@@ -449,9 +480,7 @@ class DouYinCrawler(AbstractCrawler):
 
         if not video_download_url:
             return
-        content = await self.dy_client.get_aweme_media(video_download_url)
-        await asyncio.sleep(random.random())
-        if content is None:
-            return
-        extension_file_name = f"video.mp4"
-        await douyin_store.update_dy_aweme_video(aweme_id, content, extension_file_name)
+        save_path = douyin_store.get_dy_aweme_video_path(aweme_id, "video.mp4")
+        MediaDownloader.get_instance().submit(
+            self.dy_client.download_media, video_download_url, save_path, "douyin", aweme_id, "video", 0
+        )
@@ -33,6 +33,7 @@ from playwright.async_api import Page
 
 from model.m_douyin import VideoUrlInfo, CreatorUrlInfo
 from tools.crawler_util import extract_url_params_to_dict
+from tools.js_signer import JsSignerPool
 
 douyin_sign_obj = execjs.compile(open('libs/douyin.js', encoding='utf-8-sig').read())
 
@@ -61,8 +62,15 @@ def get_web_id():
 async def get_a_bogus(url: str, params: str, post_data: dict, user_agent: str, page: Page = None):
     """
     Get a_bogus parameter, currently does not support POST request type signature
+    Signed by the persistent node workers of JsSignerPool instead of one execjs process per call
     """
-    return get_a_bogus_from_js(url, params, user_agent)
+    return await JsSignerPool.get_instance("libs/douyin.js").call(_get_sign_js_name(url), params, user_agent)
+
+
+def _get_sign_js_name(url: str) -> str:
+    if "/reply" in url:
+        return "sign_reply"
+    return "sign_datail"
 
 def get_a_bogus_from_js(url: str, params: str, user_agent: str):
     """
@@ -75,10 +83,7 @@ def get_a_bogus_from_js(url: str, params: str, user_agent: str):
     Returns:
 
     """
-    sign_js_name = "sign_datail"
-    if "/reply" in url:
-        sign_js_name = "sign_reply"
-    return douyin_sign_obj.call(sign_js_name, params, user_agent)
+    return douyin_sign_obj.call(_get_sign_js_name(url), params, user_agent)
 
 
 
@@ -40,10 +40,12 @@ from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import kuaishou as kuaishou_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
-from var import comment_tasks_var, crawler_type_var, source_keyword_var
+from tools.rate_limiter import crawl_sleep
+from tools.seen_index import SeenIndex, content_fingerprint
+from var import comment_tasks_var, crawler_type_var
 
 from .client import KuaiShouClient
-from .exception import DataFetchError
+from .exception import DataFetchError, IPBlockError
 from .help import parse_video_info_from_url, parse_creator_info_from_url
 from .login import KuaishouLogin
 
@@ -93,22 +95,14 @@ class KuaishouCrawler(AbstractCrawler):
 
 
             self.context_page = await self.browser_context.new_page()
-            await self.context_page.goto(f"{self.index_url}?isHome=1")
 
             # Create a client to interact with the kuaishou website.
-            self.ks_client = await self.create_ks_client(httpx_proxy_format)
-            if not await self.ks_client.pong():
-                login_obj = KuaishouLogin(
-                    login_type=config.LOGIN_TYPE,
-                    login_phone=httpx_proxy_format,
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=config.COOKIES,
-                )
-                await login_obj.begin()
-                await self.ks_client.update_cookies(
-                    browser_context=self.browser_context
-                )
+            self.ks_client = await self.open_session(
+                self.browser_context, self.context_page, httpx_proxy_format, config.LOGIN_TYPE, config.COOKIES
+            )
+            self.ks_client = await self.create_session_pool(
+                playwright, "ks", self.ks_client, quarantine_on=(IPBlockError,)
+            )
 
             crawler_type_var.set(config.CRAWLER_TYPE)
             if config.CRAWLER_TYPE == "search":
@@ -131,9 +125,10 @@ class KuaishouCrawler(AbstractCrawler):
         if config.CRAWLER_MAX_NOTES_COUNT < ks_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = ks_limit_count
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
+        seen_index = SeenIndex.get_instance("ks")
+
+        async def search_keyword(keyword: str):
             search_session_id = ""
-            source_keyword_var.set(keyword)
             utils.logger.info(
                 f"[KuaishouCrawler.search] Current search keyword: {keyword}"
             )
@@ -168,18 +163,22 @@ class KuaishouCrawler(AbstractCrawler):
                     continue
                 search_session_id = vision_search_photo.get("searchSessionId", "")
                 for video_detail in vision_search_photo.get("feeds"):
-                    video_id_list.append(video_detail.get("photo", {}).get("id"))
+                    photo_info: Dict = video_detail.get("photo", {})
                     await kuaishou_store.update_kuaishou_video(video_item=video_detail)
+                    # Incremental mode: comments are only crawled again when the comment count changed
+                    if seen_index.should_crawl(photo_info.get("id"), content_fingerprint(photo_info.get("commentCount"))):
+                        video_id_list.append(photo_info.get("id"))
 
                 # batch fetch video comments
                 page += 1
 
                 # Sleep after page navigation
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[KuaishouCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
+                await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
 
                 await self.batch_get_video_comments(video_id_list)
 
+        await self.crawl_keywords(search_keyword)
+
     async def get_specified_videos(self):
         """Get the information and comments of the specified post"""
         utils.logger.info("[KuaishouCrawler.get_specified_videos] Parsing video URLs...")
@@ -213,8 +212,7 @@ class KuaishouCrawler(AbstractCrawler):
                 result = await self.ks_client.get_video_info(video_id)
 
                 # Sleep after fetching video details
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[KuaishouCrawler.get_video_info_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching video details {video_id}")
+                await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
 
                 utils.logger.info(
                     f"[KuaishouCrawler.get_video_info_task] Get video_id:{video_id} info result: {result} ..."
@@ -241,6 +239,8 @@ class KuaishouCrawler(AbstractCrawler):
             utils.logger.info(
                 f"[KuaishouCrawler.batch_get_video_comments] Crawling comment mode is not enabled"
             )
+            for video_id in video_id_list:
+                SeenIndex.get_instance("ks").mark_crawled(video_id)
             return
 
         utils.logger.info(
@@ -271,8 +271,7 @@ class KuaishouCrawler(AbstractCrawler):
                 )
 
                 # Sleep before fetching comments
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[KuaishouCrawler.get_comments] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds before fetching comments for video {video_id}")
+                await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
 
                 await self.ks_client.get_video_all_comments(
                     photo_id=video_id,
@@ -280,6 +279,7 @@ class KuaishouCrawler(AbstractCrawler):
                     callback=kuaishou_store.batch_update_ks_video_comments,
                     max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
                 )
+                SeenIndex.get_instance("ks").mark_crawled(video_id)
             except DataFetchError as ex:
                 utils.logger.error(
                     f"[KuaishouCrawler.get_comments] get video_id: {video_id} comment error: {ex}"
@@ -299,13 +299,38 @@ class KuaishouCrawler(AbstractCrawler):
                     browser_context=self.browser_context
                 )
 
-    async def create_ks_client(self, httpx_proxy: Optional[str]) -> KuaiShouClient:
+    async def open_session(
+        self,
+        browser_context: BrowserContext,
+        context_page: Page,
+        httpx_proxy: Optional[str],
+        login_type: str,
+        cookie_str: str,
+    ) -> KuaiShouClient:
+        """Log one account in and create its ks client"""
+        await context_page.goto(f"{self.index_url}?isHome=1")
+        ks_client = await self.create_ks_client(httpx_proxy, browser_context, context_page)
+        if not await ks_client.pong():
+            login_obj = KuaishouLogin(
+                login_type=login_type,
+                login_phone=httpx_proxy,
+                browser_context=browser_context,
+                context_page=context_page,
+                cookie_str=cookie_str,
+            )
+            await login_obj.begin()
+            await ks_client.update_cookies(browser_context=browser_context)
+        return ks_client
+
+    async def create_ks_client(
+        self, httpx_proxy: Optional[str], browser_context: BrowserContext, context_page: Page
+    ) -> KuaiShouClient:
         """Create ks client"""
         utils.logger.info(
             "[KuaishouCrawler.create_ks_client] Begin create kuaishou API client ..."
         )
         cookie_str, cookie_dict = utils.convert_cookies(
-            await self.browser_context.cookies()
+            await browser_context.cookies()
         )
         ks_client_obj = KuaiShouClient(
             proxy=httpx_proxy,
@@ -316,7 +341,7 @@ class KuaishouCrawler(AbstractCrawler):
                 "Referer": self.index_url,
                 "Content-Type": "application/json;charset=UTF-8",
             },
-            playwright_page=self.context_page,
+            playwright_page=context_page,
             cookie_dict=cookie_dict,
             proxy_ip_pool=self.ip_proxy_pool,  # Pass proxy pool for automatic refresh
         )
@@ -438,6 +463,9 @@ class KuaishouCrawler(AbstractCrawler):
 
     async def close(self):
         """Close browser context"""
+        # Release the pooled keep-alive connections of the API client
+        if getattr(self, "ks_client", None):
+            await self.ks_client.close_http_client()
         # If using CDP mode, need special handling
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
@@ -22,7 +22,6 @@ import json
 from typing import Any, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode, quote
 
-import requests
 from playwright.async_api import BrowserContext, Page
 from tenacity import RetryError, retry, stop_after_attempt, wait_fixed
 
@@ -30,13 +29,16 @@ import config
 from base.base_crawler import AbstractApiClient
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
 from proxy.proxy_ip_pool import ProxyIpPool
+from proxy.proxy_mixin import ProxyRefreshMixin
 from tools import utils
+from tools.http_client import create_async_client
+from tools.rate_limiter import RateLimiterRegistry, crawl_sleep
 
 from .field import SearchNoteType, SearchSortType
 from .help import TieBaExtractor
 
 
-class BaiduTieBaClient(AbstractApiClient):
+class BaiduTieBaClient(AbstractApiClient, ProxyRefreshMixin):
 
     def __init__(
         self,
@@ -58,36 +60,14 @@ class BaiduTieBaClient(AbstractApiClient):
         self.default_ip_proxy = default_ip_proxy
         self.playwright_page = playwright_page  # Playwright page object
 
-    def _sync_request(self, method, url, proxy=None, **kwargs):
-        """
-        Synchronous requests method
-        Args:
-            method: Request method
-            url: Request URL
-            proxy: Proxy IP
-            **kwargs: Other request parameters
+    @property
+    def proxy(self) -> Optional[str]:
+        """Current httpx proxy URL, the pooled http client of ProxyRefreshMixin follows it"""
+        return self.default_ip_proxy
 
-        Returns:
-            Response object
-        """
-        # Construct proxy dictionary
-        proxies = None
-        if proxy:
-            proxies = {
-                "http": proxy,
-                "https": proxy,
-            }
-
-        # Send request
-        response = requests.request(
-            method=method,
-            url=url,
-            headers=self.headers,
-            proxies=proxies,
-            timeout=self.timeout,
-            **kwargs
-        )
-        return response
+    @proxy.setter
+    def proxy(self, value: Optional[str]):
+        self.default_ip_proxy = value
 
     async def _refresh_proxy_if_expired(self) -> None:
         """
@@ -106,11 +86,12 @@ class BaiduTieBaClient(AbstractApiClient):
             utils.logger.info(
                 f"[BaiduTieBaClient._refresh_proxy_if_expired] New proxy: {new_proxy.ip}:{new_proxy.port}"
             )
+            await self._retire_http_client()
 
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
     async def request(self, method, url, return_ori_content=False, proxy=None, **kwargs) -> Union[str, Any]:
         """
-        Common request method wrapper for requests, handles request responses
+        Common request method wrapper (pooled async httpx client), handles request responses
         Args:
             method: Request method
             url: Request URL
@@ -124,16 +105,17 @@ class BaiduTieBaClient(AbstractApiClient):
         # Check if proxy is expired before each request
         await self._refresh_proxy_if_expired()
 
-        actual_proxy = proxy if proxy else self.default_ip_proxy
-
-        # Execute synchronous requests in thread pool
-        response = await asyncio.to_thread(
-            self._sync_request,
-            method,
-            url,
-            actual_proxy,
-            **kwargs
-        )
+        # follow_redirects keeps the behaviour of the former requests based transport
+        async with RateLimiterRegistry.slot("tieba", url) as limiter:
+            if proxy and proxy != self.default_ip_proxy:
+                # One-off proxy (retry after the current proxy got blocked), not worth a pooled client
+                async with create_async_client(proxy=proxy) as client:
+                    response = await client.request(method, url, headers=self.headers, timeout=self.timeout, follow_redirects=True, **kwargs)
+            else:
+                response = await self.get_http_client().request(
+                    method, url, headers=self.headers, timeout=self.timeout, follow_redirects=True, **kwargs
+                )
+        limiter.observe_status(response.status_code)
 
         if response.status_code != 200:
             utils.logger.error(f"Request failed, method: {method}, url: {url}, status code: {response.status_code}")
@@ -141,6 +123,7 @@ class BaiduTieBaClient(AbstractApiClient):
             raise Exception(f"Request failed, method: {method}, url: {url}, status code: {response.status_code}")
 
         if response.text == "" or response.text == "blocked":
+            limiter.record_throttle("blocked")
             utils.logger.error(f"request params incorrect, response.text: {response.text}")
             raise Exception("account blocked")
 
@@ -149,6 +132,13 @@ class BaiduTieBaClient(AbstractApiClient):
 
         return response.json()
 
+    async def _goto(self, url: str):
+        """Open a page in the browser, paced by the same limiter as the HTTP requests of the client"""
+        async with RateLimiterRegistry.slot("tieba", url) as limiter:
+            response = await self.playwright_page.goto(url, wait_until="domcontentloaded")
+        if response is not None:
+            limiter.observe_status(response.status)
+
     async def get(self, uri: str, params=None, return_ori_content=False, **kwargs) -> Any:
         """
         GET request with header signing
@@ -281,7 +271,7 @@ class BaiduTieBaClient(AbstractApiClient):
 
         try:
             # Use Playwright to access search page
-            await self.playwright_page.goto(full_url, wait_until="domcontentloaded")
+            await self._goto(full_url)
 
             # Wait for page loading, using delay setting from config file
             await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
@@ -318,7 +308,7 @@ class BaiduTieBaClient(AbstractApiClient):
 
         try:
             # Use Playwright to access post detail page
-            await self.playwright_page.goto(note_url, wait_until="domcontentloaded")
+            await self._goto(note_url)
 
             # Wait for page loading, using delay setting from config file
             await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
@@ -366,7 +356,7 @@ class BaiduTieBaClient(AbstractApiClient):
 
             try:
                 # Use Playwright to access comment page
-                await self.playwright_page.goto(comment_url, wait_until="domcontentloaded")
+                await self._goto(comment_url)
 
                 # Wait for page loading, using delay setting from config file
                 await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
@@ -397,7 +387,7 @@ class BaiduTieBaClient(AbstractApiClient):
                     comments, crawl_interval=crawl_interval, callback=callback
                 )
 
-                await asyncio.sleep(crawl_interval)
+                await crawl_sleep(crawl_interval)
                 current_page += 1
 
             except Exception as e:
@@ -452,7 +442,7 @@ class BaiduTieBaClient(AbstractApiClient):
 
                 try:
                     # Use Playwright to access sub-comment page
-                    await self.playwright_page.goto(sub_comment_url, wait_until="domcontentloaded")
+                    await self._goto(sub_comment_url)
 
                     # Wait for page loading, using delay setting from config file
                     await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
@@ -476,7 +466,7 @@ class BaiduTieBaClient(AbstractApiClient):
                         await callback(parment_comment.note_id, sub_comments)
 
                     all_sub_comments.extend(sub_comments)
-                    await asyncio.sleep(crawl_interval)
+                    await crawl_sleep(crawl_interval)
                     current_page += 1
 
                 except Exception as e:
@@ -509,7 +499,7 @@ class BaiduTieBaClient(AbstractApiClient):
 
         try:
             # Use Playwright to access Tieba page
-            await self.playwright_page.goto(tieba_url, wait_until="domcontentloaded")
+            await self._goto(tieba_url)
 
             # Wait for page loading, using delay setting from config file
             await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
@@ -544,7 +534,7 @@ class BaiduTieBaClient(AbstractApiClient):
 
         try:
             # Use Playwright to access creator homepage
-            await self.playwright_page.goto(creator_url, wait_until="domcontentloaded")
+            await self._goto(creator_url)
 
             # Wait for page loading, using delay setting from config file
             await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
@@ -579,7 +569,7 @@ class BaiduTieBaClient(AbstractApiClient):
 
         try:
             # Use Playwright to access creator post list page
-            await self.playwright_page.goto(creator_url, wait_until="domcontentloaded")
+            await self._goto(creator_url)
 
             # Wait for page loading, using delay setting from config file
             await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
@@ -652,7 +642,7 @@ class BaiduTieBaClient(AbstractApiClient):
             notes = await asyncio.gather(*note_detail_task)
             if callback:
                 await callback(notes)
-            await asyncio.sleep(crawl_interval)
+            await crawl_sleep(crawl_interval)
             result.extend(notes)
             page_number += 1
             total_get_count += page_per_count
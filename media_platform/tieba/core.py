@@ -38,7 +38,9 @@ from proxy.proxy_ip_pool import IpInfoModel, ProxyIpPool, create_ip_pool
 from store import tieba as tieba_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
-from var import crawler_type_var, source_keyword_var
+from tools.rate_limiter import crawl_sleep
+from tools.seen_index import SeenIndex, content_fingerprint
+from var import crawler_type_var
 
 from .client import BaiduTieBaClient
 from .field import SearchNoteType, SearchSortType
@@ -154,8 +156,8 @@ class TieBaCrawler(AbstractCrawler):
         if config.CRAWLER_MAX_NOTES_COUNT < tieba_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = tieba_limit_count
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
+
+        async def search_keyword(keyword: str):
             utils.logger.info(
                 f"[BaiduTieBaCrawler.search] Current search keyword: {keyword}"
             )
@@ -193,8 +195,7 @@ class TieBaCrawler(AbstractCrawler):
                     )
 
                     # Sleep after page navigation
-                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                    utils.logger.info(f"[TieBaCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page}")
+                    await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
 
                     page += 1
                 except Exception as ex:
@@ -203,6 +204,8 @@ class TieBaCrawler(AbstractCrawler):
                     )
                     break
 
+        await self.crawl_keywords(search_keyword)
+
     async def get_specified_tieba_notes(self):
         """
         Get the information and comments of the specified post by tieba name
@@ -235,8 +238,7 @@ class TieBaCrawler(AbstractCrawler):
                 await self.get_specified_notes([note.note_id for note in note_list])
 
                 # Sleep after processing notes
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[TieBaCrawler.get_specified_tieba_notes] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after processing notes from page {page_number}")
+                await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
 
                 page_number += tieba_limit_count
 
@@ -258,10 +260,13 @@ class TieBaCrawler(AbstractCrawler):
         ]
         note_details = await asyncio.gather(*task_list)
         note_details_model: List[TiebaNote] = []
+        seen_index = SeenIndex.get_instance("tieba")
         for note_detail in note_details:
             if note_detail is not None:
-                note_details_model.append(note_detail)
                 await tieba_store.update_tieba_note(note_detail)
+                # Incremental mode: the reply pages are only crawled again when the reply count changed
+                if seen_index.should_crawl(note_detail.note_id, content_fingerprint(note_detail.total_replay_num)):
+                    note_details_model.append(note_detail)
         await self.batch_get_note_comments(note_details_model)
 
     async def get_note_detail_async_task(
@@ -284,8 +289,7 @@ class TieBaCrawler(AbstractCrawler):
                 note_detail: TiebaNote = await self.tieba_client.get_note_by_id(note_id)
 
                 # Sleep after fetching note details
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[TieBaCrawler.get_note_detail_async_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching note details {note_id}")
+                await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
 
                 if not note_detail:
                     utils.logger.error(
@@ -314,6 +318,8 @@ class TieBaCrawler(AbstractCrawler):
 
         """
         if not config.ENABLE_GET_COMMENTS:
+            for note_detail in note_detail_list:
+                SeenIndex.get_instance("tieba").mark_crawled(note_detail.note_id)
             return
 
         semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
@@ -344,8 +350,7 @@ class TieBaCrawler(AbstractCrawler):
             )
 
             # Sleep before fetching comments
-            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-            utils.logger.info(f"[TieBaCrawler.get_comments_async_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds before fetching comments for note {note_detail.note_id}")
+            await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
 
             await self.tieba_client.get_note_all_comments(
                 note_detail=note_detail,
@@ -353,6 +358,7 @@ class TieBaCrawler(AbstractCrawler):
                 callback=tieba_store.batch_update_tieba_note_comments,
                 max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
             )
+            SeenIndex.get_instance("tieba").mark_crawled(note_detail.note_id)
 
     async def get_creators_and_notes(self) -> None:
         """
@@ -416,7 +422,7 @@ class TieBaCrawler(AbstractCrawler):
 
             # Step 2: Wait for page loading, using delay setting from config file
             utils.logger.info(f"[TieBaCrawler] Step 2: Waiting {config.CRAWLER_MAX_SLEEP_SEC} seconds to simulate user browsing...")
-            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+            await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
 
             # Step 3: Find and click "Tieba" link
             utils.logger.info("[TieBaCrawler] Step 3: Finding and clicking 'Tieba' link...")
@@ -476,7 +482,7 @@ class TieBaCrawler(AbstractCrawler):
 
             # Step 5: Wait for page to stabilize, using delay setting from config file
             utils.logger.info(f"[TieBaCrawler] Step 5: Page loaded, waiting {config.CRAWLER_MAX_SLEEP_SEC} seconds...")
-            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+            await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
 
             current_url = self.context_page.url
             utils.logger.info(f"[TieBaCrawler] Successfully entered Tieba via Baidu homepage! Current URL: {current_url}")
@@ -672,6 +678,9 @@ class TieBaCrawler(AbstractCrawler):
         Returns:
 
         """
+        # Release the pooled keep-alive connections of the API client
+        if getattr(self, "tieba_client", None):
+            await self.tieba_client.close_http_client()
         # If using CDP mode, need special handling
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
@@ -37,6 +37,8 @@ from tenacity import retry, stop_after_attempt, wait_fixed
 import config
 from proxy.proxy_mixin import ProxyRefreshMixin
 from tools import utils
+from tools.media_downloader import download_to_file
+from tools.rate_limiter import RateLimiterRegistry, crawl_sleep
 
 if TYPE_CHECKING:
     from proxy.proxy_ip_pool import ProxyIpPool
@@ -73,8 +75,10 @@ class WeiboClient(ProxyRefreshMixin):
         await self._refresh_proxy_if_expired()
 
         enable_return_response = kwargs.pop("return_response", False)
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
+        client = self.get_http_client()
+        async with RateLimiterRegistry.slot("weibo", url) as limiter:
             response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        limiter.observe_status(response.status_code)
 
         if enable_return_response:
             return response
@@ -83,6 +87,8 @@ class WeiboClient(ProxyRefreshMixin):
             data: Dict = response.json()
         except json.decoder.JSONDecodeError:
             # issue: #771 Search API returns error 432, retry multiple times + update h5 cookies
+            if response.status_code == 432:
+                limiter.record_throttle("http 432")
             utils.logger.error(f"[WeiboClient.request] request {method}:{url} err code: {response.status_code} res:{response.text}")
             await self.playwright_page.goto(self._host)
             await asyncio.sleep(2)
@@ -220,7 +226,7 @@ class WeiboClient(ProxyRefreshMixin):
                 comment_list = comment_list[:max_count - len(result)]
             if callback:  # If callback function exists, execute it
                 await callback(note_id, comment_list)
-            await asyncio.sleep(crawl_interval)
+            await crawl_sleep(crawl_interval)
             result.extend(comment_list)
             sub_comment_result = await self.get_comments_all_sub_comments(note_id, comment_list, callback)
             result.extend(sub_comment_result)
@@ -261,22 +267,22 @@ class WeiboClient(ProxyRefreshMixin):
         :return:
         """
         url = f"{self._host}/detail/{note_id}"
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
-            if response.status_code != 200:
-                raise DataFetchError(f"get weibo detail err: {response.text}")
-            match = re.search(r'var \$render_data = (\[.*?\])\[0\]', response.text, re.DOTALL)
-            if match:
-                render_data_json = match.group(1)
-                render_data_dict = json.loads(render_data_json)
-                note_detail = render_data_dict[0].get("status")
-                note_item = {"mblog": note_detail}
-                return note_item
-            else:
-                utils.logger.info(f"[WeiboClient.get_note_info_by_id] $render_data value not found")
-                return dict()
+        client = self.get_http_client()
+        response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
+        if response.status_code != 200:
+            raise DataFetchError(f"get weibo detail err: {response.text}")
+        match = re.search(r'var \$render_data = (\[.*?\])\[0\]', response.text, re.DOTALL)
+        if match:
+            render_data_json = match.group(1)
+            render_data_dict = json.loads(render_data_json)
+            note_detail = render_data_dict[0].get("status")
+            note_item = {"mblog": note_detail}
+            return note_item
+        else:
+            utils.logger.info(f"[WeiboClient.get_note_info_by_id] $render_data value not found")
+            return dict()
 
-    async def get_note_image(self, image_url: str) -> bytes:
+    def get_image_proxy_url(self, image_url: str) -> str:
         image_url = image_url[8:]  # Remove https://
         sub_url = image_url.split("/")
         image_url = ""
@@ -289,20 +295,34 @@ class WeiboClient(ProxyRefreshMixin):
                 image_url += sub_url[i] + "/"
         # Weibo image hosting has anti-hotlinking, so proxy access is needed
         # Since Weibo images are accessed through i1.wp.com, we need to concatenate the URL
-        final_uri = (f"{self._image_agent_host}"
-                     f"{image_url}")
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            try:
-                response = await client.request("GET", final_uri, timeout=self.timeout)
-                response.raise_for_status()
-                if not response.reason_phrase == "OK":
-                    utils.logger.error(f"[WeiboClient.get_note_image] request {final_uri} err, res:{response.text}")
-                    return None
-                else:
-                    return response.content
-            except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
-                utils.logger.error(f"[DouYinClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")    # Keep original exception type name for developer debugging
+        return f"{self._image_agent_host}{image_url}"
+
+    async def download_media(self, image_url: str, save_path: str) -> bool:
+        """
+        Stream a note image to save_path through the image proxy (used by MediaDownloader)
+        Args:
+            image_url: original image URL
+            save_path: final file path
+
+        Returns:
+            True if the file was saved
+        """
+        return await download_to_file(self.get_http_client(), self.get_image_proxy_url(image_url), save_path, timeout=self.timeout)
+
+    async def get_note_image(self, image_url: str) -> bytes:
+        final_uri = self.get_image_proxy_url(image_url)
+        client = self.get_http_client()
+        try:
+            response = await client.request("GET", final_uri, timeout=self.timeout)
+            response.raise_for_status()
+            if not response.reason_phrase == "OK":
+                utils.logger.error(f"[WeiboClient.get_note_image] request {final_uri} err, res:{response.text}")
                 return None
+            else:
+                return response.content
+        except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
+            utils.logger.error(f"[DouYinClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")    # Keep original exception type name for developer debugging
+            return None
 
     async def get_creator_container_info(self, creator_id: str) -> Dict:
         """
@@ -405,7 +425,7 @@ class WeiboClient(ProxyRefreshMixin):
             notes = [note for note in notes if note.get("card_type") == 9]
             if callback:
                 await callback(notes)
-            await asyncio.sleep(crawl_interval)
+            await crawl_sleep(crawl_interval)
             result.extend(notes)
             crawler_total_count += 10
             notes_has_more = notes_res.get("cardlistInfo", {}).get("total", 0) > crawler_total_count
@@ -42,10 +42,13 @@ from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import weibo as weibo_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
-from var import crawler_type_var, source_keyword_var
+from tools.media_downloader import MediaDownloader
+from tools.rate_limiter import crawl_sleep
+from tools.seen_index import SeenIndex, content_fingerprint
+from var import crawler_type_var
 
 from .client import WeiboClient
-from .exception import DataFetchError
+from .exception import DataFetchError, IPBlockError
 from .field import SearchType
 from .help import filter_search_result_card
 from .login import WeiboLogin
@@ -93,31 +96,14 @@ class WeiboCrawler(AbstractCrawler):
 
 
             self.context_page = await self.browser_context.new_page()
-            await self.context_page.goto(self.index_url)
-            await asyncio.sleep(2)
-
-
-            # Create a client to interact with the xiaohongshu website.
-            self.wb_client = await self.create_weibo_client(httpx_proxy_format)
-            if not await self.wb_client.pong():
-                login_obj = WeiboLogin(
-                    login_type=config.LOGIN_TYPE,
-                    login_phone="",  # your phone number
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=config.COOKIES,
-                )
-                await login_obj.begin()
-
-                # After successful login, redirect to mobile website and update mobile cookies
-                utils.logger.info("[WeiboCrawler.start] redirect weibo mobile homepage and update cookies on mobile platform")
-                await self.context_page.goto(self.mobile_index_url)
-                await asyncio.sleep(3)
-                # Only get mobile cookies to avoid confusion between PC and mobile cookies
-                await self.wb_client.update_cookies(
-                    browser_context=self.browser_context,
-                    urls=[self.mobile_index_url]
-                )
+
+            # Create a client to interact with the weibo website.
+            self.wb_client = await self.open_session(
+                self.browser_context, self.context_page, httpx_proxy_format, config.LOGIN_TYPE, config.COOKIES
+            )
+            self.wb_client = await self.create_session_pool(
+                playwright, "wb", self.wb_client, quarantine_on=(IPBlockError,)
+            )
 
             crawler_type_var.set(config.CRAWLER_TYPE)
             if config.CRAWLER_TYPE == "search":
@@ -157,8 +143,9 @@ class WeiboCrawler(AbstractCrawler):
             utils.logger.error(f"[WeiboCrawler.search] Invalid WEIBO_SEARCH_TYPE: {config.WEIBO_SEARCH_TYPE}")
             return
 
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
+        seen_index = SeenIndex.get_instance("wb")
+
+        async def search_keyword(keyword: str):
             utils.logger.info(f"[WeiboCrawler.search] Current search keyword: {keyword}")
             page = 1
             while (page - start_page + 1) * weibo_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
@@ -170,6 +157,14 @@ class WeiboCrawler(AbstractCrawler):
                 search_res = await self.wb_client.get_note_by_keyword(keyword=keyword, page=page, search_type=search_type)
                 note_id_list: List[str] = []
                 note_list = filter_search_result_card(search_res.get("cards"))
+                # Incremental mode: posts that were not edited and got no new comments are skipped
+                note_list = [
+                    note_item for note_item in note_list
+                    if not (note_item or {}).get("mblog") or seen_index.should_crawl(
+                        note_item["mblog"].get("id"),
+                        content_fingerprint(note_item["mblog"].get("comments_count"), note_item["mblog"].get("edit_at")),
+                    )
+                ]
                 # If full text fetching is enabled, batch get full text of posts
                 note_list = await self.batch_get_notes_full_text(note_list)
                 for note_item in note_list:
@@ -183,11 +178,12 @@ class WeiboCrawler(AbstractCrawler):
                 page += 1
 
                 # Sleep after page navigation
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[WeiboCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
+                await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
 
                 await self.batch_get_notes_comments(note_id_list)
 
+        await self.crawl_keywords(search_keyword)
+
     async def get_specified_notes(self):
         """
         get specified notes info
@@ -213,8 +209,7 @@ class WeiboCrawler(AbstractCrawler):
                 result = await self.wb_client.get_note_info_by_id(note_id)
 
                 # Sleep after fetching note details
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[WeiboCrawler.get_note_info_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching note details {note_id}")
+                await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
 
                 return result
             except DataFetchError as ex:
@@ -232,6 +227,8 @@ class WeiboCrawler(AbstractCrawler):
         """
         if not config.ENABLE_GET_COMMENTS:
             utils.logger.info(f"[WeiboCrawler.batch_get_note_comments] Crawling comment mode is not enabled")
+            for note_id in note_id_list:
+                SeenIndex.get_instance("wb").mark_crawled(note_id)
             return
 
         utils.logger.info(f"[WeiboCrawler.batch_get_notes_comments] note ids:{note_id_list}")
@@ -254,8 +251,7 @@ class WeiboCrawler(AbstractCrawler):
                 utils.logger.info(f"[WeiboCrawler.get_note_comments] begin get note_id: {note_id} comments ...")
 
                 # Sleep before fetching comments
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[WeiboCrawler.get_note_comments] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds before fetching comments for note {note_id}")
+                await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
 
                 await self.wb_client.get_note_all_comments(
                     note_id=note_id,
@@ -263,6 +259,7 @@ class WeiboCrawler(AbstractCrawler):
                     callback=weibo_store.batch_update_weibo_note_comments,
                     max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
                 )
+                SeenIndex.get_instance("wb").mark_crawled(note_id)
             except DataFetchError as ex:
                 utils.logger.error(f"[WeiboCrawler.get_note_comments] get note_id: {note_id} comment error: {ex}")
             except Exception as e:
@@ -281,7 +278,9 @@ class WeiboCrawler(AbstractCrawler):
         pics: List = mblog.get("pics")
         if not pics:
             return
-        for pic in pics:
+        note_id = str(mblog.get("id", ""))
+        downloader = MediaDownloader.get_instance()
+        for pic_num, pic in enumerate(pics):
             if isinstance(pic, str):
                 url = pic
                 pid = url.split("/")[-1].split(".")[0]
@@ -292,12 +291,8 @@ class WeiboCrawler(AbstractCrawler):
                 continue
             if not url:
                 continue
-            content = await self.wb_client.get_note_image(url)
-            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-            utils.logger.info(f"[WeiboCrawler.get_note_images] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching image")
-            if content != None:
-                extension_file_name = url.split(".")[-1]
-                await weibo_store.update_weibo_note_image(pid, content, extension_file_name)
+            save_path = weibo_store.get_weibo_note_image_path(pid, url.split(".")[-1])
+            downloader.submit(self.wb_client.download_media, url, save_path, "weibo", note_id, "image", pic_num)
 
     async def get_creators_and_notes(self) -> None:
         """
@@ -335,10 +330,46 @@ class WeiboCrawler(AbstractCrawler):
             else:
                 utils.logger.error(f"[WeiboCrawler.get_creators_and_notes] get creator info error, creator_id:{user_id}")
 
-    async def create_weibo_client(self, httpx_proxy: Optional[str]) -> WeiboClient:
-        """Create xhs client"""
+    async def open_session(
+        self,
+        browser_context: BrowserContext,
+        context_page: Page,
+        httpx_proxy: Optional[str],
+        login_type: str,
+        cookie_str: str,
+    ) -> WeiboClient:
+        """Log one account in and create its weibo client"""
+        await context_page.goto(self.index_url)
+        await asyncio.sleep(2)
+
+        wb_client = await self.create_weibo_client(httpx_proxy, browser_context, context_page)
+        if not await wb_client.pong():
+            login_obj = WeiboLogin(
+                login_type=login_type,
+                login_phone="",  # your phone number
+                browser_context=browser_context,
+                context_page=context_page,
+                cookie_str=cookie_str,
+            )
+            await login_obj.begin()
+
+            # After successful login, redirect to mobile website and update mobile cookies
+            utils.logger.info("[WeiboCrawler.open_session] redirect weibo mobile homepage and update cookies on mobile platform")
+            await context_page.goto(self.mobile_index_url)
+            await asyncio.sleep(3)
+            # Only get mobile cookies to avoid confusion between PC and mobile cookies
+            await wb_client.update_cookies(
+                browser_context=browser_context,
+                urls=[self.mobile_index_url]
+            )
+        return wb_client
+
+    async def create_weibo_client(
+        self, httpx_proxy: Optional[str], browser_context: BrowserContext, context_page: Page
+    ) -> WeiboClient:
+        """Create weibo client"""
         utils.logger.info("[WeiboCrawler.create_weibo_client] Begin create weibo API client ...")
-        cookie_str, cookie_dict = utils.convert_cookies(await self.browser_context.cookies(urls=[self.mobile_index_url]))
+        cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies(urls=[self.mobile_index_url]))
         weibo_client_obj = WeiboClient(
             proxy=httpx_proxy,
             headers={
@@ -348,7 +379,7 @@ class WeiboCrawler(AbstractCrawler):
                 "Referer": "https://m.weibo.cn",
                 "Content-Type": "application/json;charset=UTF-8",
             },
-            playwright_page=self.context_page,
+            playwright_page=context_page,
             cookie_dict=cookie_dict,
             proxy_ip_pool=self.ip_proxy_pool,  # Pass proxy pool for automatic refresh
         )
@@ -446,7 +477,7 @@ class WeiboCrawler(AbstractCrawler):
                 utils.logger.info(f"[WeiboCrawler.get_note_full_text] Successfully fetched full text for note: {note_id}")
 
             # Sleep after request to avoid rate limiting
-            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+            await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
         except DataFetchError as ex:
             utils.logger.error(f"[WeiboCrawler.get_note_full_text] Failed to fetch full text for note {note_id}: {ex}")
         except Exception as ex:
@@ -471,6 +502,9 @@ class WeiboCrawler(AbstractCrawler):
 
     async def close(self):
         """Close browser context"""
+        # Release the pooled keep-alive connections of the API client
+        if getattr(self, "wb_client", None):
+            await self.wb_client.close_http_client()
         # Special handling if using CDP mode
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
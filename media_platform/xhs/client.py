@@ -18,6 +18,7 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
 import asyncio
+import functools
 import json
 from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
@@ -30,15 +31,19 @@ import config
 from base.base_crawler import AbstractApiClient
 from proxy.proxy_mixin import ProxyRefreshMixin
 from tools import utils
+from tools.crawl_checkpoint import CrawlCheckpoint
+from tools.media_downloader import download_to_file
+from tools.rate_limiter import RateLimiterRegistry, crawl_sleep
+from tools.sub_comment_fanout import SubCommentBudget, SubCommentFanout
 
 if TYPE_CHECKING:
     from proxy.proxy_ip_pool import ProxyIpPool
 
-from .exception import DataFetchError, IPBlockError
+from .exception import CaptchaError, DataFetchError, IPBlockError
 from .field import SearchNoteType, SearchSortType
 from .help import get_search_id
 from .extractor import XiaoHongShuExtractor
-from .playwright_sign import sign_with_playwright
+from .playwright_sign import PlaywrightSigner
 
 
 class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
@@ -64,6 +69,7 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
         self.NOTE_ABNORMAL_CODE = -510001
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
+        self.signer = PlaywrightSigner(playwright_page, max_batch_size=config.XHS_SIGN_MAX_BATCH_SIZE)
         self._extractor = XiaoHongShuExtractor()
         # Initialize proxy pool (from ProxyRefreshMixin)
         self.init_proxy_pool(proxy_ip_pool)
@@ -91,9 +97,8 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
         else:
             raise ValueError("params or payload is required")
 
-        # Generate signature using playwright injection method
-        signs = await sign_with_playwright(
-            page=self.playwright_page,
+        # Generate signature using playwright injection method, concurrent requests share one evaluate
+        signs = await self.signer.sign(
             uri=url,
             data=data,
             a1=a1_value,
@@ -106,8 +111,8 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
             "x-S-Common": signs["x-s-common"],
             "X-B3-Traceid": signs["x-b3-traceid"],
         }
-        self.headers.update(headers)
-        return self.headers
+        # Return a copy, concurrent requests must not overwrite each other's signature
+        return {**self.headers, **headers}
 
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
     async def request(self, method, url, **kwargs) -> Union[str, Any]:
@@ -126,8 +131,10 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
 
         # return response.text
         return_response = kwargs.pop("return_response", False)
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
+        client = self.get_http_client()
+        async with RateLimiterRegistry.slot("xhs", url) as limiter:
             response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        limiter.observe_status(response.status_code)
 
         if response.status_code == 471 or response.status_code == 461:
             # someday someone maybe will bypass captcha
@@ -135,7 +142,7 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
             verify_uuid = response.headers["Verifyuuid"]
             msg = f"CAPTCHA appeared, request failed, Verifytype: {verify_type}, Verifyuuid: {verify_uuid}, Response: {response}"
             utils.logger.error(msg)
-            raise Exception(msg)
+            raise CaptchaError(msg)
 
         if return_response:
             return response.text
@@ -143,6 +150,7 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
         if data["success"]:
             return data.get("data", data.get("success", {}))
         elif data["code"] == self.IP_ERROR_CODE:
+            limiter.record_throttle("ip_error")
             raise IPBlockError(self.IP_ERROR_STR)
         else:
             err_msg = data.get("msg", None) or f"{response.text}"
@@ -189,24 +197,38 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
         # Check if proxy is expired before request
         await self._refresh_proxy_if_expired()
 
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            try:
-                response = await client.request("GET", url, timeout=self.timeout)
-                response.raise_for_status()
-                if not response.reason_phrase == "OK":
-                    utils.logger.error(
-                        f"[XiaoHongShuClient.get_note_media] request {url} err, res:{response.text}"
-                    )
-                    return None
-                else:
-                    return response.content
-            except (
-                httpx.HTTPError
-            ) as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
+        client = self.get_http_client()
+        try:
+            response = await client.request("GET", url, timeout=self.timeout)
+            response.raise_for_status()
+            if not response.reason_phrase == "OK":
                 utils.logger.error(
-                    f"[XiaoHongShuClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}"
-                )  # Keep original exception type name for developer debugging
+                    f"[XiaoHongShuClient.get_note_media] request {url} err, res:{response.text}"
+                )
                 return None
+            else:
+                return response.content
+        except (
+            httpx.HTTPError
+        ) as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
+            utils.logger.error(
+                f"[XiaoHongShuClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}"
+            )  # Keep original exception type name for developer debugging
+            return None
+
+    async def download_media(self, url: str, save_path: str) -> bool:
+        """
+        Stream a note image or video to save_path (used by MediaDownloader)
+        Args:
+            url: media URL
+            save_path: final file path
+
+        Returns:
+            True if the file was saved
+
+        """
+        await self._refresh_proxy_if_expired()
+        return await download_to_file(self.get_http_client(), url, save_path, timeout=self.timeout)
 
     async def pong(self) -> bool:
         """
@@ -240,6 +262,8 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        # b1 in localStorage changes with the login state
+        self.signer.invalidate_b1()
 
     async def get_note_by_keyword(
         self,
@@ -388,33 +412,44 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
 
         """
         result = []
+        # Continue after the last comment page of an interrupted run, see CrawlCheckpoint
+        checkpoint = CrawlCheckpoint.get_instance()
+        state = checkpoint.get_cursor("comments", note_id)
+        if state.done:
+            utils.logger.info(f"[XiaoHongShuClient.get_note_all_comments] Comments of note {note_id} already crawled")
+            return result
         comments_has_more = True
-        comments_cursor = ""
-        while comments_has_more and len(result) < max_count:
-            comments_res = await self.get_note_comments(
-                note_id=note_id, xsec_token=xsec_token, cursor=comments_cursor
-            )
-            comments_has_more = comments_res.get("has_more", False)
-            comments_cursor = comments_res.get("cursor", "")
-            if "comments" not in comments_res:
-                utils.logger.info(
-                    f"[XiaoHongShuClient.get_note_all_comments] No 'comments' key found in response: {comments_res}"
+        comments_cursor = state.cursor
+        crawled_count = state.count
+        # Reply threads are crawled in the background while the first-level pages are paginated
+        async with SubCommentFanout() as sub_comment_fanout:
+            while comments_has_more and crawled_count < max_count:
+                comments_res = await self.get_note_comments(
+                    note_id=note_id, xsec_token=xsec_token, cursor=comments_cursor
                 )
-                break
-            comments = comments_res["comments"]
-            if len(result) + len(comments) > max_count:
-                comments = comments[: max_count - len(result)]
-            if callback:
-                await callback(note_id, comments)
-            await asyncio.sleep(crawl_interval)
-            result.extend(comments)
-            sub_comments = await self.get_comments_all_sub_comments(
-                comments=comments,
-                xsec_token=xsec_token,
-                crawl_interval=crawl_interval,
-                callback=callback,
-            )
-            result.extend(sub_comments)
+                comments_has_more = comments_res.get("has_more", False)
+                comments_cursor = comments_res.get("cursor", "")
+                if "comments" not in comments_res:
+                    utils.logger.info(
+                        f"[XiaoHongShuClient.get_note_all_comments] No 'comments' key found in response: {comments_res}"
+                    )
+                    break
+                comments = comments_res["comments"]
+                if crawled_count + len(comments) > max_count:
+                    comments = comments[: max_count - crawled_count]
+                if callback:
+                    await callback(note_id, comments)
+                await crawl_sleep(crawl_interval)
+                result.extend(comments)
+                crawled_count += len(comments)
+                self._submit_sub_comment_threads(sub_comment_fanout, comments, xsec_token, crawl_interval, callback)
+                # The page only counts as crawled once its reply threads are done, --resume would skip them otherwise
+                sub_comment_fanout.on_done(functools.partial(
+                    checkpoint.save_cursor, "comments", note_id, comments_cursor, crawled_count
+                ))
+        result.extend(sub_comment_fanout.results)
+        if not comments_has_more or crawled_count >= max_count:
+            checkpoint.save_cursor("comments", note_id, comments_cursor, crawled_count, done=True)
         return result
 
     async def get_comments_all_sub_comments(
@@ -435,53 +470,66 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
         Returns:
 
         """
-        if not config.ENABLE_GET_SUB_COMMENTS:
-            utils.logger.info(
-                f"[XiaoHongShuCrawler.get_comments_all_sub_comments] Crawling sub_comment mode is not enabled"
-            )
-            return []
+        async with SubCommentFanout() as sub_comment_fanout:
+            self._submit_sub_comment_threads(sub_comment_fanout, comments, xsec_token, crawl_interval, callback)
+        return sub_comment_fanout.results
 
-        result = []
+    def _submit_sub_comment_threads(
+        self,
+        fanout: SubCommentFanout,
+        comments: List[Dict],
+        xsec_token: str,
+        crawl_interval: float,
+        callback: Optional[Callable],
+    ):
+        if not config.ENABLE_GET_SUB_COMMENTS:
+            return
         for comment in comments:
-            note_id = comment.get("note_id")
-            sub_comments = comment.get("sub_comments")
-            if sub_comments and callback:
-                await callback(note_id, sub_comments)
-
-            sub_comment_has_more = comment.get("sub_comment_has_more")
-            if not sub_comment_has_more:
-                continue
+            if comment.get("sub_comments") or comment.get("sub_comment_has_more"):
+                fanout.submit(functools.partial(self._crawl_sub_comment_thread, comment, xsec_token, crawl_interval, callback))
 
-            root_comment_id = comment.get("id")
-            sub_comment_cursor = comment.get("sub_comment_cursor")
+    async def _crawl_sub_comment_thread(
+        self,
+        comment: Dict,
+        xsec_token: str,
+        crawl_interval: float,
+        callback: Optional[Callable],
+        budget: SubCommentBudget,
+    ):
+        """Store the replies embedded in a first-level comment, then page through the rest of its thread"""
+        note_id = comment.get("note_id")
+        sub_comments = budget.take(comment.get("sub_comments") or [])
+        if sub_comments and callback:
+            await callback(note_id, sub_comments)
+
+        root_comment_id = comment.get("id")
+        sub_comment_has_more = comment.get("sub_comment_has_more")
+        sub_comment_cursor = comment.get("sub_comment_cursor")
+        while sub_comment_has_more and not budget.exhausted:
+            comments_res = await self.get_note_sub_comments(
+                note_id=note_id,
+                root_comment_id=root_comment_id,
+                xsec_token=xsec_token,
+                num=10,
+                cursor=sub_comment_cursor,
+            )
 
-            while sub_comment_has_more:
-                comments_res = await self.get_note_sub_comments(
-                    note_id=note_id,
-                    root_comment_id=root_comment_id,
-                    xsec_token=xsec_token,
-                    num=10,
-                    cursor=sub_comment_cursor,
+            if comments_res is None:
+                utils.logger.info(
+                    f"[XiaoHongShuClient.get_comments_all_sub_comments] No response found for note_id: {note_id}"
                 )
-
-                if comments_res is None:
-                    utils.logger.info(
-                        f"[XiaoHongShuClient.get_comments_all_sub_comments] No response found for note_id: {note_id}"
-                    )
-                    continue
-                sub_comment_has_more = comments_res.get("has_more", False)
-                sub_comment_cursor = comments_res.get("cursor", "")
-                if "comments" not in comments_res:
-                    utils.logger.info(
-                        f"[XiaoHongShuClient.get_comments_all_sub_comments] No 'comments' key found in response: {comments_res}"
-                    )
-                    break
-                comments = comments_res["comments"]
-                if callback:
-                    await callback(note_id, comments)
-                await asyncio.sleep(crawl_interval)
-                result.extend(comments)
-        return result
+                break
+            sub_comment_has_more = comments_res.get("has_more", False)
+            sub_comment_cursor = comments_res.get("cursor", "")
+            if "comments" not in comments_res:
+                utils.logger.info(
+                    f"[XiaoHongShuClient.get_comments_all_sub_comments] No 'comments' key found in response: {comments_res}"
+                )
+                break
+            sub_comments = budget.take(comments_res["comments"])
+            if callback:
+                await callback(note_id, sub_comments)
+            await crawl_sleep(crawl_interval)
 
     async def get_creator_info(
         self, user_id: str, xsec_token: str = "", xsec_source: str = ""
@@ -559,9 +607,16 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
 
         """
         result = []
+        # Continue after the last note page of an interrupted run, see CrawlCheckpoint
+        checkpoint = CrawlCheckpoint.get_instance()
+        state = checkpoint.get_cursor("creator", user_id)
+        if state.done:
+            utils.logger.info(f"[XiaoHongShuClient.get_all_notes_by_creator] Notes of user {user_id} already crawled")
+            return result
         notes_has_more = True
-        notes_cursor = ""
-        while notes_has_more and len(result) < config.CRAWLER_MAX_NOTES_COUNT:
+        notes_cursor = state.cursor
+        crawled_count = state.count
+        while notes_has_more and crawled_count < config.CRAWLER_MAX_NOTES_COUNT:
             notes_res = await self.get_notes_by_creator(
                 user_id, notes_cursor, xsec_token=xsec_token, xsec_source=xsec_source
             )
@@ -584,7 +639,7 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
                 f"[XiaoHongShuClient.get_all_notes_by_creator] got user_id:{user_id} notes len : {len(notes)}"
             )
 
-            remaining = config.CRAWLER_MAX_NOTES_COUNT - len(result)
+            remaining = config.CRAWLER_MAX_NOTES_COUNT - crawled_count
             if remaining <= 0:
                 break
 
@@ -593,7 +648,10 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
                 await callback(notes_to_add)
 
             result.extend(notes_to_add)
-            await asyncio.sleep(crawl_interval)
+            crawled_count += len(notes_to_add)
+            checkpoint.save_cursor("creator", user_id, notes_cursor, crawled_count,
+                                   done=not notes_has_more or crawled_count >= config.CRAWLER_MAX_NOTES_COUNT)
+            await crawl_sleep(crawl_interval)
 
         utils.logger.info(
             f"[XiaoHongShuClient.get_all_notes_by_creator] Finished getting notes for user {user_id}, total: {len(result)}"
@@ -19,7 +19,6 @@
 
 import asyncio
 import os
-import random
 from asyncio import Task
 from typing import Dict, List, Optional
 
@@ -40,10 +39,14 @@ from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import xhs as xhs_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.crawl_checkpoint import CrawlCheckpoint
+from tools.media_downloader import MediaDownloader
+from tools.rate_limiter import crawl_sleep
+from tools.seen_index import SeenIndex, content_fingerprint
 from var import crawler_type_var, source_keyword_var
 
 from .client import XiaoHongShuClient
-from .exception import DataFetchError
+from .exception import CaptchaError, DataFetchError, IPBlockError
 from .field import SearchSortType
 from .help import parse_note_info_from_note_url, parse_creator_info_from_url, get_search_id
 from .login import XiaoHongShuLogin
@@ -93,20 +96,14 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 await self.browser_context.add_init_script(path="libs/stealth.min.js")
 
             self.context_page = await self.browser_context.new_page()
-            await self.context_page.goto(self.index_url)
 
             # Create a client to interact with the Xiaohongshu website.
-            self.xhs_client = await self.create_xhs_client(httpx_proxy_format)
-            if not await self.xhs_client.pong():
-                login_obj = XiaoHongShuLogin(
-                    login_type=config.LOGIN_TYPE,
-                    login_phone="",  # input your phone number
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=config.COOKIES,
-                )
-                await login_obj.begin()
-                await self.xhs_client.update_cookies(browser_context=self.browser_context)
+            self.xhs_client = await self.open_session(
+                self.browser_context, self.context_page, httpx_proxy_format, config.LOGIN_TYPE, config.COOKIES
+            )
+            self.xhs_client = await self.create_session_pool(
+                playwright, "xhs", self.xhs_client, quarantine_on=(IPBlockError, CaptchaError)
+            )
 
             crawler_type_var.set(config.CRAWLER_TYPE)
             if config.CRAWLER_TYPE == "search":
@@ -121,6 +118,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
             else:
                 pass
 
+            utils.logger.info(f"[XiaoHongShuCrawler.start] Sign latency: {self.xhs_client.signer.metrics.snapshot()}")
             utils.logger.info("[XiaoHongShuCrawler.start] Xhs Crawler finished ...")
 
     async def search(self) -> None:
@@ -130,10 +128,37 @@ class XiaoHongShuCrawler(AbstractCrawler):
         if config.CRAWLER_MAX_NOTES_COUNT < xhs_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = xhs_limit_count
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
+        detail_semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        comment_semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        checkpoint = CrawlCheckpoint.get_instance()
+        seen_index = SeenIndex.get_instance("xhs")
+
+        async def fetch_note_detail(post_item: Dict):
+            note_detail = await self.get_note_detail_async_task(
+                note_id=post_item.get("id"),
+                xsec_source=post_item.get("xsec_source"),
+                xsec_token=post_item.get("xsec_token"),
+                semaphore=detail_semaphore,
+            )
+            if not note_detail:
+                checkpoint.finish(post_item.get("id"))
+                return
+            await xhs_store.update_xhs_note(note_detail)
+            await pipeline.put("media", note_detail)
+            if not await pipeline.put("comment", note_detail):
+                checkpoint.finish(post_item.get("id"))
+                seen_index.mark_crawled(post_item.get("id"))
+
+        async def fetch_note_comments(note_detail: Dict):
+            await self.get_comments(note_id=note_detail.get("note_id"), xsec_token=note_detail.get("xsec_token"), semaphore=comment_semaphore)
+
+        async def search_keyword(keyword: str):
             utils.logger.info(f"[XiaoHongShuCrawler.search] Current search keyword: {keyword}")
-            page = 1
+            state = checkpoint.get_cursor("keyword", keyword)
+            if state.done:
+                utils.logger.info(f"[XiaoHongShuCrawler.search] keyword: {keyword} already crawled")
+                return
+            page = int(state.cursor) if state.cursor else 1
             search_id = get_search_id()
             while (page - start_page + 1) * xhs_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
                 if page < start_page:
@@ -143,8 +168,6 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
                 try:
                     utils.logger.info(f"[XiaoHongShuCrawler.search] search Xiaohongshu keyword: {keyword}, page: {page}")
-                    note_ids: List[str] = []
-                    xsec_tokens: List[str] = []
                     notes_res = await self.xhs_client.get_note_by_keyword(
                         keyword=keyword,
                         search_id=search_id,
@@ -154,34 +177,42 @@ class XiaoHongShuCrawler(AbstractCrawler):
                     utils.logger.info(f"[XiaoHongShuCrawler.search] Search notes response: {notes_res}")
                     if not notes_res or not notes_res.get("has_more", False):
                         utils.logger.info("[XiaoHongShuCrawler.search] No more content!")
+                        checkpoint.save_cursor("keyword", keyword, page, done=True)
                         break
-                    semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-                    task_list = [
-                        self.get_note_detail_async_task(
-                            note_id=post_item.get("id"),
-                            xsec_source=post_item.get("xsec_source"),
-                            xsec_token=post_item.get("xsec_token"),
-                            semaphore=semaphore,
-                        ) for post_item in notes_res.get("items", {}) if post_item.get("model_type") not in ("rec_query", "hot_query")
-                    ]
-                    note_details = await asyncio.gather(*task_list)
-                    for note_detail in note_details:
-                        if note_detail:
-                            await xhs_store.update_xhs_note(note_detail)
-                            await self.get_notice_media(note_detail)
-                            note_ids.append(note_detail.get("note_id"))
-                            xsec_tokens.append(note_detail.get("xsec_token"))
+                    for post_item in notes_res.get("items", {}):
+                        if post_item.get("model_type") in ("rec_query", "hot_query"):
+                            continue
+                        # Incremental mode: notes without new comments since the last crawl are skipped
+                        interact_info = (post_item.get("note_card") or {}).get("interact_info") or {}
+                        if not seen_index.should_crawl(post_item.get("id"), content_fingerprint(interact_info.get("comment_count"))):
+                            continue
+                        # Queued notes stay in the frontier until their comments are crawled
+                        checkpoint.add_pending(post_item.get("id"), {
+                            "id": post_item.get("id"),
+                            "xsec_source": post_item.get("xsec_source"),
+                            "xsec_token": post_item.get("xsec_token"),
+                            "source_keyword": keyword,
+                        })
+                        await pipeline.put("detail", post_item)
                     page += 1
-                    utils.logger.info(f"[XiaoHongShuCrawler.search] Note details: {note_details}")
-                    await self.batch_get_note_comments(note_ids, xsec_tokens)
+                    checkpoint.save_cursor("keyword", keyword, page)
 
                     # Sleep after each page navigation
-                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                    utils.logger.info(f"[XiaoHongShuCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
+                    await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
                 except DataFetchError:
                     utils.logger.error("[XiaoHongShuCrawler.search] Get note detail error")
                     break
 
+        async def search_pages():
+            # Notes that an interrupted run found but did not finish
+            for post_item in checkpoint.pending():
+                source_keyword_var.set(post_item.get("source_keyword", ""))
+                await pipeline.put("detail", post_item)
+            await self.crawl_keywords(search_keyword)
+
+        pipeline = self.create_crawl_pipeline(fetch_note_detail, fetch_note_comments, self.get_notice_media)
+        await pipeline.run(search_pages)
+
     async def get_creators_and_notes(self) -> None:
         """Get creator's notes and retrieve their comment information."""
         utils.logger.info("[XiaoHongShuCrawler.get_creators_and_notes] Begin get Xiaohongshu creators")
@@ -215,12 +246,11 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 xsec_source=creator_info.xsec_source,
             )
 
-            note_ids = []
-            xsec_tokens = []
-            for note_item in all_notes_list:
-                note_ids.append(note_item.get("note_id"))
-                xsec_tokens.append(note_item.get("xsec_token"))
-            await self.batch_get_note_comments(note_ids, xsec_tokens)
+            # Notes of this run plus the notes whose comments an interrupted run did not finish
+            note_tokens: Dict[str, str] = {}
+            for note_item in CrawlCheckpoint.get_instance().pending() + all_notes_list:
+                note_tokens[note_item.get("note_id")] = note_item.get("xsec_token")
+            await self.batch_get_note_comments(list(note_tokens.keys()), list(note_tokens.values()))
 
     async def fetch_creator_notes_detail(self, note_list: List[Dict]):
         """Concurrently obtain the specified post list and save the data"""
@@ -239,6 +269,11 @@ class XiaoHongShuCrawler(AbstractCrawler):
             if note_detail:
                 await xhs_store.update_xhs_note(note_detail)
                 await self.get_notice_media(note_detail)
+                if config.ENABLE_GET_COMMENTS:
+                    CrawlCheckpoint.get_instance().add_pending(note_detail.get("note_id"), {
+                        "note_id": note_detail.get("note_id"),
+                        "xsec_token": note_detail.get("xsec_token"),
+                    })
 
     async def get_specified_notes(self):
         """Get the information and comments of the specified post
@@ -304,8 +339,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 note_detail.update({"xsec_token": xsec_token, "xsec_source": xsec_source})
 
                 # Sleep after fetching note detail
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[get_note_detail_async_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching note {note_id}")
+                await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
 
                 return note_detail
 
@@ -346,15 +380,41 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 callback=xhs_store.batch_update_xhs_note_comments,
                 max_count=CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
             )
+            CrawlCheckpoint.get_instance().finish(note_id)
+            SeenIndex.get_instance("xhs").mark_crawled(note_id)
 
             # Sleep after fetching comments
-            await asyncio.sleep(crawl_interval)
-            utils.logger.info(f"[XiaoHongShuCrawler.get_comments] Sleeping for {crawl_interval} seconds after fetching comments for note {note_id}")
+            await crawl_sleep(crawl_interval)
+
+    async def open_session(
+        self,
+        browser_context: BrowserContext,
+        context_page: Page,
+        httpx_proxy: Optional[str],
+        login_type: str,
+        cookie_str: str,
+    ) -> XiaoHongShuClient:
+        """Log one account in and create its Xiaohongshu client"""
+        await context_page.goto(self.index_url)
+        xhs_client = await self.create_xhs_client(httpx_proxy, browser_context, context_page)
+        if not await xhs_client.pong():
+            login_obj = XiaoHongShuLogin(
+                login_type=login_type,
+                login_phone="",  # input your phone number
+                browser_context=browser_context,
+                context_page=context_page,
+                cookie_str=cookie_str,
+            )
+            await login_obj.begin()
+            await xhs_client.update_cookies(browser_context=browser_context)
+        return xhs_client
 
-    async def create_xhs_client(self, httpx_proxy: Optional[str]) -> XiaoHongShuClient:
+    async def create_xhs_client(
+        self, httpx_proxy: Optional[str], browser_context: BrowserContext, context_page: Page
+    ) -> XiaoHongShuClient:
         """Create Xiaohongshu client"""
         utils.logger.info("[XiaoHongShuCrawler.create_xhs_client] Begin create Xiaohongshu API client ...")
-        cookie_str, cookie_dict = utils.convert_cookies(await self.browser_context.cookies())
+        cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         xhs_client_obj = XiaoHongShuClient(
             proxy=httpx_proxy,
             headers={
@@ -375,7 +435,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 "user-agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36",
                 "Cookie": cookie_str,
             },
-            playwright_page=self.context_page,
+            playwright_page=context_page,
             cookie_dict=cookie_dict,
             proxy_ip_pool=self.ip_proxy_pool,  # Pass proxy pool for automatic refresh
         )
@@ -442,6 +502,9 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
     async def close(self):
         """Close browser context"""
+        # Release the pooled keep-alive connections of the API client
+        if getattr(self, "xhs_client", None):
+            await self.xhs_client.close_http_client()
         # Special handling if using CDP mode
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
@@ -474,18 +537,13 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
         if not image_list:
             return
-        picNum = 0
-        for pic in image_list:
+        downloader = MediaDownloader.get_instance()
+        for pic_num, pic in enumerate(image_list):
             url = pic.get("url")
             if not url:
                 continue
-            content = await self.xhs_client.get_note_media(url)
-            await asyncio.sleep(random.random())
-            if content is None:
-                continue
-            extension_file_name = f"{picNum}.jpg"
-            picNum += 1
-            await xhs_store.update_xhs_note_image(note_id, content, extension_file_name)
+            save_path = xhs_store.get_xhs_note_image_path(note_id, f"{pic_num}.jpg")
+            downloader.submit(self.xhs_client.download_media, url, save_path, "xhs", note_id, "image", pic_num)
 
     async def get_notice_video(self, note_item: Dict):
         """Get note videos. Please use get_notice_media
@@ -501,12 +559,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
         if not videos:
             return
-        videoNum = 0
-        for url in videos:
-            content = await self.xhs_client.get_note_media(url)
-            await asyncio.sleep(random.random())
-            if content is None:
-                continue
-            extension_file_name = f"{videoNum}.mp4"
-            videoNum += 1
-            await xhs_store.update_xhs_note_video(note_id, content, extension_file_name)
+        downloader = MediaDownloader.get_instance()
+        for video_num, url in enumerate(videos):
+            save_path = xhs_store.get_xhs_note_video_path(note_id, f"{video_num}.mp4")
+            downloader.submit(self.xhs_client.download_media, url, save_path, "xhs", note_id, "video", video_num)
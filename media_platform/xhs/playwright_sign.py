@@ -18,10 +18,12 @@
 
 # Generate Xiaohongshu signature by calling window.mnsv2 via Playwright injection
 
+import asyncio
 import hashlib
 import json
 import time
-from typing import Any, Dict, Optional, Union
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlparse, quote
 
 from playwright.async_api import Page
@@ -115,8 +117,8 @@ def _build_xs_common(a1: str, b1: str, x_s: str, x_t: str) -> str:
 async def get_b1_from_localstorage(page: Page) -> str:
     """Get b1 value from localStorage"""
     try:
-        local_storage = await page.evaluate("() => window.localStorage")
-        return local_storage.get("b1", "")
+        b1 = await page.evaluate("() => window.localStorage.getItem('b1')")
+        return b1 or ""
     except Exception:
         return ""
 
@@ -200,6 +202,125 @@ async def sign_with_playwright(
     }
 
 
+# Signs a batch of [sign_str, md5_str] pairs in one round trip, b1 is only read when requested
+_BATCH_SIGN_JS = """
+([items, readB1]) => ({
+    b1: readB1 ? (window.localStorage.getItem('b1') || '') : null,
+    x3: items.map(([signStr, md5Str]) => {
+        try {
+            return window.mnsv2(signStr, md5Str) || '';
+        } catch (e) {
+            return '';
+        }
+    }),
+})
+"""
+
+
+class SignLatencyMetrics:
+    """Signing latency (queue wait + evaluate) of the last samples, in milliseconds"""
+
+    def __init__(self, window: int = 1000):
+        self.count = 0
+        self.batches = 0
+        self.max_ms = 0.0
+        self._total_ms = 0.0
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, latency_ms: float):
+        self.count += 1
+        self._total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+        self._samples.append(latency_ms)
+
+    def snapshot(self) -> Dict[str, float]:
+        """count / batches / avg_ms / p50_ms / p95_ms / max_ms"""
+        samples = sorted(self._samples)
+
+        def percentile(p: float) -> float:
+            return round(samples[min(len(samples) - 1, int(len(samples) * p))], 2) if samples else 0.0
+
+        return {
+            "count": self.count,
+            "batches": self.batches,
+            "avg_ms": round(self._total_ms / self.count, 2) if self.count else 0.0,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(self.max_ms, 2),
+        }
+
+
+class PlaywrightSigner:
+    """
+    Signs XHS requests with window.mnsv2 in the shared page
+    Requests queued while an evaluate is running are signed together in the next evaluate, and b1 is
+    cached until invalidate_b1() (called when the cookies are updated)
+    """
+
+    def __init__(self, page: Page, max_batch_size: int = 16):
+        self.page = page
+        self.max_batch_size = max(1, max_batch_size)
+        self.metrics = SignLatencyMetrics()
+        self._b1: Optional[str] = None
+        self._pending: List[Tuple[str, str, float, asyncio.Future]] = []
+        self._worker: Optional[asyncio.Task] = None
+
+    def invalidate_b1(self):
+        self._b1 = None
+
+    async def sign(
+        self,
+        uri: str,
+        data: Optional[Union[Dict, str]] = None,
+        a1: str = "",
+        method: str = "POST",
+    ) -> Dict[str, Any]:
+        """
+        Same result as sign_with_playwright
+
+        Returns:
+            Dictionary containing x-s, x-t, x-s-common, x-b3-traceid
+        """
+        sign_str = _build_sign_string(uri, data, method)
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((sign_str, _md5_hex(sign_str), time.perf_counter(), future))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._drain())
+        x3_value = await future
+
+        x_s = _build_xs_payload(x3_value, "object" if isinstance(data, (dict, list)) else "string")
+        x_t = str(int(time.time() * 1000))
+        return {
+            "x-s": x_s,
+            "x-t": x_t,
+            "x-s-common": _build_xs_common(a1, self._b1 or "", x_s, x_t),
+            "x-b3-traceid": get_trace_id(),
+        }
+
+    async def _drain(self):
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            read_b1 = self._b1 is None
+            try:
+                result = await self.page.evaluate(_BATCH_SIGN_JS, [[[item[0], item[1]] for item in batch], read_b1])
+                x3_values = result.get("x3") or []
+                if read_b1 and result.get("b1"):
+                    self._b1 = result["b1"]
+            except asyncio.CancelledError:
+                for *_, future in batch + self._pending:
+                    future.cancel()
+                raise
+            except Exception:
+                x3_values = []
+            self.metrics.batches += 1
+            now = time.perf_counter()
+            for i, (_, _, queued_at, future) in enumerate(batch):
+                self.metrics.record((now - queued_at) * 1000)
+                if not future.done():
+                    future.set_result(x3_values[i] if i < len(x3_values) else "")
+
+
 async def pre_headers_with_playwright(
     page: Page,
     url: str,
@@ -41,10 +41,12 @@ from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import zhihu as zhihu_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
-from var import crawler_type_var, source_keyword_var
+from tools.rate_limiter import crawl_sleep
+from tools.seen_index import SeenIndex, content_fingerprint
+from var import crawler_type_var
 
 from .client import ZhiHuClient
-from .exception import DataFetchError
+from .exception import DataFetchError, ForbiddenError, IPBlockError
 from .help import ZhihuExtractor, judge_zhihu_url
 from .login import ZhiHuLogin
 
@@ -100,32 +102,14 @@ class ZhihuCrawler(AbstractCrawler):
                 await self.browser_context.add_init_script(path="libs/stealth.min.js")
 
             self.context_page = await self.browser_context.new_page()
-            await self.context_page.goto(self.index_url, wait_until="domcontentloaded")
 
             # Create a client to interact with the zhihu website.
-            self.zhihu_client = await self.create_zhihu_client(httpx_proxy_format)
-            if not await self.zhihu_client.pong():
-                login_obj = ZhiHuLogin(
-                    login_type=config.LOGIN_TYPE,
-                    login_phone="",  # input your phone number
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=config.COOKIES,
-                )
-                await login_obj.begin()
-                await self.zhihu_client.update_cookies(
-                    browser_context=self.browser_context
-                )
-
-            # Zhihu's search API requires opening the search page first to access cookies, homepage alone won't work
-            utils.logger.info(
-                "[ZhihuCrawler.start] Zhihu navigating to search page to get search page cookies, this process takes about 5 seconds"
+            self.zhihu_client = await self.open_session(
+                self.browser_context, self.context_page, httpx_proxy_format, config.LOGIN_TYPE, config.COOKIES
             )
-            await self.context_page.goto(
-                f"{self.index_url}/search?q=python&search_source=Guess&utm_content=search_hot&type=content"
+            self.zhihu_client = await self.create_session_pool(
+                playwright, "zhihu", self.zhihu_client, quarantine_on=(IPBlockError, ForbiddenError)
             )
-            await asyncio.sleep(5)
-            await self.zhihu_client.update_cookies(browser_context=self.browser_context)
 
             crawler_type_var.set(config.CRAWLER_TYPE)
             if config.CRAWLER_TYPE == "search":
@@ -149,8 +133,9 @@ class ZhihuCrawler(AbstractCrawler):
         if config.CRAWLER_MAX_NOTES_COUNT < zhihu_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = zhihu_limit_count
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
+        seen_index = SeenIndex.get_instance("zhihu")
+
+        async def search_keyword(keyword: str):
             utils.logger.info(
                 f"[ZhihuCrawler.search] Current search keyword: {keyword}"
             )
@@ -181,18 +166,23 @@ class ZhihuCrawler(AbstractCrawler):
                         break
 
                     # Sleep after page navigation
-                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                    utils.logger.info(f"[ZhihuCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
+                    await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
 
                     page += 1
                     for content in content_list:
                         await zhihu_store.update_zhihu_content(content)
 
-                    await self.batch_get_content_comments(content_list)
+                    # Incremental mode: comments are only crawled again for edited or newly commented contents
+                    await self.batch_get_content_comments([
+                        content for content in content_list
+                        if seen_index.should_crawl(content.content_id, content_fingerprint(content.comment_count, content.updated_time))
+                    ])
                 except DataFetchError:
                     utils.logger.error("[ZhihuCrawler.search] Search content error")
                     return
 
+        await self.crawl_keywords(search_keyword)
+
     async def batch_get_content_comments(self, content_list: List[ZhihuContent]):
         """
         Batch get content comments
@@ -206,6 +196,8 @@ class ZhihuCrawler(AbstractCrawler):
             utils.logger.info(
                 f"[ZhihuCrawler.batch_get_content_comments] Crawling comment mode is not enabled"
             )
+            for content_item in content_list:
+                SeenIndex.get_instance("zhihu").mark_crawled(content_item.content_id)
             return
 
         semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
@@ -235,14 +227,14 @@ class ZhihuCrawler(AbstractCrawler):
             )
 
             # Sleep before fetching comments
-            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-            utils.logger.info(f"[ZhihuCrawler.get_comments] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds before fetching comments for content {content_item.content_id}")
+            await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
 
             await self.zhihu_client.get_note_all_comments(
                 content=content_item,
                 crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
                 callback=zhihu_store.batch_update_zhihu_note_comments,
             )
+            SeenIndex.get_instance("zhihu").mark_crawled(content_item.content_id)
 
     async def get_creators_and_notes(self) -> None:
         """
@@ -326,8 +318,7 @@ class ZhihuCrawler(AbstractCrawler):
                 result = await self.zhihu_client.get_answer_info(question_id, answer_id)
 
                 # Sleep after fetching answer details
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[ZhihuCrawler.get_note_detail] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching answer details {answer_id}")
+                await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
 
                 return result
 
@@ -339,8 +330,7 @@ class ZhihuCrawler(AbstractCrawler):
                 result = await self.zhihu_client.get_article_info(article_id)
 
                 # Sleep after fetching article details
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[ZhihuCrawler.get_note_detail] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching article details {article_id}")
+                await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
 
                 return result
 
@@ -352,8 +342,7 @@ class ZhihuCrawler(AbstractCrawler):
                 result = await self.zhihu_client.get_video_info(video_id)
 
                 # Sleep after fetching video details
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[ZhihuCrawler.get_note_detail] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching video details {video_id}")
+                await crawl_sleep(config.CRAWLER_MAX_SLEEP_SEC)
 
                 return result
 
@@ -388,13 +377,48 @@ class ZhihuCrawler(AbstractCrawler):
 
         await self.batch_get_content_comments(need_get_comment_notes)
 
-    async def create_zhihu_client(self, httpx_proxy: Optional[str]) -> ZhiHuClient:
+    async def open_session(
+        self,
+        browser_context: BrowserContext,
+        context_page: Page,
+        httpx_proxy: Optional[str],
+        login_type: str,
+        cookie_str: str,
+    ) -> ZhiHuClient:
+        """Log one account in and create its zhihu client"""
+        await context_page.goto(self.index_url, wait_until="domcontentloaded")
+        zhihu_client = await self.create_zhihu_client(httpx_proxy, browser_context, context_page)
+        if not await zhihu_client.pong():
+            login_obj = ZhiHuLogin(
+                login_type=login_type,
+                login_phone="",  # input your phone number
+                browser_context=browser_context,
+                context_page=context_page,
+                cookie_str=cookie_str,
+            )
+            await login_obj.begin()
+            await zhihu_client.update_cookies(browser_context=browser_context)
+
+        # Zhihu's search API requires opening the search page first to access cookies, homepage alone won't work
+        utils.logger.info(
+            "[ZhihuCrawler.open_session] Zhihu navigating to search page to get search page cookies, this process takes about 5 seconds"
+        )
+        await context_page.goto(
+            f"{self.index_url}/search?q=python&search_source=Guess&utm_content=search_hot&type=content"
+        )
+        await asyncio.sleep(5)
+        await zhihu_client.update_cookies(browser_context=browser_context)
+        return zhihu_client
+
+    async def create_zhihu_client(
+        self, httpx_proxy: Optional[str], browser_context: BrowserContext, context_page: Page
+    ) -> ZhiHuClient:
         """Create zhihu client"""
         utils.logger.info(
             "[ZhihuCrawler.create_zhihu_client] Begin create zhihu API client ..."
         )
         cookie_str, cookie_dict = utils.convert_cookies(
-            await self.browser_context.cookies()
+            await browser_context.cookies()
         )
         zhihu_client_obj = ZhiHuClient(
             proxy=httpx_proxy,
@@ -410,7 +434,7 @@ class ZhihuCrawler(AbstractCrawler):
                 "x-requested-with": "fetch",
                 "x-zse-93": "101_3_3.0",
             },
-            playwright_page=self.context_page,
+            playwright_page=context_page,
             cookie_dict=cookie_dict,
             proxy_ip_pool=self.ip_proxy_pool,  # Pass proxy pool for automatic refresh
         )
@@ -485,6 +509,9 @@ class ZhihuCrawler(AbstractCrawler):
 
     async def close(self):
         """Close browser context"""
+        # Release the pooled keep-alive connections of the API client
+        if getattr(self, "zhihu_client", None):
+            await self.zhihu_client.close_http_client()
         # Special handling if using CDP mode
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
@@ -30,6 +30,7 @@ from constant import zhihu as zhihu_constant
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
 from tools import utils
 from tools.crawler_util import extract_text_from_html
+from tools.js_signer import JsSignerPool
 
 ZHIHU_SGIN_JS = None
 
@@ -52,6 +53,19 @@ def sign(url: str, cookies: str) -> Dict:
     return ZHIHU_SGIN_JS.call("get_sign", url, cookies)
 
 
+async def async_sign(url: str, cookies: str) -> Dict:
+    """
+    zhihu sign algorithm on the persistent node workers of JsSignerPool, same result as sign()
+    Args:
+        url: request url with query string
+        cookies: request cookies with d_c0 key
+
+    Returns:
+
+    """
+    return await JsSignerPool.get_instance("libs/zhihu.js").call("get_sign", url, cookies)
+
+
 class ZhihuExtractor:
     def __init__(self):
         pass
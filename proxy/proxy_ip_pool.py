@@ -21,8 +21,10 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2023/12/2 13:45
 # @Desc    : IP proxy pool implementation
+import asyncio
 import random
-from typing import Dict, List
+import time
+from typing import Dict, List, Optional
 
 import httpx
 from tenacity import retry, stop_after_attempt, wait_fixed
@@ -38,6 +40,52 @@ from .base_proxy import ProxyProvider
 from .types import IpInfoModel, ProviderNameEnum
 
 
+def _proxy_key(proxy: IpInfoModel) -> str:
+    return f"{proxy.ip}:{proxy.port}"
+
+
+def _proxy_url(proxy: IpInfoModel) -> str:
+    # httpx 0.28.1 requires passing proxy URL string directly, not a dictionary
+    if proxy.user and proxy.password:
+        return f"http://{proxy.user}:{proxy.password}@{proxy.ip}:{proxy.port}"
+    return f"http://{proxy.ip}:{proxy.port}"
+
+
+class ProxyHealth:
+    """Latency (moving average) and error rate of one proxy IP, from validations and reported requests"""
+
+    # Weight of a new latency sample in the moving average
+    LATENCY_ALPHA = 0.3
+    # Latency assumed for a proxy that has not been measured yet (seconds)
+    DEFAULT_LATENCY = 1.0
+
+    def __init__(self):
+        self.successes = 0
+        self.failures = 0
+        self.latency: Optional[float] = None
+
+    def record_success(self, latency: Optional[float] = None):
+        self.successes += 1
+        if latency is not None:
+            self.latency = latency if self.latency is None else (
+                self.LATENCY_ALPHA * latency + (1 - self.LATENCY_ALPHA) * self.latency
+            )
+
+    def record_failure(self):
+        self.failures += 1
+
+    @property
+    def error_rate(self) -> float:
+        # Laplace smoothing, an unknown proxy starts at 0.5
+        return (self.failures + 1) / (self.successes + self.failures + 2)
+
+    @property
+    def score(self) -> float:
+        """Selection weight: fast proxies with few errors are picked more often"""
+        latency = self.DEFAULT_LATENCY if self.latency is None else self.latency
+        return (1 - self.error_rate) / (0.2 + latency)
+
+
 class ProxyIpPool:
 
     def __init__(
@@ -46,72 +94,135 @@ class ProxyIpPool:
         """
 
         Args:
-            ip_pool_count:
-            enable_validate_ip:
+            ip_pool_count: Number of IPs fetched from the provider per load
+            enable_validate_ip: Validate IPs before they enter the pool
             ip_provider:
         """
-        self.valid_ip_url = "https://echo.apifox.cn/"  # URL to validate if IP is valid
+        self.valid_ip_url = config.IP_PROXY_VALIDATE_URL  # URL to validate if IP is valid
         self.ip_pool_count = ip_pool_count
         self.enable_validate_ip = enable_validate_ip
+        # Warm proxies: validated (when enabled) and not about to expire
         self.proxy_list: List[IpInfoModel] = []
         self.ip_provider: ProxyProvider = ip_provider
         self.current_proxy: IpInfoModel | None = None  # Currently used proxy
+        self.health: Dict[str, ProxyHealth] = {}
+        self._prefetch_task: Optional[asyncio.Task] = None
 
     async def load_proxies(self) -> None:
         """
-        Load IP proxies
+        Load IP proxies from the provider, validate them concurrently and add the valid ones to the pool
         Returns:
 
         """
-        self.proxy_list = await self.ip_provider.get_proxy(self.ip_pool_count)
+        proxies = await self.ip_provider.get_proxy(self.ip_pool_count)
+        known = {_proxy_key(proxy) for proxy in self.proxy_list}
+        proxies = [proxy for proxy in proxies if _proxy_key(proxy) not in known and not self._is_stale(proxy)]
+        if self.enable_validate_ip:
+            proxies = await self._validate_all(proxies)
+        self.proxy_list.extend(proxies)
+
+    def get_health(self, proxy: IpInfoModel) -> ProxyHealth:
+        key = _proxy_key(proxy)
+        if key not in self.health:
+            self.health[key] = ProxyHealth()
+        return self.health[key]
+
+    def record_proxy_success(self, proxy: IpInfoModel, latency: Optional[float] = None):
+        """Report a successful request through the proxy"""
+        self.get_health(proxy).record_success(latency)
+
+    def record_proxy_failure(self, proxy: IpInfoModel):
+        """Report a failed request through the proxy"""
+        self.get_health(proxy).record_failure()
+
+    async def _validate_all(self, proxies: List[IpInfoModel]) -> List[IpInfoModel]:
+        semaphore = asyncio.Semaphore(max(1, config.IP_PROXY_VALIDATE_CONCURRENCY))
+
+        async def validate(proxy: IpInfoModel) -> bool:
+            async with semaphore:
+                return await self._is_valid_proxy(proxy)
+
+        results = await asyncio.gather(*[validate(proxy) for proxy in proxies])
+        return [proxy for proxy, valid in zip(proxies, results) if valid]
 
     async def _is_valid_proxy(self, proxy: IpInfoModel) -> bool:
         """
-        Validate if proxy IP is valid
+        Validate if proxy IP is valid, the latency / failure is recorded in the proxy's health
         :param proxy:
         :return:
         """
         utils.logger.info(
             f"[ProxyIpPool._is_valid_proxy] testing {proxy.ip} is it valid "
         )
+        started = time.monotonic()
         try:
-            # httpx 0.28.1 requires passing proxy URL string directly, not a dictionary
-            if proxy.user and proxy.password:
-                proxy_url = f"http://{proxy.user}:{proxy.password}@{proxy.ip}:{proxy.port}"
-            else:
-                proxy_url = f"http://{proxy.ip}:{proxy.port}"
-
-            async with httpx.AsyncClient(proxy=proxy_url) as client:
+            async with httpx.AsyncClient(proxy=_proxy_url(proxy), timeout=config.IP_PROXY_VALIDATE_TIMEOUT) as client:
                 response = await client.get(self.valid_ip_url)
-            if response.status_code == 200:
-                return True
-            else:
-                return False
         except Exception as e:
             utils.logger.info(
                 f"[ProxyIpPool._is_valid_proxy] testing {proxy.ip} err: {e}"
             )
-            raise e
+            self.record_proxy_failure(proxy)
+            return False
+        if response.status_code != 200:
+            self.record_proxy_failure(proxy)
+            return False
+        self.record_proxy_success(proxy, time.monotonic() - started)
+        return True
+
+    @staticmethod
+    def _is_stale(proxy: IpInfoModel) -> bool:
+        return proxy.is_expired(config.IP_PROXY_EVICT_BUFFER_SECONDS)
+
+    def _evict_stale(self):
+        # Leave before the expiry time, a proxy handed out now must survive its first requests
+        stale = [proxy for proxy in self.proxy_list if self._is_stale(proxy)]
+        for proxy in stale:
+            utils.logger.info(f"[ProxyIpPool._evict_stale] evict {proxy.ip}:{proxy.port}, expires at {proxy.expired_time_ts}")
+            self.proxy_list.remove(proxy)
+
+    def _pick(self) -> IpInfoModel:
+        weights = [self.get_health(proxy).score for proxy in self.proxy_list]
+        return random.choices(self.proxy_list, weights=weights)[0]
 
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
     async def get_proxy(self) -> IpInfoModel:
         """
-        Randomly extract a proxy IP from the proxy pool
+        Take a warm proxy IP from the pool, weighted by its health score
+        The pool is refilled in the background, so the caller only waits when no warm proxy is left
         :return:
         """
+        self._evict_stale()
         if len(self.proxy_list) == 0:
-            await self._reload_proxies()
+            if self._prefetch_task and not self._prefetch_task.done():
+                await asyncio.shield(self._prefetch_task)
+            if len(self.proxy_list) == 0:
+                await self._reload_proxies()
+        if len(self.proxy_list) == 0:
+            raise Exception(
+                "[ProxyIpPool.get_proxy] no valid ip in the pool and again get it"
+            )
 
-        proxy = random.choice(self.proxy_list)
+        proxy = self._pick()
         self.proxy_list.remove(proxy)  # Remove an IP once extracted
-        if self.enable_validate_ip:
-            if not await self._is_valid_proxy(proxy):
-                raise Exception(
-                    "[ProxyIpPool.get_proxy] current ip invalid and again get it"
-                )
         self.current_proxy = proxy  # Save currently used proxy
+        self._schedule_prefetch()
         return proxy
 
+    def _schedule_prefetch(self):
+        """Start a background load when fewer than IP_PROXY_PREFETCH_COUNT proxies are warm"""
+        if len(self.proxy_list) >= config.IP_PROXY_PREFETCH_COUNT:
+            return
+        if self._prefetch_task and not self._prefetch_task.done():
+            return
+        self._prefetch_task = asyncio.create_task(self._prefetch())
+
+    async def _prefetch(self):
+        try:
+            await self.load_proxies()
+        except Exception as e:
+            utils.logger.error(f"[ProxyIpPool._prefetch] prefetch proxies error: {e}")
+
     def is_current_proxy_expired(self, buffer_seconds: int = 30) -> bool:
         """
         Check if current proxy has expired
@@ -148,6 +259,16 @@ class ProxyIpPool:
         self.proxy_list = []
         await self.load_proxies()
 
+    async def close(self):
+        """Stop the background prefetch"""
+        if self._prefetch_task and not self._prefetch_task.done():
+            self._prefetch_task.cancel()
+            try:
+                await self._prefetch_task
+            except asyncio.CancelledError:
+                pass
+        self._prefetch_task = None
+
 
 IpProxyProvider: Dict[str, ProxyProvider] = {
     ProviderNameEnum.KUAI_DAILI_PROVIDER.value: new_kuai_daili_proxy(),
@@ -23,9 +23,12 @@
 # @Time    : 2025/11/25
 # @Desc    : Auto-refresh proxy Mixin class for use by various platform clients
 
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Callable, List, Optional
+
+import httpx
 
 from tools import utils
+from tools.http_client import create_async_client
 
 if TYPE_CHECKING:
     from proxy.proxy_ip_pool import ProxyIpPool
@@ -39,12 +42,18 @@ class ProxyRefreshMixin:
     1. Let client class inherit this Mixin
     2. Call init_proxy_pool(proxy_ip_pool) in client's __init__
     3. Call await _refresh_proxy_if_expired() before each request method call
+    4. Send requests through get_http_client(), the pooled client is rebuilt when the proxy changes
+    5. Call await close_http_client() when the crawler closes
 
     Requirements:
     - client class must have self.proxy attribute to store current proxy URL
     """
 
     _proxy_ip_pool: Optional["ProxyIpPool"] = None
+    _http_client: Optional[httpx.AsyncClient] = None
+    _http_client_proxy: Optional[str] = None
+    # Clients replaced by a proxy swap, requests started before the swap may still be using them
+    _retired_http_clients: Optional[List[httpx.AsyncClient]] = None
 
     def init_proxy_pool(self, proxy_ip_pool: Optional["ProxyIpPool"]) -> None:
         """
@@ -75,3 +84,57 @@ class ProxyRefreshMixin:
             utils.logger.info(
                 f"[{self.__class__.__name__}._refresh_proxy_if_expired] New proxy: {new_proxy.ip}:{new_proxy.port}"
             )
+            await self._retire_http_client()
+
+    def get_http_client(self) -> httpx.AsyncClient:
+        """
+        Get the pooled httpx client of this API client (keep-alive connections are reused across requests)
+        The client is created lazily and rebuilt when self.proxy has changed
+        """
+        if self._http_client is None or self._http_client.is_closed or self._http_client_proxy != self.proxy:
+            if self._http_client is not None and not self._http_client.is_closed:
+                self._retired_http_clients = (self._retired_http_clients or []) + [self._http_client]
+            self._http_client = create_async_client(proxy=self.proxy, on_proxy_result=self._proxy_result_reporter())
+            self._http_client_proxy = self.proxy
+        return self._http_client
+
+    def _proxy_result_reporter(self) -> Optional[Callable[[bool, Optional[float]], None]]:
+        """
+        Report the requests of the pooled client to the health of the pool's current proxy,
+        the client is rebuilt when the proxy changes so the proxy is bound here
+        """
+        pool = self._proxy_ip_pool
+        if pool is None or pool.current_proxy is None or not self.proxy:
+            return None
+        proxy = pool.current_proxy
+
+        def report(succeeded: bool, latency: Optional[float]):
+            if succeeded:
+                pool.record_proxy_success(proxy, latency)
+            else:
+                pool.record_proxy_failure(proxy)
+
+        return report
+
+    async def _retire_http_client(self) -> None:
+        """
+        Stop using the current client after a proxy swap
+        Clients retired by the previous swap have had a whole proxy lifetime to finish their requests and are closed now
+        """
+        for client in self._retired_http_clients or []:
+            await client.aclose()
+        self._retired_http_clients = [self._http_client] if self._http_client is not None else None
+        self._http_client = None
+        self._http_client_proxy = None
+
+    async def close_http_client(self) -> None:
+        """Close the pooled httpx client (and clients retired by proxy swaps)"""
+        clients = (self._retired_http_clients or []) + ([self._http_client] if self._http_client is not None else [])
+        self._http_client = None
+        self._http_client_proxy = None
+        self._retired_http_clients = None
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                utils.logger.error(f"[{self.__class__.__name__}.close_http_client] Error closing http client: {e}")
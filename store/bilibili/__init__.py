@@ -28,6 +28,7 @@ import config
 from var import source_keyword_var
 
 from ._store_impl import *
+from store.write_pipeline import StoreWritePipeline
 from .bilibilli_store_media import *
 
 
@@ -40,15 +41,20 @@ class BiliStoreFactory:
         "sqlite": BiliSqliteStoreImplement,
         "mongodb": BiliMongoStoreImplement,
         "excel": BiliExcelStoreImplement,
+        "parquet": BiliParquetStoreImplement,
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
         store_class = BiliStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[BiliStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
+            raise ValueError("[BiliStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel or parquet ...")
         return store_class()
 
+    @staticmethod
+    def get_pipeline() -> StoreWritePipeline:
+        return StoreWritePipeline.get_instance("bilibili", BiliStoreFactory.create_store)
+
 
 async def update_bilibili_video(video_item: Dict):
     video_item_view: Dict = video_item.get("View")
@@ -78,7 +84,7 @@ async def update_bilibili_video(video_item: Dict):
         "source_keyword": source_keyword_var.get(),
     }
     utils.logger.info(f"[store.bilibili.update_bilibili_video] bilibili video id:{video_id}, title:{save_content_item.get('title')}")
-    await BiliStoreFactory.create_store().store_content(content_item=save_content_item)
+    await BiliStoreFactory.get_pipeline().submit("store_content", save_content_item)
 
 
 async def update_up_info(video_item: Dict):
@@ -97,7 +103,7 @@ async def update_up_info(video_item: Dict):
         "is_official": video_item_card.get("official_verify").get("type"),
     }
     utils.logger.info(f"[store.bilibili.update_up_info] bilibili user_id:{video_item_card.get('mid')}")
-    await BiliStoreFactory.create_store().store_creator(creator=saver_up_info)
+    await BiliStoreFactory.get_pipeline().submit("store_creator", saver_up_info)
 
 
 async def batch_update_bilibili_video_comments(video_id: str, comments: List[Dict]):
@@ -129,7 +135,12 @@ async def update_bilibili_video_comment(video_id: str, comment_item: Dict):
         "last_modify_ts": utils.get_current_timestamp(),
     }
     utils.logger.info(f"[store.bilibili.update_bilibili_video_comment] Bilibili video comment: {comment_id}, content: {save_comment_item.get('content')}")
-    await BiliStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    await BiliStoreFactory.get_pipeline().submit("store_comment", save_comment_item)
+
+
+def get_bilibili_video_path(aid, extension_file_name: str) -> str:
+    """Local path of a video, files are written by the MediaDownloader"""
+    return BilibiliVideo().make_save_file_name(str(aid), extension_file_name)
 
 
 async def store_video(aid, video_content, extension_file_name):
@@ -212,7 +223,7 @@ async def update_bilibili_creator_contact(creator_info: Dict, fan_info: Dict):
         "last_modify_ts": utils.get_current_timestamp(),
     }
 
-    await BiliStoreFactory.create_store().store_contact(contact_item=save_contact_item)
+    await BiliStoreFactory.get_pipeline().submit("store_contact", save_contact_item)
 
 
 async def update_bilibili_creator_dynamic(creator_info: Dict, dynamic_info: Dict):
@@ -229,4 +240,4 @@ async def update_bilibili_creator_dynamic(creator_info: Dict, dynamic_info: Dict
         "last_modify_ts": utils.get_current_timestamp(),
     }
 
-    await BiliStoreFactory.create_store().store_dynamic(dynamic_item=save_dynamic_item)
+    await BiliStoreFactory.get_pipeline().submit("store_dynamic", save_dynamic_item)
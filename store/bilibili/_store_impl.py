@@ -27,7 +27,7 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
 from sqlalchemy import select
@@ -35,6 +35,7 @@ from sqlalchemy.orm import sessionmaker
 
 import config
 from base.base_crawler import AbstractStore
+from database.bulk_upsert import bulk_upsert
 from database.db_session import get_session
 from database.models import BilibiliVideoComment, BilibiliVideo, BilibiliUpInfo, BilibiliUpDynamic, BilibiliContactInfo
 from tools.async_file_writer import AsyncFileWriter
@@ -128,26 +129,26 @@ class BiliDbStoreImplement(AbstractStore):
         Args:
             content_item: content item dict
         """
-        video_id = int(content_item.get("video_id"))
-        content_item["video_id"] = video_id
-        content_item["user_id"] = int(content_item.get("user_id", 0) or 0)
-        content_item["liked_count"] = int(content_item.get("liked_count", 0) or 0)
-        content_item["create_time"] = int(content_item.get("create_time", 0) or 0)
-        
+        await self.store_content_batch([content_item])
+
+    async def store_content_batch(self, content_items: List[Dict]):
+        """
+        Bilibili content DB storage implementation, the whole batch is upserted in one statement
+        Args:
+            content_items: content item dicts
+        """
+        rows = []
+        for content_item in content_items:
+            row = dict(content_item)
+            row["video_id"] = int(content_item.get("video_id"))
+            row["user_id"] = int(content_item.get("user_id", 0) or 0)
+            row["liked_count"] = int(content_item.get("liked_count", 0) or 0)
+            row["create_time"] = int(content_item.get("create_time", 0) or 0)
+            row["add_ts"] = utils.get_current_timestamp()
+            row["last_modify_ts"] = utils.get_current_timestamp()
+            rows.append(row)
         async with get_session() as session:
-            result = await session.execute(select(BilibiliVideo).where(BilibiliVideo.video_id == video_id))
-            video_detail = result.scalar_one_or_none()
-
-            if not video_detail:
-                content_item["add_ts"] = utils.get_current_timestamp()
-                content_item["last_modify_ts"] = utils.get_current_timestamp()
-                new_content = BilibiliVideo(**content_item)
-                session.add(new_content)
-            else:
-                content_item["last_modify_ts"] = utils.get_current_timestamp()
-                for key, value in content_item.items():
-                    setattr(video_detail, key, value)
-            await session.commit()
+            await bulk_upsert(session, BilibiliVideo, rows, key_columns=["video_id"])
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -155,28 +156,28 @@ class BiliDbStoreImplement(AbstractStore):
         Args:
             comment_item: comment item dict
         """
-        comment_id = int(comment_item.get("comment_id"))
-        comment_item["comment_id"] = comment_id
-        comment_item["video_id"] = int(comment_item.get("video_id", 0) or 0)
-        comment_item["create_time"] = int(comment_item.get("create_time", 0) or 0)
-        comment_item["like_count"] = str(comment_item.get("like_count", "0"))
-        comment_item["sub_comment_count"] = str(comment_item.get("sub_comment_count", "0"))
-        comment_item["parent_comment_id"] = str(comment_item.get("parent_comment_id", "0"))
-        
+        await self.store_comment_batch([comment_item])
+
+    async def store_comment_batch(self, comment_items: List[Dict]):
+        """
+        Bilibili comment DB storage implementation, the whole batch is upserted in one statement
+        Args:
+            comment_items: comment item dicts
+        """
+        rows = []
+        for comment_item in comment_items:
+            row = dict(comment_item)
+            row["comment_id"] = int(comment_item.get("comment_id"))
+            row["video_id"] = int(comment_item.get("video_id", 0) or 0)
+            row["create_time"] = int(comment_item.get("create_time", 0) or 0)
+            row["like_count"] = str(comment_item.get("like_count", "0"))
+            row["sub_comment_count"] = str(comment_item.get("sub_comment_count", "0"))
+            row["parent_comment_id"] = str(comment_item.get("parent_comment_id", "0"))
+            row["add_ts"] = utils.get_current_timestamp()
+            row["last_modify_ts"] = utils.get_current_timestamp()
+            rows.append(row)
         async with get_session() as session:
-            result = await session.execute(select(BilibiliVideoComment).where(BilibiliVideoComment.comment_id == comment_id))
-            comment_detail = result.scalar_one_or_none()
-
-            if not comment_detail:
-                comment_item["add_ts"] = utils.get_current_timestamp()
-                comment_item["last_modify_ts"] = utils.get_current_timestamp()
-                new_comment = BilibiliVideoComment(**comment_item)
-                session.add(new_comment)
-            else:
-                comment_item["last_modify_ts"] = utils.get_current_timestamp()
-                for key, value in comment_item.items():
-                    setattr(comment_detail, key, value)
-            await session.commit()
+            await bulk_upsert(session, BilibiliVideoComment, rows, key_columns=["comment_id"])
 
     async def store_creator(self, creator: Dict):
         """
@@ -184,27 +185,27 @@ class BiliDbStoreImplement(AbstractStore):
         Args:
             creator: creator item dict
         """
-        creator_id = int(creator.get("user_id"))
-        creator["user_id"] = creator_id
-        creator["total_fans"] = int(creator.get("total_fans", 0) or 0)
-        creator["total_liked"] = int(creator.get("total_liked", 0) or 0)
-        creator["user_rank"] = int(creator.get("user_rank", 0) or 0)
-        creator["is_official"] = int(creator.get("is_official", 0) or 0)
+        await self.store_creator_batch([creator])
 
+    async def store_creator_batch(self, creators: List[Dict]):
+        """
+        Bilibili creator DB storage implementation, the whole batch is upserted in one statement
+        Args:
+            creators: creator item dicts
+        """
+        rows = []
+        for creator in creators:
+            row = dict(creator)
+            row["user_id"] = int(creator.get("user_id"))
+            row["total_fans"] = int(creator.get("total_fans", 0) or 0)
+            row["total_liked"] = int(creator.get("total_liked", 0) or 0)
+            row["user_rank"] = int(creator.get("user_rank", 0) or 0)
+            row["is_official"] = int(creator.get("is_official", 0) or 0)
+            row["add_ts"] = utils.get_current_timestamp()
+            row["last_modify_ts"] = utils.get_current_timestamp()
+            rows.append(row)
         async with get_session() as session:
-            result = await session.execute(select(BilibiliUpInfo).where(BilibiliUpInfo.user_id == creator_id))
-            creator_detail = result.scalar_one_or_none()
-
-            if not creator_detail:
-                creator["add_ts"] = utils.get_current_timestamp()
-                creator["last_modify_ts"] = utils.get_current_timestamp()
-                new_creator = BilibiliUpInfo(**creator)
-                session.add(new_creator)
-            else:
-                creator["last_modify_ts"] = utils.get_current_timestamp()
-                for key, value in creator.items():
-                    setattr(creator_detail, key, value)
-            await session.commit()
+            await bulk_upsert(session, BilibiliUpInfo, rows, key_columns=["user_id"])
 
     async def store_contact(self, contact_item: Dict):
         """
@@ -212,27 +213,24 @@ class BiliDbStoreImplement(AbstractStore):
         Args:
             contact_item: contact item dict
         """
-        up_id = int(contact_item.get("up_id"))
-        fan_id = int(contact_item.get("fan_id"))
-        contact_item["up_id"] = up_id
-        contact_item["fan_id"] = fan_id
+        await self.store_contact_batch([contact_item])
 
+    async def store_contact_batch(self, contact_items: List[Dict]):
+        """
+        Bilibili contact DB storage implementation, the whole batch is upserted in one statement
+        Args:
+            contact_items: contact item dicts
+        """
+        rows = []
+        for contact_item in contact_items:
+            row = dict(contact_item)
+            row["up_id"] = int(contact_item.get("up_id"))
+            row["fan_id"] = int(contact_item.get("fan_id"))
+            row["add_ts"] = utils.get_current_timestamp()
+            row["last_modify_ts"] = utils.get_current_timestamp()
+            rows.append(row)
         async with get_session() as session:
-            result = await session.execute(
-                select(BilibiliContactInfo).where(BilibiliContactInfo.up_id == up_id, BilibiliContactInfo.fan_id == fan_id)
-            )
-            contact_detail = result.scalar_one_or_none()
-
-            if not contact_detail:
-                contact_item["add_ts"] = utils.get_current_timestamp()
-                contact_item["last_modify_ts"] = utils.get_current_timestamp()
-                new_contact = BilibiliContactInfo(**contact_item)
-                session.add(new_contact)
-            else:
-                contact_item["last_modify_ts"] = utils.get_current_timestamp()
-                for key, value in contact_item.items():
-                    setattr(contact_detail, key, value)
-            await session.commit()
+            await bulk_upsert(session, BilibiliContactInfo, rows, key_columns=["up_id", "fan_id"])
 
     async def store_dynamic(self, dynamic_item):
         """
@@ -240,23 +238,24 @@ class BiliDbStoreImplement(AbstractStore):
         Args:
             dynamic_item: dynamic item dict
         """
-        dynamic_id = int(dynamic_item.get("dynamic_id"))
-        dynamic_item["dynamic_id"] = dynamic_id
-        
+        await self.store_dynamic_batch([dynamic_item])
+
+    async def store_dynamic_batch(self, dynamic_items: List[Dict]):
+        """
+        Bilibili dynamic DB storage implementation, the whole batch is upserted in one statement
+        Args:
+            dynamic_items: dynamic item dicts
+        """
+        rows = []
+        for dynamic_item in dynamic_items:
+            row = dict(dynamic_item)
+            row["dynamic_id"] = int(dynamic_item.get("dynamic_id"))
+            row["add_ts"] = utils.get_current_timestamp()
+            row["last_modify_ts"] = utils.get_current_timestamp()
+            rows.append(row)
         async with get_session() as session:
-            result = await session.execute(select(BilibiliUpDynamic).where(BilibiliUpDynamic.dynamic_id == dynamic_id))
-            dynamic_detail = result.scalar_one_or_none()
+            await bulk_upsert(session, BilibiliUpDynamic, rows, key_columns=["dynamic_id"])
 
-            if not dynamic_detail:
-                dynamic_item["add_ts"] = utils.get_current_timestamp()
-                dynamic_item["last_modify_ts"] = utils.get_current_timestamp()
-                new_dynamic = BilibiliUpDynamic(**dynamic_item)
-                session.add(new_dynamic)
-            else:
-                dynamic_item["last_modify_ts"] = utils.get_current_timestamp()
-                for key, value in dynamic_item.items():
-                    setattr(dynamic_detail, key, value)
-            await session.commit()
 
 
 class BiliJsonStoreImplement(AbstractStore):
@@ -354,16 +353,15 @@ class BiliMongoStoreImplement(AbstractStore):
         Args:
             content_item: Video content data
         """
-        video_id = content_item.get("video_id")
-        if not video_id:
-            return
+        await self.store_content_batch([content_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="contents",
-            query={"video_id": video_id},
-            data=content_item
-        )
-        utils.logger.info(f"[BiliMongoStoreImplement.store_content] Saved video {video_id} to MongoDB")
+    async def store_content_batch(self, content_items: List[Dict]):
+        """
+        Store a batch of video content to MongoDB (buffered bulk upsert)
+        Args:
+            content_items: Video content data list
+        """
+        await self.mongo_store.save_or_update_many("contents", content_items, key_fields=["video_id"])
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -371,16 +369,15 @@ class BiliMongoStoreImplement(AbstractStore):
         Args:
             comment_item: Comment data
         """
-        comment_id = comment_item.get("comment_id")
-        if not comment_id:
-            return
+        await self.store_comment_batch([comment_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="comments",
-            query={"comment_id": comment_id},
-            data=comment_item
-        )
-        utils.logger.info(f"[BiliMongoStoreImplement.store_comment] Saved comment {comment_id} to MongoDB")
+    async def store_comment_batch(self, comment_items: List[Dict]):
+        """
+        Store a batch of comments to MongoDB (buffered bulk upsert)
+        Args:
+            comment_items: Comment data list
+        """
+        await self.mongo_store.save_or_update_many("comments", comment_items, key_fields=["comment_id"])
 
     async def store_creator(self, creator_item: Dict):
         """
@@ -388,16 +385,15 @@ class BiliMongoStoreImplement(AbstractStore):
         Args:
             creator_item: UP master data
         """
-        user_id = creator_item.get("user_id")
-        if not user_id:
-            return
+        await self.store_creator_batch([creator_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="creators",
-            query={"user_id": user_id},
-            data=creator_item
-        )
-        utils.logger.info(f"[BiliMongoStoreImplement.store_creator] Saved creator {user_id} to MongoDB")
+    async def store_creator_batch(self, creator_items: List[Dict]):
+        """
+        Store a batch of UP master information to MongoDB (buffered bulk upsert)
+        Args:
+            creator_items: UP master data list
+        """
+        await self.mongo_store.save_or_update_many("creators", creator_items, key_fields=["user_id"])
 
 
 class BiliExcelStoreImplement:
@@ -409,3 +405,14 @@ class BiliExcelStoreImplement:
             platform="bilibili",
             crawler_type=crawler_type_var.get()
         )
+
+
+class BiliParquetStoreImplement:
+    """Bilibili Parquet storage implementation - Global singleton"""
+
+    def __new__(cls, *args, **kwargs):
+        from store.parquet_store_base import ParquetStoreBase
+        return ParquetStoreBase.get_instance(
+            platform="bilibili",
+            crawler_type=crawler_type_var.get()
+        )
@@ -27,6 +27,7 @@ import config
 from var import source_keyword_var
 
 from ._store_impl import *
+from store.write_pipeline import StoreWritePipeline
 from .douyin_store_media import *
 
 
@@ -39,15 +40,20 @@ class DouyinStoreFactory:
         "sqlite": DouyinSqliteStoreImplement,
         "mongodb": DouyinMongoStoreImplement,
         "excel": DouyinExcelStoreImplement,
+        "parquet": DouyinParquetStoreImplement,
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
         store_class = DouyinStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
+            raise ValueError("[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel or parquet ...")
         return store_class()
 
+    @staticmethod
+    def get_pipeline() -> StoreWritePipeline:
+        return StoreWritePipeline.get_instance("douyin", DouyinStoreFactory.create_store)
+
 
 def _extract_note_image_list(aweme_detail: Dict) -> List[str]:
     """
@@ -184,7 +190,7 @@ async def update_douyin_aweme(aweme_item: Dict):
         "source_keyword": source_keyword_var.get(),
     }
     utils.logger.info(f"[store.douyin.update_douyin_aweme] douyin aweme id:{aweme_id}, title:{save_content_item.get('title')}")
-    await DouyinStoreFactory.create_store().store_content(content_item=save_content_item)
+    await DouyinStoreFactory.get_pipeline().submit("store_content", save_content_item)
 
 
 async def batch_update_dy_aweme_comments(aweme_id: str, comments: List[Dict]):
@@ -224,7 +230,7 @@ async def update_dy_aweme_comment(aweme_id: str, comment_item: Dict):
     }
     utils.logger.info(f"[store.douyin.update_dy_aweme_comment] douyin aweme comment: {comment_id}, content: {save_comment_item.get('content')}")
 
-    await DouyinStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    await DouyinStoreFactory.get_pipeline().submit("store_comment", save_comment_item)
 
 
 async def save_creator(user_id: str, creator: Dict):
@@ -245,7 +251,17 @@ async def save_creator(user_id: str, creator: Dict):
         "last_modify_ts": utils.get_current_timestamp(),
     }
     utils.logger.info(f"[store.douyin.save_creator] creator:{local_db_item}")
-    await DouyinStoreFactory.create_store().store_creator(local_db_item)
+    await DouyinStoreFactory.get_pipeline().submit("store_creator", local_db_item)
+
+
+def get_dy_aweme_image_path(aweme_id: str, extension_file_name: str) -> str:
+    """Local path of an aweme image, files are written by the MediaDownloader"""
+    return DouYinImage().make_save_file_name(aweme_id, extension_file_name)
+
+
+def get_dy_aweme_video_path(aweme_id: str, extension_file_name: str) -> str:
+    """Local path of an aweme video, files are written by the MediaDownloader"""
+    return DouYinVideo().make_save_file_name(aweme_id, extension_file_name)
 
 
 async def update_dy_aweme_image(aweme_id, pic_content, extension_file_name):
@@ -26,12 +26,13 @@ import asyncio
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 from sqlalchemy import select
 
 import config
 from base.base_crawler import AbstractStore
+from database.bulk_upsert import bulk_upsert, bulk_update
 from database.db_session import get_session
 from database.models import DouyinAweme, DouyinAwemeComment, DyCreator
 from tools import utils, words
@@ -97,20 +98,23 @@ class DouyinDbStoreImplement(AbstractStore):
         Args:
             content_item: content item dict
         """
-        aweme_id = int(content_item.get("aweme_id"))
+        await self.store_content_batch([content_item])
+
+    async def store_content_batch(self, content_items: List[Dict]):
+        """
+        Douyin content DB storage implementation, the whole batch is upserted in one statement
+        Args:
+            content_items: content item dicts
+        """
+        rows = []
+        for content_item in content_items:
+            row = dict(content_item, aweme_id=int(content_item.get("aweme_id")))
+            row["add_ts"] = utils.get_current_timestamp()
+            rows.append(row)
         async with get_session() as session:
-            result = await session.execute(select(DouyinAweme).where(DouyinAweme.aweme_id == aweme_id))
-            aweme_detail = result.scalar_one_or_none()
-
-            if not aweme_detail:
-                content_item["add_ts"] = utils.get_current_timestamp()
-                if content_item.get("title"):
-                    new_content = DouyinAweme(**content_item)
-                    session.add(new_content)
-            else:
-                for key, value in content_item.items():
-                    setattr(aweme_detail, key, value)
-            await session.commit()
+            # Videos without title are only refreshed, never inserted
+            await bulk_upsert(session, DouyinAweme, [row for row in rows if row.get("title")], key_columns=["aweme_id"])
+            await bulk_update(session, DouyinAweme, [row for row in rows if not row.get("title")], key_columns=["aweme_id"])
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -118,19 +122,21 @@ class DouyinDbStoreImplement(AbstractStore):
         Args:
             comment_item: comment item dict
         """
-        comment_id = int(comment_item.get("comment_id"))
+        await self.store_comment_batch([comment_item])
+
+    async def store_comment_batch(self, comment_items: List[Dict]):
+        """
+        Douyin comment DB storage implementation, the whole batch is upserted in one statement
+        Args:
+            comment_items: comment item dicts
+        """
+        rows = []
+        for comment_item in comment_items:
+            row = dict(comment_item, comment_id=int(comment_item.get("comment_id")))
+            row["add_ts"] = utils.get_current_timestamp()
+            rows.append(row)
         async with get_session() as session:
-            result = await session.execute(select(DouyinAwemeComment).where(DouyinAwemeComment.comment_id == comment_id))
-            comment_detail = result.scalar_one_or_none()
-
-            if not comment_detail:
-                comment_item["add_ts"] = utils.get_current_timestamp()
-                new_comment = DouyinAwemeComment(**comment_item)
-                session.add(new_comment)
-            else:
-                for key, value in comment_item.items():
-                    setattr(comment_detail, key, value)
-            await session.commit()
+            await bulk_upsert(session, DouyinAwemeComment, rows, key_columns=["comment_id"])
 
     async def store_creator(self, creator: Dict):
         """
@@ -138,19 +144,18 @@ class DouyinDbStoreImplement(AbstractStore):
         Args:
             creator: creator dict
         """
-        user_id = creator.get("user_id")
+        await self.store_creator_batch([creator])
+
+    async def store_creator_batch(self, creators: List[Dict]):
+        """
+        Douyin creator DB storage implementation, the whole batch is upserted in one statement
+        Args:
+            creators: creator dicts
+        """
+        rows = [dict(creator, add_ts=utils.get_current_timestamp()) for creator in creators]
         async with get_session() as session:
-            result = await session.execute(select(DyCreator).where(DyCreator.user_id == user_id))
-            user_detail = result.scalar_one_or_none()
+            await bulk_upsert(session, DyCreator, rows, key_columns=["user_id"])
 
-            if not user_detail:
-                creator["add_ts"] = utils.get_current_timestamp()
-                new_creator = DyCreator(**creator)
-                session.add(new_creator)
-            else:
-                for key, value in creator.items():
-                    setattr(user_detail, key, value)
-            await session.commit()
 
 
 class DouyinJsonStoreImplement(AbstractStore):
@@ -220,16 +225,15 @@ class DouyinMongoStoreImplement(AbstractStore):
         Args:
             content_item: Video content data
         """
-        aweme_id = content_item.get("aweme_id")
-        if not aweme_id:
-            return
+        await self.store_content_batch([content_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="contents",
-            query={"aweme_id": aweme_id},
-            data=content_item
-        )
-        utils.logger.info(f"[DouyinMongoStoreImplement.store_content] Saved aweme {aweme_id} to MongoDB")
+    async def store_content_batch(self, content_items: List[Dict]):
+        """
+        Store a batch of video content to MongoDB (buffered bulk upsert)
+        Args:
+            content_items: Video content data list
+        """
+        await self.mongo_store.save_or_update_many("contents", content_items, key_fields=["aweme_id"])
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -237,16 +241,15 @@ class DouyinMongoStoreImplement(AbstractStore):
         Args:
             comment_item: Comment data
         """
-        comment_id = comment_item.get("comment_id")
-        if not comment_id:
-            return
+        await self.store_comment_batch([comment_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="comments",
-            query={"comment_id": comment_id},
-            data=comment_item
-        )
-        utils.logger.info(f"[DouyinMongoStoreImplement.store_comment] Saved comment {comment_id} to MongoDB")
+    async def store_comment_batch(self, comment_items: List[Dict]):
+        """
+        Store a batch of comments to MongoDB (buffered bulk upsert)
+        Args:
+            comment_items: Comment data list
+        """
+        await self.mongo_store.save_or_update_many("comments", comment_items, key_fields=["comment_id"])
 
     async def store_creator(self, creator_item: Dict):
         """
@@ -254,16 +257,15 @@ class DouyinMongoStoreImplement(AbstractStore):
         Args:
             creator_item: Creator data
         """
-        user_id = creator_item.get("user_id")
-        if not user_id:
-            return
+        await self.store_creator_batch([creator_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="creators",
-            query={"user_id": user_id},
-            data=creator_item
-        )
-        utils.logger.info(f"[DouyinMongoStoreImplement.store_creator] Saved creator {user_id} to MongoDB")
+    async def store_creator_batch(self, creator_items: List[Dict]):
+        """
+        Store a batch of creator information to MongoDB (buffered bulk upsert)
+        Args:
+            creator_items: Creator data list
+        """
+        await self.mongo_store.save_or_update_many("creators", creator_items, key_fields=["user_id"])
 
 
 class DouyinExcelStoreImplement:
@@ -275,3 +277,14 @@ class DouyinExcelStoreImplement:
             platform="douyin",
             crawler_type=crawler_type_var.get()
         )
+
+
+class DouyinParquetStoreImplement:
+    """Douyin Parquet storage implementation - Global singleton"""
+
+    def __new__(cls, *args, **kwargs):
+        from store.parquet_store_base import ParquetStoreBase
+        return ParquetStoreBase.get_instance(
+            platform="douyin",
+            crawler_type=crawler_type_var.get()
+        )
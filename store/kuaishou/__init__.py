@@ -28,6 +28,7 @@ import config
 from var import source_keyword_var
 
 from ._store_impl import *
+from store.write_pipeline import StoreWritePipeline
 
 
 class KuaishouStoreFactory:
@@ -39,6 +40,7 @@ class KuaishouStoreFactory:
         "sqlite": KuaishouSqliteStoreImplement,
         "mongodb": KuaishouMongoStoreImplement,
         "excel": KuaishouExcelStoreImplement,
+        "parquet": KuaishouParquetStoreImplement,
     }
 
     @staticmethod
@@ -46,9 +48,13 @@ class KuaishouStoreFactory:
         store_class = KuaishouStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[KuaishouStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
+                "[KuaishouStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel or parquet ...")
         return store_class()
 
+    @staticmethod
+    def get_pipeline() -> StoreWritePipeline:
+        return StoreWritePipeline.get_instance("kuaishou", KuaishouStoreFactory.create_store)
+
 
 async def update_kuaishou_video(video_item: Dict):
     photo_info: Dict = video_item.get("photo", {})
@@ -75,7 +81,7 @@ async def update_kuaishou_video(video_item: Dict):
     }
     utils.logger.info(
         f"[store.kuaishou.update_kuaishou_video] Kuaishou video id:{video_id}, title:{save_content_item.get('title')}")
-    await KuaishouStoreFactory.create_store().store_content(content_item=save_content_item)
+    await KuaishouStoreFactory.get_pipeline().submit("store_content", save_content_item)
 
 
 async def batch_update_ks_video_comments(video_id: str, comments: List[Dict]):
@@ -107,7 +113,7 @@ async def update_ks_video_comment(video_id: str, comment_item: Dict):
     }
     utils.logger.info(
         f"[store.kuaishou.update_ks_video_comment] Kuaishou video comment: {comment_id}, content: {save_comment_item.get('content')}")
-    await KuaishouStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    await KuaishouStoreFactory.get_pipeline().submit("store_comment", save_comment_item)
 
 async def save_creator(user_id: str, creator: Dict):
     ownerCount = creator.get('ownerCount', {})
@@ -126,4 +132,4 @@ async def save_creator(user_id: str, creator: Dict):
         "last_modify_ts": utils.get_current_timestamp(),
     }
     utils.logger.info(f"[store.kuaishou.save_creator] creator:{local_db_item}")
-    await KuaishouStoreFactory.create_store().store_creator(local_db_item)
+    await KuaishouStoreFactory.get_pipeline().submit("store_creator", local_db_item)
@@ -27,7 +27,7 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 from tools.async_file_writer import AsyncFileWriter
 
 import aiofiles
@@ -35,6 +35,7 @@ from sqlalchemy import select
 
 import config
 from base.base_crawler import AbstractStore
+from database.bulk_upsert import bulk_upsert
 from database.db_session import get_session
 from database.models import KuaishouVideo, KuaishouVideoComment
 from tools import utils, words
@@ -98,20 +99,17 @@ class KuaishouDbStoreImplement(AbstractStore):
         Args:
             content_item: content item dict
         """
-        video_id = content_item.get("video_id")
+        await self.store_content_batch([content_item])
+
+    async def store_content_batch(self, content_items: List[Dict]):
+        """
+        Kuaishou content DB storage implementation, the whole batch is upserted in one statement
+        Args:
+            content_items: content item dicts
+        """
+        rows = [dict(content_item, add_ts=utils.get_current_timestamp()) for content_item in content_items]
         async with get_session() as session:
-            result = await session.execute(select(KuaishouVideo).where(KuaishouVideo.video_id == video_id))
-            video_detail = result.scalar_one_or_none()
-
-            if not video_detail:
-                content_item["add_ts"] = utils.get_current_timestamp()
-                new_content = KuaishouVideo(**content_item)
-                session.add(new_content)
-            else:
-                for key, value in content_item.items():
-                    if hasattr(video_detail, key):
-                        setattr(video_detail, key, value)
-            await session.commit()
+            await bulk_upsert(session, KuaishouVideo, rows, key_columns=["video_id"])
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -119,21 +117,18 @@ class KuaishouDbStoreImplement(AbstractStore):
         Args:
             comment_item: comment item dict
         """
-        comment_id = comment_item.get("comment_id")
+        await self.store_comment_batch([comment_item])
+
+    async def store_comment_batch(self, comment_items: List[Dict]):
+        """
+        Kuaishou comment DB storage implementation, the whole batch is upserted in one statement
+        Args:
+            comment_items: comment item dicts
+        """
+        rows = [dict(comment_item, add_ts=utils.get_current_timestamp()) for comment_item in comment_items]
         async with get_session() as session:
-            result = await session.execute(
-                select(KuaishouVideoComment).where(KuaishouVideoComment.comment_id == comment_id))
-            comment_detail = result.scalar_one_or_none()
+            await bulk_upsert(session, KuaishouVideoComment, rows, key_columns=["comment_id"])
 
-            if not comment_detail:
-                comment_item["add_ts"] = utils.get_current_timestamp()
-                new_comment = KuaishouVideoComment(**comment_item)
-                session.add(new_comment)
-            else:
-                for key, value in comment_item.items():
-                    if hasattr(comment_detail, key):
-                        setattr(comment_detail, key, value)
-            await session.commit()
 
 
 class KuaishouJsonStoreImplement(AbstractStore):
@@ -184,16 +179,15 @@ class KuaishouMongoStoreImplement(AbstractStore):
         Args:
             content_item: Video content data
         """
-        video_id = content_item.get("video_id")
-        if not video_id:
-            return
+        await self.store_content_batch([content_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="contents",
-            query={"video_id": video_id},
-            data=content_item
-        )
-        utils.logger.info(f"[KuaishouMongoStoreImplement.store_content] Saved video {video_id} to MongoDB")
+    async def store_content_batch(self, content_items: List[Dict]):
+        """
+        Store a batch of video content to MongoDB (buffered bulk upsert)
+        Args:
+            content_items: Video content data list
+        """
+        await self.mongo_store.save_or_update_many("contents", content_items, key_fields=["video_id"])
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -201,16 +195,15 @@ class KuaishouMongoStoreImplement(AbstractStore):
         Args:
             comment_item: Comment data
         """
-        comment_id = comment_item.get("comment_id")
-        if not comment_id:
-            return
+        await self.store_comment_batch([comment_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="comments",
-            query={"comment_id": comment_id},
-            data=comment_item
-        )
-        utils.logger.info(f"[KuaishouMongoStoreImplement.store_comment] Saved comment {comment_id} to MongoDB")
+    async def store_comment_batch(self, comment_items: List[Dict]):
+        """
+        Store a batch of comments to MongoDB (buffered bulk upsert)
+        Args:
+            comment_items: Comment data list
+        """
+        await self.mongo_store.save_or_update_many("comments", comment_items, key_fields=["comment_id"])
 
     async def store_creator(self, creator_item: Dict):
         """
@@ -218,16 +211,15 @@ class KuaishouMongoStoreImplement(AbstractStore):
         Args:
             creator_item: Creator data
         """
-        user_id = creator_item.get("user_id")
-        if not user_id:
-            return
+        await self.store_creator_batch([creator_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="creators",
-            query={"user_id": user_id},
-            data=creator_item
-        )
-        utils.logger.info(f"[KuaishouMongoStoreImplement.store_creator] Saved creator {user_id} to MongoDB")
+    async def store_creator_batch(self, creator_items: List[Dict]):
+        """
+        Store a batch of creator information to MongoDB (buffered bulk upsert)
+        Args:
+            creator_items: Creator data list
+        """
+        await self.mongo_store.save_or_update_many("creators", creator_items, key_fields=["user_id"])
 
 
 class KuaishouExcelStoreImplement:
@@ -239,3 +231,14 @@ class KuaishouExcelStoreImplement:
             platform="kuaishou",
             crawler_type=crawler_type_var.get()
         )
+
+
+class KuaishouParquetStoreImplement:
+    """Kuaishou Parquet storage implementation - Global singleton"""
+
+    def __new__(cls, *args, **kwargs):
+        from store.parquet_store_base import ParquetStoreBase
+        return ParquetStoreBase.get_instance(
+            platform="kuaishou",
+            crawler_type=crawler_type_var.get()
+        )
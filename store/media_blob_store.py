@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/store/media_blob_store.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Content-addressed media store
+Media files are stored once under blobs/<aa>/<bb>/<sha256><ext>. A small SQLite index maps URLs and
+(platform, note_id, media_type, index) to digests, so known URLs are skipped before download and reposted media is
+stored once across notes and platforms. The usual per-note files are hard links to the blobs.
+"""
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+from typing import Dict, Optional, Tuple
+
+import config
+from tools import utils
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class MediaBlobStore:
+    """
+    Blob directory plus the URL -> digest and media ref -> digest indexes
+    Methods are blocking (file hashing and SQLite), call them through asyncio.to_thread
+    """
+
+    _instances: Dict[str, "MediaBlobStore"] = {}
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        self.blob_dir = os.path.join(root_dir, "blobs")
+        self.staging_dir = os.path.join(root_dir, "staging")
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.staging_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(root_dir, "media_index.db"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS url_digest ("
+            "url TEXT PRIMARY KEY, digest TEXT NOT NULL, ext TEXT NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS media_ref ("
+            "platform TEXT NOT NULL, note_id TEXT NOT NULL, media_type TEXT NOT NULL, media_index INTEGER NOT NULL, "
+            "digest TEXT NOT NULL, ext TEXT NOT NULL, PRIMARY KEY (platform, note_id, media_type, media_index))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_media_ref_digest ON media_ref (digest)")
+        self._conn.commit()
+
+    @classmethod
+    def get_instance(cls, root_dir: Optional[str] = None) -> "MediaBlobStore":
+        """
+        Get or create the store for root_dir (default MEDIA_STORE_DIR)
+        """
+        root_dir = root_dir or config.MEDIA_STORE_DIR
+        if root_dir not in cls._instances:
+            cls._instances[root_dir] = cls(root_dir)
+        return cls._instances[root_dir]
+
+    @classmethod
+    def close_all(cls):
+        for store in cls._instances.values():
+            store.close()
+        cls._instances.clear()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def blob_path(self, digest: str, ext: str) -> str:
+        """Hash-sharded path of a blob, e.g. blobs/ab/cd/abcd...jpg"""
+        return os.path.join(self.blob_dir, digest[:2], digest[2:4], f"{digest}{ext}")
+
+    def staging_path(self, url: str, ext: str) -> str:
+        """Download target of a URL, stable across runs so partial downloads are resumed"""
+        return os.path.join(self.staging_dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ext)
+
+    def lookup_url(self, url: str) -> Optional[Tuple[str, str]]:
+        """
+        Digest of an already downloaded URL
+        Returns:
+            (digest, ext) if the URL is known and its blob still exists, else None
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT digest, ext FROM url_digest WHERE url = ?", (url,)).fetchone()
+        if row and os.path.exists(self.blob_path(row[0], row[1])):
+            return row[0], row[1]
+        return None
+
+    def lookup_ref(self, platform: str, note_id: str, media_type: str, media_index: int) -> Optional[Tuple[str, str]]:
+        """(digest, ext) stored for a media item of a note"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT digest, ext FROM media_ref WHERE platform = ? AND note_id = ? AND media_type = ? AND media_index = ?",
+                (platform, str(note_id), media_type, media_index),
+            ).fetchone()
+
+    def put_file(self, staged_path: str, url: str) -> str:
+        """
+        Move a downloaded file into the blob directory, identical content is kept only once
+        Args:
+            staged_path: downloaded file (see staging_path)
+            url: URL the file was downloaded from
+
+        Returns:
+            sha256 digest of the content
+        """
+        ext = os.path.splitext(staged_path)[1]
+        sha256 = hashlib.sha256()
+        with open(staged_path, "rb") as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+                sha256.update(chunk)
+        digest = sha256.hexdigest()
+        size = os.path.getsize(staged_path)
+
+        blob_path = self.blob_path(digest, ext)
+        if os.path.exists(blob_path):
+            os.remove(staged_path)
+        else:
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            os.replace(staged_path, blob_path)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO url_digest (url, digest, ext, size) VALUES (?, ?, ?, ?)",
+                (url, digest, ext, size),
+            )
+            self._conn.commit()
+        return digest
+
+    def attach(self, digest: str, ext: str, save_path: str, platform: str = "", note_id: str = "",
+               media_type: str = "image", media_index: int = 0):
+        """
+        Record the (platform, note_id, media_type, index) -> digest ref and expose the blob at save_path
+        save_path is a hard link to the blob (a copy where hard links are not supported)
+        """
+        if platform and note_id:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO media_ref (platform, note_id, media_type, media_index, digest, ext) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (platform, str(note_id), media_type, media_index, digest, ext),
+                )
+                self._conn.commit()
+        if os.path.exists(save_path):
+            return
+        os.makedirs(os.path.dirname(save_path) or ".", exist_ok=True)
+        blob_path = self.blob_path(digest, ext)
+        try:
+            os.link(blob_path, save_path)
+        except OSError as e:
+            utils.logger.warning(f"[MediaBlobStore.attach] Hard link failed ({e}), copying {blob_path} to {save_path}")
+            shutil.copyfile(blob_path, save_path)
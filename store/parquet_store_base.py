@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/store/parquet_store_base.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Parquet Store Base Implementation
+Buffers the crawled rows in memory and writes them as typed, partitioned Parquet files:
+
+    data/<platform>/parquet/<item_type>/date=<crawl date>/keyword=<source keyword>/<crawler_type>_<time>_<seq>.parquet
+
+Counts are stored as int64 and times as timestamps, so the files can be filtered with predicate pushdown, e.g.
+    pyarrow.dataset.dataset("data/xhs/parquet/contents", partitioning="hive").to_table(filter=ds.field("liked_count") > 1000)
+    duckdb: SELECT * FROM read_parquet('data/xhs/parquet/contents/**/*.parquet', hive_partitioning = true, union_by_name = true)
+"""
+
+import asyncio
+import json
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+    # Every time is stored in UTC, epochs and date strings with an offset (Weibo) would mix time zones otherwise
+    TIMESTAMP_TYPE = pa.timestamp("ms", tz="UTC")
+except ImportError:
+    PARQUET_AVAILABLE = False
+    TIMESTAMP_TYPE = None
+
+import config
+from base.base_crawler import AbstractStore
+from tools import utils
+
+# Fields stored as int64 besides every *_count field
+COUNT_FIELDS = {
+    "fans", "follows", "interaction", "total_fans", "total_liked", "total_comments", "total_forwards",
+    "video_danmaku", "video_comment", "user_rank",
+}
+
+# Fields stored as timestamp (epoch seconds / milliseconds or date strings in the crawled data)
+TIMESTAMP_FIELDS = {
+    "time", "create_time", "created_time", "updated_time", "last_update_time", "last_modify_ts", "add_ts",
+    "pub_ts", "publish_time", "create_date_time",
+}
+
+# Partition value of rows without a source keyword (comments, creators)
+# Not Hive's __HIVE_DEFAULT_PARTITION__: pyarrow cannot infer the type of a partition column that is only null
+NULL_PARTITION = "__none__"
+
+_COUNT_PATTERN = re.compile(r"^([0-9]+(?:\.[0-9]+)?)\s*([万wWkK亿]?)\+?$")
+_COUNT_UNITS = {"": 1, "k": 1000, "K": 1000, "w": 10000, "W": 10000, "万": 10000, "亿": 100000000}
+_DATE_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d", "%a %b %d %H:%M:%S %z %Y")
+
+
+def parse_count(value: Any) -> Optional[int]:
+    """Count from ints and strings like "1,234", "1.2万", "10w+", None when it is not a count"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = _COUNT_PATTERN.match(str(value).strip().replace(",", ""))
+    if not match:
+        return None
+    return int(round(float(match.group(1)) * _COUNT_UNITS[match.group(2)]))
+
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    """
+    UTC datetime from epoch seconds / milliseconds or a date string, None when it cannot be parsed
+    Date strings without an offset are taken as local time, the same as the epochs are shown by the platforms
+    """
+    if value is None or isinstance(value, bool) or value == "":
+        return None
+    if isinstance(value, str) and not value.strip().isdigit():
+        for fmt in _DATE_FORMATS:
+            try:
+                # astimezone() treats a naive datetime as local time
+                return datetime.strptime(value.strip(), fmt).astimezone(timezone.utc)
+            except ValueError:
+                continue
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    # 13 digit timestamps are milliseconds
+    seconds = number / 1000 if number >= 1e11 else number
+    try:
+        return datetime.fromtimestamp(seconds, tz=timezone.utc)
+    except (OverflowError, OSError, ValueError):
+        return None
+
+
+def _to_text(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def _column_type(name: str):
+    if name in TIMESTAMP_FIELDS:
+        return TIMESTAMP_TYPE
+    if name in COUNT_FIELDS or name.endswith("_count"):
+        return pa.int64()
+    return pa.string()
+
+
+def _convert(value: Any, arrow_type) -> Any:
+    if arrow_type == pa.int64():
+        return parse_count(value)
+    if arrow_type == TIMESTAMP_TYPE:
+        return parse_timestamp(value)
+    return _to_text(value)
+
+
+def build_table(rows: List[Dict]) -> "pa.Table":
+    """
+    Arrow table of the rows, the type of a column only depends on its name so every file of a dataset
+    has the same type for the same column
+    """
+    names: Dict[str, None] = {}
+    for row in rows:
+        names.update(dict.fromkeys(row))
+    schema = pa.schema([(name, _column_type(name)) for name in names])
+    arrays = [pa.array([_convert(row.get(field.name), field.type) for row in rows], type=field.type) for field in schema]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _partition_value(value: Any) -> str:
+    # Percent-encoded like pyarrow's hive partitioning expects, keeps "/" out of the path
+    return quote(str(value), safe="") if value not in (None, "") else NULL_PARTITION
+
+
+class ParquetStoreBase(AbstractStore):
+    """
+    Base class for Parquet storage implementation
+    Rows are buffered per item type and written out when PARQUET_FLUSH_ROWS rows are buffered or
+    PARQUET_FLUSH_INTERVAL_SEC passed since the last write, each write creates one file per partition
+    Uses singleton pattern to maintain state across multiple store calls
+    """
+
+    # Class-level singleton management
+    _instances: Dict[str, "ParquetStoreBase"] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls, platform: str, crawler_type: str) -> "ParquetStoreBase":
+        """
+        Get or create a singleton instance for the given platform and crawler type
+
+        Args:
+            platform: Platform name (xhs, dy, ks, etc.)
+            crawler_type: Type of crawler (search, detail, creator)
+
+        Returns:
+            ParquetStoreBase instance
+        """
+        key = f"{platform}_{crawler_type}"
+        with cls._lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(platform, crawler_type)
+            return cls._instances[key]
+
+    @classmethod
+    def flush_all(cls):
+        """
+        Write the buffered rows of all Parquet store instances
+        Should be called at the end of crawler execution
+        """
+        with cls._lock:
+            for key, instance in cls._instances.items():
+                try:
+                    instance.flush()
+                    utils.logger.info(f"[ParquetStoreBase] Flushed instance: {key}")
+                except Exception as e:
+                    utils.logger.error(f"[ParquetStoreBase] Error flushing {key}: {e}")
+            cls._instances.clear()
+
+    def __init__(self, platform: str, crawler_type: str = "search"):
+        """
+        Initialize Parquet store
+
+        Args:
+            platform: Platform name (xhs, dy, ks, etc.)
+            crawler_type: Type of crawler (search, detail, creator)
+        """
+        if not PARQUET_AVAILABLE:
+            raise ImportError(
+                "pyarrow is required for Parquet storage. "
+                "Install it with: pip install pyarrow"
+            )
+
+        super().__init__()
+        self.platform = platform
+        self.crawler_type = crawler_type
+        self.data_dir = Path("data") / platform / "parquet"
+        self.flush_rows = max(1, config.PARQUET_FLUSH_ROWS)
+        self.flush_interval = config.PARQUET_FLUSH_INTERVAL_SEC
+        self._buffers: Dict[str, List[Dict]] = {}
+        self._last_flush: Dict[str, float] = {}
+        self._file_seq = 0
+        self._file_lock = threading.Lock()
+
+    def _partition_dir(self, item_type: str, row: Dict) -> Path:
+        keyword = row.get("source_keyword") if config.PARQUET_PARTITION_BY_KEYWORD else None
+        return (
+            self.data_dir / item_type
+            / f"date={utils.get_current_date()}"
+            / f"keyword={_partition_value(keyword)}"
+        )
+
+    def _write_rows(self, item_type: str, rows: List[Dict]) -> List[Path]:
+        """Write one file per partition, returns the written files"""
+        partitions: Dict[Path, List[Dict]] = {}
+        for row in rows:
+            partitions.setdefault(self._partition_dir(item_type, row), []).append(row)
+        written = []
+        for directory, partition_rows in partitions.items():
+            directory.mkdir(parents=True, exist_ok=True)
+            with self._file_lock:
+                self._file_seq += 1
+                file_path = directory / f"{self.crawler_type}_{time.strftime('%H%M%S')}_{self._file_seq:05d}.parquet"
+            tmp_path = file_path.with_suffix(".parquet.tmp")
+            pq.write_table(build_table(partition_rows), tmp_path, row_group_size=self.flush_rows, compression="zstd")
+            # Readers never see a half written file
+            tmp_path.replace(file_path)
+            written.append(file_path)
+        utils.logger.info(f"[ParquetStoreBase] Wrote {len(rows)} {item_type} rows to {len(written)} file(s)")
+        return written
+
+    def _take_buffer(self, item_type: str) -> List[Dict]:
+        self._last_flush[item_type] = time.monotonic()
+        return self._buffers.pop(item_type, [])
+
+    async def _append(self, item_type: str, items: List[Dict]):
+        buffer = self._buffers.setdefault(item_type, [])
+        buffer.extend(item for item in items if item)
+        last_flush = self._last_flush.setdefault(item_type, time.monotonic())
+        if len(buffer) >= self.flush_rows or time.monotonic() - last_flush >= self.flush_interval:
+            rows = self._take_buffer(item_type)
+            if rows:
+                await asyncio.to_thread(self._write_rows, item_type, rows)
+
+    async def store_content(self, content_item: Dict):
+        await self._append("contents", [content_item])
+
+    async def store_content_batch(self, content_items: List[Dict]):
+        await self._append("contents", content_items)
+
+    async def store_comment(self, comment_item: Dict):
+        await self._append("comments", [comment_item])
+
+    async def store_comment_batch(self, comment_items: List[Dict]):
+        await self._append("comments", comment_items)
+
+    async def store_creator(self, creator: Dict):
+        await self._append("creators", [creator])
+
+    async def store_creator_batch(self, creators: List[Dict]):
+        await self._append("creators", creators)
+
+    async def store_contact(self, contact_item: Dict):
+        """Store contact data (for platforms like Bilibili)"""
+        await self._append("contacts", [contact_item])
+
+    async def store_contact_batch(self, contact_items: List[Dict]):
+        await self._append("contacts", contact_items)
+
+    async def store_dynamic(self, dynamic_item: Dict):
+        """Store dynamic data (for platforms like Bilibili)"""
+        await self._append("dynamics", [dynamic_item])
+
+    async def store_dynamic_batch(self, dynamic_items: List[Dict]):
+        await self._append("dynamics", dynamic_items)
+
+    def flush(self):
+        """
+        Write all buffered rows
+        """
+        for item_type in list(self._buffers):
+            rows = self._take_buffer(item_type)
+            if rows:
+                self._write_rows(item_type, rows)
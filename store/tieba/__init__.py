@@ -25,6 +25,7 @@ from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
 from var import source_keyword_var
 
 from ._store_impl import *
+from store.write_pipeline import StoreWritePipeline
 
 
 class TieBaStoreFactory:
@@ -36,6 +37,7 @@ class TieBaStoreFactory:
         "sqlite": TieBaSqliteStoreImplement,
         "mongodb": TieBaMongoStoreImplement,
         "excel": TieBaExcelStoreImplement,
+        "parquet": TieBaParquetStoreImplement,
     }
 
     @staticmethod
@@ -43,9 +45,13 @@ class TieBaStoreFactory:
         store_class = TieBaStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
+                "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel or parquet ...")
         return store_class()
 
+    @staticmethod
+    def get_pipeline() -> StoreWritePipeline:
+        return StoreWritePipeline.get_instance("tieba", TieBaStoreFactory.create_store)
+
 
 async def batch_update_tieba_notes(note_list: List[TiebaNote]):
     """
@@ -76,7 +82,7 @@ async def update_tieba_note(note_item: TiebaNote):
     save_note_item.update({"last_modify_ts": utils.get_current_timestamp()})
     utils.logger.info(f"[store.tieba.update_tieba_note] tieba note: {save_note_item}")
 
-    await TieBaStoreFactory.create_store().store_content(save_note_item)
+    await TieBaStoreFactory.get_pipeline().submit("store_content", save_note_item)
 
 
 async def batch_update_tieba_note_comments(note_id: str, comments: List[TiebaComment]):
@@ -108,7 +114,7 @@ async def update_tieba_note_comment(note_id: str, comment_item: TiebaComment):
     save_comment_item = comment_item.model_dump()
     save_comment_item.update({"last_modify_ts": utils.get_current_timestamp()})
     utils.logger.info(f"[store.tieba.update_tieba_note_comment] tieba note id: {note_id} comment:{save_comment_item}")
-    await TieBaStoreFactory.create_store().store_comment(save_comment_item)
+    await TieBaStoreFactory.get_pipeline().submit("store_comment", save_comment_item)
 
 
 async def save_creator(user_info: TiebaCreator):
@@ -123,4 +129,4 @@ async def save_creator(user_info: TiebaCreator):
     local_db_item = user_info.model_dump()
     local_db_item["last_modify_ts"] = utils.get_current_timestamp()
     utils.logger.info(f"[store.tieba.save_creator] creator:{local_db_item}")
-    await TieBaStoreFactory.create_store().store_creator(local_db_item)
+    await TieBaStoreFactory.get_pipeline().submit("store_creator", local_db_item)
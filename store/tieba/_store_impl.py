@@ -27,7 +27,7 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
 from sqlalchemy import select
@@ -37,6 +37,7 @@ import config
 from base.base_crawler import AbstractStore
 from database.models import TiebaNote, TiebaComment, TiebaCreator
 from tools import utils, words
+from database.bulk_upsert import bulk_upsert
 from database.db_session import get_session
 from var import crawler_type_var
 from tools.async_file_writer import AsyncFileWriter
@@ -104,18 +105,16 @@ class TieBaDbStoreImplement(AbstractStore):
         Args:
             content_item: content item dict
         """
-        note_id = content_item.get("note_id")
+        await self.store_content_batch([content_item])
+
+    async def store_content_batch(self, content_items: List[Dict]):
+        """
+        tieba content DB storage implementation, the whole batch is upserted in one statement
+        Args:
+            content_items: content item dicts
+        """
         async with get_session() as session:
-            stmt = select(TiebaNote).where(TiebaNote.note_id == note_id)
-            res = await session.execute(stmt)
-            db_note = res.scalar_one_or_none()
-            if db_note:
-                for key, value in content_item.items():
-                    setattr(db_note, key, value)
-            else:
-                db_note = TiebaNote(**content_item)
-                session.add(db_note)
-            await session.commit()
+            await bulk_upsert(session, TiebaNote, content_items, key_columns=["note_id"])
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -123,18 +122,16 @@ class TieBaDbStoreImplement(AbstractStore):
         Args:
             comment_item: comment item dict
         """
-        comment_id = comment_item.get("comment_id")
+        await self.store_comment_batch([comment_item])
+
+    async def store_comment_batch(self, comment_items: List[Dict]):
+        """
+        tieba comment DB storage implementation, the whole batch is upserted in one statement
+        Args:
+            comment_items: comment item dicts
+        """
         async with get_session() as session:
-            stmt = select(TiebaComment).where(TiebaComment.comment_id == comment_id)
-            res = await session.execute(stmt)
-            db_comment = res.scalar_one_or_none()
-            if db_comment:
-                for key, value in comment_item.items():
-                    setattr(db_comment, key, value)
-            else:
-                db_comment = TiebaComment(**comment_item)
-                session.add(db_comment)
-            await session.commit()
+            await bulk_upsert(session, TiebaComment, comment_items, key_columns=["comment_id"])
 
     async def store_creator(self, creator: Dict):
         """
@@ -142,18 +139,17 @@ class TieBaDbStoreImplement(AbstractStore):
         Args:
             creator: creator dict
         """
-        user_id = creator.get("user_id")
+        await self.store_creator_batch([creator])
+
+    async def store_creator_batch(self, creators: List[Dict]):
+        """
+        tieba creator DB storage implementation, the whole batch is upserted in one statement
+        Args:
+            creators: creator dicts
+        """
         async with get_session() as session:
-            stmt = select(TiebaCreator).where(TiebaCreator.user_id == user_id)
-            res = await session.execute(stmt)
-            db_creator = res.scalar_one_or_none()
-            if db_creator:
-                for key, value in creator.items():
-                    setattr(db_creator, key, value)
-            else:
-                db_creator = TiebaCreator(**creator)
-                session.add(db_creator)
-            await session.commit()
+            await bulk_upsert(session, TiebaCreator, creators, key_columns=["user_id"])
+
 
 
 class TieBaJsonStoreImplement(AbstractStore):
@@ -214,16 +210,15 @@ class TieBaMongoStoreImplement(AbstractStore):
         Args:
             content_item: Post content data
         """
-        note_id = content_item.get("note_id")
-        if not note_id:
-            return
+        await self.store_content_batch([content_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="contents",
-            query={"note_id": note_id},
-            data=content_item
-        )
-        utils.logger.info(f"[TieBaMongoStoreImplement.store_content] Saved note {note_id} to MongoDB")
+    async def store_content_batch(self, content_items: List[Dict]):
+        """
+        Store a batch of post content to MongoDB (buffered bulk upsert)
+        Args:
+            content_items: Post content data list
+        """
+        await self.mongo_store.save_or_update_many("contents", content_items, key_fields=["note_id"])
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -231,16 +226,15 @@ class TieBaMongoStoreImplement(AbstractStore):
         Args:
             comment_item: Comment data
         """
-        comment_id = comment_item.get("comment_id")
-        if not comment_id:
-            return
+        await self.store_comment_batch([comment_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="comments",
-            query={"comment_id": comment_id},
-            data=comment_item
-        )
-        utils.logger.info(f"[TieBaMongoStoreImplement.store_comment] Saved comment {comment_id} to MongoDB")
+    async def store_comment_batch(self, comment_items: List[Dict]):
+        """
+        Store a batch of comments to MongoDB (buffered bulk upsert)
+        Args:
+            comment_items: Comment data list
+        """
+        await self.mongo_store.save_or_update_many("comments", comment_items, key_fields=["comment_id"])
 
     async def store_creator(self, creator_item: Dict):
         """
@@ -248,16 +242,15 @@ class TieBaMongoStoreImplement(AbstractStore):
         Args:
             creator_item: Creator data
         """
-        user_id = creator_item.get("user_id")
-        if not user_id:
-            return
+        await self.store_creator_batch([creator_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="creators",
-            query={"user_id": user_id},
-            data=creator_item
-        )
-        utils.logger.info(f"[TieBaMongoStoreImplement.store_creator] Saved creator {user_id} to MongoDB")
+    async def store_creator_batch(self, creator_items: List[Dict]):
+        """
+        Store a batch of creator information to MongoDB (buffered bulk upsert)
+        Args:
+            creator_items: Creator data list
+        """
+        await self.mongo_store.save_or_update_many("creators", creator_items, key_fields=["user_id"])
 
 
 class TieBaExcelStoreImplement:
@@ -269,3 +262,14 @@ class TieBaExcelStoreImplement:
             platform="tieba",
             crawler_type=crawler_type_var.get()
         )
+
+
+class TieBaParquetStoreImplement:
+    """TieBa Parquet storage implementation - Global singleton"""
+
+    def __new__(cls, *args, **kwargs):
+        from store.parquet_store_base import ParquetStoreBase
+        return ParquetStoreBase.get_instance(
+            platform="tieba",
+            crawler_type=crawler_type_var.get()
+        )
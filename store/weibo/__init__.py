@@ -29,6 +29,7 @@ from var import source_keyword_var
 
 from .weibo_store_media import *
 from ._store_impl import *
+from store.write_pipeline import StoreWritePipeline
 
 
 class WeibostoreFactory:
@@ -40,15 +41,20 @@ class WeibostoreFactory:
         "sqlite": WeiboSqliteStoreImplement,
         "mongodb": WeiboMongoStoreImplement,
         "excel": WeiboExcelStoreImplement,
+        "parquet": WeiboParquetStoreImplement,
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
         store_class = WeibostoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
+            raise ValueError("[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel or parquet ...")
         return store_class()
 
+    @staticmethod
+    def get_pipeline() -> StoreWritePipeline:
+        return StoreWritePipeline.get_instance("weibo", WeibostoreFactory.create_store)
+
 
 async def batch_update_weibo_notes(note_list: List[Dict]):
     """
@@ -104,7 +110,7 @@ async def update_weibo_note(note_item: Dict):
         "source_keyword": source_keyword_var.get(),
     }
     utils.logger.info(f"[store.weibo.update_weibo_note] weibo note id:{note_id}, title:{save_content_item.get('content')[:24]} ...")
-    await WeibostoreFactory.create_store().store_content(content_item=save_content_item)
+    await WeibostoreFactory.get_pipeline().submit("store_content", save_content_item)
 
 
 async def batch_update_weibo_note_comments(note_id: str, comments: List[Dict]):
@@ -159,7 +165,12 @@ async def update_weibo_note_comment(note_id: str, comment_item: Dict):
         "avatar": user_info.get("profile_image_url", ""),
     }
     utils.logger.info(f"[store.weibo.update_weibo_note_comment] Weibo note comment: {comment_id}, content: {save_comment_item.get('content', '')[:24]} ...")
-    await WeibostoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    await WeibostoreFactory.get_pipeline().submit("store_comment", save_comment_item)
+
+
+def get_weibo_note_image_path(picid: str, extension_file_name: str) -> str:
+    """Local path of a note image, files are written by the MediaDownloader"""
+    return WeiboStoreImage().make_save_file_name(picid, extension_file_name)
 
 
 async def update_weibo_note_image(picid: str, pic_content, extension_file_name):
@@ -199,4 +210,4 @@ async def save_creator(user_id: str, user_info: Dict):
         "last_modify_ts": utils.get_current_timestamp(),
     }
     utils.logger.info(f"[store.weibo.save_creator] creator:{local_db_item}")
-    await WeibostoreFactory.create_store().store_creator(local_db_item)
+    await WeibostoreFactory.get_pipeline().submit("store_creator", local_db_item)
@@ -27,7 +27,7 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
 from sqlalchemy import select
@@ -38,6 +38,7 @@ from base.base_crawler import AbstractStore
 from database.models import WeiboCreator, WeiboNote, WeiboNoteComment
 from tools import utils, words
 from tools.async_file_writer import AsyncFileWriter
+from database.bulk_upsert import bulk_upsert
 from database.db_session import get_session
 from var import crawler_type_var
 from database.mongodb_store_base import MongoDBStoreBase
@@ -108,23 +109,25 @@ class WeiboDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        note_id = int(content_item.get("note_id"))
-        content_item["note_id"] = note_id
+        await self.store_content_batch([content_item])
+
+    async def store_content_batch(self, content_items: List[Dict]):
+        """
+        Weibo content DB storage implementation, the whole batch is upserted in one statement
+        Args:
+            content_items: content item dicts
+
+        Returns:
+
+        """
+        rows = []
+        for content_item in content_items:
+            row = dict(content_item, note_id=int(content_item.get("note_id")))
+            row["add_ts"] = utils.get_current_timestamp()
+            row["last_modify_ts"] = utils.get_current_timestamp()
+            rows.append(row)
         async with get_session() as session:
-            stmt = select(WeiboNote).where(WeiboNote.note_id == note_id)
-            res = await session.execute(stmt)
-            db_note = res.scalar_one_or_none()
-            if db_note:
-                db_note.last_modify_ts = utils.get_current_timestamp()
-                for key, value in content_item.items():
-                    if hasattr(db_note, key):
-                        setattr(db_note, key, value)
-            else:
-                content_item["add_ts"] = utils.get_current_timestamp()
-                content_item["last_modify_ts"] = utils.get_current_timestamp()
-                db_note = WeiboNote(**content_item)
-                session.add(db_note)
-            await session.commit()
+            await bulk_upsert(session, WeiboNote, rows, key_columns=["note_id"])
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -135,29 +138,31 @@ class WeiboDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        comment_id = int(comment_item.get("comment_id"))
-        comment_item["comment_id"] = comment_id
-        comment_item["note_id"] = int(comment_item.get("note_id", 0) or 0)
-        comment_item["create_time"] = int(comment_item.get("create_time", 0) or 0)
-        comment_item["comment_like_count"] = str(comment_item.get("comment_like_count", "0"))
-        comment_item["sub_comment_count"] = str(comment_item.get("sub_comment_count", "0"))
-        comment_item["parent_comment_id"] = str(comment_item.get("parent_comment_id", "0"))
+        await self.store_comment_batch([comment_item])
+
+    async def store_comment_batch(self, comment_items: List[Dict]):
+        """
+        Weibo comment DB storage implementation, the whole batch is upserted in one statement
+        Args:
+            comment_items: comment item dicts
 
+        Returns:
+
+        """
+        rows = []
+        for comment_item in comment_items:
+            row = dict(comment_item)
+            row["comment_id"] = int(comment_item.get("comment_id"))
+            row["note_id"] = int(comment_item.get("note_id", 0) or 0)
+            row["create_time"] = int(comment_item.get("create_time", 0) or 0)
+            row["comment_like_count"] = str(comment_item.get("comment_like_count", "0"))
+            row["sub_comment_count"] = str(comment_item.get("sub_comment_count", "0"))
+            row["parent_comment_id"] = str(comment_item.get("parent_comment_id", "0"))
+            row["add_ts"] = utils.get_current_timestamp()
+            row["last_modify_ts"] = utils.get_current_timestamp()
+            rows.append(row)
         async with get_session() as session:
-            stmt = select(WeiboNoteComment).where(WeiboNoteComment.comment_id == comment_id)
-            res = await session.execute(stmt)
-            db_comment = res.scalar_one_or_none()
-            if db_comment:
-                db_comment.last_modify_ts = utils.get_current_timestamp()
-                for key, value in comment_item.items():
-                    if hasattr(db_comment, key):
-                        setattr(db_comment, key, value)
-            else:
-                comment_item["add_ts"] = utils.get_current_timestamp()
-                comment_item["last_modify_ts"] = utils.get_current_timestamp()
-                db_comment = WeiboNoteComment(**comment_item)
-                session.add(db_comment)
-            await session.commit()
+            await bulk_upsert(session, WeiboNoteComment, rows, key_columns=["comment_id"])
 
     async def store_creator(self, creator: Dict):
         """
@@ -168,23 +173,26 @@ class WeiboDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        user_id = int(creator.get("user_id"))
-        creator["user_id"] = user_id
+        await self.store_creator_batch([creator])
+
+    async def store_creator_batch(self, creators: List[Dict]):
+        """
+        Weibo creator DB storage implementation, the whole batch is upserted in one statement
+        Args:
+            creators:
+
+        Returns:
+
+        """
+        rows = []
+        for creator in creators:
+            row = dict(creator, user_id=int(creator.get("user_id")))
+            row["add_ts"] = utils.get_current_timestamp()
+            row["last_modify_ts"] = utils.get_current_timestamp()
+            rows.append(row)
         async with get_session() as session:
-            stmt = select(WeiboCreator).where(WeiboCreator.user_id == user_id)
-            res = await session.execute(stmt)
-            db_creator = res.scalar_one_or_none()
-            if db_creator:
-                db_creator.last_modify_ts = utils.get_current_timestamp()
-                for key, value in creator.items():
-                    if hasattr(db_creator, key):
-                        setattr(db_creator, key, value)
-            else:
-                creator["add_ts"] = utils.get_current_timestamp()
-                creator["last_modify_ts"] = utils.get_current_timestamp()
-                db_creator = WeiboCreator(**creator)
-                session.add(db_creator)
-            await session.commit()
+            await bulk_upsert(session, WeiboCreator, rows, key_columns=["user_id"])
+
 
 
 class WeiboJsonStoreImplement(AbstractStore):
@@ -245,16 +253,15 @@ class WeiboMongoStoreImplement(AbstractStore):
         Args:
             content_item: Weibo content data
         """
-        note_id = content_item.get("note_id")
-        if not note_id:
-            return
+        await self.store_content_batch([content_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="contents",
-            query={"note_id": note_id},
-            data=content_item
-        )
-        utils.logger.info(f"[WeiboMongoStoreImplement.store_content] Saved note {note_id} to MongoDB")
+    async def store_content_batch(self, content_items: List[Dict]):
+        """
+        Store a batch of Weibo content to MongoDB (buffered bulk upsert)
+        Args:
+            content_items: Weibo content data list
+        """
+        await self.mongo_store.save_or_update_many("contents", content_items, key_fields=["note_id"])
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -262,16 +269,15 @@ class WeiboMongoStoreImplement(AbstractStore):
         Args:
             comment_item: Comment data
         """
-        comment_id = comment_item.get("comment_id")
-        if not comment_id:
-            return
+        await self.store_comment_batch([comment_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="comments",
-            query={"comment_id": comment_id},
-            data=comment_item
-        )
-        utils.logger.info(f"[WeiboMongoStoreImplement.store_comment] Saved comment {comment_id} to MongoDB")
+    async def store_comment_batch(self, comment_items: List[Dict]):
+        """
+        Store a batch of comments to MongoDB (buffered bulk upsert)
+        Args:
+            comment_items: Comment data list
+        """
+        await self.mongo_store.save_or_update_many("comments", comment_items, key_fields=["comment_id"])
 
     async def store_creator(self, creator_item: Dict):
         """
@@ -279,16 +285,15 @@ class WeiboMongoStoreImplement(AbstractStore):
         Args:
             creator_item: Creator data
         """
-        user_id = creator_item.get("user_id")
-        if not user_id:
-            return
+        await self.store_creator_batch([creator_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="creators",
-            query={"user_id": user_id},
-            data=creator_item
-        )
-        utils.logger.info(f"[WeiboMongoStoreImplement.store_creator] Saved creator {user_id} to MongoDB")
+    async def store_creator_batch(self, creator_items: List[Dict]):
+        """
+        Store a batch of creator information to MongoDB (buffered bulk upsert)
+        Args:
+            creator_items: Creator data list
+        """
+        await self.mongo_store.save_or_update_many("creators", creator_items, key_fields=["user_id"])
 
 
 class WeiboExcelStoreImplement:
@@ -300,3 +305,14 @@ class WeiboExcelStoreImplement:
             platform="weibo",
             crawler_type=crawler_type_var.get()
         )
+
+
+class WeiboParquetStoreImplement:
+    """Weibo Parquet storage implementation - Global singleton"""
+
+    def __new__(cls, *args, **kwargs):
+        from store.parquet_store_base import ParquetStoreBase
+        return ParquetStoreBase.get_instance(
+            platform="weibo",
+            crawler_type=crawler_type_var.get()
+        )
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/store/write_pipeline.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Write-behind pipeline for the platform stores
+Crawler coroutines only put items into a bounded queue, a background flusher writes them in batches
+"""
+
+import asyncio
+from typing import Callable, Dict, List, Optional, Tuple
+
+import config
+from base.base_crawler import AbstractStore
+from tools import utils
+
+
+class StoreWritePipeline:
+    """
+    Write-behind pipeline in front of one platform store
+    Uses singleton pattern so every item of a platform goes through the same store instance and queue
+    """
+
+    # Class-level singleton management
+    _instances: Dict[str, "StoreWritePipeline"] = {}
+
+    @classmethod
+    def get_instance(cls, platform: str, store_factory: Callable[[], AbstractStore]) -> "StoreWritePipeline":
+        """
+        Get or create the pipeline for the given platform and the current SAVE_DATA_OPTION
+
+        Args:
+            platform: Platform name (xhs, dy, ks, etc.)
+            store_factory: Callable creating the underlying store, e.g. XhsStoreFactory.create_store
+
+        Returns:
+            StoreWritePipeline instance
+        """
+        key = f"{platform}_{config.SAVE_DATA_OPTION}"
+        if key not in cls._instances:
+            cls._instances[key] = cls(platform, store_factory())
+        return cls._instances[key]
+
+    @classmethod
+    async def flush_all(cls):
+        """
+        Write out everything still queued and stop all flushers
+        Should be called at the end of crawler execution, before the stores themselves are flushed/closed
+        """
+        for key, instance in list(cls._instances.items()):
+            try:
+                await instance.close()
+                utils.logger.info(f"[StoreWritePipeline] Flushed pipeline: {key}, items written: {instance.written_count}")
+            except Exception as e:
+                utils.logger.error(f"[StoreWritePipeline] Error flushing {key}: {e}")
+        cls._instances.clear()
+
+    def __init__(self, platform: str, store: AbstractStore):
+        """
+        Args:
+            platform: Platform name (xhs, dy, ks, etc.)
+            store: Underlying store the batches are written to
+        """
+        self.platform = platform
+        self.store = store
+        self.batch_size = max(1, config.STORE_PIPELINE_BATCH_SIZE)
+        self.flush_interval = config.STORE_PIPELINE_FLUSH_INTERVAL_SEC
+        self.queue: asyncio.Queue[Tuple[str, Dict]] = asyncio.Queue(maxsize=config.STORE_PIPELINE_QUEUE_MAX_SIZE)
+        self.written_count = 0
+        self._flusher_task: Optional[asyncio.Task] = None
+
+    async def submit(self, method: str, item: Dict):
+        """
+        Hand an item over to the pipeline
+        Returns as soon as the item is queued, only waits when the queue is full (backpressure)
+
+        Args:
+            method: Store method the item is written with, e.g. store_content / store_comment / store_creator
+            item: Item to store
+        """
+        if not config.ENABLE_STORE_PIPELINE:
+            await getattr(self.store, method)(item)
+            return
+
+        if self._flusher_task is None or self._flusher_task.done():
+            self._flusher_task = asyncio.create_task(self._run_flusher())
+        await self.queue.put((method, item))
+
+    async def flush(self):
+        """Wait until every queued item has been written"""
+        if self._flusher_task is None or self._flusher_task.done():
+            # No flusher running (e.g. it was cancelled), write the rest inline
+            batch = []
+            while not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            await self._write_batch(batch)
+            for _ in batch:
+                self.queue.task_done()
+            return
+        await self.queue.join()
+
+    async def close(self):
+        """Flush the queue and stop the background flusher"""
+        await self.flush()
+        if self._flusher_task is not None and not self._flusher_task.done():
+            self._flusher_task.cancel()
+            await asyncio.gather(self._flusher_task, return_exceptions=True)
+        self._flusher_task = None
+
+    async def _run_flusher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout=timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _write_batch(self, batch: List[Tuple[str, Dict]]):
+        # Consecutive items of the same kind go to the store's <method>_batch (e.g. store_comment_batch) if it has one
+        for method, items in self._group_consecutive(batch):
+            batch_fn = getattr(self.store, f"{method}_batch", None)
+            if batch_fn is not None and len(items) > 1:
+                try:
+                    await batch_fn(items)
+                    self.written_count += len(items)
+                    continue
+                except Exception as e:
+                    utils.logger.error(f"[StoreWritePipeline._write_batch] {self.platform} {method}_batch failed, retrying item by item: {e}")
+            for item in items:
+                try:
+                    await getattr(self.store, method)(item)
+                    self.written_count += 1
+                except Exception as e:
+                    utils.logger.error(f"[StoreWritePipeline._write_batch] {self.platform} {method} failed: {e}")
+
+    @staticmethod
+    def _group_consecutive(batch: List[Tuple[str, Dict]]) -> List[Tuple[str, List[Dict]]]:
+        groups: List[Tuple[str, List[Dict]]] = []
+        for method, item in batch:
+            if groups and groups[-1][0] == method:
+                groups[-1][1].append(item)
+            else:
+                groups.append((method, [item]))
+        return groups
@@ -28,6 +28,7 @@ from var import source_keyword_var
 
 from .xhs_store_media import *
 from ._store_impl import *
+from store.write_pipeline import StoreWritePipeline
 
 
 class XhsStoreFactory:
@@ -39,15 +40,20 @@ class XhsStoreFactory:
         "sqlite": XhsSqliteStoreImplement,
         "mongodb": XhsMongoStoreImplement,
         "excel": XhsExcelStoreImplement,
+        "parquet": XhsParquetStoreImplement,
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
         store_class = XhsStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[XhsStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
+            raise ValueError("[XhsStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel or parquet ...")
         return store_class()
 
+    @staticmethod
+    def get_pipeline() -> StoreWritePipeline:
+        return StoreWritePipeline.get_instance("xhs", XhsStoreFactory.create_store)
+
 
 def get_video_url_arr(note_item: Dict) -> List:
     """
@@ -128,7 +134,7 @@ async def update_xhs_note(note_item: Dict):
         "xsec_token": note_item.get("xsec_token"),  # xsec_token
     }
     utils.logger.info(f"[store.xhs.update_xhs_note] xhs note: {local_db_item}")
-    await XhsStoreFactory.create_store().store_content(local_db_item)
+    await XhsStoreFactory.get_pipeline().submit("store_content", local_db_item)
 
 
 async def batch_update_xhs_note_comments(note_id: str, comments: List[Dict]):
@@ -177,7 +183,7 @@ async def update_xhs_note_comment(note_id: str, comment_item: Dict):
         "like_count": comment_item.get("like_count", 0),
     }
     utils.logger.info(f"[store.xhs.update_xhs_note_comment] xhs note comment:{local_db_item}")
-    await XhsStoreFactory.create_store().store_comment(local_db_item)
+    await XhsStoreFactory.get_pipeline().submit("store_comment", local_db_item)
 
 
 async def save_creator(user_id: str, creator: Dict):
@@ -226,7 +232,17 @@ async def save_creator(user_id: str, creator: Dict):
         "last_modify_ts": utils.get_current_timestamp(),  # Last modification timestamp (Generated by MediaCrawler, mainly used to record the latest update time of a record in DB storage)
     }
     utils.logger.info(f"[store.xhs.save_creator] creator:{local_db_item}")
-    await XhsStoreFactory.create_store().store_creator(local_db_item)
+    await XhsStoreFactory.get_pipeline().submit("store_creator", local_db_item)
+
+
+def get_xhs_note_image_path(note_id: str, extension_file_name: str) -> str:
+    """Local path of a note image, files are written by the MediaDownloader"""
+    return XiaoHongShuImage().make_save_file_name(note_id, extension_file_name)
+
+
+def get_xhs_note_video_path(note_id: str, extension_file_name: str) -> str:
+    """Local path of a note video, files are written by the MediaDownloader"""
+    return XiaoHongShuVideo().make_save_file_name(note_id, extension_file_name)
 
 
 async def update_xhs_note_image(note_id, pic_content, extension_file_name):
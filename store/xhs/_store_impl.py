@@ -29,6 +29,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from base.base_crawler import AbstractStore
+from database.bulk_upsert import bulk_upsert
 from database.db_session import get_session
 from database.models import XhsNote, XhsNoteComment, XhsCreator
 
@@ -102,163 +103,134 @@ class XhsJsonStoreImplement(AbstractStore):
 
 
 class XhsDbStoreImplement(AbstractStore):
+    # Columns refreshed when a note/comment/creator is crawled again
+    CONTENT_UPDATE_COLUMNS = ["last_modify_ts", "liked_count", "collected_count", "comment_count", "share_count", "last_update_time"]
+    COMMENT_UPDATE_COLUMNS = ["last_modify_ts", "like_count", "sub_comment_count"]
+    CREATOR_UPDATE_COLUMNS = ["last_modify_ts", "nickname", "avatar", "desc", "follows", "fans", "interaction", "tag_list"]
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
     async def store_content(self, content_item: Dict):
-        note_id = content_item.get("note_id")
-        if not note_id:
+        await self.store_content_batch([content_item])
+
+    async def store_content_batch(self, content_items: List[Dict]):
+        """
+        Upsert a batch of notes in one statement
+        :param content_items:
+        :return:
+        """
+        rows = [self._content_row(item) for item in content_items if item.get("note_id")]
+        if not rows:
             return
         async with get_session() as session:
-            if await self.content_is_exist(session, note_id):
-                await self.update_content(session, content_item)
-            else:
-                await self.add_content(session, content_item)
-
-    async def add_content(self, session: AsyncSession, content_item: Dict):
-        add_ts = int(get_current_timestamp())
-        last_modify_ts = int(get_current_timestamp())
-        note = XhsNote(
-            user_id=content_item.get("user_id"),
-            nickname=content_item.get("nickname"),
-            avatar=content_item.get("avatar"),
-            ip_location=content_item.get("ip_location"),
-            add_ts=add_ts,
-            last_modify_ts=last_modify_ts,
-            note_id=content_item.get("note_id"),
-            type=content_item.get("type"),
-            title=content_item.get("title"),
-            desc=content_item.get("desc"),
-            video_url=content_item.get("video_url"),
-            time=content_item.get("time"),
-            last_update_time=content_item.get("last_update_time"),
-            liked_count=str(content_item.get("liked_count")),
-            collected_count=str(content_item.get("collected_count")),
-            comment_count=str(content_item.get("comment_count")),
-            share_count=str(content_item.get("share_count")),
-            image_list=json.dumps(content_item.get("image_list")),
-            tag_list=json.dumps(content_item.get("tag_list")),
-            note_url=content_item.get("note_url"),
-            source_keyword=content_item.get("source_keyword", ""),
-            xsec_token=content_item.get("xsec_token", "")
-        )
-        session.add(note)
-
-    async def update_content(self, session: AsyncSession, content_item: Dict):
-        note_id = content_item.get("note_id")
-        last_modify_ts = int(get_current_timestamp())
-        update_data = {
-            "last_modify_ts": last_modify_ts,
+            await bulk_upsert(session, XhsNote, rows, key_columns=["note_id"], update_columns=self.CONTENT_UPDATE_COLUMNS)
+
+    @staticmethod
+    def _content_row(content_item: Dict) -> Dict:
+        now_ts = int(get_current_timestamp())
+        return {
+            "user_id": content_item.get("user_id"),
+            "nickname": content_item.get("nickname"),
+            "avatar": content_item.get("avatar"),
+            "ip_location": content_item.get("ip_location"),
+            "add_ts": now_ts,
+            "last_modify_ts": now_ts,
+            "note_id": content_item.get("note_id"),
+            "type": content_item.get("type"),
+            "title": content_item.get("title"),
+            "desc": content_item.get("desc"),
+            "video_url": content_item.get("video_url"),
+            "time": content_item.get("time"),
+            "last_update_time": content_item.get("last_update_time"),
             "liked_count": str(content_item.get("liked_count")),
             "collected_count": str(content_item.get("collected_count")),
             "comment_count": str(content_item.get("comment_count")),
             "share_count": str(content_item.get("share_count")),
-            "last_update_time": content_item.get("last_update_time"),
+            "image_list": json.dumps(content_item.get("image_list")),
+            "tag_list": json.dumps(content_item.get("tag_list")),
+            "note_url": content_item.get("note_url"),
+            "source_keyword": content_item.get("source_keyword", ""),
+            "xsec_token": content_item.get("xsec_token", ""),
         }
-        stmt = update(XhsNote).where(XhsNote.note_id == note_id).values(**update_data)
-        await session.execute(stmt)
 
     async def content_is_exist(self, session: AsyncSession, note_id: str) -> bool:
-        stmt = select(XhsNote).where(XhsNote.note_id == note_id)
+        stmt = select(XhsNote.id).where(XhsNote.note_id == note_id)
         result = await session.execute(stmt)
         return result.first() is not None
 
     async def store_comment(self, comment_item: Dict):
         if not comment_item:
             return
-        async with get_session() as session:
-            comment_id = comment_item.get("comment_id")
-            if not comment_id:
-                return
-            if await self.comment_is_exist(session, comment_id):
-                await self.update_comment(session, comment_item)
-            else:
-                await self.add_comment(session, comment_item)
-
-    async def add_comment(self, session: AsyncSession, comment_item: Dict):
-        add_ts = int(get_current_timestamp())
-        last_modify_ts = int(get_current_timestamp())
-        comment = XhsNoteComment(
-            user_id=comment_item.get("user_id"),
-            nickname=comment_item.get("nickname"),
-            avatar=comment_item.get("avatar"),
-            ip_location=comment_item.get("ip_location"),
-            add_ts=add_ts,
-            last_modify_ts=last_modify_ts,
-            comment_id=comment_item.get("comment_id"),
-            create_time=comment_item.get("create_time"),
-            note_id=comment_item.get("note_id"),
-            content=comment_item.get("content"),
-            sub_comment_count=int(comment_item.get("sub_comment_count", 0) or 0),
-            pictures=json.dumps(comment_item.get("pictures")),
-            parent_comment_id=str(comment_item.get("parent_comment_id", "")),
-            like_count=str(comment_item.get("like_count"))
-        )
-        session.add(comment)
+        await self.store_comment_batch([comment_item])
 
-    async def update_comment(self, session: AsyncSession, comment_item: Dict):
-        comment_id = comment_item.get("comment_id")
-        last_modify_ts = int(get_current_timestamp())
-        update_data = {
-            "last_modify_ts": last_modify_ts,
-            "like_count": str(comment_item.get("like_count")),
+    async def store_comment_batch(self, comment_items: List[Dict]):
+        """
+        Upsert a batch of comments (e.g. one comment page) in one statement
+        :param comment_items:
+        :return:
+        """
+        rows = [self._comment_row(item) for item in comment_items if item and item.get("comment_id")]
+        if not rows:
+            return
+        async with get_session() as session:
+            await bulk_upsert(session, XhsNoteComment, rows, key_columns=["comment_id"], update_columns=self.COMMENT_UPDATE_COLUMNS)
+
+    @staticmethod
+    def _comment_row(comment_item: Dict) -> Dict:
+        now_ts = int(get_current_timestamp())
+        return {
+            "user_id": comment_item.get("user_id"),
+            "nickname": comment_item.get("nickname"),
+            "avatar": comment_item.get("avatar"),
+            "ip_location": comment_item.get("ip_location"),
+            "add_ts": now_ts,
+            "last_modify_ts": now_ts,
+            "comment_id": comment_item.get("comment_id"),
+            "create_time": comment_item.get("create_time"),
+            "note_id": comment_item.get("note_id"),
+            "content": comment_item.get("content"),
             "sub_comment_count": int(comment_item.get("sub_comment_count", 0) or 0),
+            "pictures": json.dumps(comment_item.get("pictures")),
+            "parent_comment_id": str(comment_item.get("parent_comment_id", "")),
+            "like_count": str(comment_item.get("like_count")),
         }
-        stmt = update(XhsNoteComment).where(XhsNoteComment.comment_id == comment_id).values(**update_data)
-        await session.execute(stmt)
 
     async def comment_is_exist(self, session: AsyncSession, comment_id: str) -> bool:
-        stmt = select(XhsNoteComment).where(XhsNoteComment.comment_id == comment_id)
+        stmt = select(XhsNoteComment.id).where(XhsNoteComment.comment_id == comment_id)
         result = await session.execute(stmt)
         return result.first() is not None
 
     async def store_creator(self, creator_item: Dict):
-        user_id = creator_item.get("user_id")
-        if not user_id:
+        await self.store_creator_batch([creator_item])
+
+    async def store_creator_batch(self, creator_items: List[Dict]):
+        rows = [self._creator_row(item) for item in creator_items if item.get("user_id")]
+        if not rows:
             return
         async with get_session() as session:
-            if await self.creator_is_exist(session, user_id):
-                await self.update_creator(session, creator_item)
-            else:
-                await self.add_creator(session, creator_item)
-
-    async def add_creator(self, session: AsyncSession, creator_item: Dict):
-        add_ts = int(get_current_timestamp())
-        last_modify_ts = int(get_current_timestamp())
-        creator = XhsCreator(
-            user_id=creator_item.get("user_id"),
-            nickname=creator_item.get("nickname"),
-            avatar=creator_item.get("avatar"),
-            ip_location=creator_item.get("ip_location"),
-            add_ts=add_ts,
-            last_modify_ts=last_modify_ts,
-            desc=creator_item.get("desc"),
-            gender=creator_item.get("gender"),
-            follows=str(creator_item.get("follows")),
-            fans=str(creator_item.get("fans")),
-            interaction=str(creator_item.get("interaction")),
-            tag_list=json.dumps(creator_item.get("tag_list"))
-        )
-        session.add(creator)
+            await bulk_upsert(session, XhsCreator, rows, key_columns=["user_id"], update_columns=self.CREATOR_UPDATE_COLUMNS)
 
-    async def update_creator(self, session: AsyncSession, creator_item: Dict):
-        user_id = creator_item.get("user_id")
-        last_modify_ts = int(get_current_timestamp())
-        update_data = {
-            "last_modify_ts": last_modify_ts,
+    @staticmethod
+    def _creator_row(creator_item: Dict) -> Dict:
+        now_ts = int(get_current_timestamp())
+        return {
+            "user_id": creator_item.get("user_id"),
             "nickname": creator_item.get("nickname"),
             "avatar": creator_item.get("avatar"),
+            "ip_location": creator_item.get("ip_location"),
+            "add_ts": now_ts,
+            "last_modify_ts": now_ts,
             "desc": creator_item.get("desc"),
+            "gender": creator_item.get("gender"),
             "follows": str(creator_item.get("follows")),
             "fans": str(creator_item.get("fans")),
             "interaction": str(creator_item.get("interaction")),
-            "tag_list": json.dumps(creator_item.get("tag_list"))
+            "tag_list": json.dumps(creator_item.get("tag_list")),
         }
-        stmt = update(XhsCreator).where(XhsCreator.user_id == user_id).values(**update_data)
-        await session.execute(stmt)
 
     async def creator_is_exist(self, session: AsyncSession, user_id: str) -> bool:
-        stmt = select(XhsCreator).where(XhsCreator.user_id == user_id)
+        stmt = select(XhsCreator.id).where(XhsCreator.user_id == user_id)
         result = await session.execute(stmt)
         return result.first() is not None
 
@@ -293,16 +265,15 @@ class XhsMongoStoreImplement(AbstractStore):
         Args:
             content_item: Note content data
         """
-        note_id = content_item.get("note_id")
-        if not note_id:
-            return
+        await self.store_content_batch([content_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="contents",
-            query={"note_id": note_id},
-            data=content_item
-        )
-        utils.logger.info(f"[XhsMongoStoreImplement.store_content] Saved note {note_id} to MongoDB")
+    async def store_content_batch(self, content_items: List[Dict]):
+        """
+        Store a batch of note content to MongoDB (buffered bulk upsert)
+        Args:
+            content_items: Note content data list
+        """
+        await self.mongo_store.save_or_update_many("contents", content_items, key_fields=["note_id"])
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -310,16 +281,15 @@ class XhsMongoStoreImplement(AbstractStore):
         Args:
             comment_item: Comment data
         """
-        comment_id = comment_item.get("comment_id")
-        if not comment_id:
-            return
+        await self.store_comment_batch([comment_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="comments",
-            query={"comment_id": comment_id},
-            data=comment_item
-        )
-        utils.logger.info(f"[XhsMongoStoreImplement.store_comment] Saved comment {comment_id} to MongoDB")
+    async def store_comment_batch(self, comment_items: List[Dict]):
+        """
+        Store a batch of comments to MongoDB (buffered bulk upsert)
+        Args:
+            comment_items: Comment data list
+        """
+        await self.mongo_store.save_or_update_many("comments", comment_items, key_fields=["comment_id"])
 
     async def store_creator(self, creator_item: Dict):
         """
@@ -327,16 +297,15 @@ class XhsMongoStoreImplement(AbstractStore):
         Args:
             creator_item: Creator data
         """
-        user_id = creator_item.get("user_id")
-        if not user_id:
-            return
+        await self.store_creator_batch([creator_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="creators",
-            query={"user_id": user_id},
-            data=creator_item
-        )
-        utils.logger.info(f"[XhsMongoStoreImplement.store_creator] Saved creator {user_id} to MongoDB")
+    async def store_creator_batch(self, creator_items: List[Dict]):
+        """
+        Store a batch of creator information to MongoDB (buffered bulk upsert)
+        Args:
+            creator_items: Creator data list
+        """
+        await self.mongo_store.save_or_update_many("creators", creator_items, key_fields=["user_id"])
 
 
 class XhsExcelStoreImplement:
@@ -348,3 +317,14 @@ class XhsExcelStoreImplement:
             platform="xhs",
             crawler_type=crawler_type_var.get()
         )
+
+
+class XhsParquetStoreImplement:
+    """Xiaohongshu Parquet storage implementation - Global singleton"""
+
+    def __new__(cls, *args, **kwargs):
+        from store.parquet_store_base import ParquetStoreBase
+        return ParquetStoreBase.get_instance(
+            platform="xhs",
+            crawler_type=crawler_type_var.get()
+        )
@@ -29,7 +29,9 @@ from ._store_impl import (ZhihuCsvStoreImplement,
                                           ZhihuJsonStoreImplement,
                                           ZhihuSqliteStoreImplement,
                                           ZhihuMongoStoreImplement,
-                                          ZhihuExcelStoreImplement)
+                                          ZhihuExcelStoreImplement,
+                                          ZhihuParquetStoreImplement)
+from store.write_pipeline import StoreWritePipeline
 from tools import utils
 from var import source_keyword_var
 
@@ -43,15 +45,20 @@ class ZhihuStoreFactory:
         "sqlite": ZhihuSqliteStoreImplement,
         "mongodb": ZhihuMongoStoreImplement,
         "excel": ZhihuExcelStoreImplement,
+        "parquet": ZhihuParquetStoreImplement,
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
         store_class = ZhihuStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[ZhihuStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
+            raise ValueError("[ZhihuStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel or parquet ...")
         return store_class()
 
+    @staticmethod
+    def get_pipeline() -> StoreWritePipeline:
+        return StoreWritePipeline.get_instance("zhihu", ZhihuStoreFactory.create_store)
+
 async def batch_update_zhihu_contents(contents: List[ZhihuContent]):
     """
     Batch update Zhihu contents
@@ -80,7 +87,7 @@ async def update_zhihu_content(content_item: ZhihuContent):
     local_db_item = content_item.model_dump()
     local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
     utils.logger.info(f"[store.zhihu.update_zhihu_content] zhihu content: {local_db_item}")
-    await ZhihuStoreFactory.create_store().store_content(local_db_item)
+    await ZhihuStoreFactory.get_pipeline().submit("store_content", local_db_item)
 
 
 
@@ -112,7 +119,7 @@ async def update_zhihu_content_comment(comment_item: ZhihuComment):
     local_db_item = comment_item.model_dump()
     local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
     utils.logger.info(f"[store.zhihu.update_zhihu_note_comment] zhihu content comment:{local_db_item}")
-    await ZhihuStoreFactory.create_store().store_comment(local_db_item)
+    await ZhihuStoreFactory.get_pipeline().submit("store_comment", local_db_item)
 
 
 async def save_creator(creator: ZhihuCreator):
@@ -128,4 +135,4 @@ async def save_creator(creator: ZhihuCreator):
         return
     local_db_item = creator.model_dump()
     local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
-    await ZhihuStoreFactory.create_store().store_creator(local_db_item)
+    await ZhihuStoreFactory.get_pipeline().submit("store_creator", local_db_item)
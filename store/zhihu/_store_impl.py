@@ -27,7 +27,7 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
 from sqlalchemy import select
@@ -35,6 +35,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 import config
 from base.base_crawler import AbstractStore
+from database.bulk_upsert import bulk_upsert
 from database.db_session import get_session
 from database.models import ZhihuContent, ZhihuComment, ZhihuCreator
 from tools import utils, words
@@ -103,19 +104,16 @@ class ZhihuDbStoreImplement(AbstractStore):
         Args:
             content_item: content item dict
         """
-        content_id = content_item.get("content_id")
+        await self.store_content_batch([content_item])
+
+    async def store_content_batch(self, content_items: List[Dict]):
+        """
+        Zhihu content DB storage implementation, the whole batch is upserted in one statement
+        Args:
+            content_items: content item dicts
+        """
         async with get_session() as session:
-            stmt = select(ZhihuContent).where(ZhihuContent.content_id == content_id)
-            result = await session.execute(stmt)
-            existing_content = result.scalars().first()
-            if existing_content:
-                for key, value in content_item.items():
-                    if hasattr(existing_content, key):
-                        setattr(existing_content, key, value)
-            else:
-                new_content = ZhihuContent(**content_item)
-                session.add(new_content)
-            await session.commit()
+            await bulk_upsert(session, ZhihuContent, content_items, key_columns=["content_id"])
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -123,19 +121,16 @@ class ZhihuDbStoreImplement(AbstractStore):
         Args:
             comment_item: comment item dict
         """
-        comment_id = comment_item.get("comment_id")
+        await self.store_comment_batch([comment_item])
+
+    async def store_comment_batch(self, comment_items: List[Dict]):
+        """
+        Zhihu comment DB storage implementation, the whole batch is upserted in one statement
+        Args:
+            comment_items: comment item dicts
+        """
         async with get_session() as session:
-            stmt = select(ZhihuComment).where(ZhihuComment.comment_id == comment_id)
-            result = await session.execute(stmt)
-            existing_comment = result.scalars().first()
-            if existing_comment:
-                for key, value in comment_item.items():
-                    if hasattr(existing_comment, key):
-                        setattr(existing_comment, key, value)
-            else:
-                new_comment = ZhihuComment(**comment_item)
-                session.add(new_comment)
-            await session.commit()
+            await bulk_upsert(session, ZhihuComment, comment_items, key_columns=["comment_id"])
 
     async def store_creator(self, creator: Dict):
         """
@@ -143,19 +138,17 @@ class ZhihuDbStoreImplement(AbstractStore):
         Args:
             creator: creator dict
         """
-        user_id = creator.get("user_id")
+        await self.store_creator_batch([creator])
+
+    async def store_creator_batch(self, creators: List[Dict]):
+        """
+        Zhihu creator DB storage implementation, the whole batch is upserted in one statement
+        Args:
+            creators: creator dicts
+        """
         async with get_session() as session:
-            stmt = select(ZhihuCreator).where(ZhihuCreator.user_id == user_id)
-            result = await session.execute(stmt)
-            existing_creator = result.scalars().first()
-            if existing_creator:
-                for key, value in creator.items():
-                    if hasattr(existing_creator, key):
-                        setattr(existing_creator, key, value)
-            else:
-                new_creator = ZhihuCreator(**creator)
-                session.add(new_creator)
-            await session.commit()
+            await bulk_upsert(session, ZhihuCreator, creators, key_columns=["user_id"])
+
 
 
 class ZhihuJsonStoreImplement(AbstractStore):
@@ -216,16 +209,15 @@ class ZhihuMongoStoreImplement(AbstractStore):
         Args:
             content_item: Content data
         """
-        note_id = content_item.get("note_id")
-        if not note_id:
-            return
+        await self.store_content_batch([content_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="contents",
-            query={"note_id": note_id},
-            data=content_item
-        )
-        utils.logger.info(f"[ZhihuMongoStoreImplement.store_content] Saved note {note_id} to MongoDB")
+    async def store_content_batch(self, content_items: List[Dict]):
+        """
+        Store a batch of content to MongoDB (buffered bulk upsert)
+        Args:
+            content_items: Content data list
+        """
+        await self.mongo_store.save_or_update_many("contents", content_items, key_fields=["content_id"])
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -233,16 +225,15 @@ class ZhihuMongoStoreImplement(AbstractStore):
         Args:
             comment_item: Comment data
         """
-        comment_id = comment_item.get("comment_id")
-        if not comment_id:
-            return
+        await self.store_comment_batch([comment_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="comments",
-            query={"comment_id": comment_id},
-            data=comment_item
-        )
-        utils.logger.info(f"[ZhihuMongoStoreImplement.store_comment] Saved comment {comment_id} to MongoDB")
+    async def store_comment_batch(self, comment_items: List[Dict]):
+        """
+        Store a batch of comments to MongoDB (buffered bulk upsert)
+        Args:
+            comment_items: Comment data list
+        """
+        await self.mongo_store.save_or_update_many("comments", comment_items, key_fields=["comment_id"])
 
     async def store_creator(self, creator_item: Dict):
         """
@@ -250,16 +241,15 @@ class ZhihuMongoStoreImplement(AbstractStore):
         Args:
             creator_item: Creator data
         """
-        user_id = creator_item.get("user_id")
-        if not user_id:
-            return
+        await self.store_creator_batch([creator_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="creators",
-            query={"user_id": user_id},
-            data=creator_item
-        )
-        utils.logger.info(f"[ZhihuMongoStoreImplement.store_creator] Saved creator {user_id} to MongoDB")
+    async def store_creator_batch(self, creator_items: List[Dict]):
+        """
+        Store a batch of creator information to MongoDB (buffered bulk upsert)
+        Args:
+            creator_items: Creator data list
+        """
+        await self.mongo_store.save_or_update_many("creators", creator_items, key_fields=["user_id"])
 
 
 class ZhihuExcelStoreImplement:
@@ -271,3 +261,14 @@ class ZhihuExcelStoreImplement:
             platform="zhihu",
             crawler_type=crawler_type_var.get()
         )
+
+
+class ZhihuParquetStoreImplement:
+    """Zhihu Parquet storage implementation - Global singleton"""
+
+    def __new__(cls, *args, **kwargs):
+        from store.parquet_store_base import ParquetStoreBase
+        return ParquetStoreBase.get_instance(
+            platform="zhihu",
+            crawler_type=crawler_type_var.get()
+        )
@@ -24,7 +24,7 @@ from datetime import datetime
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database.mongodb_store_base import MongoDBConnection, MongoDBStoreBase
+from database.mongodb_store_base import MongoBulkWriter, MongoDBConnection, MongoDBStoreBase
 from store.xhs._store_impl import XhsMongoStoreImplement
 from store.douyin._store_impl import DouyinMongoStoreImplement
 from config import db_config
@@ -50,6 +50,7 @@ class TestMongoDBRealConnection(unittest.TestCase):
         MongoDBConnection._instance = None
         MongoDBConnection._client = None
         MongoDBConnection._db = None
+        MongoBulkWriter._instances = {}
 
     def tearDown(self):
         if self.mongodb_available:
@@ -254,6 +255,7 @@ class TestMongoDBRealConnection(unittest.TestCase):
                 "follows": "100"
             }
             await store.store_creator(creator_data)
+            await MongoDBStoreBase.flush_all()
 
             mongo_store = store.mongo_store
 
@@ -301,6 +303,7 @@ class TestMongoDBRealConnection(unittest.TestCase):
                 "desc": "This is a test creator"
             }
             await store.store_creator(creator_data)
+            await MongoDBStoreBase.flush_all()
 
             mongo_store = store.mongo_store
 
@@ -29,6 +29,13 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 
+@pytest.fixture(autouse=True)
+def no_request_pacing(monkeypatch):
+    """API client tests run against mock transports, do not pace them with the adaptive rate limiter"""
+    import config
+    monkeypatch.setattr(config, "ENABLE_ADAPTIVE_RATE_LIMIT", False)
+
+
 @pytest.fixture(scope="session")
 def project_root_path():
     """Return project root path"""
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_async_file_writer.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for AsyncFileWriter JSON / JSON Lines storage
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+import pytest
+import pytest_asyncio
+
+import config
+from tools.async_file_writer import AsyncFileWriter, iter_json_file_items
+
+
+class TestAsyncFileWriterJsonl:
+    """Test cases for the append-only JSON Lines mode"""
+
+    @pytest.fixture
+    def temp_dir(self, monkeypatch):
+        """Run each test inside a temporary working directory"""
+        temp_path = tempfile.mkdtemp()
+        monkeypatch.chdir(temp_path)
+        monkeypatch.setattr(config, "ENABLE_GET_WORDCLOUD", False)
+        monkeypatch.setattr(config, "JSON_STORE_FORMAT", "jsonl")
+        yield temp_path
+        shutil.rmtree(temp_path, ignore_errors=True)
+
+    @pytest_asyncio.fixture
+    async def writer(self, temp_dir):
+        """Create AsyncFileWriter and close shared handles afterwards"""
+        yield AsyncFileWriter(platform="test", crawler_type="search")
+        await AsyncFileWriter.close_all()
+        AsyncFileWriter._path_locks.clear()
+
+    @pytest.mark.asyncio
+    async def test_append_only(self, writer):
+        """Each item is appended as one line through a single shared handle"""
+        for i in range(3):
+            await writer.write_single_item_to_json({"note_id": str(i), "title": f"标题{i}"}, "contents")
+        # A second writer instance reuses the same handle
+        other = AsyncFileWriter(platform="test", crawler_type="search")
+        await other.write_single_item_to_json({"note_id": "3"}, "contents")
+
+        assert len(AsyncFileWriter._jsonl_handles) == 1
+        file_path = writer._get_file_path("json", "contents", extension="jsonl")
+        with open(file_path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        assert [json.loads(line)["note_id"] for line in lines] == ["0", "1", "2", "3"]
+        assert "标题0" in lines[0]
+
+    @pytest.mark.asyncio
+    async def test_finalize_to_json_array(self, writer):
+        """close_all(finalize=True) converts the jsonl file into a json array"""
+        items = [{"comment_id": str(i), "content": "hello"} for i in range(5)]
+        for item in items:
+            await writer.write_single_item_to_json(item, "comments")
+        jsonl_path = writer._get_file_path("json", "comments", extension="jsonl")
+
+        await AsyncFileWriter.close_all(finalize=True)
+
+        json_path = writer._get_file_path("json", "comments")
+        assert not os.path.exists(jsonl_path)
+        with open(json_path, encoding="utf-8") as f:
+            content = f.read()
+        assert json.loads(content) == items
+        assert content == json.dumps(items, ensure_ascii=False, indent=4)
+
+    @pytest.mark.asyncio
+    async def test_finalize_keeps_existing_json(self, writer):
+        """Records of an existing json file of the same day are kept in front"""
+        json_path = writer._get_file_path("json", "contents")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump([{"note_id": "old"}], f)
+        await writer.write_single_item_to_json({"note_id": "new"}, "contents")
+
+        await AsyncFileWriter.close_all(finalize=True)
+
+        assert [item["note_id"] for item in iter_json_file_items(json_path)] == ["old", "new"]
+
+    def test_iter_skips_truncated_line(self, temp_dir):
+        """A partially written last line is ignored when reading"""
+        file_path = os.path.join(temp_dir, "data.jsonl")
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write('{"a": 1}\n\n{"a": 2}\n{"a": ')
+        assert list(iter_json_file_items(file_path)) == [{"a": 1}, {"a": 2}]
+
+    @pytest.mark.asyncio
+    async def test_legacy_json_format(self, writer, monkeypatch):
+        """JSON_STORE_FORMAT = json keeps writing a json array"""
+        monkeypatch.setattr(config, "JSON_STORE_FORMAT", "json")
+        await writer.write_single_item_to_json({"note_id": "1"}, "contents")
+        await writer.write_single_item_to_json({"note_id": "2"}, "contents")
+        with open(writer._get_file_path("json", "contents"), encoding="utf-8") as f:
+            assert [item["note_id"] for item in json.load(f)] == ["1", "2"]
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_bilibili_wbi.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the cached Bilibili WBI keys
+"""
+
+import asyncio
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import pytest
+
+from media_platform.bilibili.client import BilibiliClient
+from media_platform.bilibili.help import BilibiliSign, WbiKeyManager
+
+IMG_KEY = "7cd084941338484aae1ad9425b84077c"
+SUB_KEY = "4932caff0ff746eab6f01bf08b70ac45"
+
+
+class FakePage:
+    def __init__(self):
+        self.evaluate_calls = 0
+
+    async def evaluate(self, expression):
+        self.evaluate_calls += 1
+        return {
+            "wbi_img_urls": f"https://i0.hdslb.com/bfs/wbi/{IMG_KEY}.png-https://i0.hdslb.com/bfs/wbi/{SUB_KEY}.png",
+            "wbi_img_url": None,
+            "wbi_sub_url": None,
+        }
+
+
+class TestWbiKeys:
+    """Test cases for BilibiliSign / WbiKeyManager / BilibiliClient signing"""
+
+    def test_mixin_key_is_precomputed(self):
+        """Mixin key of the documented example key pair"""
+        signer = BilibiliSign(IMG_KEY, SUB_KEY)
+        assert signer.salt == "ea1db124af3c7062474693fa704f4ff8"
+        assert signer.get_salt() == signer.salt
+
+    @pytest.mark.asyncio
+    async def test_keys_are_cached_and_refreshed_in_background(self):
+        """Fresh keys are reused, stale keys are served while one background refresh runs"""
+        calls = []
+
+        async def fetch_keys(force_http):
+            calls.append(force_http)
+            await asyncio.sleep(0.01)
+            return IMG_KEY, SUB_KEY
+
+        manager = WbiKeyManager(fetch_keys, ttl_sec=60)
+        signers = await asyncio.gather(*[manager.get_signer() for _ in range(5)])
+        assert calls == [False]
+        assert len({id(s) for s in signers}) == 1
+
+        manager._fetched_at -= 120
+        assert await manager.get_signer() is signers[0]
+        assert await manager.get_signer() is signers[0]
+        await manager._refresh_task
+        assert calls == [False, False]
+
+        manager.invalidate()
+        await manager.get_signer()
+        assert calls == [False, False, False]
+
+    @pytest.mark.asyncio
+    async def test_client_signs_without_browser_round_trip(self):
+        """Only the first signed request reads localStorage"""
+        page = FakePage()
+        seen = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(parse_qs(urlparse(str(request.url)).query))
+            return httpx.Response(200, json={"code": 0, "data": {}})
+
+        client = BilibiliClient(headers={}, playwright_page=page, cookie_dict={})
+        client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            for i in range(3):
+                await client.get("/x/web-interface/wbi/search/type", {"keyword": "python", "page": i})
+        finally:
+            await client.close_http_client()
+
+        assert page.evaluate_calls == 1
+        assert all("w_rid" in query and "wts" in query for query in seen)
+
+    @pytest.mark.asyncio
+    async def test_rejected_signature_refreshes_keys_from_nav(self):
+        """A -352 response refreshes the keys from the nav api and the request is signed again"""
+        page = FakePage()
+        paths = []
+        responses = iter([
+            {"code": -352, "message": "risk control"},
+            {"code": 0, "data": {"wbi_img": {"img_url": "https://i0.hdslb.com/bfs/wbi/" + "a" * 32 + ".png",
+                                             "sub_url": "https://i0.hdslb.com/bfs/wbi/" + "b" * 32 + ".png"}}},
+            {"code": 0, "data": {"ok": True}},
+        ])
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            paths.append(request.url.path)
+            return httpx.Response(200, json=next(responses))
+
+        client = BilibiliClient(headers={}, playwright_page=page, cookie_dict={})
+        client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            assert await client.get("/x/v2/reply/wbi/main", {"oid": 1}) == {"ok": True}
+        finally:
+            await client.close_http_client()
+
+        assert paths == ["/x/v2/reply/wbi/main", "/x/web-interface/nav", "/x/v2/reply/wbi/main"]
+        assert client.wbi_key_manager._signer.img_key == "a" * 32
+        assert page.evaluate_calls == 1
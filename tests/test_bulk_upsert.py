@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_bulk_upsert.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the dialect-aware bulk upsert (SQLite)
+"""
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from database.bulk_upsert import bulk_update, bulk_upsert, has_unique_key
+from database.models import Base, BilibiliContactInfo, XhsNoteComment, ZhihuCreator
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    """Fresh SQLite database with all tables"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def _upsert(session_factory, model, rows, key_columns, update_columns=None):
+    async with session_factory() as session:
+        written = await bulk_upsert(session, model, rows, key_columns=key_columns, update_columns=update_columns)
+        await session.commit()
+    return written
+
+
+async def _all_rows(session_factory, model, order_by):
+    async with session_factory() as session:
+        result = await session.execute(select(model).order_by(order_by))
+        return result.scalars().all()
+
+
+class TestBulkUpsert:
+    """Test cases for bulk_upsert / bulk_update"""
+
+    @pytest.mark.asyncio
+    async def test_has_unique_key(self, session_factory):
+        """Unique keys are detected from the database schema"""
+        async with session_factory() as session:
+            def _check(sync_session):
+                inspector = inspect(sync_session.connection())
+                return (
+                    has_unique_key(inspector, "zhihu_creator", ["user_id"]),
+                    has_unique_key(inspector, "bilibili_contact_info", ["fan_id", "up_id"]),
+                    has_unique_key(inspector, "bilibili_contact_info", ["up_id"]),
+                )
+
+            assert await session.run_sync(_check) == (True, True, False)
+
+    @pytest.mark.asyncio
+    async def test_native_upsert_inserts_and_updates(self, session_factory):
+        """ON CONFLICT path: new rows are inserted, existing rows updated, add_ts kept"""
+        await _upsert(session_factory, ZhihuCreator, [
+            {"user_id": "u1", "user_nickname": "a", "fans": 1, "add_ts": 100, "last_modify_ts": 100},
+            {"user_id": "u2", "user_nickname": "b", "fans": 2, "add_ts": 100, "last_modify_ts": 100},
+        ], ["user_id"])
+        await _upsert(session_factory, ZhihuCreator, [
+            {"user_id": "u2", "user_nickname": "b2", "fans": 20, "add_ts": 200, "last_modify_ts": 200},
+            {"user_id": "u3", "user_nickname": "c", "fans": 3, "add_ts": 200, "last_modify_ts": 200},
+        ], ["user_id"])
+
+        rows = await _all_rows(session_factory, ZhihuCreator, ZhihuCreator.user_id)
+        assert [(r.user_id, r.user_nickname, r.fans, r.add_ts) for r in rows] == [
+            ("u1", "a", 1, 100), ("u2", "b2", 20, 100), ("u3", "c", 3, 200),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_lookup_fallback_without_unique_key(self, session_factory):
+        """Databases without the unique key (not migrated yet) are deduplicated with one lookup per batch"""
+        async with session_factory() as session:
+            await session.execute(text("DROP INDEX uq_bilibili_contact_up_fan"))
+            await session.commit()
+        key = ["up_id", "fan_id"]
+        await _upsert(session_factory, BilibiliContactInfo, [
+            {"up_id": 1, "fan_id": 1, "fan_name": "x", "add_ts": 1},
+            {"up_id": 1, "fan_id": 2, "fan_name": "y", "add_ts": 1},
+        ], key)
+        await _upsert(session_factory, BilibiliContactInfo, [
+            {"up_id": 1, "fan_id": 2, "fan_name": "y2", "add_ts": 2},
+        ], key)
+
+        rows = await _all_rows(session_factory, BilibiliContactInfo, BilibiliContactInfo.fan_id)
+        assert [(r.fan_id, r.fan_name, r.add_ts) for r in rows] == [(1, "x", 1), (2, "y2", 1)]
+
+    @pytest.mark.asyncio
+    async def test_duplicates_in_batch_and_update_columns(self, session_factory):
+        """Last row per key wins inside a batch, only update_columns are overwritten"""
+        await _upsert(session_factory, XhsNoteComment, [
+            {"comment_id": "c1", "content": "first", "like_count": "1"},
+        ], ["comment_id"])
+        written = await _upsert(session_factory, XhsNoteComment, [
+            {"comment_id": "c1", "content": "changed", "like_count": "5"},
+            {"comment_id": "c1", "content": "changed", "like_count": "7"},
+            {"comment_id": None, "content": "no key"},
+            {"comment_id": "c2", "content": "second", "like_count": "0", "unknown_field": 1},
+        ], ["comment_id"], update_columns=["like_count"])
+        assert written == 2
+
+        rows = await _all_rows(session_factory, XhsNoteComment, XhsNoteComment.comment_id)
+        assert [(r.comment_id, r.content, r.like_count) for r in rows] == [("c1", "first", "7"), ("c2", "second", "0")]
+
+    @pytest.mark.asyncio
+    async def test_large_batch_is_chunked(self, session_factory):
+        """Batches above the bind parameter limit are split into several statements"""
+        rows = [{"user_id": f"u{i}", "user_nickname": "n", "fans": i} for i in range(12000)]
+        assert await _upsert(session_factory, ZhihuCreator, rows, ["user_id"]) == 12000
+        async with session_factory() as session:
+            assert await session.scalar(select(func.count()).select_from(ZhihuCreator)) == 12000
+
+    @pytest.mark.asyncio
+    async def test_bulk_update_ignores_missing_rows(self, session_factory):
+        """bulk_update only touches existing rows"""
+        await _upsert(session_factory, ZhihuCreator, [{"user_id": "u1", "fans": 1}], ["user_id"])
+        async with session_factory() as session:
+            await bulk_update(session, ZhihuCreator, [{"user_id": "u1", "fans": 9}, {"user_id": "u9", "fans": 9}], ["user_id"])
+            await session.commit()
+        rows = await _all_rows(session_factory, ZhihuCreator, ZhihuCreator.user_id)
+        assert [(r.user_id, r.fans) for r in rows] == [("u1", 9)]
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_crawl_checkpoint.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the crawl checkpoint store and the resumable Xiaohongshu comment crawl
+"""
+
+import asyncio
+
+import pytest
+
+import config
+from media_platform.xhs.client import XiaoHongShuClient
+from tools.crawl_checkpoint import CrawlCheckpoint, CursorState
+
+
+@pytest.fixture
+def checkpoint_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "ENABLE_CRAWL_CHECKPOINT", True)
+    monkeypatch.setattr(config, "CRAWL_CHECKPOINT_DB", str(tmp_path / "checkpoint.db"))
+    monkeypatch.setattr(config, "PLATFORM", "xhs")
+    monkeypatch.setattr(config, "CRAWLER_TYPE", "search")
+    monkeypatch.setattr(CrawlCheckpoint, "_instances", {})
+    yield tmp_path / "checkpoint.db"
+    CrawlCheckpoint.close_all()
+
+
+class TestCrawlCheckpoint:
+    """Test cases for CrawlCheckpoint"""
+
+    def test_cursors_frontier_and_reset(self, checkpoint_db):
+        """Progress survives a new process, reset only clears its own scope"""
+        checkpoint = CrawlCheckpoint.get_instance()
+        checkpoint.save_cursor("keyword", "python", 3)
+        checkpoint.save_cursor("comments", "n1", "cursor-2", 40, done=True)
+        checkpoint.add_pending("n2", {"id": "n2", "source_keyword": "python"})
+        checkpoint.add_pending("n3", {"id": "n3", "source_keyword": "python"})
+        checkpoint.finish("n2")
+        CrawlCheckpoint.get_instance("xhs:creator").save_cursor("creator", "u1", "c", 10)
+        CrawlCheckpoint.close_all()
+
+        checkpoint = CrawlCheckpoint.get_instance()
+        assert checkpoint.get_cursor("keyword", "python") == CursorState("3", 0, False)
+        assert checkpoint.get_cursor("comments", "n1") == CursorState("cursor-2", 40, True)
+        assert checkpoint.get_cursor("comments", "unknown") == CursorState()
+        assert checkpoint.pending() == [{"id": "n3", "source_keyword": "python"}]
+
+        checkpoint.reset()
+        assert checkpoint.get_cursor("keyword", "python") == CursorState()
+        assert checkpoint.pending() == []
+        assert CrawlCheckpoint.get_instance("xhs:creator").get_cursor("creator", "u1").count == 10
+
+    def test_disabled_checkpoint_records_nothing(self, checkpoint_db, monkeypatch):
+        monkeypatch.setattr(config, "ENABLE_CRAWL_CHECKPOINT", False)
+        checkpoint = CrawlCheckpoint.get_instance()
+        checkpoint.save_cursor("keyword", "python", 3)
+        checkpoint.add_pending("n1", {})
+        assert checkpoint.get_cursor("keyword", "python") == CursorState()
+        assert checkpoint.pending() == []
+        assert not checkpoint_db.exists()
+
+    @pytest.mark.asyncio
+    async def test_interrupted_comment_crawl_resumes_from_cursor(self, checkpoint_db, monkeypatch):
+        """A restarted comment crawl continues at the saved cursor and keeps the max count"""
+        monkeypatch.setattr(config, "ENABLE_GET_SUB_COMMENTS", False)
+        pages = {
+            "": {"comments": [{"id": "c1"}, {"id": "c2"}], "cursor": "p2", "has_more": True},
+            "p2": {"comments": [{"id": "c3"}, {"id": "c4"}], "cursor": "p3", "has_more": True},
+            "p3": {"comments": [{"id": "c5"}, {"id": "c6"}], "cursor": "p4", "has_more": True},
+        }
+        requested = []
+        fail_at = {"p2"}
+
+        async def get_note_comments(note_id, xsec_token, cursor=""):
+            requested.append(cursor)
+            if cursor in fail_at:
+                fail_at.discard(cursor)
+                raise RuntimeError("process killed")
+            return pages[cursor]
+
+        stored = []
+
+        async def callback(note_id, comments):
+            stored.extend(c["id"] for c in comments)
+
+        client = XiaoHongShuClient(headers={}, playwright_page=None, cookie_dict={})
+        monkeypatch.setattr(client, "get_note_comments", get_note_comments)
+
+        with pytest.raises(RuntimeError):
+            await client.get_note_all_comments("n1", "token", crawl_interval=0, callback=callback, max_count=5)
+        await client.get_note_all_comments("n1", "token", crawl_interval=0, callback=callback, max_count=5)
+        await client.get_note_all_comments("n1", "token", crawl_interval=0, callback=callback, max_count=5)
+
+        assert requested == ["", "p2", "p2", "p3"]
+        assert stored == ["c1", "c2", "c3", "c4", "c5"]
+        assert CrawlCheckpoint.get_instance().get_cursor("comments", "n1") == CursorState("p4", 5, True)
+
+    @pytest.mark.asyncio
+    async def test_cursor_waits_for_reply_threads(self, checkpoint_db, monkeypatch):
+        """A comment page is only checkpointed after its reply threads finished, an interrupted thread is crawled again"""
+        monkeypatch.setattr(config, "ENABLE_GET_SUB_COMMENTS", True)
+        pages = {
+            "": {"comments": [{"id": "c1", "note_id": "n1", "sub_comment_has_more": True, "sub_comment_cursor": "s1"}],
+                 "cursor": "p2", "has_more": True},
+            "p2": {"comments": [{"id": "c2", "note_id": "n1"}], "cursor": "p3", "has_more": False},
+        }
+        requested = []
+        reply_calls = []
+
+        async def get_note_comments(note_id, xsec_token, cursor=""):
+            requested.append(cursor)
+            return pages[cursor]
+
+        async def get_note_sub_comments(note_id, root_comment_id, xsec_token, num=10, cursor=""):
+            await asyncio.sleep(0.01)
+            reply_calls.append(cursor)
+            if len(reply_calls) == 1:
+                raise RuntimeError("process killed")
+            return {"comments": [{"id": "r1"}], "has_more": False, "cursor": ""}
+
+        client = XiaoHongShuClient(headers={}, playwright_page=None, cookie_dict={})
+        monkeypatch.setattr(client, "get_note_comments", get_note_comments)
+        monkeypatch.setattr(client, "get_note_sub_comments", get_note_sub_comments)
+
+        with pytest.raises(RuntimeError):
+            await client.get_note_all_comments("n1", "token", crawl_interval=0, max_count=10)
+        # Page 2 was fetched while the reply thread of page 1 was still running, neither page is checkpointed
+        assert requested == ["", "p2"]
+        assert CrawlCheckpoint.get_instance().get_cursor("comments", "n1") == CursorState()
+
+        result = await client.get_note_all_comments("n1", "token", crawl_interval=0, max_count=10)
+        assert requested == ["", "p2", "", "p2"]
+        assert [c["id"] for c in result] == ["c1", "c2", "r1"]
+        assert CrawlCheckpoint.get_instance().get_cursor("comments", "n1") == CursorState("p3", 2, True)
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_crawl_pipeline.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the staged crawl pipeline
+"""
+
+import asyncio
+import time
+
+import pytest
+
+import config
+from base.base_crawler import AbstractCrawler
+from tools.crawl_pipeline import CrawlPipeline
+from var import source_keyword_var
+
+
+class TestCrawlPipeline:
+    """Test cases for CrawlPipeline"""
+
+    @pytest.mark.asyncio
+    async def test_stages_overlap_with_search_paging(self):
+        """Comments of the first page are crawled while later search pages are still produced"""
+        events = []
+
+        async def detail(item):
+            await asyncio.sleep(0.01)
+            await pipeline.put("comment", item)
+
+        async def comment(item):
+            events.append(("comment", item))
+
+        async def produce():
+            for page in range(3):
+                events.append(("page", page))
+                for index in range(2):
+                    await pipeline.put("detail", f"{page}-{index}")
+                await asyncio.sleep(0.05)
+
+        pipeline = CrawlPipeline("test").add_stage("detail", detail, 2, 4).add_stage("comment", comment, 2, 4)
+        await pipeline.run(produce)
+
+        assert sorted(item for kind, item in events if kind == "comment") == [f"{p}-{i}" for p in range(3) for i in range(2)]
+        assert events.index(("comment", "0-0")) < events.index(("page", 2))
+        assert pipeline.stats == {"detail": {"processed": 6, "failed": 0}, "comment": {"processed": 6, "failed": 0}}
+
+    @pytest.mark.asyncio
+    async def test_bounded_queue_and_worker_count(self):
+        """A slow stage limits the producer through its bounded queue, workers cap the concurrency"""
+        running = 0
+        peak = 0
+        max_backlog = 0
+
+        async def detail(item):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.005)
+            running -= 1
+
+        async def produce():
+            nonlocal max_backlog
+            for i in range(20):
+                await pipeline.put("detail", i)
+                max_backlog = max(max_backlog, pipeline._stages["detail"].queue.qsize())
+
+        pipeline = CrawlPipeline("test").add_stage("detail", detail, workers=3, queue_size=2)
+        await pipeline.run(produce)
+        assert peak == 3
+        assert max_backlog <= 2
+
+    @pytest.mark.asyncio
+    async def test_context_failures_and_missing_stages(self):
+        """Handlers see the context of put(), failures are counted, items for absent stages are dropped"""
+        seen = []
+
+        async def detail(item):
+            if item == "bad":
+                raise ValueError("boom")
+            seen.append((item, source_keyword_var.get()))
+            await pipeline.put("comment", item)
+
+        async def produce():
+            for keyword in ("k1", "k2"):
+                source_keyword_var.set(keyword)
+                await pipeline.put("detail", f"{keyword}-note")
+            await pipeline.put("detail", "bad")
+
+        pipeline = CrawlPipeline("test").add_stage("detail", detail, 2)
+        await pipeline.run(produce)
+        assert sorted(seen) == [("k1-note", "k1"), ("k2-note", "k2")]
+        assert pipeline.stats["detail"] == {"processed": 2, "failed": 1}
+
+
+class _KeywordCrawler(AbstractCrawler):
+    async def start(self):
+        pass
+
+    async def search(self):
+        pass
+
+    async def launch_browser(self, chromium, playwright_proxy, user_agent, headless=True):
+        pass
+
+
+class TestCrawlKeywords:
+    """Test cases for AbstractCrawler.crawl_keywords"""
+
+    @pytest.mark.asyncio
+    async def test_keywords_run_in_parallel_with_own_source_keyword(self, monkeypatch):
+        """Six keywords take about as long as the slowest one, items keep their keyword"""
+        monkeypatch.setattr(config, "KEYWORDS", "k1,k2,k3,k4,k5,k6")
+        monkeypatch.setattr(config, "KEYWORD_CONCURRENCY_NUM", 6)
+        stored = []
+
+        async def search_keyword(keyword: str):
+            for page in range(2):
+                await asyncio.sleep(0.05)
+                stored.append((keyword, source_keyword_var.get()))
+
+        started = time.monotonic()
+        await _KeywordCrawler().crawl_keywords(search_keyword)
+        assert time.monotonic() - started < 0.25
+        assert len(stored) == 12
+        assert all(keyword == source_keyword for keyword, source_keyword in stored)
+
+    @pytest.mark.asyncio
+    async def test_fan_out_limit_and_errors(self, monkeypatch):
+        """At most KEYWORD_CONCURRENCY_NUM keywords run at once, a failing keyword does not stop its siblings"""
+        monkeypatch.setattr(config, "KEYWORDS", "a,bad,c,d")
+        monkeypatch.setattr(config, "KEYWORD_CONCURRENCY_NUM", 2)
+        running = 0
+        peak = 0
+        finished = []
+
+        async def search_keyword(keyword: str):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            if keyword == "bad":
+                raise ValueError("blocked")
+            finished.append(keyword)
+
+        with pytest.raises(ValueError):
+            await _KeywordCrawler().crawl_keywords(search_keyword)
+        assert peak == 2
+        assert sorted(finished) == ["a", "c", "d"]
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_data_analysis.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the keyword matcher and the analysis engine
+"""
+
+import json
+
+import pandas as pd
+import pytest
+
+from tools.data_analysis import AnalysisEngine, find_data_files, main, run_report, to_count
+from tools import keyword_matcher
+from tools.keyword_matcher import KeywordMatcher
+
+
+class TestKeywordMatcher:
+    """Test cases for KeywordMatcher, with the Aho-Corasick automaton (if installed) and the regex fallback"""
+
+    @pytest.fixture(autouse=True, params=["automaton", "regex"])
+    def backend(self, request, monkeypatch):
+        if request.param == "regex":
+            monkeypatch.setattr(keyword_matcher, "AHOCORASICK_AVAILABLE", False)
+        elif not keyword_matcher.AHOCORASICK_AVAILABLE:
+            pytest.skip("pyahocorasick not installed")
+
+    def test_overlapping_keywords(self):
+        """A keyword that is a prefix of a longer one at the same position is still reported"""
+        matcher = KeywordMatcher({"停车": ["停车"], "优惠": ["停车券", "券"], "网络": ["WiFi"]})
+        assert matcher.match("送停车券，有wifi") == {"停车", "优惠", "网络"}
+        assert matcher.match("") == set()
+        assert matcher.match(None) == set()
+
+    def test_count_once_per_text(self):
+        matcher = KeywordMatcher({"猫": ["猫", "cat"]}, ignore_case=False)
+        assert matcher.count(["猫猫 cat", "CAT", "狗"]) == {"猫": 1}
+
+    def test_same_result_as_substring_loops(self):
+        """Same labels as testing every keyword with `in`"""
+        dictionary = {"a": ["ab", "b"], "b": ["abc", "c"], "c": ["bca"], "d": ["x"]}
+        matcher = KeywordMatcher(dictionary)
+        for text in ["abca", "bcab", "x", "cab", "aaa"]:
+            expected = {label for label, words in dictionary.items() if any(w in text for w in words)}
+            assert matcher.match(text) == expected
+
+
+def test_to_count():
+    series = pd.Series(["12", "1,234", "1.2万", "10w+", "", None, "n/a"])
+    assert to_count(series).tolist()[:4] == [12, 1234, 12000, 100000]
+    assert to_count(series)[4:].isna().all()
+
+
+@pytest.fixture
+def engine():
+    contents = pd.DataFrame({
+        "note_id": ["1", "2", "3"],
+        "title": ["徐汇安静咖啡", "静安 WiFi 好", "普通"],
+        "desc": ["衡山路附近", None, "人民广场"],
+        "liked_count": ["1.2万", "30", "5"],
+        "ip_location": ["上海", "上海", "北京"],
+        "tag_list": [["a"], ["b"], []],
+    })
+    comments = pd.DataFrame({"comment_id": ["c1", "c2"], "content": ["推荐！", "太吵了"], "like_count": [1, 2]})
+    yield AnalysisEngine(contents, comments)
+
+
+class TestAnalysisEngine:
+    """Test cases for AnalysisEngine"""
+
+    def test_sql_aggregations(self, engine):
+        assert engine.engagement_stats()["liked_count"] == {"mean": 4011.6666666666665, "max": 12000.0}
+        assert engine.value_counts("ip_location") == [("上海", 2), ("北京", 1)]
+        assert engine.top("liked_count", n=1, columns=["title"]).to_dict(orient="records") == [
+            {"title": "徐汇安静咖啡", "liked_count": 12000.0}
+        ]
+        assert engine.query("SELECT SUM(like_count) AS s FROM comments")["s"].tolist() == [3]
+
+    def test_keywords_and_patterns(self, engine):
+        assert engine.keyword_counts({"安静": ["安静"], "网络": ["wifi"]}) == {"安静": 1, "网络": 1}
+        assert engine.keyword_counts({"positive": ["推荐"], "negative": ["吵"]}, table="comments") == {"positive": 1, "negative": 1}
+        assert engine.pattern_counts([r"(\w+路)", r"(\w+广场)"]) == {"衡山路": 1, "人民广场": 1}
+
+    def test_report(self, engine):
+        report = run_report(engine, {"sentiment": {"positive": ["推荐"]}})
+        assert (report["contents"], report["comments"]) == (3, 2)
+        assert report["keywords"]["sentiment"] == [("positive", 1)]
+        assert report["top_liked"][0]["liked_count"] == 12000
+
+
+def test_cli_on_platform_files(tmp_path, capsys):
+    """Files of a platform are found under data/, jsonl wins over csv when both exist"""
+    json_dir = tmp_path / "douyin" / "json"
+    csv_dir = tmp_path / "douyin" / "csv"
+    json_dir.mkdir(parents=True)
+    csv_dir.mkdir(parents=True)
+    with open(json_dir / "search_contents_2025-01-01.jsonl", "w", encoding="utf-8") as f:
+        for i in range(3):
+            f.write(json.dumps({"aweme_id": str(i), "title": "好看", "liked_count": str(i)}, ensure_ascii=False) + "\n")
+    (csv_dir / "search_contents_2025-01-01.csv").write_text("aweme_id,title\n9,x\n", encoding="utf-8")
+
+    assert find_data_files("douyin", "contents", data_dir=str(tmp_path)) == [str(json_dir / "search_contents_2025-01-01.jsonl")]
+    main(["--platform", "douyin", "--data-dir", str(tmp_path), "--json", "--sql", "SELECT MAX(liked_count) AS m FROM contents"])
+    output = capsys.readouterr().out
+    assert '"contents": 3' in output
+    assert "2.0" in output.splitlines()[-1]
+
+
+def test_parquet_files_filtered_by_date_and_crawler_type(tmp_path):
+    """Parquet partitions of other days and files of other crawler types are not analyzed"""
+    pytest.importorskip("pyarrow")
+    base = tmp_path / "xhs" / "parquet" / "contents"
+    layout = {
+        ("2026-01-19", "search"): ["1", "2"],
+        ("2026-01-19", "detail"): ["3"],
+        ("2026-01-20", "search"): ["4"],
+    }
+    for (date, crawler_type), note_ids in layout.items():
+        directory = base / f"date={date}" / "keyword=%E5%92%96%E5%95%A1"
+        directory.mkdir(parents=True, exist_ok=True)
+        pd.DataFrame({"note_id": note_ids}).to_parquet(directory / f"{crawler_type}_120000_00001.parquet")
+
+    files = find_data_files("xhs", "contents", "search", date="2026-01-19", data_dir=str(tmp_path))
+    engine = AnalysisEngine.from_files(files)
+    assert sorted(engine.contents["note_id"]) == ["1", "2"]
+    assert set(engine.contents["date"]) == {"2026-01-19"}
+    assert set(engine.contents["keyword"]) == {"咖啡"}
+    assert len(find_data_files("xhs", "contents", "search", data_dir=str(tmp_path))) == 2
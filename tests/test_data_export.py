@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_data_export.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the streaming data export
+"""
+
+import csv
+import io
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import config
+from api.routers import data as data_router
+from tools.data_export import export_file
+from tools.data_file_index import get_file_index
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+@pytest.fixture
+def jsonl_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DATA_INDEX_STRIDE", 4)
+    path = tmp_path / "search_contents.jsonl"
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(25):
+            record = {"note_id": str(i), "liked_count": i, "title": f"标题\n{i}", "tags": ["a", "b"]}
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return path
+
+
+class TestDataExport:
+    """Test cases for export_file"""
+
+    def test_jsonl_chunks(self, jsonl_file):
+        """Output is produced one batch at a time"""
+        chunks = list(export_file(get_file_index(str(jsonl_file)), "jsonl", batch_size=10))
+        assert len(chunks) == 3
+        records = [json.loads(line) for line in b"".join(chunks).decode("utf-8").splitlines()]
+        assert [r["note_id"] for r in records] == [str(i) for i in range(25)]
+
+    def test_csv(self, jsonl_file):
+        data = b"".join(export_file(get_file_index(str(jsonl_file)), "csv", {"liked_count": "3"}))
+        rows = list(csv.DictReader(io.StringIO(data.decode("utf-8-sig"), newline="")))
+        assert rows == [{"note_id": "3", "liked_count": "3", "title": "标题\n3", "tags": '["a", "b"]'}]
+
+    def test_parquet_row_groups_and_types(self, jsonl_file):
+        """One row group per batch, native ints stay ints, nested values become json strings"""
+        data = b"".join(export_file(get_file_index(str(jsonl_file)), "parquet", batch_size=10))
+        parquet_file = pq.ParquetFile(io.BytesIO(data))
+        assert parquet_file.metadata.num_row_groups == 3
+        table = parquet_file.read()
+        assert str(table.schema.field("liked_count").type) == "int64"
+        assert table.column("liked_count").to_pylist() == list(range(25))
+        assert table.column("tags").to_pylist()[0] == '["a", "b"]'
+
+    def test_parquet_from_csv_and_empty(self, tmp_path):
+        """CSV values stay strings, a file without records gives an empty parquet file with its columns"""
+        path = tmp_path / "a.csv"
+        path.write_text("id,content\n1,x\n", encoding="utf-8")
+        table = pq.read_table(io.BytesIO(b"".join(export_file(get_file_index(str(path)), "parquet"))))
+        assert table.to_pylist() == [{"id": "1", "content": "x"}]
+
+        empty = tmp_path / "b.csv"
+        empty.write_text("id,content\n", encoding="utf-8")
+        table = pq.read_table(io.BytesIO(b"".join(export_file(get_file_index(str(empty)), "parquet"))))
+        assert (table.num_rows, table.column_names) == (0, ["id", "content"])
+
+    def test_api(self, jsonl_file, monkeypatch):
+        monkeypatch.setattr(data_router, "DATA_DIR", jsonl_file.parent)
+        app = FastAPI()
+        app.include_router(data_router.router)
+        client = TestClient(app)
+
+        response = client.get("/data/export/search_contents.jsonl", params={"format": "parquet"})
+        assert response.status_code == 200
+        assert 'filename="search_contents.parquet"' in response.headers["content-disposition"]
+        assert pq.read_table(io.BytesIO(response.content)).num_rows == 25
+
+        assert client.get("/data/export/search_contents.jsonl", params={"format": "xml"}).status_code == 400
+        assert client.get("/data/export/missing.jsonl").status_code == 404
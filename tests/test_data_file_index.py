@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_data_file_index.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the data file sidecar index and the paginated data API
+"""
+
+import asyncio
+import csv
+import json
+import os
+
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import config
+from api.routers import data as data_router
+from tools.async_file_writer import AsyncFileWriter
+from tools.data_file_index import DataFileIndex, get_file_index, index_path
+
+
+@pytest.fixture
+def small_stride(monkeypatch):
+    monkeypatch.setattr(config, "DATA_INDEX_STRIDE", 3)
+
+
+def _write_jsonl(path, items, mode="w"):
+    with open(path, mode, encoding="utf-8") as f:
+        for item in items:
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+
+class TestDataFileIndex:
+    """Test cases for DataFileIndex"""
+
+    def test_jsonl_incremental(self, tmp_path, small_stride):
+        """Appended records are indexed from where the last refresh stopped, a partial line is left out"""
+        path = str(tmp_path / "a.jsonl")
+        _write_jsonl(path, [{"id": i, "text": f"内容{i}"} for i in range(5)])
+        index = get_file_index(path)
+        assert (index.rows, index.columns) == (5, ["id", "text"])
+        assert len(index.checkpoints) == 2
+
+        _write_jsonl(path, [{"id": i, "text": "x"} for i in range(5, 10)], mode="a")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"id": 10, "te')
+        covered = index.size
+        index = DataFileIndex.load(path)
+        assert index.size == covered
+        assert index.refresh()
+        assert index.rows == 10
+        assert [r["id"] for r in index.read(offset=4, limit=4)] == [4, 5, 6, 7]
+        assert [r["id"] for r in index.read(offset=8, limit=5)] == [8, 9]
+
+    def test_replaced_file_is_reindexed(self, tmp_path, small_stride):
+        """A file that was rewritten with other content is indexed from scratch"""
+        path = str(tmp_path / "a.jsonl")
+        _write_jsonl(path, [{"id": i} for i in range(4)])
+        get_file_index(path)
+        _write_jsonl(path, [{"other": i} for i in range(6)])
+        index = get_file_index(path)
+        assert (index.rows, index.columns) == (6, ["other"])
+
+    def test_csv_with_embedded_newlines(self, tmp_path, small_stride):
+        """Quoted newlines do not split a record"""
+        path = str(tmp_path / "a.csv")
+        with open(path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.DictWriter(f, fieldnames=["id", "content"])
+            writer.writeheader()
+            for i in range(7):
+                writer.writerow({"id": i, "content": f'line one\nline "two" {i}'})
+        index = get_file_index(path)
+        assert (index.rows, index.columns) == (7, ["id", "content"])
+        page = index.read(offset=5, limit=10)
+        assert page == [
+            {"id": "5", "content": 'line one\nline "two" 5'},
+            {"id": "6", "content": 'line one\nline "two" 6'},
+        ]
+
+    def test_json_array(self, tmp_path, small_stride):
+        """Offsets of a json array are byte offsets, non ascii text before a checkpoint is accounted for"""
+        path = str(tmp_path / "a.json")
+        items = [{"id": i, "title": "标题" * i} for i in range(8)]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(items, f, ensure_ascii=False, indent=4)
+        index = get_file_index(path)
+        assert index.rows == 8
+        assert index.read(offset=6, limit=3) == items[6:]
+
+    def test_filters(self, tmp_path, small_stride):
+        """Offset and limit apply to the filtered records"""
+        path = str(tmp_path / "a.jsonl")
+        _write_jsonl(path, [{"id": i, "kind": "even" if i % 2 == 0 else "odd"} for i in range(20)])
+        index = get_file_index(path)
+        assert [r["id"] for r in index.read(offset=2, limit=3, filters={"kind": "odd"})] == [5, 7, 9]
+        assert index.read(offset=50, limit=3, filters={"kind": "odd"}) == []
+
+    def test_parquet_footer(self, tmp_path):
+        """Parquet rows and columns come from the footer, pages skip whole row groups"""
+        pq = pytest.importorskip("pyarrow.parquet")
+        import pyarrow as pa
+
+        path = str(tmp_path / "a.parquet")
+        pq.write_table(pa.table({"id": list(range(10)), "text": ["x"] * 10}), path, row_group_size=4)
+        index = get_file_index(path)
+        assert (index.rows, index.columns) == (10, ["id", "text"])
+        assert [r["id"] for r in index.read(offset=5, limit=4)] == [5, 6, 7, 8]
+
+    def test_build_false_skips_unindexed_files(self, tmp_path):
+        """Listing does not parse files without an up to date sidecar"""
+        path = str(tmp_path / "a.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([{"id": 1}], f)
+        assert get_file_index(path, build=False) is None
+        get_file_index(path)
+        assert get_file_index(path, build=False).rows == 1
+
+
+class TestWriterIndex:
+    """AsyncFileWriter keeps the index up to date while appending"""
+
+    @pytest_asyncio.fixture
+    async def writer(self, tmp_path, monkeypatch, small_stride):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(config, "ENABLE_GET_WORDCLOUD", False)
+        monkeypatch.setattr(config, "JSON_STORE_FORMAT", "jsonl")
+        yield AsyncFileWriter(platform="test", crawler_type="search")
+        await AsyncFileWriter.close_all()
+        AsyncFileWriter._path_locks.clear()
+
+    @pytest.mark.asyncio
+    async def test_jsonl_and_csv_appends(self, writer):
+        for i in range(4):
+            await writer.write_single_item_to_json({"note_id": str(i)}, "contents")
+            await writer.write_to_csv({"note_id": str(i)}, "contents")
+        jsonl_path = writer._get_file_path("json", "contents", extension="jsonl")
+        csv_path = writer._get_file_path("csv", "contents")
+        # The index is refreshed in a worker thread after the first record and every DATA_INDEX_STRIDE records
+        await asyncio.gather(*AsyncFileWriter._index_tasks.values())
+        assert DataFileIndex.load(jsonl_path).checkpoints == AsyncFileWriter._indexes[jsonl_path].checkpoints
+        assert AsyncFileWriter._indexes[csv_path].rows >= 1
+
+        await AsyncFileWriter.close_all()
+        assert DataFileIndex.load(jsonl_path).rows == 4
+        assert DataFileIndex.load(csv_path).is_fresh()
+
+    @pytest.mark.asyncio
+    async def test_finalize_writes_json_index(self, writer):
+        items = [{"comment_id": str(i), "content": "评论" * i} for i in range(7)]
+        for item in items:
+            await writer.write_single_item_to_json(item, "comments")
+        jsonl_path = writer._get_file_path("json", "comments", extension="jsonl")
+
+        await AsyncFileWriter.close_all(finalize=True)
+
+        json_path = writer._get_file_path("json", "comments")
+        assert not os.path.exists(index_path(jsonl_path))
+        index = DataFileIndex.load(json_path)
+        assert index.is_fresh()
+        assert (index.rows, index.columns) == (7, ["comment_id", "content"])
+        assert index.read(offset=3, limit=10) == items[3:]
+
+
+class TestDataApi:
+    """Test cases for the paginated /data API"""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch, small_stride):
+        monkeypatch.setattr(data_router, "DATA_DIR", tmp_path)
+        (tmp_path / "xhs" / "json").mkdir(parents=True)
+        _write_jsonl(tmp_path / "xhs" / "json" / "search_contents.jsonl",
+                     [{"note_id": str(i), "type": "video" if i % 3 == 0 else "normal"} for i in range(10)])
+        with open(tmp_path / "xhs" / "json" / "search_comments.json", "w", encoding="utf-8") as f:
+            json.dump([{"comment_id": "1"}], f)
+        app = FastAPI()
+        app.include_router(data_router.router)
+        return TestClient(app)
+
+    def test_list_files_uses_sidecars_only(self, client):
+        files = {f["name"]: f for f in client.get("/data/files").json()["files"]}
+        assert set(files) == {"search_contents.jsonl", "search_comments.json"}
+        assert files["search_contents.jsonl"]["record_count"] is None
+        assert files["search_comments.json"]["record_count"] is None
+
+        client.get("/data/files/xhs/json/search_comments.json")
+        files = {f["name"]: f for f in client.get("/data/files").json()["files"]}
+        assert files["search_comments.json"]["record_count"] == 1
+
+    def test_preview_page(self, client):
+        body = client.get("/data/files/xhs/json/search_contents.jsonl", params={"offset": 4, "limit": 3}).json()
+        assert [r["note_id"] for r in body["data"]] == ["4", "5", "6"]
+        assert (body["total"], body["columns"], body["has_more"]) == (10, ["note_id", "type"], True)
+
+    def test_preview_filter(self, client):
+        body = client.get("/data/files/xhs/json/search_contents.jsonl",
+                          params={"filter": "type:video", "limit": 3}).json()
+        assert [r["note_id"] for r in body["data"]] == ["0", "3", "6"]
+        assert (body["total"], body["filtered"], body["has_more"]) == (None, True, True)
+        assert client.get("/data/files/xhs/json/search_contents.jsonl", params={"filter": "type"}).status_code == 400
+
+    def test_errors(self, client):
+        assert client.get("/data/files/xhs/json/missing.jsonl").status_code == 404
+        assert client.get("/data/files/xhs/json").status_code == 400
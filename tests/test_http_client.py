@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_http_client.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the pooled httpx client of the platform API clients
+"""
+
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from proxy.proxy_mixin import ProxyRefreshMixin
+from tools.http_client import create_async_client
+
+
+class DummyApiClient(ProxyRefreshMixin):
+    def __init__(self, proxy=None, proxy_ip_pool=None):
+        self.proxy = proxy
+        self.init_proxy_pool(proxy_ip_pool)
+
+
+class DummyProxyPool:
+    def __init__(self):
+        self.expired = False
+        self.current_proxy = None
+
+    def is_current_proxy_expired(self):
+        return self.expired
+
+    async def get_or_refresh_proxy(self):
+        self.expired = False
+        return SimpleNamespace(ip="10.0.0.2", port=8080, user="", password="")
+
+
+class TestPooledHttpClient:
+    """Test cases for ProxyRefreshMixin.get_http_client / close_http_client"""
+
+    @pytest.mark.asyncio
+    async def test_client_is_reused(self):
+        """All requests of one API client share the same pooled client"""
+        api_client = DummyApiClient()
+        first = api_client.get_http_client()
+        assert api_client.get_http_client() is first
+        await api_client.close_http_client()
+        assert first.is_closed
+        assert api_client.get_http_client() is not first
+        await api_client.close_http_client()
+
+    @pytest.mark.asyncio
+    async def test_client_rebuilt_on_proxy_swap(self):
+        """An expired proxy swaps the client, the old one is closed on the next swap or on close"""
+        pool = DummyProxyPool()
+        api_client = DummyApiClient(proxy="http://10.0.0.1:8080", proxy_ip_pool=pool)
+        old = api_client.get_http_client()
+
+        await api_client._refresh_proxy_if_expired()
+        assert api_client.get_http_client() is old
+
+        pool.expired = True
+        await api_client._refresh_proxy_if_expired()
+        new = api_client.get_http_client()
+        assert api_client.proxy == "http://10.0.0.2:8080"
+        assert new is not old
+        assert not old.is_closed
+
+        await api_client.close_http_client()
+        assert old.is_closed and new.is_closed
+
+    @pytest.mark.asyncio
+    async def test_response_cookies_are_not_kept(self):
+        """The shared client stays stateless: cookies set by a response are not sent with later requests"""
+        seen_cookies = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen_cookies.append(request.headers.get("Cookie"))
+            return httpx.Response(200, headers={"Set-Cookie": "session=abc; Path=/"})
+
+        async with create_async_client(transport=httpx.MockTransport(handler)) as client:
+            await client.get("https://example.com/a")
+            await client.get("https://example.com/b")
+            await client.get("https://example.com/c", headers={"Cookie": "a1=explicit"})
+        assert seen_cookies == [None, None, "a1=explicit"]
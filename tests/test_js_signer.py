@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_js_signer.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Golden tests for the node signer pool: fixed Math.random / Date.now, output pinned and equal to execjs
+"""
+
+import asyncio
+import shutil
+
+import execjs
+import pytest
+import pytest_asyncio
+
+from tools.js_signer import DETERMINISTIC_JS, JsSignError, JsSignerPool
+
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+
+UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+DOUYIN_PARAMS = "aweme_id=7300000000000000000&device_platform=webapp"
+ZHIHU_URL = "/api/v4/search_v3?q=python"
+ZHIHU_COOKIES = "d_c0=AAAA|1700000000;"
+
+GOLDEN_A_BOGUS = (
+    "Dj8hQdwXDkVPgDy656KLfY3q6XP3Y2AI0trEMD2fcd30qL39HMYD9exoIBGvXY8jwG/-IeYjy4hbT3ohrQ2y8qwf9W0L/25gsDSkKl12"
+    "so0j53inCLf/E0iE5hsAtFH8svr4iKi8owICSYyhldAJ5kIlO62-zo0/918="
+)
+GOLDEN_A_BOGUS_REPLY = (
+    "d68MQQ8fdEVPDDWh56KLfY3q63q3YB/I0trEMD2fxnf3qL39HMYD9exEIBGvXY8jwG/-IeYjy4hbT3ohrQ2y8qwf9W0L/25gsDSkKl12"
+    "so0j53inCLf/E0iE5hsAtFH8svr4iKi8owICSYyhldAJ5kIlO62-zo0/91S="
+)
+GOLDEN_ZSE_96 = "2.0_2KkGnpYgwLD81QmY19Yhtnro/27sraIVbGCo+5i=zRWbyYjVJmVTVjdLQjFN7ytC"
+
+
+def _execjs_call(script_path, name, *args):
+    with open(script_path, encoding="utf-8-sig") as f:
+        return execjs.compile(DETERMINISTIC_JS + f.read()).call(name, *args)
+
+
+@pytest_asyncio.fixture
+async def douyin_pool():
+    pool = JsSignerPool("libs/douyin.js", size=1, deterministic=True)
+    yield pool
+    await pool.close()
+
+
+class TestJsSignerPool:
+    """Test cases for JsSignerPool"""
+
+    @pytest.mark.asyncio
+    async def test_douyin_golden(self, douyin_pool):
+        """a_bogus is pinned for fixed inputs, the worker keeps its state between calls"""
+        assert await douyin_pool.call("sign_datail", DOUYIN_PARAMS, UA) == GOLDEN_A_BOGUS
+        assert await douyin_pool.call("sign_reply", "aweme_id=7300000000000000000&cursor=0", UA) == GOLDEN_A_BOGUS_REPLY
+
+    @pytest.mark.asyncio
+    async def test_same_output_as_execjs(self, douyin_pool):
+        """A fresh worker signs exactly like the execjs path"""
+        assert await douyin_pool.call("sign_datail", DOUYIN_PARAMS, UA) == _execjs_call(
+            "libs/douyin.js", "sign_datail", DOUYIN_PARAMS, UA
+        )
+
+    @pytest.mark.asyncio
+    async def test_zhihu_golden(self):
+        """x-zse-96 is pinned for fixed inputs"""
+        pool = JsSignerPool("libs/zhihu.js", size=1, deterministic=True)
+        try:
+            result = await pool.call("get_sign", ZHIHU_URL, ZHIHU_COOKIES)
+        finally:
+            await pool.close()
+        assert result["x-zse-96"] == GOLDEN_ZSE_96
+        assert result == _execjs_call("libs/zhihu.js", "get_sign", ZHIHU_URL, ZHIHU_COOKIES)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_and_errors(self):
+        """Concurrent calls are spread over the pool, JS errors are raised and the worker stays usable"""
+        pool = JsSignerPool("libs/douyin.js", size=2)
+        try:
+            results = await asyncio.gather(*[pool.call("sign_datail", f"aweme_id={i}", UA) for i in range(8)])
+            assert len(pool._workers) == 2
+            assert all(results)
+            with pytest.raises(JsSignError):
+                await pool.call("no_such_function")
+            assert await pool.call("sign_datail", DOUYIN_PARAMS, UA)
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_call_does_not_leak_reply(self, tmp_path):
+        """A call cancelled while the worker is busy does not hand its reply to the next caller"""
+        script = tmp_path / "sign.js"
+        script.write_text(
+            "function slow(x) { const end = Date.now() + 300; while (Date.now() < end) {} return 'slow:' + x; }\n"
+            "function fast(x) { return 'fast:' + x; }\n",
+            encoding="utf-8",
+        )
+        pool = JsSignerPool(str(script), size=1)
+        try:
+            task = asyncio.create_task(pool.call("slow", "A"))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            assert await pool.call("fast", "B") == "fast:B"
+        finally:
+            await pool.close()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_media_blob_store.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the content-addressed media store
+"""
+
+import os
+
+import pytest
+
+import config
+from store.media_blob_store import MediaBlobStore
+from tools.media_downloader import MediaDownloader
+
+
+@pytest.fixture
+def blob_config(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "ENABLE_MEDIA_DEDUP", True)
+    monkeypatch.setattr(config, "MEDIA_STORE_DIR", str(tmp_path / "media"))
+    monkeypatch.setattr(MediaDownloader, "_instance", None)
+    monkeypatch.setattr(MediaBlobStore, "_instances", {})
+    yield tmp_path
+    MediaBlobStore.close_all()
+
+
+def _fake_cdn(bodies, calls):
+    async def download(url, save_path):
+        calls.append(url)
+        with open(save_path, "wb") as f:
+            f.write(bodies[url])
+        return True
+
+    return download
+
+
+class TestMediaBlobStore:
+    """Test cases for MediaBlobStore and the deduplicating MediaDownloader"""
+
+    @pytest.mark.asyncio
+    async def test_same_content_is_stored_once(self, blob_config):
+        """Reposted media under different URLs is one blob, every note file links to it"""
+        calls = []
+        download = _fake_cdn({"https://a/1.jpg": b"same", "https://b/2.jpg": b"same"}, calls)
+        downloader = MediaDownloader.get_instance()
+        downloader.submit(download, "https://a/1.jpg", str(blob_config / "xhs" / "n1" / "0.jpg"), "xhs", "n1", "image", 0)
+        downloader.submit(download, "https://b/2.jpg", str(blob_config / "dy" / "n2" / "000.jpg"), "douyin", "n2", "image", 0)
+        await MediaDownloader.wait_all()
+
+        store = MediaBlobStore.get_instance()
+        blobs = [f for _, _, files in os.walk(store.blob_dir) for f in files]
+        assert len(blobs) == 1
+        assert store.lookup_ref("xhs", "n1", "image", 0) == store.lookup_ref("douyin", "n2", "image", 0)
+        assert os.path.samefile(blob_config / "xhs" / "n1" / "0.jpg", blob_config / "dy" / "n2" / "000.jpg")
+        assert not os.listdir(store.staging_dir)
+
+    @pytest.mark.asyncio
+    async def test_same_url_downloaded_concurrently_once(self, blob_config):
+        """A URL queued for two notes at the same time is downloaded once, the second path waits for the blob"""
+        calls = []
+        download = _fake_cdn({"https://a/1.jpg": b"reposted"}, calls)
+        downloader = MediaDownloader.get_instance()
+        downloader.submit(download, "https://a/1.jpg", str(blob_config / "n1" / "0.jpg"), "xhs", "n1", "image", 0)
+        downloader.submit(download, "https://a/1.jpg", str(blob_config / "n2" / "0.jpg"), "xhs", "n2", "image", 0)
+        await MediaDownloader.wait_all()
+
+        assert calls == ["https://a/1.jpg"]
+        assert downloader.stats["downloaded"] == 1 and downloader.stats["deduplicated"] == 1
+        assert (blob_config / "n1" / "0.jpg").read_bytes() == (blob_config / "n2" / "0.jpg").read_bytes() == b"reposted"
+        assert not downloader._pending_urls
+
+    @pytest.mark.asyncio
+    async def test_known_url_is_not_downloaded_again(self, blob_config):
+        """The persistent URL index skips the request on a re-crawl"""
+        calls = []
+        download = _fake_cdn({"https://a/v.mp4": b"video"}, calls)
+        MediaDownloader.get_instance().submit(download, "https://a/v.mp4", str(blob_config / "run1" / "video.mp4"))
+        await MediaDownloader.wait_all()
+        await MediaDownloader.close()
+        MediaBlobStore.close_all()
+
+        downloader = MediaDownloader.get_instance()
+        downloader.submit(download, "https://a/v.mp4", str(blob_config / "run2" / "video.mp4"), "bili", "1", "video", 0)
+        await MediaDownloader.wait_all()
+
+        assert calls == ["https://a/v.mp4"]
+        assert downloader.stats["deduplicated"] == 1
+        assert (blob_config / "run2" / "video.mp4").read_bytes() == b"video"
+        assert MediaBlobStore.get_instance().lookup_ref("bili", "1", "video", 0) is not None
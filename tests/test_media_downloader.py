@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_media_downloader.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the streamed, resumable media downloader
+"""
+
+import gzip
+import os
+
+import httpx
+import pytest
+
+import config
+from tools.media_downloader import PART_SUFFIX, MediaDownloader, download_to_file
+
+VIDEO = bytes(range(256)) * 1000
+
+
+def _range_server(requests_seen):
+    """Serves VIDEO and honours Range headers"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests_seen.append(request)
+        range_header = request.headers.get("Range")
+        if range_header:
+            start = int(range_header.split("=")[1].rstrip("-"))
+            if start >= len(VIDEO):
+                return httpx.Response(416)
+            return httpx.Response(206, content=VIDEO[start:])
+        return httpx.Response(200, content=VIDEO)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+class TestMediaDownloader:
+    """Test cases for download_to_file / MediaDownloader"""
+
+    @pytest.mark.asyncio
+    async def test_streams_to_file_and_renames(self, tmp_path):
+        """The body is written in chunks to .part and renamed when complete"""
+        seen = []
+        save_path = str(tmp_path / "n1" / "video.mp4")
+        async with _range_server(seen) as client:
+            assert await download_to_file(client, "https://cdn/v.mp4", save_path, chunk_size=1024)
+        with open(save_path, "rb") as f:
+            assert f.read() == VIDEO
+        assert not os.path.exists(save_path + PART_SUFFIX)
+        assert "Range" not in seen[0].headers
+
+    @pytest.mark.asyncio
+    async def test_resumes_partial_file_with_range(self, tmp_path):
+        """An existing .part file is continued with a Range request"""
+        seen = []
+        save_path = str(tmp_path / "video.mp4")
+        with open(save_path + PART_SUFFIX, "wb") as f:
+            f.write(VIDEO[:1000])
+        async with _range_server(seen) as client:
+            assert await download_to_file(client, "https://cdn/v.mp4", save_path)
+        assert seen[0].headers["Range"] == "bytes=1000-"
+        with open(save_path, "rb") as f:
+            assert f.read() == VIDEO
+
+    @pytest.mark.asyncio
+    async def test_restarts_when_range_is_ignored(self, tmp_path):
+        """Servers answering 200 to a Range request overwrite the partial file"""
+        save_path = str(tmp_path / "image.jpg")
+        with open(save_path + PART_SUFFIX, "wb") as f:
+            f.write(b"stale")
+        client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, content=b"image")))
+        async with client:
+            assert await download_to_file(client, "https://cdn/i.jpg", save_path)
+        with open(save_path, "rb") as f:
+            assert f.read() == b"image"
+
+    @pytest.mark.asyncio
+    async def test_gzip_encoded_response_is_complete(self, tmp_path):
+        """Content-Length of a compressed response is the wire size, the decoded body is not truncated"""
+        body = b"svg " * 5000
+        compressed = gzip.compress(body)
+        client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(
+            200, content=compressed, headers={"Content-Encoding": "gzip", "Content-Length": str(len(compressed))})))
+        save_path = str(tmp_path / "image.svg")
+        async with client:
+            assert await download_to_file(client, "https://cdn/i.svg", save_path)
+        with open(save_path, "rb") as f:
+            assert f.read() == body
+
+    @pytest.mark.asyncio
+    async def test_submit_skips_existing_and_duplicate_paths(self, tmp_path, monkeypatch):
+        """Existing files and paths already queued are not downloaded again"""
+        monkeypatch.setattr(config, "MEDIA_DOWNLOAD_CONCURRENCY", 2)
+        monkeypatch.setattr(config, "ENABLE_MEDIA_DEDUP", False)
+        monkeypatch.setattr(MediaDownloader, "_instance", None)
+        existing = tmp_path / "existing.jpg"
+        existing.write_bytes(b"x")
+        calls = []
+
+        async def fake_download(url, save_path):
+            calls.append(url)
+            with open(save_path, "wb") as f:
+                f.write(url.encode())
+            return True
+
+        downloader = MediaDownloader.get_instance()
+        assert not downloader.submit(fake_download, "https://cdn/0", str(existing))
+        assert downloader.submit(fake_download, "https://cdn/1", str(tmp_path / "1.jpg"))
+        assert not downloader.submit(fake_download, "https://cdn/1", str(tmp_path / "1.jpg"))
+        assert downloader.submit(fake_download, "https://cdn/2", str(tmp_path / "2.jpg"))
+        await MediaDownloader.wait_all()
+
+        assert sorted(calls) == ["https://cdn/1", "https://cdn/2"]
+        assert downloader.stats == {"downloaded": 2, "deduplicated": 0, "skipped": 2, "failed": 0}
+        await MediaDownloader.close()
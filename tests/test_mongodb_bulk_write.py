@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_mongodb_bulk_write.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the buffered MongoDB bulk upserts, backed by mongomock
+"""
+
+import asyncio
+
+import mongomock
+import pytest
+import pytest_asyncio
+
+import config
+from database.mongodb_store_base import MongoBulkWriter, MongoDBConnection, MongoDBStoreBase
+from store.xhs._store_impl import XhsMongoStoreImplement
+
+
+class _MockUpdateOne:
+    """Feeds a pymongo UpdateOne into mongomock's bulk builder (pymongo 4.9+ passes arguments mongomock does not know)"""
+
+    def __init__(self, operation):
+        self.operation = operation
+
+    def _add_to_bulk(self, bulk):
+        bulk.add_update(self.operation._filter, self.operation._doc, multi=False, upsert=self.operation._upsert)
+
+
+class AsyncMockCollection:
+    """The subset of the motor collection API used by MongoDBStoreBase, on top of a mongomock collection"""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.name = collection.name
+        self.bulk_write_calls = 0
+
+    async def bulk_write(self, operations, ordered=True):
+        self.bulk_write_calls += 1
+        return self._collection.bulk_write([_MockUpdateOne(op) for op in operations], ordered=ordered)
+
+    async def create_index(self, keys, unique=False):
+        return self._collection.create_index(keys, unique=unique)
+
+    async def update_one(self, query, update, upsert=False):
+        return self._collection.update_one(query, update, upsert=upsert)
+
+    async def find_one(self, query):
+        return self._collection.find_one(query)
+
+    def index_information(self):
+        return self._collection.index_information()
+
+    def count_documents(self, query):
+        return self._collection.count_documents(query)
+
+
+class AsyncMockDatabase:
+    def __init__(self):
+        self._db = mongomock.MongoClient().db
+        self._collections = {}
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            self._collections[name] = AsyncMockCollection(self._db[name])
+        return self._collections[name]
+
+
+@pytest_asyncio.fixture
+async def mock_db(monkeypatch):
+    """Route MongoDBConnection to an in-memory mongomock database"""
+    db = AsyncMockDatabase()
+
+    async def _get_db(self):
+        return db
+
+    monkeypatch.setattr(MongoDBConnection, "get_db", _get_db)
+    monkeypatch.setattr(MongoBulkWriter, "_instances", {})
+    monkeypatch.setattr(MongoDBStoreBase, "_unique_indexes", set())
+    monkeypatch.setattr(config, "MONGODB_BULK_WRITE_BATCH_SIZE", 3)
+    monkeypatch.setattr(config, "MONGODB_BULK_WRITE_LINGER_SEC", 0.05)
+    yield db
+    await MongoBulkWriter.flush_all()
+
+
+class TestMongoBulkWrite:
+    """Test cases for MongoDBStoreBase.save_or_update_many"""
+
+    @pytest.mark.asyncio
+    async def test_flush_on_batch_size(self, mock_db):
+        """A full batch is written at once with one bulk_write, a unique index is created on first use"""
+        store = MongoDBStoreBase(collection_prefix="xhs")
+        items = [{"comment_id": f"c{i}", "content": str(i)} for i in range(3)]
+        assert await store.save_or_update_many("comments", items, key_fields=["comment_id"]) == 3
+
+        collection = mock_db["xhs_comments"]
+        assert collection.bulk_write_calls == 1
+        assert collection.count_documents({}) == 3
+        assert any(info.get("unique") for info in collection.index_information().values())
+
+    @pytest.mark.asyncio
+    async def test_flush_after_linger(self, mock_db):
+        """A partial batch is written after the linger time"""
+        store = MongoDBStoreBase(collection_prefix="xhs")
+        await store.save_or_update_many("contents", [{"note_id": "n1", "title": "t"}], key_fields=["note_id"])
+        collection = mock_db["xhs_contents"]
+        assert collection.count_documents({}) == 0
+
+        await asyncio.sleep(0.2)
+        assert collection.count_documents({}) == 1
+
+    @pytest.mark.asyncio
+    async def test_updates_of_one_document_are_merged(self, mock_db):
+        """Buffered updates of the same key become one upsert, later fields win, items without key are skipped"""
+        store = MongoDBStoreBase(collection_prefix="xhs")
+        accepted = await store.save_or_update_many("comments", [
+            {"comment_id": "c1", "content": "old", "like_count": "1"},
+            {"comment_id": "c1", "like_count": "5"},
+            {"comment_id": "", "content": "no key"},
+        ], key_fields=["comment_id"])
+        assert accepted == 2
+        await MongoDBStoreBase.flush_all()
+
+        collection = mock_db["xhs_comments"]
+        assert collection.bulk_write_calls == 1
+        doc = await collection.find_one({"comment_id": "c1"})
+        assert (doc["content"], doc["like_count"]) == ("old", "5")
+        assert collection.count_documents({}) == 1
+
+    @pytest.mark.asyncio
+    async def test_platform_store_uses_bulk_path(self, mock_db):
+        """Platform Mongo stores upsert through the buffered bulk path"""
+        store = XhsMongoStoreImplement()
+        await store.store_comment_batch([{"comment_id": "c1", "content": "a"}, {"comment_id": "c2", "content": "b"}])
+        await store.store_comment({"comment_id": "c1", "content": "a2"})
+        await MongoDBStoreBase.flush_all()
+
+        collection = mock_db["xhs_comments"]
+        assert collection.count_documents({}) == 2
+        assert (await collection.find_one({"comment_id": "c1"}))["content"] == "a2"
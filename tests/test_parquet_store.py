@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_parquet_store.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the Parquet store
+"""
+
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+
+import config
+from store.parquet_store_base import PARQUET_AVAILABLE, ParquetStoreBase, parse_count, parse_timestamp
+
+pytestmark = pytest.mark.skipif(not PARQUET_AVAILABLE, reason="pyarrow not installed")
+
+
+def test_parse_count():
+    assert [parse_count(v) for v in (12, "1,234", "1.2万", "10w+", "3k", "", "abc", None)] == [
+        12, 1234, 12000, 100000, 3000, None, None, None,
+    ]
+
+
+def test_parse_timestamp():
+    assert parse_timestamp(1700000000) == datetime(2023, 11, 14, 22, 13, 20, tzinfo=timezone.utc)
+    assert parse_timestamp("1700000000123") == datetime.fromtimestamp(1700000000.123, tz=timezone.utc)
+    assert parse_timestamp("2024-01-02 03:04:05") == datetime(2024, 1, 2, 3, 4, 5).astimezone(timezone.utc)
+    # Weibo: the offset is kept, the same instant as the epoch
+    assert parse_timestamp("Tue Nov 14 22:13:20 +0000 2023") == parse_timestamp(1700000000)
+    assert parse_timestamp("Wed Nov 15 06:13:20 +0800 2023") == parse_timestamp(1700000000)
+    assert parse_timestamp("yesterday") is None
+
+
+class TestParquetStoreBase:
+    """Test cases for ParquetStoreBase"""
+
+    @pytest.fixture(autouse=True)
+    def clear_singleton_state(self):
+        ParquetStoreBase._instances.clear()
+        yield
+        ParquetStoreBase._instances.clear()
+
+    @pytest.fixture
+    def store(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(config, "PARQUET_FLUSH_ROWS", 3)
+        monkeypatch.setattr(config, "PARQUET_FLUSH_INTERVAL_SEC", 3600)
+        return ParquetStoreBase.get_instance(platform="xhs", crawler_type="search")
+
+    def _read(self, store, item_type):
+        import pyarrow.dataset as ds
+
+        return ds.dataset(str(store.data_dir / item_type), format="parquet", partitioning="hive")
+
+    @pytest.mark.asyncio
+    async def test_typed_partitioned_files(self, store):
+        """Counts become int64, times timestamps, rows are partitioned by date and keyword"""
+        for i in range(4):
+            await store.store_content({
+                "note_id": str(i), "liked_count": f"{i}万", "time": 1700000000000 + i,
+                "tag_list": ["a"], "source_keyword": "猫/狗" if i % 2 else "",
+            })
+        # The buffer is written when it reaches PARQUET_FLUSH_ROWS
+        assert len(list(store.data_dir.rglob("*.parquet"))) == 2
+        assert len(store._buffers["contents"]) == 1
+
+        ParquetStoreBase.flush_all()
+        dataset = self._read(store, "contents")
+        assert str(dataset.schema.field("liked_count").type) == "int64"
+        assert str(dataset.schema.field("time").type) == "timestamp[ms, tz=UTC]"
+
+        import pyarrow.dataset as ds
+        table = dataset.to_table(filter=ds.field("liked_count") >= 20000)
+        assert sorted(table.column("note_id").to_pylist()) == ["2", "3"]
+        assert set(dataset.to_table().column("keyword").to_pylist()) == {"猫/狗", "__none__"}
+        assert table.column("tag_list").to_pylist()[0] == '["a"]'
+
+    @pytest.mark.asyncio
+    async def test_time_based_flush(self, store):
+        await store.store_comment({"comment_id": "1", "like_count": 5})
+        assert not list(store.data_dir.rglob("*.parquet"))
+        store.flush_interval = 0
+        await store.store_comment({"comment_id": "2", "like_count": None})
+        assert self._read(store, "comments").count_rows() == 2
+
+    @pytest.mark.asyncio
+    async def test_batch_methods_and_contacts(self, store):
+        await store.store_comment_batch([{"comment_id": str(i)} for i in range(5)])
+        await store.store_contact({"up_id": 1, "fan_id": 2})
+        store.flush()
+        assert self._read(store, "comments").count_rows() == 5
+        assert self._read(store, "contacts").to_table().column("up_id").to_pylist() == ["1"]
+
+    @patch("config.SAVE_DATA_OPTION", "parquet")
+    def test_store_factories(self):
+        from store.bilibili import BiliStoreFactory
+        from store.xhs import XhsStoreFactory
+        from store.zhihu import ZhihuStoreFactory
+
+        for factory in (BiliStoreFactory, XhsStoreFactory, ZhihuStoreFactory):
+            assert isinstance(factory.create_store(), ParquetStoreBase)
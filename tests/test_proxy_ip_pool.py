@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_proxy_ip_pool.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the ProxyIpPool prefetch, concurrent validation and health scoring
+A local asyncio server answers every request with 200 and stands in for both the proxy and the validator
+"""
+
+import asyncio
+import random
+import socket
+import time
+from typing import List
+
+import httpx
+import pytest
+import pytest_asyncio
+
+import config
+from proxy.base_proxy import ProxyProvider
+from proxy.proxy_ip_pool import ProxyIpPool
+from proxy.proxy_mixin import ProxyRefreshMixin
+from proxy.types import IpInfoModel
+
+
+class _StubProvider(ProxyProvider):
+    def __init__(self, batches: List[List[IpInfoModel]]):
+        self.batches = batches
+        self.calls = 0
+
+    async def get_proxy(self, num: int) -> List[IpInfoModel]:
+        batch = self.batches[min(self.calls, len(self.batches) - 1)]
+        self.calls += 1
+        return list(batch)
+
+
+def _ip(port: int, expires_in: int = 3600) -> IpInfoModel:
+    return IpInfoModel(ip="127.0.0.1", port=port, user="", password="", expired_time_ts=int(time.time()) + expires_in)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest_asyncio.fixture
+async def stub_proxy_port(monkeypatch):
+    """Local HTTP server that answers 200, used as proxy and validator"""
+    async def handle(reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok")
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    monkeypatch.setattr(config, "IP_PROXY_VALIDATE_URL", "http://validator.local/")
+    monkeypatch.setattr(config, "IP_PROXY_VALIDATE_TIMEOUT", 2)
+    yield server.sockets[0].getsockname()[1]
+    server.close()
+    await server.wait_closed()
+
+
+class _ApiClient(ProxyRefreshMixin):
+    def __init__(self, pool: ProxyIpPool):
+        proxy = pool.current_proxy
+        self.proxy = f"http://{proxy.ip}:{proxy.port}"
+        self.init_proxy_pool(pool)
+
+
+class TestProxyIpPool:
+    """Test cases for ProxyIpPool"""
+
+    @pytest.mark.asyncio
+    async def test_load_validates_concurrently_and_drops_stale(self, stub_proxy_port):
+        """Only live proxies that are not about to expire enter the pool"""
+        good, dead, stale = _ip(stub_proxy_port), _ip(_free_port()), _ip(stub_proxy_port, expires_in=10)
+        pool = ProxyIpPool(ip_pool_count=3, enable_validate_ip=True, ip_provider=_StubProvider([[good, dead, stale]]))
+
+        await pool.load_proxies()
+
+        assert pool.proxy_list == [good]
+        assert pool.get_health(good).latency is not None
+        assert pool.get_health(dead).failures == 1
+
+    @pytest.mark.asyncio
+    async def test_prefetch_keeps_pool_warm(self, monkeypatch, stub_proxy_port):
+        """Taking a proxy refills the pool in the background"""
+        monkeypatch.setattr(config, "IP_PROXY_PREFETCH_COUNT", 1)
+        first, second = _ip(stub_proxy_port), IpInfoModel(
+            ip="localhost", port=stub_proxy_port, user="", password="", expired_time_ts=int(time.time()) + 3600
+        )
+        provider = _StubProvider([[first], [second]])
+        pool = ProxyIpPool(ip_pool_count=1, enable_validate_ip=True, ip_provider=provider)
+        await pool.load_proxies()
+
+        assert await pool.get_proxy() == first
+        await asyncio.wait_for(pool._prefetch_task, timeout=5)
+        assert pool.proxy_list == [second]
+        assert provider.calls == 2
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_stale_proxy_evicted_before_expiry(self, monkeypatch):
+        """A warm proxy is dropped IP_PROXY_EVICT_BUFFER_SECONDS before it expires"""
+        monkeypatch.setattr(config, "IP_PROXY_EVICT_BUFFER_SECONDS", 60)
+        monkeypatch.setattr(config, "IP_PROXY_PREFETCH_COUNT", 0)
+        fresh, expiring = _ip(1001), _ip(1002, expires_in=120)
+        pool = ProxyIpPool(ip_pool_count=2, enable_validate_ip=False, ip_provider=_StubProvider([[]]))
+        pool.proxy_list = [expiring, fresh]
+        expiring.expired_time_ts = int(time.time()) + 30
+
+        assert await pool.get_proxy() == fresh
+        assert pool.proxy_list == []
+
+    def test_selection_weighted_by_health(self):
+        """Fast proxies with few errors are picked more often"""
+        healthy, flaky = _ip(2001), _ip(2002)
+        pool = ProxyIpPool(ip_pool_count=2, enable_validate_ip=False, ip_provider=_StubProvider([[]]))
+        pool.proxy_list = [healthy, flaky]
+        for _ in range(5):
+            pool.record_proxy_success(healthy, latency=0.1)
+            pool.record_proxy_failure(flaky)
+        pool.record_proxy_success(flaky, latency=2.0)
+
+        assert pool.get_health(healthy).score > pool.get_health(flaky).score
+        random.seed(7)
+        picks = [pool._pick() for _ in range(200)]
+        assert picks.count(healthy) > 180
+
+    @pytest.mark.asyncio
+    async def test_requests_report_proxy_health(self, stub_proxy_port):
+        """Requests of the platform clients feed the health of the proxy they went through"""
+        good, dead = _ip(stub_proxy_port), _ip(_free_port())
+        pool = ProxyIpPool(ip_pool_count=1, enable_validate_ip=False, ip_provider=_StubProvider([[]]))
+
+        pool.current_proxy = good
+        api_client = _ApiClient(pool)
+        response = await api_client.get_http_client().get("http://api.local/feed")
+        assert response.status_code == 200
+        await api_client.close_http_client()
+
+        pool.current_proxy = dead
+        api_client = _ApiClient(pool)
+        with pytest.raises(httpx.TransportError):
+            await api_client.get_http_client().get("http://api.local/feed")
+        await api_client.close_http_client()
+
+        assert pool.get_health(good).successes == 1 and pool.get_health(good).latency is not None
+        assert pool.get_health(dead).failures == 1
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_rate_limiter.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the adaptive per-host rate limiter
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+import config
+from tools.rate_limiter import AdaptiveRateLimiter, RateLimiterRegistry, endpoint_family
+
+
+def _limiter(**overrides) -> AdaptiveRateLimiter:
+    params = dict(name="test", rate=1.0, min_rate=0.1, max_rate=10.0, increase=0.5,
+                  decrease_factor=0.5, penalty_sec=0.05, max_in_flight=4)
+    params.update(overrides)
+    return AdaptiveRateLimiter(**params)
+
+
+@pytest.fixture
+def limiter_registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "ENABLE_ADAPTIVE_RATE_LIMIT", True)
+    monkeypatch.setattr(config, "RATE_LIMIT_STATE_FILE", str(tmp_path / "state.json"))
+    monkeypatch.setattr(RateLimiterRegistry, "_limiters", {})
+    monkeypatch.setattr(RateLimiterRegistry, "_saved_state", None)
+    return tmp_path / "state.json"
+
+
+class TestAdaptiveRateLimiter:
+    """Test cases for AdaptiveRateLimiter / RateLimiterRegistry"""
+
+    def test_endpoint_family(self):
+        assert endpoint_family("https://edith.xiaohongshu.com/api/sns/web/v2/comment/page?note_id=1") == "comment"
+        assert endpoint_family("https://api.bilibili.com/x/v2/reply/wbi/main") == "comment"
+        assert endpoint_family("https://edith.xiaohongshu.com/api/sns/web/v1/search/notes") == "search"
+        assert endpoint_family("https://edith.xiaohongshu.com/api/sns/web/v1/feed") == "api"
+
+    def test_additive_increase_multiplicative_decrease(self):
+        """Successes raise the rate up to max_rate, a throttle halves it once per penalty window"""
+        limiter = _limiter()
+        for _ in range(4):
+            limiter.observe_status(200)
+        assert limiter.rate == 3.0
+        limiter.observe_status(461)
+        assert limiter.rate == 1.5 and limiter.in_flight_limit < 4
+        limiter.record_throttle("ip_error")
+        assert limiter.rate == 1.5
+        assert limiter.snapshot()["throttled"] == 2
+        for _ in range(100):
+            limiter.record_success()
+        assert limiter.rate == 10.0
+
+    @pytest.mark.asyncio
+    async def test_token_bucket_paces_requests(self):
+        """Requests beyond the first one are spaced by 1 / rate"""
+        limiter = _limiter(rate=50.0, increase=0.0)
+        started = time.monotonic()
+        for _ in range(6):
+            async with limiter.slot():
+                pass
+        assert time.monotonic() - started >= 0.08
+
+    @pytest.mark.asyncio
+    async def test_throttle_pauses_and_limits_in_flight(self):
+        """After a throttle signal no request starts before the penalty is over, in-flight requests are capped"""
+        limiter = _limiter(rate=1000.0, max_in_flight=4, penalty_sec=0.1)
+        limiter.record_throttle("http 429")
+        assert int(limiter.in_flight_limit) == 2
+        peak = 0
+        started = time.monotonic()
+
+        async def one():
+            nonlocal peak
+            async with limiter.slot():
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*[one() for _ in range(6)])
+        assert time.monotonic() - started >= 0.09
+        assert peak <= 2
+
+    @pytest.mark.asyncio
+    async def test_registry_shares_limiters_and_persists_state(self, limiter_registry):
+        """Clients share one limiter per platform and endpoint family, the state is restored by the next run"""
+        async with RateLimiterRegistry.slot("xhs", "https://edith.xiaohongshu.com/api/sns/web/v1/feed") as limiter:
+            limiter.observe_status(200)
+        assert RateLimiterRegistry.get("xhs", "https://edith.xiaohongshu.com/api/sns/web/v1/user_posted") is limiter
+        assert RateLimiterRegistry.get("xhs", "https://edith.xiaohongshu.com/api/sns/web/v2/comment/page") is not limiter
+        RateLimiterRegistry.save_state()
+
+        state = json.loads(limiter_registry.read_text(encoding="utf-8"))
+        assert state["xhs:api"]["rate"] == pytest.approx(config.RATE_LIMIT_INITIAL_RPS + config.RATE_LIMIT_INCREASE_RPS)
+
+        RateLimiterRegistry._limiters = {}
+        RateLimiterRegistry._saved_state = None
+        restored = RateLimiterRegistry.get("xhs", "https://edith.xiaohongshu.com/api/sns/web/v1/feed")
+        assert restored.rate == pytest.approx(state["xhs:api"]["rate"])
+
+    @pytest.mark.asyncio
+    async def test_disabled_limiter_is_a_no_op(self, limiter_registry, monkeypatch):
+        monkeypatch.setattr(config, "ENABLE_ADAPTIVE_RATE_LIMIT", False)
+        async with RateLimiterRegistry.slot("xhs", "https://x/api") as limiter:
+            limiter.observe_status(461)
+            limiter.record_throttle("ip_error")
+        assert RateLimiterRegistry.snapshot() == {}
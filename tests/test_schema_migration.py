@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_schema_migration.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the index migration of existing databases (SQLite)
+"""
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from database.schema_migration import migrate_indexes
+
+# xhs_note_comment as created by versions before comment_id became unique
+LEGACY_XHS_NOTE_COMMENT = """
+CREATE TABLE xhs_note_comment (
+    id INTEGER NOT NULL PRIMARY KEY, user_id VARCHAR(255), nickname TEXT, avatar TEXT, ip_location TEXT,
+    add_ts BIGINT, last_modify_ts BIGINT, comment_id VARCHAR(255), create_time BIGINT, note_id VARCHAR(255),
+    content TEXT, sub_comment_count INTEGER, pictures TEXT, parent_comment_id VARCHAR(255), like_count TEXT
+)
+"""
+
+
+@pytest_asyncio.fixture
+async def legacy_engine(tmp_path):
+    """SQLite database with a legacy xhs_note_comment table containing duplicate comments"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'legacy.db'}")
+    async with engine.begin() as conn:
+        await conn.execute(text(LEGACY_XHS_NOTE_COMMENT))
+        await conn.execute(text("CREATE INDEX ix_xhs_note_comment_comment_id ON xhs_note_comment (comment_id)"))
+        await conn.execute(text("CREATE INDEX ix_xhs_note_comment_create_time ON xhs_note_comment (create_time)"))
+        await conn.execute(text(
+            "INSERT INTO xhs_note_comment (id, comment_id, note_id, content, create_time) VALUES "
+            "(1, 'c1', 'n1', 'old', 1), (2, 'c2', 'n1', 'only', 2), (3, 'c1', 'n1', 'new', 1), "
+            "(4, NULL, 'n1', 'no key', 3), (5, NULL, 'n1', 'no key', 3)"
+        ))
+    yield engine
+    await engine.dispose()
+
+
+def _indexes(conn):
+    return {index["name"]: bool(index["unique"]) for index in inspect(conn).get_indexes("xhs_note_comment")}
+
+
+class TestSchemaMigration:
+    """Test cases for migrate_indexes"""
+
+    @pytest.mark.asyncio
+    async def test_migrate_legacy_table(self, legacy_engine):
+        """Duplicates are removed keeping the newest row, indexes become unique / composite"""
+        async with legacy_engine.begin() as conn:
+            applied = await conn.run_sync(migrate_indexes)
+        assert set(applied) == {"xhs_note_comment"}
+
+        async with legacy_engine.connect() as conn:
+            indexes = await conn.run_sync(_indexes)
+            rows = (await conn.execute(text("SELECT id, comment_id, content FROM xhs_note_comment ORDER BY id"))).all()
+        assert indexes["ix_xhs_note_comment_comment_id"] is True
+        assert indexes["idx_xhs_note_comment_note_time"] is False
+        assert [tuple(row) for row in rows] == [(2, "c2", "only"), (3, "c1", "new"), (4, None, "no key"), (5, None, "no key")]
+
+    @pytest.mark.asyncio
+    async def test_migration_is_idempotent(self, legacy_engine):
+        """A second run finds nothing to change"""
+        async with legacy_engine.begin() as conn:
+            await conn.run_sync(migrate_indexes)
+        async with legacy_engine.begin() as conn:
+            assert await conn.run_sync(migrate_indexes) == {}
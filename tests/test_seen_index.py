@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_seen_index.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the incremental re-crawl seen-index
+"""
+
+import pytest
+
+import config
+from tools.seen_index import BloomFilter, SeenIndex, content_fingerprint
+
+
+@pytest.fixture
+def seen_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "ENABLE_INCREMENTAL_CRAWL", True)
+    monkeypatch.setattr(config, "SEEN_INDEX_DB", str(tmp_path / "seen.db"))
+    monkeypatch.setattr(config, "SEEN_INDEX_BLOOM_CAPACITY", 1000)
+    monkeypatch.setattr(SeenIndex, "_instances", {})
+    yield tmp_path / "seen.db"
+    SeenIndex.close_all()
+
+
+class TestSeenIndex:
+    """Test cases for SeenIndex / BloomFilter"""
+
+    def test_bloom_filter(self):
+        """No false negatives, false positives close to the configured rate"""
+        bloom = BloomFilter(10000, 0.01)
+        for i in range(10000):
+            bloom.add(f"note-{i}")
+        assert all(f"note-{i}" in bloom for i in range(10000))
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        assert false_positives < 300
+
+    def test_unchanged_items_are_skipped_across_runs(self, seen_db):
+        """Only fully crawled items are remembered, a changed fingerprint triggers a re-crawl"""
+        index = SeenIndex.get_instance("xhs")
+        assert index.should_crawl("n1", content_fingerprint(10))
+        assert index.should_crawl("n2", content_fingerprint(3))
+        index.mark_crawled("n1")
+        # n2 was interrupted before its comments were crawled
+        SeenIndex.close_all()
+
+        index = SeenIndex.get_instance("xhs")
+        assert not index.should_crawl("n1", content_fingerprint(10))
+        assert index.should_crawl("n2", content_fingerprint(3))
+        assert index.should_crawl("n1", content_fingerprint(11))
+        assert index.stats == {"new": 1, "changed": 1, "unchanged": 1}
+        index.mark_crawled("n1")
+        assert not index.should_crawl("n1", content_fingerprint(11))
+
+        assert SeenIndex.get_instance("dy").should_crawl("n1", content_fingerprint(11))
+
+    def test_missing_fingerprint_and_disabled_index(self, seen_db, monkeypatch):
+        """Items without a change signal are always crawled, the disabled index crawls everything"""
+        index = SeenIndex.get_instance("ks")
+        assert content_fingerprint(None) is None
+        assert index.should_crawl("v1", None)
+        index.mark_crawled("v1")
+        assert index.should_crawl("v1", None)
+
+        monkeypatch.setattr(config, "ENABLE_INCREMENTAL_CRAWL", False)
+        disabled = SeenIndex.get_instance("ks")
+        disabled.mark_crawled("v2")
+        assert disabled.should_crawl("v2", content_fingerprint(1))
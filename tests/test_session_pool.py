@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_session_pool.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the multi-account session pool
+"""
+
+import asyncio
+
+import pytest
+from tenacity import retry, stop_after_attempt
+
+import config
+from media_platform.xhs.exception import CaptchaError, DataFetchError, IPBlockError
+from tools.session_pool import CrawlSession, SessionPool
+
+
+class _FakeClient:
+    def __init__(self, name: str):
+        self.name = name
+        self.headers = {"account": name}
+        self.calls = []
+        self.fail_with = None
+
+    @retry(stop=stop_after_attempt(2))
+    async def get_note_by_id(self, note_id: str):
+        self.calls.append(note_id)
+        await asyncio.sleep(0.01)
+        if self.fail_with:
+            raise self.fail_with
+        return {"note_id": note_id, "account": self.name}
+
+    async def update_cookies(self, browser_context):
+        self.calls.append("update_cookies")
+
+
+def _pool(*names):
+    pool = SessionPool("test", quarantine_on=(IPBlockError, CaptchaError))
+    for session_id, name in enumerate(names):
+        pool.add(CrawlSession(session_id, _FakeClient(name)))
+    return pool
+
+
+class TestSessionPool:
+    """Test cases for SessionPool / SessionPoolClient"""
+
+    @pytest.mark.asyncio
+    async def test_calls_spread_over_sessions(self):
+        """Concurrent calls go to the session with the fewest calls in flight"""
+        pool = _pool("a", "b", "c")
+        client = pool.client()
+        results = await asyncio.gather(*[client.get_note_by_id(str(i)) for i in range(6)])
+
+        assert sorted(r["account"] for r in results) == ["a", "a", "b", "b", "c", "c"]
+        assert [s["requests"] for s in pool.stats()] == [2, 2, 2]
+
+    @pytest.mark.asyncio
+    async def test_blocked_session_is_quarantined(self, monkeypatch):
+        """An IP block (raised through the tenacity retry) quarantines the session at once"""
+        monkeypatch.setattr(config, "SESSION_POOL_QUARANTINE_SECONDS", 60)
+        pool = _pool("a", "b")
+        pool.sessions[0].client.fail_with = IPBlockError("blocked")
+        client = pool.client()
+
+        with pytest.raises(Exception):
+            await client.get_note_by_id("1")
+        assert not pool.sessions[0].healthy
+        assert "IPBlockError" in pool.sessions[0].last_error
+
+        assert [(await client.get_note_by_id(str(i)))["account"] for i in range(3)] == ["b", "b", "b"]
+
+    @pytest.mark.asyncio
+    async def test_consecutive_failures_quarantine(self, monkeypatch):
+        """Other errors quarantine a session after SESSION_POOL_MAX_FAILURES failures in a row"""
+        monkeypatch.setattr(config, "SESSION_POOL_MAX_FAILURES", 2)
+        monkeypatch.setattr(config, "SESSION_POOL_QUARANTINE_SECONDS", 60)
+        pool = _pool("a")
+        session = pool.sessions[0]
+        session.client.fail_with = DataFetchError("note deleted")
+        client = pool.client()
+
+        with pytest.raises(Exception):
+            await client.get_note_by_id("1")
+        session.client.fail_with = None
+        await client.get_note_by_id("2")
+        assert session.failures == 0 and session.healthy
+
+        session.client.fail_with = DataFetchError("note deleted")
+        for note_id in ("3", "4"):
+            with pytest.raises(Exception):
+                await client.get_note_by_id(note_id)
+        assert not session.healthy
+
+    @pytest.mark.asyncio
+    async def test_waits_for_quarantine_to_end(self, monkeypatch):
+        """When every session is quarantined, calls wait until the first one is released"""
+        monkeypatch.setattr(config, "SESSION_POOL_QUARANTINE_SECONDS", 0.05)
+        pool = _pool("a")
+        pool.sessions[0].last_error = "CaptchaError"
+        pool.quarantine(pool.sessions[0])
+
+        result = await asyncio.wait_for(pool.client().get_note_by_id("1"), timeout=2)
+        assert result["account"] == "a"
+
+    @pytest.mark.asyncio
+    async def test_primary_only_attributes(self):
+        """Plain attributes and cookie updates belong to the crawler's own session"""
+        pool = _pool("a", "b")
+        client = pool.client()
+        pool.sessions[0].in_flight = 5
+
+        assert client.headers == {"account": "a"}
+        await client.update_cookies(browser_context=None)
+        assert pool.sessions[0].client.calls == ["update_cookies"]
+        assert pool.sessions[1].client.calls == []
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_sub_comment_fanout.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the concurrent sub-comment fan-out
+"""
+
+import asyncio
+import functools
+
+import pytest
+
+import config
+from media_platform.xhs.client import XiaoHongShuClient
+from tools.sub_comment_fanout import SubCommentFanout
+
+
+def _page(prefix: str, size: int):
+    return [{"id": f"{prefix}-{i}"} for i in range(size)]
+
+
+async def _crawl_pages(pages, budget, delay: float = 0):
+    for page in pages:
+        if budget.exhausted:
+            break
+        budget.take(page)
+        await asyncio.sleep(delay)
+
+
+class TestSubCommentFanout:
+    """Test cases for SubCommentFanout"""
+
+    @pytest.mark.asyncio
+    async def test_caps_per_parent_and_per_note(self):
+        """Every thread stops at max_per_parent, all threads together at max_per_note"""
+        async with SubCommentFanout(max_per_note=12, max_per_parent=5, concurrency=1) as fanout:
+            for parent in ("a", "b", "c", "d"):
+                fanout.submit(functools.partial(_crawl_pages, [_page(parent, 3), _page(parent, 3)]))
+
+        assert len(fanout.results) == 12
+        assert [c["id"][0] for c in fanout.results] == list("aaaaabbbbbcc")
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        """No more than `concurrency` threads run at the same time"""
+        running = 0
+        peak = 0
+
+        async def crawl_thread(budget):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        async with SubCommentFanout(max_per_note=100, max_per_parent=10, concurrency=3) as fanout:
+            for _ in range(10):
+                fanout.submit(crawl_thread)
+
+        assert peak == 3
+
+    @pytest.mark.asyncio
+    async def test_failed_thread_is_raised(self):
+        """The first error of a reply thread cancels the other threads and is raised on exit"""
+        cancelled = []
+
+        async def broken(budget):
+            await asyncio.sleep(0.01)
+            raise RuntimeError("ip blocked")
+
+        async def slow(budget):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        with pytest.raises(RuntimeError, match="ip blocked"):
+            async with SubCommentFanout(max_per_note=10, max_per_parent=10, concurrency=2) as fanout:
+                fanout.submit(broken)
+                fanout.submit(slow)
+
+        assert cancelled == [True]
+
+    @pytest.mark.asyncio
+    async def test_submit_after_failure_raises(self):
+        """Pagination of the first-level comments stops at the next submit after a thread failed"""
+        async def broken(budget):
+            raise RuntimeError("captcha")
+
+        with pytest.raises(RuntimeError, match="captcha"):
+            async with SubCommentFanout(max_per_note=10, max_per_parent=10, concurrency=1) as fanout:
+                fanout.submit(broken)
+                await asyncio.sleep(0)
+                fanout.submit(functools.partial(_crawl_pages, [_page("late", 2)]))
+
+        assert fanout.results == []
+
+    @pytest.mark.asyncio
+    async def test_on_done_waits_for_earlier_threads(self):
+        """A callback runs once every thread submitted before it finished, callbacks keep their order"""
+        saved = []
+        release = asyncio.Event()
+
+        async def blocked(budget):
+            await release.wait()
+
+        async with SubCommentFanout(max_per_note=10, max_per_parent=10, concurrency=2) as fanout:
+            fanout.submit(blocked)
+            fanout.on_done(lambda: saved.append("page1"))
+            fanout.submit(functools.partial(_crawl_pages, [_page("b", 1)]))
+            fanout.on_done(lambda: saved.append("page2"))
+            await asyncio.sleep(0.01)
+            assert saved == []
+            release.set()
+
+        assert saved == ["page1", "page2"]
+
+    @pytest.mark.asyncio
+    async def test_xhs_parent_pages_not_blocked_by_replies(self, monkeypatch):
+        """First-level pages keep being fetched while the reply threads are still running"""
+        monkeypatch.setattr(config, "ENABLE_CRAWL_CHECKPOINT", False)
+        monkeypatch.setattr(config, "ENABLE_GET_SUB_COMMENTS", True)
+        events = []
+        pages = {
+            "": {"comments": [{"id": "c1", "note_id": "n1", "sub_comments": [{"id": "r0"}],
+                               "sub_comment_has_more": True, "sub_comment_cursor": "s1"}],
+                 "has_more": True, "cursor": "p2"},
+            "p2": {"comments": [{"id": "c2", "note_id": "n1"}], "has_more": False, "cursor": ""},
+        }
+
+        async def get_note_comments(note_id, xsec_token, cursor=""):
+            events.append(f"page:{cursor}")
+            return pages[cursor]
+
+        async def get_note_sub_comments(note_id, root_comment_id, xsec_token, num=10, cursor=""):
+            await asyncio.sleep(0.01)
+            events.append(f"sub:{cursor}")
+            return {"comments": _page("r", 10), "has_more": True, "cursor": "s2"}
+
+        client = XiaoHongShuClient(headers={}, playwright_page=None, cookie_dict={})
+        monkeypatch.setattr(client, "get_note_comments", get_note_comments)
+        monkeypatch.setattr(client, "get_note_sub_comments", get_note_sub_comments)
+        monkeypatch.setattr(config, "CRAWLER_MAX_SUB_COMMENTS_COUNT_PER_COMMENT", 15)
+
+        result = await client.get_note_all_comments("n1", "token", crawl_interval=0, max_count=10)
+
+        assert events[:2] == ["page:", "page:p2"]
+        assert [c["id"] for c in result[:2]] == ["c1", "c2"]
+        # 1 embedded reply + 10 + 4 trimmed from the second page
+        assert len(result) == 2 + 15
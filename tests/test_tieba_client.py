@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_tieba_client.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the async Tieba transport
+"""
+
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from tenacity import stop_after_attempt
+
+import config
+from media_platform.tieba.client import BaiduTieBaClient
+from tools.http_client import create_async_client
+from tools.rate_limiter import RateLimiterRegistry
+
+
+def _client_with_transport(handler) -> BaiduTieBaClient:
+    client = BaiduTieBaClient(headers={"User-Agent": "test-agent", "Cookie": "BDUSS=abc"})
+    client._http_client = create_async_client(transport=httpx.MockTransport(handler))
+    return client
+
+
+class TestBaiduTieBaClientTransport:
+    """Test cases for BaiduTieBaClient.request on the pooled httpx client"""
+
+    @pytest.mark.asyncio
+    async def test_get_sends_headers_and_follows_redirects(self):
+        """Client headers are sent and redirects are followed, like the former requests transport"""
+        seen = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append((request.url.path, request.headers.get("User-Agent")))
+            assert request.url.path != "/p/1" or request.headers.get("Cookie") == "BDUSS=abc"
+            if request.url.path == "/p/1":
+                return httpx.Response(302, headers={"Location": "https://tieba.baidu.com/p/2"})
+            return httpx.Response(200, text="<html>note</html>")
+
+        client = _client_with_transport(handler)
+        text = await client.get("/p/1", params={"pn": 1}, return_ori_content=True)
+        assert text == "<html>note</html>"
+        assert seen == [("/p/1", "test-agent"), ("/p/2", "test-agent")]
+        await client.close_http_client()
+
+    @pytest.mark.asyncio
+    async def test_pooled_client_is_shared(self):
+        """Concurrent requests go through one pooled client"""
+        client = _client_with_transport(lambda request: httpx.Response(200, json={"no": 0}))
+        pooled = client.get_http_client()
+        assert await client.request("GET", "https://tieba.baidu.com/a") == {"no": 0}
+        assert await client.request("GET", "https://tieba.baidu.com/b") == {"no": 0}
+        assert client.get_http_client() is pooled
+        await client.close_http_client()
+        assert pooled.is_closed
+
+    @pytest.mark.asyncio
+    async def test_blocked_response_raises(self):
+        """An empty or 'blocked' body is reported as a blocked account"""
+        client = _client_with_transport(lambda request: httpx.Response(200, text="blocked"))
+        with pytest.raises(Exception, match="account blocked"):
+            await client.request.retry_with(stop=stop_after_attempt(1), reraise=True)(client, "GET", "https://tieba.baidu.com/a")
+        await client.close_http_client()
+
+    @pytest.mark.asyncio
+    async def test_page_navigation_is_rate_limited(self, monkeypatch):
+        """Pages opened in the browser take a limiter slot and report their status like HTTP requests"""
+        monkeypatch.setattr(config, "ENABLE_ADAPTIVE_RATE_LIMIT", True)
+        monkeypatch.setattr(config, "RATE_LIMIT_STATE_FILE", "")
+        monkeypatch.setattr(RateLimiterRegistry, "_limiters", {})
+        monkeypatch.setattr(RateLimiterRegistry, "_saved_state", None)
+        visited = []
+
+        class FakePage:
+            async def goto(self, url, wait_until=None):
+                visited.append(url)
+                return SimpleNamespace(status=200)
+
+        client = BaiduTieBaClient(playwright_page=FakePage())
+        await client._goto("https://tieba.baidu.com/p/1")
+        await client._goto("https://tieba.baidu.com/p/2")
+
+        assert visited == ["https://tieba.baidu.com/p/1", "https://tieba.baidu.com/p/2"]
+        snapshot = RateLimiterRegistry.snapshot()
+        assert [key.split(":")[0] for key in snapshot] == ["tieba"]
+        assert sum(state["requests"] for state in snapshot.values()) == 2
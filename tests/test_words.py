@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_words.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the incremental word frequency counter
+"""
+
+import json
+import pathlib
+from collections import Counter
+
+import pytest
+import pytest_asyncio
+from matplotlib import font_manager
+
+import config
+from tools import words
+from tools.async_file_writer import AsyncFileWriter
+from tools.words import AsyncWordCloudGenerator, WordFrequencyCounter, count_words, init_tokenizer
+
+
+
+@pytest.fixture
+def word_config(tmp_path, monkeypatch):
+    """Small stop word list, tokenization in a thread and a temporary working directory"""
+    stop_words_file = tmp_path / "stop_words.txt"
+    stop_words_file.write_text("的\n了\n，\n。", encoding="utf-8")
+    monkeypatch.setattr(config, "STOP_WORDS_FILE", str(stop_words_file))
+    monkeypatch.setattr(config, "WORDCLOUD_WORKERS", 0)
+    monkeypatch.setattr(config, "WORDCLOUD_BATCH_SIZE", 2)
+    monkeypatch.setattr(words, "_tokenizer_ready", False)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest_asyncio.fixture
+async def cleanup_counters():
+    yield
+    await WordFrequencyCounter.close_all()
+    await AsyncFileWriter.close_all()
+    AsyncFileWriter._path_locks.clear()
+
+
+class TestWordFrequencyCounter:
+    """Test cases for WordFrequencyCounter"""
+
+    def test_batch_counts_merge(self, word_config):
+        """Counts of several batches add up to the counts of all texts"""
+        init_tokenizer(config.STOP_WORDS_FILE, {})
+        texts = ["咖啡很好喝", "咖啡的味道", "环境很好，咖啡一般。"]
+        merged = count_words(texts[:1]) + count_words(texts[1:])
+        assert merged == count_words(texts)
+        assert merged["咖啡"] == 3
+        assert "的" not in merged and "，" not in merged
+
+    @pytest.mark.asyncio
+    async def test_incremental_add(self, word_config, cleanup_counters):
+        """Full batches are counted while texts are added, flush counts the rest"""
+        counter = WordFrequencyCounter.get_instance("test", "search")
+        assert counter is WordFrequencyCounter.get_instance("test", "search")
+        for text in ["咖啡很好喝", "", "咖啡的味道", "咖啡一般"]:
+            await counter.add(text)
+        assert counter.text_count == 2
+        await counter.flush()
+        assert counter.text_count == 3
+        assert counter.counter["咖啡"] == 3
+
+    @pytest.mark.asyncio
+    async def test_process_pool(self, word_config, cleanup_counters, monkeypatch):
+        """Batches tokenized in worker processes give the same counts"""
+        monkeypatch.setattr(config, "WORDCLOUD_WORKERS", 1)
+        counter = WordFrequencyCounter.get_instance("test", "pool")
+        texts = ["咖啡很好喝", "咖啡的味道", "环境很好"]
+        await counter.add_many(texts)
+        await counter.flush()
+        assert counter.counter == count_words_in_process(texts)
+
+
+def count_words_in_process(texts):
+    init_tokenizer(config.STOP_WORDS_FILE, {})
+    return count_words(texts)
+
+
+class TestWordCloudFromComments:
+    """Test cases for the word cloud rendered from the running counter"""
+
+    @pytest.fixture
+    def writer_config(self, word_config, monkeypatch):
+        monkeypatch.setattr(config, "ENABLE_GET_WORDCLOUD", True)
+        monkeypatch.setattr(config, "ENABLE_GET_COMMENTS", True)
+        monkeypatch.setattr(config, "JSON_STORE_FORMAT", "jsonl")
+        rendered = []
+        monkeypatch.setattr(AsyncWordCloudGenerator, "_render_word_cloud",
+                            lambda self, freq, prefix: rendered.append(freq))
+        return rendered
+
+    @pytest.mark.asyncio
+    async def test_counted_while_storing(self, writer_config, cleanup_counters):
+        """Comments are counted as they are stored and the cloud uses the running counter"""
+        writer = AsyncFileWriter(platform="test", crawler_type="search")
+        for i, text in enumerate(["咖啡很好喝", "咖啡的味道", "环境很好"]):
+            await writer.write_single_item_to_json({"comment_id": str(i), "content": text}, "comments")
+        counter = WordFrequencyCounter.get_instance("test", "search")
+        assert counter.item_count == 3
+
+        await writer.generate_wordcloud_from_comments()
+        freq_files = list(pathlib.Path("data/test/words").glob("*_word_freq.json"))
+        assert len(freq_files) == 1
+        word_freq = json.loads(freq_files[0].read_text(encoding="utf-8"))
+        assert word_freq["咖啡"] == 2
+        assert writer_config and writer_config[0]["咖啡"] == 2
+
+    @pytest.mark.asyncio
+    async def test_recount_file_from_earlier_run(self, writer_config, cleanup_counters):
+        """Comments stored by an earlier run are not in the counter, the file is counted again"""
+        writer = AsyncFileWriter(platform="test", crawler_type="search")
+        await writer.write_single_item_to_json({"comment_id": "1", "content": "咖啡很好喝"}, "comments")
+        await WordFrequencyCounter.close_all()
+        await writer.write_single_item_to_json({"comment_id": "2", "content": "咖啡的味道"}, "comments")
+
+        await writer.generate_wordcloud_from_comments()
+        freq_file = next(pathlib.Path("data/test/words").glob("*_word_freq.json"))
+        assert json.loads(freq_file.read_text(encoding="utf-8"))["咖啡"] == 2
+
+    @pytest.mark.asyncio
+    async def test_generate_word_frequency_and_cloud(self, writer_config):
+        """The list based entry point still writes the frequencies and renders the top words"""
+        generator = AsyncWordCloudGenerator()
+        await generator.generate_word_frequency_and_cloud([{"content": "咖啡很好喝"}, {"content": "咖啡"}], "cloud")
+        with open("cloud_word_freq.json", encoding="utf-8") as f:
+            assert json.load(f)["咖啡"] == 2
+        assert writer_config[0] == dict(Counter(writer_config[0]).most_common(20))
+
+
+@pytest.mark.asyncio
+async def test_render_word_cloud_in_worker_thread(word_config, monkeypatch):
+    """The cloud image is rendered off the event loop without pyplot"""
+    monkeypatch.setattr(config, "FONT_PATH", font_manager.findfont(font_manager.FontProperties()))
+    generator = AsyncWordCloudGenerator()
+    await generator.generate_word_cloud(Counter({"coffee": 3, "tea": 1}), "cloud")
+    assert pathlib.Path("cloud_word_cloud.png").stat().st_size > 0
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_write_pipeline.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the write-behind store pipeline
+"""
+
+import asyncio
+from typing import Dict, List
+
+import pytest
+
+import config
+from base.base_crawler import AbstractStore
+from store.write_pipeline import StoreWritePipeline
+
+
+class SlowMemoryStore(AbstractStore):
+    """In-memory store whose writes take some time, like a disk or database"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.contents: List[Dict] = []
+        self.comments: List[Dict] = []
+
+    async def store_content(self, content_item: Dict):
+        await asyncio.sleep(self.delay)
+        self.contents.append(content_item)
+
+    async def store_comment(self, comment_item: Dict):
+        await asyncio.sleep(self.delay)
+        if comment_item.get("fail"):
+            raise RuntimeError("write failed")
+        self.comments.append(comment_item)
+
+    async def store_creator(self, creator: Dict):
+        pass
+
+
+class TestStoreWritePipeline:
+    """Test cases for StoreWritePipeline"""
+
+    @pytest.fixture(autouse=True)
+    def pipeline_config(self, monkeypatch):
+        """Small batches and queue, clear singleton state around each test"""
+        monkeypatch.setattr(config, "ENABLE_STORE_PIPELINE", True)
+        monkeypatch.setattr(config, "STORE_PIPELINE_BATCH_SIZE", 10)
+        monkeypatch.setattr(config, "STORE_PIPELINE_FLUSH_INTERVAL_SEC", 0.05)
+        monkeypatch.setattr(config, "STORE_PIPELINE_QUEUE_MAX_SIZE", 5)
+        StoreWritePipeline._instances.clear()
+        yield
+        StoreWritePipeline._instances.clear()
+
+    def test_singleton_per_platform(self):
+        """The same pipeline and store instance is reused for a platform"""
+        created = []
+
+        def factory():
+            created.append(SlowMemoryStore())
+            return created[-1]
+
+        first = StoreWritePipeline.get_instance("test", factory)
+        second = StoreWritePipeline.get_instance("test", factory)
+        assert first is second
+        assert len(created) == 1
+
+    @pytest.mark.asyncio
+    async def test_items_written_in_order_after_flush(self):
+        """All submitted items are written, in order, once flush_all returns"""
+        store = SlowMemoryStore()
+        pipeline = StoreWritePipeline.get_instance("test", lambda: store)
+        for i in range(25):
+            await pipeline.submit("store_content", {"note_id": i})
+        await pipeline.submit("store_comment", {"comment_id": "c1"})
+
+        await StoreWritePipeline.flush_all()
+
+        assert [item["note_id"] for item in store.contents] == list(range(25))
+        assert store.comments == [{"comment_id": "c1"}]
+        assert pipeline.written_count == 26
+        assert StoreWritePipeline._instances == {}
+
+    @pytest.mark.asyncio
+    async def test_backpressure_when_queue_full(self):
+        """submit waits once the queue is full instead of growing without bound"""
+        store = SlowMemoryStore(delay=0.05)
+        pipeline = StoreWritePipeline.get_instance("test", lambda: store)
+        for i in range(20):
+            await pipeline.submit("store_content", {"note_id": i})
+            assert pipeline.queue.qsize() <= config.STORE_PIPELINE_QUEUE_MAX_SIZE
+        await pipeline.close()
+        assert len(store.contents) == 20
+
+    @pytest.mark.asyncio
+    async def test_failed_item_does_not_stop_flusher(self):
+        """A failing write is logged and later items are still written"""
+        store = SlowMemoryStore()
+        pipeline = StoreWritePipeline.get_instance("test", lambda: store)
+        await pipeline.submit("store_comment", {"comment_id": "c1", "fail": True})
+        await pipeline.submit("store_comment", {"comment_id": "c2"})
+        await pipeline.close()
+        assert store.comments == [{"comment_id": "c2"}]
+
+    @pytest.mark.asyncio
+    async def test_disabled_pipeline_writes_inline(self, monkeypatch):
+        """With ENABLE_STORE_PIPELINE = False items are written before submit returns"""
+        monkeypatch.setattr(config, "ENABLE_STORE_PIPELINE", False)
+        store = SlowMemoryStore()
+        pipeline = StoreWritePipeline.get_instance("test", lambda: store)
+        await pipeline.submit("store_content", {"note_id": 1})
+        assert store.contents == [{"note_id": 1}]
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_xhs_playwright_sign.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the batching XHS signer (fake page, no browser)
+"""
+
+import asyncio
+
+import pytest
+
+from media_platform.xhs.playwright_sign import PlaywrightSigner
+
+
+class FakePage:
+    """Answers the batch sign script like the XHS page would"""
+
+    def __init__(self, b1="b1-value"):
+        self.b1 = b1
+        self.calls = []
+
+    async def evaluate(self, expression, arg=None):
+        items, read_b1 = arg
+        self.calls.append((len(items), read_b1))
+        await asyncio.sleep(0.01)
+        return {"b1": self.b1 if read_b1 else None, "x3": [f"x3:{md5}" for _, md5 in items]}
+
+
+class TestPlaywrightSigner:
+    """Test cases for PlaywrightSigner"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_evaluate_calls(self):
+        """Requests queued before the signer runs are signed in one evaluate"""
+        page = FakePage()
+        signer = PlaywrightSigner(page, max_batch_size=16)
+        results = await asyncio.gather(*[
+            signer.sign("/api/sns/web/v1/search/notes", {"page": i}, a1="a1") for i in range(10)
+        ])
+
+        assert page.calls == [(10, True)]
+        assert len({r["x-s"] for r in results}) == 10
+        assert all(r["x-s"].startswith("XYS_") for r in results)
+        snapshot = signer.metrics.snapshot()
+        assert snapshot["count"] == 10 and snapshot["batches"] == 1
+
+    @pytest.mark.asyncio
+    async def test_b1_is_cached_until_invalidated(self):
+        """localStorage b1 is read once and again after invalidate_b1()"""
+        page = FakePage()
+        signer = PlaywrightSigner(page)
+        await signer.sign("/api/a", {"x": 1})
+        await signer.sign("/api/b", {"x": 2})
+        signer.invalidate_b1()
+        await signer.sign("/api/c", {"x": 3})
+
+        assert [read_b1 for _, read_b1 in page.calls] == [True, False, True]
+
+    @pytest.mark.asyncio
+    async def test_batch_size_is_capped(self):
+        """A batch never exceeds max_batch_size"""
+        page = FakePage()
+        signer = PlaywrightSigner(page, max_batch_size=3)
+        await asyncio.gather(*[signer.sign("/api/a", {"i": i}) for i in range(7)])
+
+        assert max(size for size, _ in page.calls) <= 3
+        assert sum(size for size, _ in page.calls) == 7
@@ -21,25 +21,125 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict, List
+from typing import Any, Dict, Iterator, List, Optional
 import aiofiles
 import config
+from tools.data_file_index import DataFileIndex, get_file_index, index_path
 from tools.utils import utils
-from tools.words import AsyncWordCloudGenerator
+from tools.words import AsyncWordCloudGenerator, WordFrequencyCounter, comment_text
+
+
+def iter_json_file_items(file_path: str) -> Iterator[Dict]:
+    """
+    Iterate over the records of a data file written by AsyncFileWriter
+    .jsonl files are streamed line by line, .json files are parsed as a whole (legacy array format)
+    Args:
+        file_path: path of the .jsonl or .json file
+
+    Returns:
+
+    """
+    if file_path.endswith(".jsonl"):
+        with open(file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line may be truncated if the process was killed mid-write
+                    continue
+        return
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        content = f.read()
+    if not content:
+        return
+    data = json.loads(content)
+    if isinstance(data, list):
+        yield from data
+    else:
+        yield data
+
+
+def take_comment_texts(records: Iterator[Dict], count: int) -> Optional[List[str]]:
+    """Texts of the next `count` comments, None when the records are exhausted"""
+    texts = []
+    taken = 0
+    for comment in records:
+        taken += 1
+        if isinstance(comment, dict) and comment_text(comment):
+            texts.append(comment_text(comment))
+        if taken >= count:
+            break
+    return texts if taken else None
+
 
 class AsyncFileWriter:
+    # Open append-only handles shared by every writer instance, keyed by file path
+    # (the path already encodes platform, crawler type, item type and date)
+    _jsonl_handles: Dict[str, Any] = {}
+    _path_locks: Dict[str, asyncio.Lock] = {}
+    # Sidecar indexes of the .jsonl / .csv files being appended to, keyed by file path
+    _indexes: Dict[str, DataFileIndex] = {}
+    # Records appended since the last index refresh, and the refresh running in a worker thread, keyed by file path
+    _unindexed_rows: Dict[str, int] = {}
+    _index_tasks: Dict[str, asyncio.Task] = {}
+
     def __init__(self, platform: str, crawler_type: str):
         self.lock = asyncio.Lock()
         self.platform = platform
         self.crawler_type = crawler_type
         self.wordcloud_generator = AsyncWordCloudGenerator() if config.ENABLE_GET_WORDCLOUD else None
 
-    def _get_file_path(self, file_type: str, item_type: str) -> str:
+    def _get_file_path(self, file_type: str, item_type: str, extension: Optional[str] = None) -> str:
         base_path = f"data/{self.platform}/{file_type}"
         pathlib.Path(base_path).mkdir(parents=True, exist_ok=True)
-        file_name = f"{self.crawler_type}_{item_type}_{utils.get_current_date()}.{file_type}"
+        file_name = f"{self.crawler_type}_{item_type}_{utils.get_current_date()}.{extension or file_type}"
         return f"{base_path}/{file_name}"
 
+    @classmethod
+    def _get_path_lock(cls, file_path: str) -> asyncio.Lock:
+        lock = cls._path_locks.get(file_path)
+        if lock is None:
+            lock = cls._path_locks[file_path] = asyncio.Lock()
+        return lock
+
+    @classmethod
+    def _update_index(cls, file_path: str):
+        """
+        Count the record just appended to file_path. The index catches up with the new bytes in a worker thread
+        after the first record and then every DATA_INDEX_STRIDE records, readers refresh the rest themselves
+        """
+        rows = cls._unindexed_rows[file_path] = cls._unindexed_rows.get(file_path, 0) + 1
+        task = cls._index_tasks.get(file_path)
+        if task is not None and (not task.done() or rows < config.DATA_INDEX_STRIDE):
+            return
+        cls._unindexed_rows[file_path] = 0
+        cls._index_tasks[file_path] = asyncio.create_task(asyncio.to_thread(cls._refresh_index, file_path))
+
+    @classmethod
+    def _refresh_index(cls, file_path: str):
+        """Scan the bytes appended since the last refresh and save the sidecar, runs in a worker thread"""
+        try:
+            index = cls._indexes.get(file_path)
+            if index is None:
+                index = cls._indexes[file_path] = DataFileIndex.load(file_path)
+            checkpoints = len(index.checkpoints)
+            index.refresh()
+            if len(index.checkpoints) != checkpoints:
+                index.save()
+        except OSError as e:
+            utils.logger.error(f"[AsyncFileWriter._refresh_index] Error indexing {file_path}: {e}")
+
+    @classmethod
+    async def _wait_index_tasks(cls):
+        tasks = list(cls._index_tasks.values())
+        cls._index_tasks.clear()
+        cls._unindexed_rows.clear()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
     async def write_to_csv(self, item: Dict, item_type: str):
         file_path = self._get_file_path('csv', item_type)
         async with self.lock:
@@ -49,10 +149,19 @@ class AsyncFileWriter:
                 if not file_exists or await f.tell() == 0:
                     await writer.writeheader()
                 await writer.writerow(item)
+            self._update_index(file_path)
 
     async def write_single_item_to_json(self, item: Dict, item_type: str):
+        if item_type == "comments" and self.wordcloud_generator:
+            # Word frequencies are counted while comments are stored, the cloud does not re-read the file
+            await WordFrequencyCounter.get_instance(self.platform, self.crawler_type).add_comment(item)
+
+        if config.JSON_STORE_FORMAT == "jsonl":
+            await self.append_item_to_jsonl(item, item_type)
+            return
+
         file_path = self._get_file_path('json', item_type)
-        async with self.lock:
+        async with self._get_path_lock(file_path):
             existing_data = []
             if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
                 async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
@@ -70,6 +179,121 @@ class AsyncFileWriter:
             async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
                 await f.write(json.dumps(existing_data, ensure_ascii=False, indent=4))
 
+    async def append_item_to_jsonl(self, item: Dict, item_type: str):
+        """
+        Append one record as a single JSON line, the cost does not depend on how much data is already stored
+        Args:
+            item: record to store
+            item_type: contents | comments | creators ...
+
+        Returns:
+
+        """
+        file_path = self._get_file_path('json', item_type, extension='jsonl')
+        line = json.dumps(item, ensure_ascii=False) + "\n"
+        async with self._get_path_lock(file_path):
+            f = self._jsonl_handles.get(file_path)
+            if f is None:
+                f = await aiofiles.open(file_path, 'a', encoding='utf-8')
+                self._jsonl_handles[file_path] = f
+            await f.write(line)
+            await f.flush()
+            self._update_index(file_path)
+
+    @classmethod
+    async def close_all(cls, finalize: bool = False):
+        """
+        Close all open jsonl handles
+        Should be called at the end of crawler execution
+        Args:
+            finalize: also convert every closed .jsonl file into a .json array file
+
+        Returns:
+
+        """
+        await cls._wait_index_tasks()
+        for file_path in list(cls._jsonl_handles.keys()):
+            async with cls._get_path_lock(file_path):
+                f = cls._jsonl_handles.pop(file_path, None)
+                if f is None:
+                    continue
+                try:
+                    await f.close()
+                except Exception as e:
+                    utils.logger.error(f"[AsyncFileWriter.close_all] Error closing {file_path}: {e}")
+                    continue
+                index = cls._indexes.pop(file_path, None)
+                if finalize:
+                    try:
+                        json_path = await asyncio.to_thread(cls.finalize_jsonl, file_path)
+                        utils.logger.info(f"[AsyncFileWriter.close_all] Finalized {file_path} -> {json_path}")
+                    except Exception as e:
+                        utils.logger.error(f"[AsyncFileWriter.close_all] Error finalizing {file_path}: {e}")
+                elif index is not None:
+                    await asyncio.to_thread(cls._save_index, index)
+        # .csv files are not kept open, only their indexes are left
+        for index in list(cls._indexes.values()):
+            await asyncio.to_thread(cls._save_index, index)
+        cls._indexes.clear()
+
+    @staticmethod
+    def _save_index(index: DataFileIndex):
+        try:
+            index.refresh()
+            index.save()
+        except OSError as e:
+            utils.logger.error(f"[AsyncFileWriter.close_all] Error saving index of {index.file_path}: {e}")
+
+    @staticmethod
+    def finalize_jsonl(jsonl_path: str) -> str:
+        """
+        Convert a .jsonl file into a .json array file next to it and remove the .jsonl file
+        Records of an already existing .json file (e.g. an earlier run on the same day) are kept in front
+        Args:
+            jsonl_path: path of the .jsonl file
+
+        Returns:
+            path of the .json file
+
+        """
+        json_path = os.path.splitext(jsonl_path)[0] + ".json"
+        tmp_path = json_path + ".tmp"
+        sources = [json_path, jsonl_path] if os.path.exists(json_path) and os.path.getsize(json_path) > 0 else [jsonl_path]
+        # The record offsets are known while writing, the .json file gets its index without being parsed again
+        index = DataFileIndex(json_path)
+        written = 1
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            out.write("[")
+            first = True
+            for source in sources:
+                for item in iter_json_file_items(source):
+                    separator = "\n" if first else ",\n"
+                    # Same layout as json.dumps(list, indent=4)
+                    text = "    " + json.dumps(item, ensure_ascii=False, indent=4).replace("\n", "\n    ")
+                    out.write(separator)
+                    out.write(text)
+                    index._add_record(written + len(separator))
+                    if not index.columns and isinstance(item, dict):
+                        index.columns = list(item)
+                    written += len(separator) + len(text.encode("utf-8"))
+                    first = False
+            out.write("\n]" if not first else "]")
+        os.replace(tmp_path, json_path)
+        os.remove(jsonl_path)
+        stat = os.stat(json_path)
+        index.size, index.mtime = stat.st_size, stat.st_mtime
+        index.save()
+        if os.path.exists(index_path(jsonl_path)):
+            os.remove(index_path(jsonl_path))
+        return json_path
+
+    def _get_comments_data_file(self) -> Optional[str]:
+        for extension in ("jsonl", "json"):
+            file_path = self._get_file_path('json', 'comments', extension=extension)
+            if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
+                return file_path
+        return None
+
     async def generate_wordcloud_from_comments(self):
         """
         Generate wordcloud from comments data
@@ -82,33 +306,25 @@ class AsyncFileWriter:
             return
 
         try:
-            # Read comments from JSON file
-            comments_file_path = self._get_file_path('json', 'comments')
-            if not os.path.exists(comments_file_path) or os.path.getsize(comments_file_path) == 0:
-                utils.logger.info(f"[AsyncFileWriter.generate_wordcloud_from_comments] No comments file found at {comments_file_path}")
+            comments_file_path = self._get_comments_data_file()
+            if not comments_file_path:
+                utils.logger.info(f"[AsyncFileWriter.generate_wordcloud_from_comments] No comments file found at {self._get_file_path('json', 'comments', extension='jsonl')}")
                 return
 
-            async with aiofiles.open(comments_file_path, 'r', encoding='utf-8') as f:
-                content = await f.read()
-                if not content:
-                    utils.logger.info(f"[AsyncFileWriter.generate_wordcloud_from_comments] Comments file is empty")
-                    return
-
-                comments_data = json.loads(content)
-                if not isinstance(comments_data, list):
-                    comments_data = [comments_data]
-
-            # Filter comments data to only include 'content' field
-            # Handle different comment data structures across platforms
-            filtered_data = []
-            for comment in comments_data:
-                if isinstance(comment, dict):
-                    # Try different possible content field names
-                    content_text = comment.get('content') or comment.get('comment_text') or comment.get('text') or ''
-                    if content_text:
-                        filtered_data.append({'content': content_text})
-
-            if not filtered_data:
+            word_counter = WordFrequencyCounter.get_instance(self.platform, self.crawler_type)
+            await word_counter.flush()
+            index = await asyncio.to_thread(get_file_index, comments_file_path)
+            if word_counter.item_count != index.rows:
+                # The file also holds comments of an earlier run today, count the whole file again
+                utils.logger.info(f"[AsyncFileWriter.generate_wordcloud_from_comments] Counting words of {index.rows} comments in {comments_file_path}")
+                word_counter = WordFrequencyCounter()
+                records = index.iter_records()
+                # The file is read and parsed in a worker thread, one batch of texts at a time
+                while (texts := await asyncio.to_thread(take_comment_texts, records, word_counter.batch_size)) is not None:
+                    await word_counter.add_many(texts)
+                await word_counter.flush()
+
+            if not word_counter.counter:
                 utils.logger.info(f"[AsyncFileWriter.generate_wordcloud_from_comments] No valid comment content found")
                 return
 
@@ -117,8 +333,8 @@ class AsyncFileWriter:
             pathlib.Path(words_base_path).mkdir(parents=True, exist_ok=True)
             words_file_prefix = f"{words_base_path}/{self.crawler_type}_comments_{utils.get_current_date()}"
 
-            utils.logger.info(f"[AsyncFileWriter.generate_wordcloud_from_comments] Generating wordcloud from {len(filtered_data)} comments")
-            await self.wordcloud_generator.generate_word_frequency_and_cloud(filtered_data, words_file_prefix)
+            utils.logger.info(f"[AsyncFileWriter.generate_wordcloud_from_comments] Generating wordcloud from {word_counter.text_count} comments")
+            await self.wordcloud_generator.generate_from_counter(word_counter.counter, words_file_prefix)
             utils.logger.info(f"[AsyncFileWriter.generate_wordcloud_from_comments] Wordcloud generated successfully at {words_file_prefix}")
 
         except Exception as e:
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/crawl_checkpoint.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : Crawl checkpoints: per-keyword pages, per-note comment cursors, per-creator cursors and a pending frontier
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import config
+from tools import utils
+
+
+class CursorState(NamedTuple):
+    cursor: str = ""
+    count: int = 0
+    done: bool = False
+
+
+class CrawlCheckpoint:
+    """
+    Crawl progress of one platform and crawler type, e.g. "xhs:search", stored in a small SQLite database
+
+    - cursors: how far a keyword (page), a note's comments or a creator's notes were crawled, plus a done flag
+    - frontier: items that were discovered but not fully crawled yet, re-queued by a resumed run
+
+    A run started without --resume clears the progress of its scope first (see main.py). Writes are single-row
+    SQLite statements and are done inline.
+    """
+
+    _instances: Dict[Tuple[str, str], "CrawlCheckpoint"] = {}
+
+    def __init__(self, db_path: str, scope: str):
+        self.db_path = db_path
+        self.scope = scope
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS crawl_cursor ("
+            "scope TEXT NOT NULL, kind TEXT NOT NULL, item_key TEXT NOT NULL, cursor TEXT NOT NULL, "
+            "item_count INTEGER NOT NULL, done INTEGER NOT NULL, updated_ts INTEGER NOT NULL, "
+            "PRIMARY KEY (scope, kind, item_key))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS crawl_frontier ("
+            "scope TEXT NOT NULL, item_key TEXT NOT NULL, payload TEXT NOT NULL, added_ts INTEGER NOT NULL, "
+            "PRIMARY KEY (scope, item_key))"
+        )
+        self._conn.commit()
+
+    @classmethod
+    def get_instance(cls, scope: Optional[str] = None, db_path: Optional[str] = None) -> "CrawlCheckpoint":
+        """
+        Get or create the checkpoint of a scope
+        Args:
+            scope: "<platform>:<crawler type>", default the current config.PLATFORM and config.CRAWLER_TYPE
+            db_path: default CRAWL_CHECKPOINT_DB
+
+        Returns:
+            the checkpoint, a no-op checkpoint when ENABLE_CRAWL_CHECKPOINT is off
+        """
+        if not config.ENABLE_CRAWL_CHECKPOINT:
+            return _DISABLED_CHECKPOINT
+        scope = scope or f"{config.PLATFORM}:{config.CRAWLER_TYPE}"
+        db_path = db_path or config.CRAWL_CHECKPOINT_DB
+        key = (db_path, scope)
+        if key not in cls._instances:
+            cls._instances[key] = cls(db_path, scope)
+        return cls._instances[key]
+
+    @classmethod
+    def close_all(cls):
+        for checkpoint in cls._instances.values():
+            checkpoint.close()
+        cls._instances.clear()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def reset(self):
+        """Forget the progress of this scope, used when a crawl starts without --resume"""
+        with self._lock:
+            self._conn.execute("DELETE FROM crawl_cursor WHERE scope = ?", (self.scope,))
+            self._conn.execute("DELETE FROM crawl_frontier WHERE scope = ?", (self.scope,))
+            self._conn.commit()
+        utils.logger.info(f"[CrawlCheckpoint.reset] Cleared crawl progress of {self.scope}")
+
+    def get_cursor(self, kind: str, item_key: str) -> CursorState:
+        """
+        Args:
+            kind: "keyword", "comments" or "creator"
+            item_key: keyword, note id or creator id
+
+        Returns:
+            saved cursor, an empty CursorState if nothing was saved
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT cursor, item_count, done FROM crawl_cursor WHERE scope = ? AND kind = ? AND item_key = ?",
+                (self.scope, kind, str(item_key)),
+            ).fetchone()
+        if not row:
+            return CursorState()
+        return CursorState(row[0], row[1], bool(row[2]))
+
+    def save_cursor(self, kind: str, item_key: str, cursor, count: int = 0, done: bool = False):
+        """
+        Args:
+            kind: "keyword", "comments" or "creator"
+            item_key: keyword, note id or creator id
+            cursor: page number or API cursor of the next request
+            count: number of items crawled so far, keeps max count limits across restarts
+            done: nothing left to crawl for this item
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO crawl_cursor (scope, kind, item_key, cursor, item_count, done, updated_ts) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (scope, kind, item_key) DO UPDATE SET "
+                "cursor = excluded.cursor, item_count = excluded.item_count, done = excluded.done, "
+                "updated_ts = excluded.updated_ts",
+                (self.scope, kind, str(item_key), str(cursor), count, int(done), int(time.time())),
+            )
+            self._conn.commit()
+
+    def add_pending(self, item_key: str, payload: Dict):
+        """Record a discovered item whose crawl is not finished yet"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO crawl_frontier (scope, item_key, payload, added_ts) VALUES (?, ?, ?, ?)",
+                (self.scope, str(item_key), json.dumps(payload, ensure_ascii=False), int(time.time())),
+            )
+            self._conn.commit()
+
+    def finish(self, item_key: str):
+        """Remove a fully crawled item from the frontier"""
+        with self._lock:
+            self._conn.execute("DELETE FROM crawl_frontier WHERE scope = ? AND item_key = ?", (self.scope, str(item_key)))
+            self._conn.commit()
+
+    def pending(self) -> List[Dict]:
+        """Payloads of the unfinished items, in discovery order"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM crawl_frontier WHERE scope = ? ORDER BY added_ts, rowid", (self.scope,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+
+class _DisabledCheckpoint(CrawlCheckpoint):
+    """Used when ENABLE_CRAWL_CHECKPOINT is off: nothing is recorded, every crawl starts from the beginning"""
+
+    def __init__(self):
+        self.scope = ""
+
+    def close(self):
+        pass
+
+    def reset(self):
+        pass
+
+    def get_cursor(self, kind: str, item_key: str) -> CursorState:
+        return CursorState()
+
+    def save_cursor(self, kind: str, item_key: str, cursor, count: int = 0, done: bool = False):
+        pass
+
+    def add_pending(self, item_key: str, payload: Dict):
+        pass
+
+    def finish(self, item_key: str):
+        pass
+
+    def pending(self) -> List[Dict]:
+        return []
+
+
+_DISABLED_CHECKPOINT = _DisabledCheckpoint()
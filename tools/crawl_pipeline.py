@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/crawl_pipeline.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : Staged producer/consumer crawl scheduler, e.g. search pages -> details -> comments / media
+
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, List
+
+from tools import utils
+
+StageHandler = Callable[[Any], Awaitable[None]]
+
+
+class CrawlStage:
+    """One stage of a CrawlPipeline: a bounded queue consumed by a fixed number of workers"""
+
+    def __init__(self, name: str, handler: StageHandler, workers: int, queue_size: int):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(0, queue_size))
+        self.stats: Dict[str, int] = {"processed": 0, "failed": 0}
+
+
+class CrawlPipeline:
+    """
+    Runs the stages of a crawl concurrently so the network stays busy: while comments of the first notes are
+    crawled, the details of the next notes and the next search page are already being fetched.
+
+    Stages are added in flow order and may only feed later stages. Items are put together with the caller's
+    context (e.g. source_keyword_var), the handler runs in that context. A full queue blocks the producer,
+    so a fast search stage cannot run far ahead of the comment stage.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._stages: Dict[str, CrawlStage] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def add_stage(self, name: str, handler: StageHandler, workers: int = 1, queue_size: int = 0) -> "CrawlPipeline":
+        """
+        Args:
+            name: stage name used by put()
+            handler: coroutine function called with every item of the stage
+            workers: number of items processed concurrently
+            queue_size: queue bound, 0 for unbounded
+
+        Returns:
+            the pipeline, for chaining
+        """
+        if self._tasks:
+            raise RuntimeError(f"[CrawlPipeline.add_stage] pipeline {self.name} is already running")
+        self._stages[name] = CrawlStage(name, handler, workers, queue_size)
+        return self
+
+    async def put(self, stage_name: str, item: Any) -> bool:
+        """
+        Queue an item for a stage, waits while the stage queue is full
+        Items for stages that are not part of the pipeline (e.g. comments are disabled) are dropped
+
+        Returns:
+            True if the item was queued
+        """
+        stage = self._stages.get(stage_name)
+        if not stage:
+            return False
+        await stage.queue.put((item, contextvars.copy_context()))
+        return True
+
+    async def run(self, producer: Callable[[], Awaitable[None]]) -> None:
+        """
+        Start the stage workers, run the producer and wait until every queued item went through all stages
+
+        Args:
+            producer: coroutine function feeding the first stage(s) via put()
+        """
+        for stage in self._stages.values():
+            for index in range(stage.workers):
+                self._tasks.append(asyncio.create_task(self._worker(stage), name=f"{self.name}:{stage.name}:{index}"))
+        try:
+            await producer()
+            # A stage is drained only after all upstream stages are, they may still feed it
+            for stage in self._stages.values():
+                await stage.queue.join()
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+            utils.logger.info(f"[CrawlPipeline.run] {self.name} finished, stats: {self.stats}")
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {name: dict(stage.stats) for name, stage in self._stages.items()}
+
+    async def _worker(self, stage: CrawlStage) -> None:
+        while True:
+            item, context = await stage.queue.get()
+            try:
+                await asyncio.create_task(stage.handler(item), context=context)
+                stage.stats["processed"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stage.stats["failed"] += 1
+                utils.logger.error(f"[CrawlPipeline.{stage.name}] {self.name} item failed: {e}")
+            finally:
+                stage.queue.task_done()
+
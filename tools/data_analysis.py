@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/data_analysis.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : Analysis of the crawled data: SQL aggregations on an in-memory SQLite database,
+#            vectorized pandas string operations and precompiled keyword matchers instead of df.iterrows()
+
+"""
+Usage:
+    python -m tools.data_analysis --platform xhs
+    python -m tools.data_analysis --contents data/xhs/csv/search_contents_2026-01-19.csv \\
+        --comments data/xhs/csv/search_comments_2026-01-19.csv --keywords keywords.json
+    python -m tools.data_analysis --platform bili --sql "SELECT nickname, SUM(liked_count) FROM contents GROUP BY 1"
+
+keywords.json maps a group name to a keyword dictionary (label -> keywords), the "sentiment" group is matched
+against the comments, every other group against the contents:
+    {"features": {"安静": ["安静", "不吵"]}, "sentiment": {"positive": ["推荐"], "negative": ["失望"]}}
+"""
+
+import argparse
+import json
+import re
+import sqlite3
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+from urllib.parse import unquote
+
+import pandas as pd
+
+from tools.keyword_matcher import KeywordMatcher
+
+# Text columns of the platforms, joined into one `text` column for keyword matching
+TEXT_COLUMNS = ("title", "desc", "content", "content_text", "text")
+
+# Counts stored as strings by some stores ("1.2万", "10w+"), converted to numbers when loading
+ENGAGEMENT_COLUMNS = (
+    "liked_count", "collected_count", "comment_count", "comments_count", "share_count", "shared_count",
+    "voteup_count", "video_play_count", "video_favorite_count", "video_share_count", "video_coin_count",
+    "like_count", "sub_comment_count",
+)
+
+# File formats in the order they are preferred when a platform was saved in several formats
+DATA_FORMATS = ("parquet", "jsonl", "json", "csv")
+
+_COUNT_UNITS = {"k": 1000, "K": 1000, "w": 10000, "W": 10000, "万": 10000, "亿": 100000000}
+
+
+def to_count(series: pd.Series) -> pd.Series:
+    """Counts like 123 / "1,234" / "1.2万" / "10w+" as floats, NaN for anything else"""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+    counts = pd.to_numeric(series, errors="coerce")
+    # Only the values that are not plain numbers go through the regex
+    rest = series[counts.isna() & series.notna()]
+    if not rest.empty:
+        text = rest.astype(str).str.replace(",", "", regex=False).str.strip().str.rstrip("+")
+        unit = text.str[-1].map(_COUNT_UNITS)
+        number = pd.to_numeric(text.where(unit.isna(), text.str[:-1]).str.strip(), errors="coerce")
+        counts[rest.index] = (number * unit.fillna(1.0)).round()
+    return counts.astype(float)
+
+
+def read_data_file(path: str) -> pd.DataFrame:
+    """
+    Load a .csv / .json / .jsonl / .xlsx file or a parquet file / partitioned parquet directory
+    A single parquet file gets the hive partition columns of its path (date=... / keyword=...)
+    """
+    file_path = Path(path)
+    suffix = file_path.suffix.lower()
+    if file_path.is_dir():
+        return pd.read_parquet(file_path)
+    if suffix == ".parquet":
+        df = pd.read_parquet(file_path)
+        for part in file_path.parent.parts:
+            key, sep, value = part.partition("=")
+            if sep and key not in df.columns:
+                df[key] = unquote(value)
+        return df
+    if suffix == ".csv":
+        return pd.read_csv(file_path, dtype=str, keep_default_na=False, na_values=[""])
+    if suffix == ".jsonl":
+        return pd.read_json(file_path, lines=True, dtype=False)
+    if suffix == ".json":
+        return pd.read_json(file_path, dtype=False)
+    if suffix in (".xlsx", ".xls"):
+        return pd.read_excel(file_path)
+    raise ValueError(f"Unsupported data file: {path}")
+
+
+def find_data_files(platform: str, item_type: str, crawler_type: str = "search", date: Optional[str] = None,
+                    data_dir: str = "data") -> List[str]:
+    """
+    Data files of one platform written by the stores, only the first format found in DATA_FORMATS is used
+    so records saved in several formats are not counted twice
+    Args:
+        platform: store directory name, e.g. xhs / douyin / bilibili
+        item_type: contents / comments / creators
+        crawler_type: search / detail / creator
+        date: YYYY-MM-DD, default all days
+
+    Returns:
+
+    """
+    base = Path(data_dir) / platform
+    for data_format in DATA_FORMATS:
+        if data_format == "parquet":
+            # parquet/<item_type>/date=<date>/keyword=<keyword>/<crawler_type>_<time>_<seq>.parquet
+            directory = base / "parquet" / item_type
+            files = sorted(directory.glob(f"date={date or '*'}/**/{crawler_type}_*.parquet"))
+            if files:
+                return [str(f) for f in files]
+            continue
+        folder = base / ("json" if data_format == "jsonl" else data_format)
+        files = sorted(folder.glob(f"{crawler_type}_{item_type}_{date or '*'}.{data_format}"))
+        if files:
+            return [str(f) for f in files]
+    return []
+
+
+def _load(paths: Sequence[str]) -> pd.DataFrame:
+    frames = [read_data_file(p) for p in paths]
+    frames = [f for f in frames if not f.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+class AnalysisEngine:
+    """
+    Contents and comments of a crawl, loaded once
+    - counts are converted to numbers column by column
+    - aggregations (stats, top N, group by) run as SQL on an in-memory SQLite copy of the non-text columns
+    - keyword dictionaries are matched with one precompiled KeywordMatcher pass per text
+    """
+
+    def __init__(self, contents: pd.DataFrame, comments: Optional[pd.DataFrame] = None):
+        self.contents = self._prepare(contents)
+        self.comments = self._prepare(comments if comments is not None else pd.DataFrame())
+        self._db: Optional[sqlite3.Connection] = None
+
+    @classmethod
+    def from_files(cls, contents_files: Sequence[str], comments_files: Sequence[str] = ()) -> "AnalysisEngine":
+        return cls(_load(contents_files), _load(comments_files))
+
+    @staticmethod
+    def _prepare(df: pd.DataFrame) -> pd.DataFrame:
+        df = df.copy()
+        for column in ENGAGEMENT_COLUMNS:
+            if column in df.columns:
+                df[column] = to_count(df[column])
+        text_columns = [c for c in TEXT_COLUMNS if c in df.columns and c != "text"]
+        if text_columns:
+            text = df[text_columns[0]].astype("string").fillna("")
+            for column in text_columns[1:]:
+                text = text.str.cat(df[column].astype("string").fillna(""), sep=" ")
+            df["text"] = text
+        elif "text" not in df.columns:
+            df["text"] = pd.Series("", index=df.index, dtype="string")
+        return df
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        """In-memory SQLite database with the tables `contents` and `comments`, built on first use"""
+        if self._db is None:
+            self._db = sqlite3.connect(":memory:")
+            for name, df in (("contents", self.contents), ("comments", self.comments)):
+                self._sql_frame(df).to_sql(name, self._db, index=False)
+        return self._db
+
+    @staticmethod
+    def _sql_frame(df: pd.DataFrame) -> pd.DataFrame:
+        # The joined text column is only used by the matchers, nested values are stored as json
+        df = df.drop(columns=["text"], errors="ignore")
+        if df.empty and not len(df.columns):
+            return pd.DataFrame({"_empty": pd.Series(dtype="float")})
+        for column in df.columns:
+            if df[column].dtype == object:
+                first = df[column].dropna().head(1).tolist()
+                if first and isinstance(first[0], (list, dict)):
+                    df[column] = df[column].map(lambda v: json.dumps(v, ensure_ascii=False) if isinstance(v, (list, dict)) else v)
+                elif first and not isinstance(first[0], (str, int, float, bool)):
+                    df[column] = df[column].astype("string")
+        return df
+
+    def query(self, sql: str, params: Sequence = ()) -> pd.DataFrame:
+        """Run SQL on the `contents` / `comments` tables"""
+        return pd.read_sql_query(sql, self.db, params=list(params))
+
+    def _columns(self, table: str) -> List[str]:
+        return list(self.contents.columns if table == "contents" else self.comments.columns)
+
+    def engagement_stats(self, table: str = "contents") -> Dict[str, Dict[str, float]]:
+        """Mean and max of every engagement column of the table"""
+        columns = [c for c in ENGAGEMENT_COLUMNS if c in self._columns(table)]
+        if not columns:
+            return {}
+        select = ", ".join(f'AVG("{c}"), MAX("{c}")' for c in columns)
+        row = self.query(f"SELECT {select} FROM {table}").iloc[0].tolist()
+        return {c: {"mean": row[2 * i], "max": row[2 * i + 1]} for i, c in enumerate(columns)}
+
+    def top(self, by: str, n: int = 3, table: str = "contents", columns: Sequence[str] = ()) -> pd.DataFrame:
+        """The n rows with the highest `by`"""
+        if by not in self._columns(table):
+            return pd.DataFrame()
+        wanted = [c for c in columns if c in self._columns(table) and c != "text"] or ["*"]
+        select = ", ".join(f'"{c}"' if c != "*" else c for c in dict.fromkeys([*wanted, by]))
+        return self.query(f'SELECT {select} FROM {table} WHERE "{by}" IS NOT NULL ORDER BY "{by}" DESC LIMIT ?', [n])
+
+    def value_counts(self, column: str, n: int = 10, table: str = "contents") -> List[tuple]:
+        """Most frequent values of a column"""
+        if column not in self._columns(table):
+            return []
+        df = self.query(
+            f'SELECT "{column}", COUNT(*) AS n FROM {table} WHERE "{column}" IS NOT NULL AND "{column}" != \'\' '
+            f'GROUP BY 1 ORDER BY n DESC LIMIT ?', [n])
+        return list(df.itertuples(index=False, name=None))
+
+    def keyword_counts(self, dictionary: Dict[str, Iterable[str]], table: str = "contents",
+                       ignore_case: bool = True) -> Counter:
+        """Number of rows mentioning each label of the keyword dictionary"""
+        df = self.contents if table == "contents" else self.comments
+        return KeywordMatcher(dictionary, ignore_case=ignore_case).count(df["text"].tolist())
+
+    def pattern_counts(self, patterns: Iterable[str], table: str = "contents") -> Counter:
+        """
+        Occurrences of the regex matches (the capture group if the pattern has one)
+        Each pattern scans the texts joined by newlines once, patterns must not match a newline
+        (literals, \\w and . never do) so that a match cannot span two rows
+        """
+        df = self.contents if table == "contents" else self.comments
+        joined = "\n".join(df["text"].fillna("").str.replace("\n", " ", regex=False).tolist())
+        counter: Counter = Counter()
+        for pattern in patterns:
+            counter.update(re.findall(pattern, joined))
+        return counter
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def run_report(engine: AnalysisEngine, keyword_groups: Optional[Dict[str, Dict[str, List[str]]]] = None,
+               top_n: int = 10) -> Dict:
+    """Generic report over any platform's data"""
+    report = {
+        "contents": len(engine.contents),
+        "comments": len(engine.comments),
+        "engagement": engine.engagement_stats(),
+        "ip_location": engine.value_counts("ip_location", n=top_n),
+        "keywords": {},
+    }
+    for group, dictionary in (keyword_groups or {}).items():
+        table = "comments" if group == "sentiment" else "contents"
+        report["keywords"][group] = engine.keyword_counts(dictionary, table=table).most_common(top_n)
+    if "liked_count" in engine.contents.columns:
+        top = engine.top("liked_count", n=min(top_n, 3), columns=["title", "desc", "content", "nickname"])
+        report["top_liked"] = top.to_dict(orient="records")
+    return report
+
+
+def print_report(report: Dict):
+    print("=" * 80)
+    print(f"帖子数据: {report['contents']} 条, 评论数据: {report['comments']} 条")
+    if report["engagement"]:
+        print("\n互动数据:")
+        for column, stats in report["engagement"].items():
+            print(f"  {column}: 平均 {stats['mean'] or 0:.1f}, 最高 {stats['max'] or 0:.0f}")
+    if report["ip_location"]:
+        print("\nIP地点分布:")
+        for value, count in report["ip_location"]:
+            print(f"  {value}: {count}")
+    for group, counts in report["keywords"].items():
+        print(f"\n关键词 [{group}]:")
+        for label, count in counts:
+            print(f"  {label}: {count} 条")
+    for row in report.get("top_liked", []):
+        title = row.get("title") or row.get("desc") or row.get("content") or ""
+        print(f"\n  {str(title)[:50]}  👍 {row.get('liked_count'):.0f}")
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="MediaCrawler data analysis")
+    parser.add_argument("--platform", help="store directory under data/, e.g. xhs / douyin / bilibili / weibo")
+    parser.add_argument("--crawler-type", default="search", help="search / detail / creator")
+    parser.add_argument("--date", help="YYYY-MM-DD, default all days")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--contents", nargs="*", default=[], help="contents files, instead of --platform")
+    parser.add_argument("--comments", nargs="*", default=[], help="comments files, instead of --platform")
+    parser.add_argument("--keywords", help="json file: group -> {label: [keywords]}")
+    parser.add_argument("--sql", action="append", default=[], help="SQL on the contents / comments tables")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="print the report as json")
+    args = parser.parse_args(argv)
+
+    contents_files, comments_files = args.contents, args.comments
+    if args.platform:
+        contents_files = contents_files or find_data_files(args.platform, "contents", args.crawler_type, args.date, args.data_dir)
+        comments_files = comments_files or find_data_files(args.platform, "comments", args.crawler_type, args.date, args.data_dir)
+    if not contents_files and not comments_files:
+        parser.error("no data files found, pass --platform or --contents / --comments")
+
+    keyword_groups = None
+    if args.keywords:
+        with open(args.keywords, "r", encoding="utf-8") as f:
+            keyword_groups = json.load(f)
+
+    engine = AnalysisEngine.from_files(contents_files, comments_files)
+    try:
+        report = run_report(engine, keyword_groups, top_n=args.top)
+        if args.json:
+            print(json.dumps(report, ensure_ascii=False, indent=2, default=str))
+        else:
+            print_report(report)
+        for sql in args.sql:
+            print(f"\n{sql}")
+            print(engine.query(sql).to_string(index=False))
+    finally:
+        engine.close()
+
+
+if __name__ == "__main__":
+    main()
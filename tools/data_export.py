@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/data_export.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : Streaming conversion of the data files to CSV / JSONL / Parquet
+
+import csv
+import io
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import config
+from tools.data_file_index import DataFileIndex, match_filters
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that keeps what was written until drain(), lets ParquetWriter output be streamed"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _batches(records: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _to_text(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def _infer_type(values: List[Any]):
+    """Arrow type of a column from its values in the first batch, anything mixed or nested becomes a string"""
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, bool) for v in present):
+        return pa.bool_()
+    if present and all(isinstance(v, int) and not isinstance(v, bool) for v in present):
+        return pa.int64()
+    if present and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        return pa.float64()
+    return pa.string()
+
+
+def _coerce(value: Any, arrow_type) -> Any:
+    """Value converted to the column type, values that do not fit are written as null"""
+    if value is None:
+        return None
+    if arrow_type == pa.string():
+        return _to_text(value)
+    try:
+        if arrow_type == pa.int64():
+            return int(value)
+        if arrow_type == pa.float64():
+            return float(value)
+        if arrow_type == pa.bool_():
+            return value if isinstance(value, bool) else str(value).lower() in ("1", "true")
+    except (TypeError, ValueError):
+        return None
+    return value
+
+
+def stream_jsonl(records: Iterable[Dict], batch_size: int) -> Iterator[bytes]:
+    for batch in _batches(records, batch_size):
+        # default=str: timestamps of parquet sources
+        yield "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in batch).encode("utf-8")
+
+
+def stream_csv(records: Iterable[Dict], columns: List[str], batch_size: int) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = None
+    for batch in _batches(records, batch_size):
+        if writer is None:
+            # Same encoding as the csv store, Excel needs the BOM to detect utf-8
+            buffer.write("\ufeff")
+            writer = csv.DictWriter(buffer, fieldnames=columns or list(batch[0]), extrasaction="ignore")
+            writer.writeheader()
+        writer.writerows({k: _to_text(v) for k, v in r.items()} for r in batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def stream_parquet(records: Iterable[Dict], columns: List[str], batch_size: int) -> Iterator[bytes]:
+    """One row group per batch, column types are inferred from the first batch"""
+    if not PARQUET_AVAILABLE:
+        raise RuntimeError("pyarrow is not installed, run `pip install pyarrow` to export parquet files")
+    sink = _ChunkSink()
+    writer = None
+    schema = None
+    for batch in _batches(records, batch_size):
+        if schema is None:
+            names = columns or list(batch[0])
+            schema = pa.schema([(name, _infer_type([r.get(name) for r in batch])) for name in names])
+            writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        arrays = [
+            pa.array([_coerce(r.get(field.name), field.type) for r in batch], type=field.type)
+            for field in schema
+        ]
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+        yield sink.drain()
+    if writer is None:
+        writer = pq.ParquetWriter(sink, pa.schema([(name, pa.string()) for name in columns]), compression="zstd")
+    writer.close()
+    yield sink.drain()
+
+
+def export_file(index: DataFileIndex, export_format: str, filters: Optional[Dict[str, str]] = None,
+                batch_size: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Stream the records of an indexed data file in another format
+    The source is read one index checkpoint range at a time and at most batch_size records are held in memory
+    Args:
+        index: index of the source file (see tools/data_file_index.py)
+        export_format: csv / jsonl / parquet
+        filters: field -> value, only matching records are exported
+        batch_size: records per output chunk (and per parquet row group), default DATA_EXPORT_BATCH_SIZE
+
+    Returns:
+
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    batch_size = batch_size or config.DATA_EXPORT_BATCH_SIZE
+    records = (r for r in index.iter_records() if isinstance(r, dict) and match_filters(r, filters))
+    if export_format == "jsonl":
+        return stream_jsonl(records, batch_size)
+    if export_format == "csv":
+        return stream_csv(records, index.columns, batch_size)
+    return stream_parquet(records, index.columns, batch_size)
@@ -0,0 +1,389 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/data_file_index.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : Sidecar index (<file>.idx) of the data files: record count, byte offsets and columns
+
+import csv
+import hashlib
+import io
+import json
+import os
+from typing import Dict, Iterator, List, Optional
+
+import config
+from tools import utils
+
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 1
+
+# Formats the crawler only appends to, their index is updated by scanning the appended bytes
+APPEND_FORMATS = ("jsonl", "csv")
+
+# Bytes at the start of a file hashed to notice that it was replaced by another file
+_FINGERPRINT_BYTES = 256
+
+
+def index_path(file_path: str) -> str:
+    return f"{file_path}{INDEX_SUFFIX}"
+
+
+def _file_format(file_path: str) -> str:
+    extension = os.path.splitext(file_path)[1].lower().lstrip(".")
+    return "excel" if extension in ("xlsx", "xls") else extension
+
+
+def _skip_separators(text: str, pos: int) -> int:
+    """Skip whitespace and the commas between the elements of a JSON array"""
+    while pos < len(text) and text[pos] in " \t\r\n,":
+        pos += 1
+    return pos
+
+
+def match_filters(record: Dict, filters: Optional[Dict[str, str]]) -> bool:
+    """Whether every field in filters equals its value, values are compared as strings"""
+    return not filters or all(str(record.get(k)) == v for k, v in filters.items())
+
+
+class DataFileIndex:
+    """
+    Index of one data file, stored next to it as <file>.idx
+    - rows: number of records
+    - checkpoints: byte offset of every `stride`-th record, a page of records is read by seeking to the
+      checkpoint before it, so a preview costs O(limit + stride) instead of O(file)
+    - columns: field names of the records
+
+    .jsonl and .csv files are indexed incrementally, only the bytes appended since the last refresh are scanned.
+    .json arrays are re-indexed when they change, Excel and Parquet files only get rows and columns.
+    """
+
+    def __init__(self, file_path: str, stride: Optional[int] = None):
+        self.file_path = str(file_path)
+        self.format = _file_format(self.file_path)
+        self.stride = max(1, stride or config.DATA_INDEX_STRIDE)
+        self._reset()
+
+    def _reset(self):
+        self.rows = 0
+        # Bytes covered by the index: end of the last complete record
+        self.size = 0
+        self.mtime = 0.0
+        self.fingerprint = ""
+        self.checkpoints: List[int] = []
+        self.columns: List[str] = []
+
+    @classmethod
+    def load(cls, file_path: str) -> "DataFileIndex":
+        """Index from the sidecar file, an empty index when there is none (call refresh() to bring it up to date)"""
+        index = cls(file_path)
+        try:
+            with open(index_path(index.file_path), "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return index
+        if state.get("version") != INDEX_VERSION or state.get("stride") != index.stride:
+            return index
+        index.rows = state["rows"]
+        index.size = state["size"]
+        index.mtime = state["mtime"]
+        index.fingerprint = state["fingerprint"]
+        index.checkpoints = state["checkpoints"]
+        index.columns = state["columns"]
+        return index
+
+    def save(self):
+        path = index_path(self.file_path)
+        tmp_path = f"{path}.tmp"
+        state = {
+            "version": INDEX_VERSION,
+            "stride": self.stride,
+            "rows": self.rows,
+            "size": self.size,
+            "mtime": self.mtime,
+            "fingerprint": self.fingerprint,
+            "checkpoints": self.checkpoints,
+            "columns": self.columns,
+        }
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def is_fresh(self) -> bool:
+        """Whether the index was built from the file as it is now"""
+        try:
+            stat = os.stat(self.file_path)
+        except OSError:
+            return False
+        return self.size == stat.st_size and self.mtime == stat.st_mtime
+
+    def _read_fingerprint(self, length: int) -> str:
+        with open(self.file_path, "rb") as f:
+            return hashlib.sha1(f.read(length)).hexdigest()
+
+    def refresh(self) -> bool:
+        """
+        Bring the index up to date with the file
+        Returns:
+            whether the index changed
+        """
+        try:
+            stat = os.stat(self.file_path)
+        except OSError:
+            self._reset()
+            return False
+        if self.format in APPEND_FORMATS:
+            prefix_length = min(self.size, _FINGERPRINT_BYTES)
+            if stat.st_size < self.size or self._read_fingerprint(prefix_length) != self.fingerprint:
+                self._reset()
+            if stat.st_size == self.size and stat.st_mtime == self.mtime:
+                return False
+            if self.format == "jsonl":
+                self._scan_jsonl()
+            else:
+                self._scan_csv()
+            self.fingerprint = self._read_fingerprint(min(self.size, _FINGERPRINT_BYTES))
+            self.mtime = stat.st_mtime
+            return True
+        if self.size == stat.st_size and self.mtime == stat.st_mtime:
+            return False
+        self._reset()
+        if self.format == "json":
+            self._build_json()
+        elif self.format == "excel":
+            self._build_excel()
+        elif self.format == "parquet":
+            self._build_parquet()
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        return True
+
+    def _add_record(self, offset: int):
+        if self.rows % self.stride == 0:
+            self.checkpoints.append(offset)
+        self.rows += 1
+
+    def _scan_jsonl(self):
+        with open(self.file_path, "rb") as f:
+            f.seek(self.size)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Still being written
+                    break
+                if line.strip():
+                    if not self.columns:
+                        try:
+                            self.columns = list(json.loads(line))
+                        except (ValueError, TypeError):
+                            pass
+                    self._add_record(self.size)
+                self.size += len(line)
+
+    def _scan_csv(self):
+        with open(self.file_path, "rb") as f:
+            f.seek(self.size)
+            record_start = self.size
+            record_lines: List[bytes] = []
+            quotes = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                record_lines.append(line)
+                quotes += line.count(b'"')
+                if quotes % 2:
+                    # The newline is inside a quoted field, the record continues on the next line
+                    continue
+                record = b"".join(record_lines)
+                if record_start == 0:
+                    self.columns = next(csv.reader([record.decode("utf-8-sig")]), [])
+                elif record.strip():
+                    self._add_record(record_start)
+                record_start += len(record)
+                self.size = record_start
+                record_lines = []
+                quotes = 0
+
+    def _build_json(self):
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            text = f.read()
+        decoder = json.JSONDecoder()
+        pos = _skip_separators(text, 0)
+        if pos >= len(text):
+            return
+        single = text[pos] != "["
+        if not single:
+            pos = _skip_separators(text, pos + 1)
+        # Checkpoints are byte offsets, the text is converted only up to each checkpoint
+        byte_pos, char_pos = 0, 0
+        while pos < len(text) and text[pos] != "]":
+            item, end = decoder.raw_decode(text, pos)
+            if self.rows % self.stride == 0:
+                byte_pos += len(text[char_pos:pos].encode("utf-8"))
+                char_pos = pos
+                self.checkpoints.append(byte_pos)
+            self.rows += 1
+            if not self.columns and isinstance(item, dict):
+                self.columns = list(item)
+            if single:
+                break
+            pos = _skip_separators(text, end)
+
+    def _build_excel(self):
+        for record in self._iter_excel(0):
+            if not self.columns:
+                self.columns = list(record)
+            self.rows += 1
+
+    def _build_parquet(self):
+        import pyarrow.parquet as pq
+
+        # Row count and columns are in the footer, no data page is read
+        metadata = pq.ParquetFile(self.file_path).metadata
+        self.rows = metadata.num_rows
+        self.columns = list(metadata.schema.names)
+
+    def _iter_parquet(self, start: int) -> Iterator[Dict]:
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(self.file_path)
+        skip = start
+        # Whole row groups before `start` are skipped without being read
+        for group in range(parquet_file.metadata.num_row_groups):
+            group_rows = parquet_file.metadata.row_group(group).num_rows
+            if skip >= group_rows:
+                skip -= group_rows
+                continue
+            for batch in parquet_file.iter_batches(row_groups=[group]):
+                records = batch.to_pylist()
+                yield from records[skip:]
+                skip = max(0, skip - len(records))
+
+    def _iter_excel(self, start: int) -> Iterator[Dict]:
+        if self.file_path.lower().endswith(".xls"):
+            import pandas as pd
+
+            df = pd.read_excel(self.file_path, skiprows=range(1, start + 1))
+            yield from df.where(pd.notnull(df), None).to_dict(orient="records")
+            return
+
+        import openpyxl
+
+        workbook = openpyxl.load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = [str(c) if c is not None else "" for c in header]
+            for i, row in enumerate(rows):
+                if i < start:
+                    continue
+                yield dict(zip(columns, row))
+        finally:
+            workbook.close()
+
+    def _read_range(self, start: int, end: int) -> str:
+        with open(self.file_path, "rb") as f:
+            f.seek(start)
+            return f.read(end - start).decode("utf-8", errors="replace")
+
+    def _parse_chunk(self, text: str) -> Iterator[Dict]:
+        if self.format == "jsonl":
+            for line in text.splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+        elif self.format == "csv":
+            for row in csv.reader(io.StringIO(text, newline="")):
+                if row:
+                    yield dict(zip(self.columns, row))
+        elif self.format == "json":
+            decoder = json.JSONDecoder()
+            pos = _skip_separators(text, 0)
+            while pos < len(text) and text[pos] != "]":
+                item, pos = decoder.raw_decode(text, pos)
+                yield item
+                pos = _skip_separators(text, pos)
+
+    def iter_records(self, start: int = 0) -> Iterator[Dict]:
+        """Records from record number `start` on, read one checkpoint range at a time"""
+        if self.format == "excel":
+            yield from self._iter_excel(start)
+            return
+        if self.format == "parquet":
+            yield from self._iter_parquet(start)
+            return
+        skip = start % self.stride
+        for k in range(start // self.stride, len(self.checkpoints)):
+            end = self.checkpoints[k + 1] if k + 1 < len(self.checkpoints) else self.size
+            for record in self._parse_chunk(self._read_range(self.checkpoints[k], end)):
+                if skip:
+                    skip -= 1
+                    continue
+                yield record
+
+    def read(self, offset: int = 0, limit: int = 100, filters: Optional[Dict[str, str]] = None) -> List[Dict]:
+        """
+        A page of records
+        Args:
+            offset: records to skip (after filtering)
+            limit: maximum number of records
+            filters: field -> value, only records whose field equals the value are returned
+
+        Returns:
+
+        """
+        if not filters:
+            records = self.iter_records(offset)
+        else:
+            records = (r for r in self.iter_records(0) if match_filters(r, filters))
+            for _ in range(offset):
+                if next(records, None) is None:
+                    return []
+        page = []
+        for record in records:
+            if len(page) >= limit:
+                break
+            page.append(record)
+        return page
+
+
+def get_file_index(file_path: str, build: bool = True) -> Optional[DataFileIndex]:
+    """
+    Up to date index of a data file, the sidecar is rewritten when it was refreshed
+    Args:
+        file_path: data file
+        build: index files that have no sidecar yet and .json / Excel files whose sidecar is outdated
+               (parses the whole file), with build=False None is returned for them instead
+
+    Returns:
+
+    """
+    if not build and not os.path.exists(index_path(file_path)):
+        return None
+    index = DataFileIndex.load(file_path)
+    if not build and index.format not in APPEND_FORMATS and not index.is_fresh():
+        return None
+    try:
+        if index.refresh():
+            index.save()
+    except OSError as e:
+        utils.logger.error(f"[get_file_index] Error indexing {file_path}: {e}")
+    return index
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/http_client.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Pooled httpx client shared by all requests of a platform API client
+
+import time
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Callable, Optional
+
+import httpx
+
+import config
+from tools import utils
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+# Called with (succeeded, seconds until the response headers arrived) after every request through the proxy
+ProxyResultCallback = Callable[[bool, Optional[float]], None]
+
+
+class _ProxyReportingTransport(httpx.AsyncBaseTransport):
+    """Reports the outcome of every request to the proxy health, transport errors and 407 count as failures"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, on_result: ProxyResultCallback):
+        self._transport = transport
+        self._on_result = on_result
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.monotonic()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except httpx.TransportError:
+            self._on_result(False, None)
+            raise
+        if response.status_code == 407:
+            self._on_result(False, None)
+        else:
+            self._on_result(True, time.monotonic() - started)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def create_async_client(proxy: Optional[str] = None, on_proxy_result: Optional[ProxyResultCallback] = None,
+                        **kwargs) -> httpx.AsyncClient:
+    """
+    Create a long-lived httpx.AsyncClient with connection pooling / keep-alive (and optional HTTP/2)
+    The client does not keep response cookies: the platform clients send their cookies explicitly in the headers,
+    the same as the short-lived client per request did before
+    Args:
+        proxy: proxy URL, e.g. http://user:pwd@ip:port
+        on_proxy_result: called after every request through the proxy, feeds ProxyIpPool health
+        **kwargs: extra httpx.AsyncClient arguments
+
+    Returns:
+
+    """
+    http2 = config.ENABLE_HTTP2
+    if http2 and not _http2_available():
+        utils.logger.warning("[create_async_client] ENABLE_HTTP2 needs the h2 package (pip install 'httpx[http2]'), using HTTP/1.1")
+        http2 = False
+    limits = httpx.Limits(
+        max_connections=config.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY_SEC,
+    )
+    if proxy and on_proxy_result is not None:
+        transport = httpx.AsyncHTTPTransport(proxy=proxy, limits=limits, http2=http2)
+        kwargs["transport"] = _ProxyReportingTransport(transport, on_proxy_result)
+        # The proxy is on the transport, environment proxies must not take precedence over it
+        kwargs.setdefault("trust_env", False)
+        proxy = None
+    return httpx.AsyncClient(
+        proxy=proxy,
+        limits=limits,
+        http2=http2,
+        cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+        **kwargs,
+    )
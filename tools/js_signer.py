@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/js_signer.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Pool of long-lived Node.js workers for the JS signature scripts in libs/
+
+import asyncio
+import json
+import re
+import shutil
+from typing import Any, Dict, List, Optional
+
+import execjs
+
+import config
+from tools import utils
+
+# Runs inside node: loads the script once, then answers one JSON request per stdin line.
+# The script is wrapped in a function like PyExecJS does, so `require` and top level declarations behave the same.
+_WORKER_JS = r"""
+const fs = require('fs');
+const readline = require('readline');
+const [scriptPath, deterministic] = process.argv.slice(1);
+if (deterministic === '1') {
+    /*DETERMINISTIC*/
+}
+const source = fs.readFileSync(scriptPath, 'utf8').replace(/^\uFEFF/, '');
+const callFunction = new Function('require', source + '\n;return (name, args) => eval(name).apply(this, args);')(require);
+const rl = readline.createInterface({ input: process.stdin });
+rl.on('line', (line) => {
+    const { name, args } = JSON.parse(line);
+    let reply;
+    try {
+        reply = { result: callFunction(name, args) };
+    } catch (e) {
+        reply = { error: String(e && e.stack || e) };
+    }
+    process.stdout.write(JSON.stringify(reply) + '\n');
+});
+"""
+
+# Fixed Math.random / Date.now for golden tests, the signatures are random otherwise
+DETERMINISTIC_JS = (
+    "let __seed = 42;"
+    "Math.random = () => { __seed = (__seed * 16807) % 2147483647; return (__seed - 1) / 2147483646; };"
+    "Date.now = () => 1700000000000;"
+)
+_WORKER_JS = _WORKER_JS.replace("/*DETERMINISTIC*/", DETERMINISTIC_JS)
+
+_FUNCTION_NAME_RE = re.compile(r"^[A-Za-z_$][\w$]*$")
+
+
+class JsSignError(Exception):
+    """The JS function raised or the worker died"""
+
+
+class _NodeWorker:
+    """One node process with the script preloaded, handles one call at a time"""
+
+    def __init__(self, script_path: str, deterministic: bool = False):
+        self.script_path = script_path
+        self.deterministic = deterministic
+        self.process: Optional[asyncio.subprocess.Process] = None
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            shutil.which("node"), "-e", _WORKER_JS, self.script_path, "1" if self.deterministic else "0",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            limit=1024 * 1024,
+        )
+
+    async def call(self, name: str, args: List[Any]) -> Any:
+        if self.process is None or self.process.returncode is not None:
+            await self.start()
+        self.process.stdin.write((json.dumps({"name": name, "args": args}) + "\n").encode("utf-8"))
+        await self.process.stdin.drain()
+        line = await self.process.stdout.readline()
+        if not line:
+            raise JsSignError(f"node worker for {self.script_path} exited with code {self.process.returncode}")
+        reply = json.loads(line)
+        if "error" in reply:
+            raise JsSignError(reply["error"])
+        return reply.get("result")
+
+    def kill(self):
+        """Stop the process at once, a new one is started on the next call"""
+        if self.process is not None and self.process.returncode is None:
+            self.process.kill()
+        self.process = None
+
+    async def close(self):
+        if self.process is None or self.process.returncode is not None:
+            return
+        self.process.stdin.close()
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout=2)
+        except asyncio.TimeoutError:
+            self.process.kill()
+            await self.process.wait()
+
+
+class JsSignerPool:
+    """
+    Async API over a pool of persistent node processes for one signature script (libs/douyin.js, libs/zhihu.js)
+    Replaces execjs .call(), which starts a new node process per call and blocks the event loop
+    Falls back to execjs in a thread when node is not installed
+    """
+
+    _instances: Dict[str, "JsSignerPool"] = {}
+
+    def __init__(self, script_path: str, size: int = 2, deterministic: bool = False):
+        """
+        Args:
+            script_path: JS file with the signature functions
+            size: number of node processes, started lazily
+            deterministic: fixed Math.random / Date.now, only for tests
+        """
+        self.script_path = script_path
+        self.size = max(1, size)
+        self.deterministic = deterministic
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._workers: List[_NodeWorker] = []
+        self._execjs_ctx = None
+
+    @classmethod
+    def get_instance(cls, script_path: str) -> "JsSignerPool":
+        if script_path not in cls._instances:
+            cls._instances[script_path] = cls(script_path, size=config.JS_SIGNER_POOL_SIZE)
+        return cls._instances[script_path]
+
+    @classmethod
+    async def close_all(cls):
+        for pool in list(cls._instances.values()):
+            await pool.close()
+        cls._instances.clear()
+
+    async def call(self, name: str, *args) -> Any:
+        """
+        Call a function of the script
+        Args:
+            name: function name, e.g. sign_datail
+            *args: JSON serializable arguments
+
+        Returns:
+            return value of the function
+        """
+        if not _FUNCTION_NAME_RE.match(name):
+            raise ValueError(f"Invalid JS function name: {name!r}")
+        if not shutil.which("node"):
+            return await asyncio.to_thread(self._call_with_execjs, name, *args)
+
+        if self._idle.empty() and len(self._workers) < self.size:
+            worker = _NodeWorker(self.script_path, self.deterministic)
+            self._workers.append(worker)
+        else:
+            worker = await self._idle.get()
+        try:
+            return await worker.call(name, list(args))
+        except JsSignError:
+            raise
+        except BaseException as e:
+            # Broken pipe / cancelled mid-call: the reply may still be unread in stdout and would be returned to
+            # the next caller, so the process is killed and restarted on next use
+            utils.logger.warning(f"[JsSignerPool.call] Restarting node worker for {self.script_path}: {e!r}")
+            worker.kill()
+            raise
+        finally:
+            self._idle.put_nowait(worker)
+
+    def _call_with_execjs(self, name: str, *args) -> Any:
+        if self._execjs_ctx is None:
+            with open(self.script_path, encoding="utf-8-sig") as f:
+                self._execjs_ctx = execjs.compile(f.read())
+        return self._execjs_ctx.call(name, *args)
+
+    async def close(self):
+        for worker in self._workers:
+            await worker.close()
+        self._workers.clear()
+        self._idle = asyncio.Queue()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/keyword_matcher.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : Multi-keyword matcher for keyword dictionaries (label -> keywords)
+
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+
+class KeywordMatcher:
+    """
+    Matches all keywords of a dictionary in one pass over a text
+    With pyahocorasick installed the keywords are compiled into an Aho-Corasick automaton. Otherwise they are
+    compiled into a single regex `(?=(k1|k2|...))` tried at every position, longest keyword first: at each
+    position the regex returns the longest keyword starting there and every shorter keyword matching at that
+    position is one of its prefixes, so the labels of a keyword include the labels of its prefixes (the output
+    function of the automaton). Both report the same labels as testing every keyword with `in`.
+    """
+
+    def __init__(self, dictionary: Dict[str, Iterable[str]], ignore_case: bool = True):
+        """
+        Args:
+            dictionary: label -> keywords, e.g. {"安静": ["安静", "不吵", "quiet"]}
+            ignore_case: match latin keywords case-insensitively
+        """
+        self.ignore_case = ignore_case
+        keyword_labels: Dict[str, Set[str]] = {}
+        for label, keywords in dictionary.items():
+            for keyword in keywords:
+                if keyword:
+                    keyword_labels.setdefault(self._normalize(keyword), set()).add(label)
+        self.labels = list(dictionary)
+        # A keyword also implies the labels of every keyword that is a prefix of it
+        self._outputs: Dict[str, frozenset] = {
+            keyword: frozenset().union(*(labels for prefix, labels in keyword_labels.items() if keyword.startswith(prefix)))
+            for keyword in keyword_labels
+        }
+        ordered = sorted(keyword_labels, key=len, reverse=True)
+        self._pattern: Optional[re.Pattern] = None
+        self._automaton = None
+        if ordered and AHOCORASICK_AVAILABLE:
+            self._automaton = ahocorasick.Automaton()
+            for keyword in ordered:
+                self._automaton.add_word(keyword, keyword)
+            self._automaton.make_automaton()
+            # The automaton reports every occurrence itself, no prefix outputs needed
+            self._outputs = {keyword: frozenset(labels) for keyword, labels in keyword_labels.items()}
+        elif ordered:
+            self._pattern = re.compile("(?=(" + "|".join(map(re.escape, ordered)) + "))")
+
+    def _normalize(self, text: str) -> str:
+        return text.lower() if self.ignore_case else text
+
+    def keywords(self, text: Optional[str]) -> List[str]:
+        """Keywords found in text, in order of position (a keyword found at several positions is repeated)"""
+        if not text or not isinstance(text, str):
+            return []
+        if self._automaton is not None:
+            return [keyword for _, keyword in self._automaton.iter(self._normalize(text))]
+        if self._pattern is None:
+            return []
+        return [m.group(1) for m in self._pattern.finditer(self._normalize(text))]
+
+    def match(self, text: Optional[str]) -> Set[str]:
+        """Labels with at least one keyword in text"""
+        found: Set[str] = set()
+        for keyword in set(self.keywords(text)):
+            found |= self._outputs[keyword]
+        return found
+
+    def count(self, texts: Iterable[Optional[str]]) -> Counter:
+        """Number of texts mentioning each label, a label counts once per text"""
+        counter: Counter = Counter()
+        for text in texts:
+            counter.update(self.match(text))
+        return counter
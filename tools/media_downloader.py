@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/media_downloader.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Shared media downloader: bounded concurrency, streamed writes, resumable Range requests
+
+import asyncio
+import os
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+
+import aiofiles
+import httpx
+
+import config
+from store.media_blob_store import MediaBlobStore
+from tools import utils
+
+# Suffix of partially downloaded files, kept on failure so the next attempt can resume with a Range request
+PART_SUFFIX = ".part"
+
+DownloadFunc = Callable[[str, str], Awaitable[bool]]
+
+
+async def download_to_file(
+    client: httpx.AsyncClient,
+    url: str,
+    save_path: str,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 60,
+    chunk_size: int = 64 * 1024,
+) -> bool:
+    """
+    Stream a media file to disk, memory stays flat regardless of the file size
+    The body is written to <save_path>.part and renamed when complete. An existing .part file is resumed with
+    a Range request, servers that ignore the range restart the file from the beginning.
+    Args:
+        client: httpx client (the pooled client of the platform API client)
+        url: media URL
+        save_path: final file path
+        headers: request headers (e.g. Referer for Bilibili)
+        timeout: request timeout in seconds
+        chunk_size: size of the chunks written to disk
+
+    Returns:
+        True if save_path exists afterwards
+
+    """
+    if os.path.exists(save_path):
+        return True
+    os.makedirs(os.path.dirname(save_path) or ".", exist_ok=True)
+    part_path = save_path + PART_SUFFIX
+    resume_from = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+
+    request_headers = dict(headers or {})
+    if resume_from:
+        request_headers["Range"] = f"bytes={resume_from}-"
+
+    async with client.stream("GET", url, headers=request_headers, timeout=timeout, follow_redirects=True) as response:
+        if resume_from and response.status_code == 416:
+            # The .part file does not match the remote file any more, start over next time
+            os.remove(part_path)
+            utils.logger.warning(f"[download_to_file] Range not satisfiable, discarded {part_path}")
+            return False
+        if response.status_code not in (200, 206):
+            utils.logger.error(f"[download_to_file] Unexpected status {response.status_code} for {url}")
+            return False
+
+        append = resume_from > 0 and response.status_code == 206
+        written = resume_from if append else 0
+        async with aiofiles.open(part_path, "ab" if append else "wb") as f:
+            async for chunk in response.aiter_bytes(chunk_size):
+                await f.write(chunk)
+                written += len(chunk)
+
+        content_length = response.headers.get("Content-Length", "")
+        # Content-Length is the size on the wire, with gzip / br it does not match the decoded bytes written
+        content_encoding = response.headers.get("Content-Encoding", "identity").strip().lower()
+        if content_length.isdigit() and content_encoding in ("", "identity"):
+            expected = (resume_from if append else 0) + int(content_length)
+        else:
+            expected = None
+        if expected is not None and written != expected:
+            utils.logger.warning(f"[download_to_file] Incomplete download of {url} ({written}/{expected} bytes), will resume")
+            return False
+
+    os.replace(part_path, save_path)
+    return True
+
+
+class MediaDownloader:
+    """
+    Downloads media in background tasks with its own concurrency limit (MEDIA_DOWNLOAD_CONCURRENCY),
+    so note and comment crawling does not wait for images and videos
+    With ENABLE_MEDIA_DEDUP the files go through the content-addressed MediaBlobStore
+    """
+    _instance: Optional["MediaDownloader"] = None
+
+    def __init__(self):
+        self.semaphore = asyncio.Semaphore(max(1, config.MEDIA_DOWNLOAD_CONCURRENCY))
+        self.max_retries = max(1, config.MEDIA_DOWNLOAD_MAX_RETRIES)
+        self._tasks: Set[asyncio.Task] = set()
+        # Paths queued or downloading, the same file is never downloaded twice at the same time
+        self._pending_paths: Set[str] = set()
+        # URL -> (digest, ext) of the blob being downloaded (None on failure), with ENABLE_MEDIA_DEDUP the same URL
+        # saved to several paths is downloaded once and the other paths wait for the blob
+        self._pending_urls: Dict[str, asyncio.Future] = {}
+        self.stats = {"downloaded": 0, "deduplicated": 0, "skipped": 0, "failed": 0}
+
+    @classmethod
+    def get_instance(cls) -> "MediaDownloader":
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @classmethod
+    async def wait_all(cls):
+        """Wait until every submitted download is finished, should be called at the end of crawler execution"""
+        if cls._instance is None:
+            return
+        downloader = cls._instance
+        while downloader._tasks:
+            await asyncio.gather(*list(downloader._tasks), return_exceptions=True)
+        utils.logger.info(f"[MediaDownloader.wait_all] Media downloads finished: {downloader.stats}")
+
+    @classmethod
+    async def close(cls):
+        """Cancel the pending downloads (partial files are kept and resumed by the next run)"""
+        if cls._instance is None:
+            return
+        tasks = list(cls._instance._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        cls._instance = None
+        MediaBlobStore.close_all()
+
+    def submit(self, download_func: DownloadFunc, url: str, save_path: str, platform: str = "", note_id: str = "",
+               media_type: str = "image", media_index: int = 0) -> bool:
+        """
+        Queue a download and return immediately
+        Args:
+            download_func: platform specific download, e.g. XiaoHongShuClient.download_media(url, save_path)
+            url: media URL
+            save_path: final file path
+            platform: platform name, recorded in the media index together with note_id and media_index
+            note_id: id of the note / video the media belongs to
+            media_type: image or video
+            media_index: position of the media in the note
+
+        Returns:
+            False if the file already exists or is already queued
+
+        """
+        if os.path.exists(save_path) or save_path in self._pending_paths:
+            self.stats["skipped"] += 1
+            return False
+        self._pending_paths.add(save_path)
+        task = asyncio.create_task(self._download(download_func, url, save_path, (platform, note_id, media_type, media_index)))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _download(self, download_func: DownloadFunc, url: str, save_path: str, media_ref: Tuple[str, str, str, int]):
+        blob_store = MediaBlobStore.get_instance() if config.ENABLE_MEDIA_DEDUP else None
+        try:
+            if blob_store:
+                # Known URL: link the stored blob, no request at all
+                known = await asyncio.to_thread(blob_store.lookup_url, url)
+                if not known and url in self._pending_urls:
+                    # Downloading for another path right now, both would write the same staging file
+                    known = await asyncio.shield(self._pending_urls[url])
+                    if not known:
+                        self.stats["failed"] += 1
+                        return
+                if known:
+                    await asyncio.to_thread(blob_store.attach, known[0], known[1], save_path, *media_ref)
+                    self.stats["deduplicated"] += 1
+                    return
+                await self._download_blob(blob_store, download_func, url, save_path, media_ref)
+                return
+            async with self.semaphore:
+                if not await self._download_with_retries(download_func, url, save_path):
+                    self.stats["failed"] += 1
+                    utils.logger.error(f"[MediaDownloader] Giving up on {url} after {self.max_retries} attempts")
+                    return
+            self.stats["downloaded"] += 1
+            utils.logger.info(f"[MediaDownloader] Saved {save_path}")
+        except Exception as e:
+            self.stats["failed"] += 1
+            utils.logger.error(f"[MediaDownloader] Download of {url} failed: {e}")
+        finally:
+            self._pending_paths.discard(save_path)
+
+    async def _download_blob(self, blob_store: MediaBlobStore, download_func: DownloadFunc, url: str, save_path: str,
+                             media_ref: Tuple[str, str, str, int]):
+        """Download url to its staging file and move it into the blob store, other paths of the URL wait for it"""
+        future = self._pending_urls[url] = asyncio.get_running_loop().create_future()
+        blob: Optional[Tuple[str, str]] = None
+        try:
+            target_path = blob_store.staging_path(url, os.path.splitext(save_path)[1])
+            async with self.semaphore:
+                if not await self._download_with_retries(download_func, url, target_path):
+                    self.stats["failed"] += 1
+                    utils.logger.error(f"[MediaDownloader] Giving up on {url} after {self.max_retries} attempts")
+                    return
+            digest = await asyncio.to_thread(blob_store.put_file, target_path, url)
+            blob = (digest, os.path.splitext(target_path)[1])
+            await asyncio.to_thread(blob_store.attach, blob[0], blob[1], save_path, *media_ref)
+            self.stats["downloaded"] += 1
+            utils.logger.info(f"[MediaDownloader] Saved {save_path}")
+        finally:
+            del self._pending_urls[url]
+            future.set_result(blob)
+
+    async def _download_with_retries(self, download_func: DownloadFunc, url: str, target_path: str) -> bool:
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                if await download_func(url, target_path):
+                    return True
+            except httpx.HTTPError as e:
+                utils.logger.warning(f"[MediaDownloader] Attempt {attempt} for {url} failed: {e.__class__.__name__} {e}")
+            if attempt < self.max_retries:
+                await asyncio.sleep(attempt)
+        return False
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/rate_limiter.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Adaptive (AIMD) per-host rate limiter shared by all platform API clients
+
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import config
+from tools import utils
+
+# HTTP status codes meaning "slow down": 429 Too Many Requests, 461 / 471 XHS captcha
+THROTTLE_STATUS_CODES = (429, 461, 471)
+
+
+def endpoint_family(url: str) -> str:
+    """Group the endpoints of a platform: comment, search or api (details, creators, ...)"""
+    path = urlparse(url).path.lower()
+    if "comment" in path or "reply" in path:
+        return "comment"
+    if "search" in path:
+        return "search"
+    return "api"
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket with an adaptive rate plus an adaptive in-flight limit (AIMD)
+    Every successful request adds RATE_LIMIT_INCREASE_RPS to the rate and slowly raises the in-flight limit,
+    a throttle signal (captcha, IP block, 429) multiplies both by RATE_LIMIT_DECREASE_FACTOR and pauses the
+    limiter for RATE_LIMIT_PENALTY_SEC
+    """
+
+    def __init__(self, name: str, rate: float, min_rate: float, max_rate: float, increase: float,
+                 decrease_factor: float, penalty_sec: float, max_in_flight: int):
+        self.name = name
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, min_rate)
+        self.rate = min(max(rate, self.min_rate), self.max_rate)
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.penalty_sec = penalty_sec
+        self.max_in_flight = max(1, max_in_flight)
+        self.in_flight_limit = float(self.max_in_flight)
+        self.in_flight = 0
+        # Start with one token so the first request does not wait
+        self.tokens = 1.0
+        self.blocked_until = 0.0
+        self.requests = 0
+        self.throttled = 0
+        self.last_throttle_reason = ""
+        self._updated_at = time.monotonic()
+        self._in_flight_changed: Optional[asyncio.Condition] = None
+
+    def _condition(self) -> asyncio.Condition:
+        if self._in_flight_changed is None:
+            self._in_flight_changed = asyncio.Condition()
+        return self._in_flight_changed
+
+    def _refill(self, now: float):
+        # Burst of at most one second worth of requests (at least one)
+        self.tokens = min(max(1.0, self.rate), self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self):
+        condition = self._condition()
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < max(1, int(self.in_flight_limit)))
+            self.in_flight += 1
+        try:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.requests += 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+        except BaseException:
+            await self.release()
+            raise
+
+    async def release(self):
+        condition = self._condition()
+        async with condition:
+            self.in_flight -= 1
+            condition.notify_all()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Wait for a token and an in-flight slot for one request"""
+        await self.acquire()
+        try:
+            yield self
+        finally:
+            await self.release()
+
+    def record_success(self):
+        self.rate = min(self.max_rate, self.rate + self.increase)
+        # Additive increase of the in-flight limit: +1 after about in_flight_limit successes
+        self.in_flight_limit = min(float(self.max_in_flight), self.in_flight_limit + 1 / self.in_flight_limit)
+
+    def record_throttle(self, reason: str):
+        now = time.monotonic()
+        already_penalized = now < self.blocked_until
+        self.throttled += 1
+        self.last_throttle_reason = reason
+        self.blocked_until = now + self.penalty_sec
+        self.tokens = 0.0
+        self._updated_at = self.blocked_until
+        if already_penalized:
+            # Requests that were in flight when the first signal arrived, do not back off again
+            return
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self.in_flight_limit = max(1.0, self.in_flight_limit * self.decrease_factor)
+        utils.logger.warning(
+            f"[AdaptiveRateLimiter] {self.name} throttled ({reason}), backing off to {self.rate:.2f} req/s, "
+            f"{int(self.in_flight_limit)} in flight, pausing {self.penalty_sec}s"
+        )
+
+    def observe_status(self, status_code: int):
+        """Record the outcome of a request from its HTTP status code"""
+        if status_code in THROTTLE_STATUS_CODES:
+            self.record_throttle(f"http {status_code}")
+        elif status_code < 400:
+            self.record_success()
+
+    def snapshot(self) -> Dict:
+        return {
+            "rate": round(self.rate, 4),
+            "in_flight_limit": round(self.in_flight_limit, 2),
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "last_throttle_reason": self.last_throttle_reason,
+        }
+
+
+class _DisabledRateLimiter:
+    """Yielded by RateLimiterRegistry.slot when ENABLE_ADAPTIVE_RATE_LIMIT is off"""
+
+    def observe_status(self, status_code: int):
+        pass
+
+    def record_success(self):
+        pass
+
+    def record_throttle(self, reason: str):
+        pass
+
+
+class RateLimiterRegistry:
+    """
+    One limiter per (platform, endpoint family), shared by every client and coroutine of the process
+    Limiter state is saved to RATE_LIMIT_STATE_FILE at the end of a run and restored by the next run
+    """
+
+    _limiters: Dict[str, AdaptiveRateLimiter] = {}
+    _saved_state: Optional[Dict[str, Dict]] = None
+
+    @classmethod
+    def get(cls, platform: str, url: str) -> AdaptiveRateLimiter:
+        """
+        Args:
+            platform: platform name, e.g. xhs
+            url: request URL, mapped to its endpoint family
+
+        Returns:
+            the shared limiter of the platform and endpoint family
+        """
+        key = f"{platform}:{endpoint_family(url)}"
+        limiter = cls._limiters.get(key)
+        if limiter is None:
+            limiter = AdaptiveRateLimiter(
+                name=key,
+                rate=config.RATE_LIMIT_INITIAL_RPS,
+                min_rate=config.RATE_LIMIT_MIN_RPS,
+                max_rate=config.RATE_LIMIT_MAX_RPS,
+                increase=config.RATE_LIMIT_INCREASE_RPS,
+                decrease_factor=config.RATE_LIMIT_DECREASE_FACTOR,
+                penalty_sec=config.RATE_LIMIT_PENALTY_SEC,
+                max_in_flight=config.MAX_CONCURRENCY_NUM,
+            )
+            saved = cls._load_state().get(key)
+            if saved:
+                limiter.rate = min(max(saved.get("rate", limiter.rate), limiter.min_rate), limiter.max_rate)
+                limiter.in_flight_limit = min(max(saved.get("in_flight_limit", limiter.in_flight_limit), 1.0), float(limiter.max_in_flight))
+            cls._limiters[key] = limiter
+        return limiter
+
+    @classmethod
+    @asynccontextmanager
+    async def slot(cls, platform: str, url: str):
+        """
+        Pace one request of a platform client and yield its limiter
+        The caller reports the outcome with observe_status / record_throttle (no-ops when ENABLE_ADAPTIVE_RATE_LIMIT is off)
+        """
+        if not config.ENABLE_ADAPTIVE_RATE_LIMIT:
+            yield _DisabledRateLimiter()
+            return
+        limiter = cls.get(platform, url)
+        async with limiter.slot():
+            yield limiter
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, Dict]:
+        return {key: limiter.snapshot() for key, limiter in sorted(cls._limiters.items())}
+
+    @classmethod
+    def _load_state(cls) -> Dict[str, Dict]:
+        if cls._saved_state is None:
+            cls._saved_state = {}
+            path = config.RATE_LIMIT_STATE_FILE
+            if path and os.path.exists(path):
+                try:
+                    with open(path, encoding="utf-8") as f:
+                        cls._saved_state = json.load(f)
+                except (OSError, ValueError) as e:
+                    utils.logger.warning(f"[RateLimiterRegistry] Ignoring unreadable state file {path}: {e}")
+        return cls._saved_state
+
+    @classmethod
+    def save_state(cls):
+        """Log the limiter state and write it to RATE_LIMIT_STATE_FILE"""
+        if not cls._limiters:
+            return
+        state = {**cls._load_state(), **cls.snapshot()}
+        utils.logger.info(f"[RateLimiterRegistry.save_state] Rate limiter state: {cls.snapshot()}")
+        path = config.RATE_LIMIT_STATE_FILE
+        if not path:
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+
+
+async def crawl_sleep(seconds: float):
+    """
+    Fixed pause between crawl steps, only used when ENABLE_ADAPTIVE_RATE_LIMIT is off
+    (the adaptive limiter paces every API request instead)
+    """
+    if not config.ENABLE_ADAPTIVE_RATE_LIMIT:
+        await asyncio.sleep(seconds)
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/seen_index.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : Seen-index for incremental re-crawls: Bloom filter in memory, exact fingerprints in SQLite
+
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import config
+from tools import utils
+
+
+def content_fingerprint(*values: Any) -> Optional[str]:
+    """
+    Fingerprint of the fields that change when a content item gets new comments or is edited,
+    e.g. comment_count and last_update_time taken from a search result
+
+    Returns:
+        short hash, None if all values are missing (the platform gives no change signal, always crawl)
+    """
+    if all(value is None or value == "" for value in values):
+        return None
+    raw = json.dumps(values, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class BloomFilter:
+    """Fixed size Bloom filter, double hashing over one blake2b digest"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class SeenIndex:
+    """
+    Content ids of a platform with the fingerprint they had when they were last fully crawled
+
+    New ids are recognised by the Bloom filter without touching SQLite, only ids that may have been seen are
+    looked up in the exact store. An item is marked only after its comments were crawled, so an interrupted
+    crawl is repeated by the next run.
+    """
+
+    _instances: Dict[Tuple[str, str], "SeenIndex"] = {}
+
+    def __init__(self, db_path: str, platform: str):
+        self.platform = platform
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_content ("
+            "platform TEXT NOT NULL, content_id TEXT NOT NULL, fingerprint TEXT NOT NULL, updated_ts INTEGER NOT NULL, "
+            "PRIMARY KEY (platform, content_id))"
+        )
+        self._conn.commit()
+        # Fingerprints of the items that are being crawled in this run, written by mark_crawled
+        self._pending: Dict[str, str] = {}
+        self.stats: Dict[str, int] = {"new": 0, "changed": 0, "unchanged": 0}
+
+        known = self._conn.execute("SELECT COUNT(*) FROM seen_content WHERE platform = ?", (platform,)).fetchone()[0]
+        self._bloom = BloomFilter(max(config.SEEN_INDEX_BLOOM_CAPACITY, known * 2), config.SEEN_INDEX_BLOOM_ERROR_RATE)
+        for (content_id,) in self._conn.execute("SELECT content_id FROM seen_content WHERE platform = ?", (platform,)):
+            self._bloom.add(content_id)
+
+    @classmethod
+    def get_instance(cls, platform: str, db_path: Optional[str] = None) -> "SeenIndex":
+        """
+        Get or create the seen-index of a platform
+        Returns:
+            the index, a no-op index that crawls everything when ENABLE_INCREMENTAL_CRAWL is off
+        """
+        if not config.ENABLE_INCREMENTAL_CRAWL:
+            return _DISABLED_SEEN_INDEX
+        db_path = db_path or config.SEEN_INDEX_DB
+        key = (db_path, platform)
+        if key not in cls._instances:
+            cls._instances[key] = cls(db_path, platform)
+        return cls._instances[key]
+
+    @classmethod
+    def close_all(cls):
+        for index in cls._instances.values():
+            index.close()
+        cls._instances.clear()
+
+    def close(self):
+        if any(self.stats.values()):
+            utils.logger.info(f"[SeenIndex.close] {self.platform} incremental crawl stats: {self.stats}")
+        with self._lock:
+            self._conn.close()
+
+    def should_crawl(self, content_id: str, fingerprint: Optional[str]) -> bool:
+        """
+        Whether the item has to be (re-)crawled: it is new, changed since the last crawl or has no fingerprint
+
+        Args:
+            content_id: note / video id
+            fingerprint: see content_fingerprint
+        """
+        content_id = str(content_id)
+        if fingerprint is None:
+            return True
+        if content_id not in self._bloom:
+            self.stats["new"] += 1
+        else:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT fingerprint FROM seen_content WHERE platform = ? AND content_id = ?",
+                    (self.platform, content_id),
+                ).fetchone()
+            if row and row[0] == fingerprint:
+                self.stats["unchanged"] += 1
+                return False
+            self.stats["new" if not row else "changed"] += 1
+        self._pending[content_id] = fingerprint
+        return True
+
+    def mark_crawled(self, content_id: str):
+        """Record the fingerprint passed to should_crawl once the item and its comments are crawled"""
+        content_id = str(content_id)
+        fingerprint = self._pending.pop(content_id, None)
+        if fingerprint is None:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO seen_content (platform, content_id, fingerprint, updated_ts) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (platform, content_id) DO UPDATE SET fingerprint = excluded.fingerprint, "
+                "updated_ts = excluded.updated_ts",
+                (self.platform, content_id, fingerprint, int(time.time())),
+            )
+            self._conn.commit()
+        self._bloom.add(content_id)
+
+
+class _DisabledSeenIndex(SeenIndex):
+    """Used when ENABLE_INCREMENTAL_CRAWL is off: every item is crawled"""
+
+    def __init__(self):
+        self.platform = ""
+        self.stats = {"new": 0, "changed": 0, "unchanged": 0}
+
+    def close(self):
+        pass
+
+    def should_crawl(self, content_id: str, fingerprint: Optional[str]) -> bool:
+        return True
+
+    def mark_crawled(self, content_id: str):
+        pass
+
+
+_DISABLED_SEEN_INDEX = _DisabledSeenIndex()
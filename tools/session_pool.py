@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/session_pool.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : Pool of logged-in crawl sessions (one browser context, page and API client per account)
+
+import asyncio
+import functools
+import inspect
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from playwright.async_api import Browser, BrowserContext, Page
+from tenacity import RetryError
+
+import config
+from tools import utils
+
+
+class CrawlSession:
+    """One account: its browser context and page (used for signing and login) and the API client bound to them"""
+
+    def __init__(self, session_id: int, client: Any, browser_context: Optional[BrowserContext] = None,
+                 context_page: Optional[Page] = None, owns_context: bool = False):
+        self.session_id = session_id
+        self.client = client
+        self.browser_context = browser_context
+        self.context_page = context_page
+        # Contexts opened by the pool are closed by the pool, the crawler closes its own context
+        self.owns_context = owns_context
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.quarantined = 0
+        self.quarantined_until = 0.0
+        self.last_error = ""
+        self.last_used = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.quarantined_until
+
+    def snapshot(self) -> Dict:
+        return {
+            "session_id": self.session_id,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "quarantined": self.quarantined,
+            "last_error": self.last_error,
+        }
+
+
+def _unwrap_error(error: BaseException) -> BaseException:
+    # The platform clients retry requests with tenacity, the real error is the last attempt's
+    if isinstance(error, RetryError) and error.last_attempt.failed:
+        return error.last_attempt.exception()
+    return error
+
+
+class SessionPool:
+    """
+    Spreads the API calls of a crawler over several sessions (accounts) of one browser process
+    Every call goes to the healthy session with the fewest calls in flight. A session is quarantined for
+    SESSION_POOL_QUARANTINE_SECONDS when it raises one of the `quarantine_on` errors (IP block, captcha) or
+    after SESSION_POOL_MAX_FAILURES failed calls in a row.
+    """
+
+    _instances: Dict[str, "SessionPool"] = {}
+
+    def __init__(self, platform: str, quarantine_on: Tuple[Type[BaseException], ...] = ()):
+        self.platform = platform
+        self.quarantine_on = quarantine_on
+        self.sessions: List[CrawlSession] = []
+        # Browser launched by the pool when the crawler's context has none (persistent context)
+        self.owned_browser: Optional[Browser] = None
+        self._changed: Optional[asyncio.Condition] = None
+
+    @classmethod
+    def get_instance(cls, platform: str, quarantine_on: Tuple[Type[BaseException], ...] = ()) -> "SessionPool":
+        if platform not in cls._instances:
+            cls._instances[platform] = cls(platform, quarantine_on)
+        return cls._instances[platform]
+
+    @classmethod
+    async def close_all(cls):
+        for pool in list(cls._instances.values()):
+            await pool.close()
+        cls._instances.clear()
+
+    def _condition(self) -> asyncio.Condition:
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+        return self._changed
+
+    def add(self, session: CrawlSession):
+        self.sessions.append(session)
+
+    @property
+    def primary(self) -> CrawlSession:
+        return self.sessions[0]
+
+    def _pick(self) -> Optional[CrawlSession]:
+        healthy = [session for session in self.sessions if session.healthy]
+        if not healthy:
+            return None
+        return min(healthy, key=lambda session: (session.in_flight, session.last_used))
+
+    async def acquire(self) -> CrawlSession:
+        """Wait for a healthy session and reserve it for one call"""
+        condition = self._condition()
+        async with condition:
+            while True:
+                session = self._pick()
+                if session:
+                    session.in_flight += 1
+                    session.requests += 1
+                    session.last_used = time.monotonic()
+                    return session
+                wake_at = min(session.quarantined_until for session in self.sessions)
+                utils.logger.warning(
+                    f"[SessionPool.acquire] All {self.platform} sessions are quarantined, "
+                    f"waiting {wake_at - time.monotonic():.0f}s"
+                )
+                try:
+                    await asyncio.wait_for(condition.wait(), timeout=max(0.0, wake_at - time.monotonic()))
+                except asyncio.TimeoutError:
+                    pass
+
+    async def release(self, session: CrawlSession, error: Optional[BaseException] = None):
+        """Return a session and record the outcome of its call"""
+        condition = self._condition()
+        async with condition:
+            session.in_flight -= 1
+            if error is None:
+                session.failures = 0
+            else:
+                self._record_failure(session, _unwrap_error(error))
+            condition.notify_all()
+
+    def _record_failure(self, session: CrawlSession, error: BaseException):
+        session.failures += 1
+        session.last_error = f"{type(error).__name__}: {error}"
+        if isinstance(error, self.quarantine_on) or session.failures >= config.SESSION_POOL_MAX_FAILURES:
+            self.quarantine(session)
+
+    def quarantine(self, session: CrawlSession):
+        session.quarantined += 1
+        session.failures = 0
+        session.quarantined_until = time.monotonic() + config.SESSION_POOL_QUARANTINE_SECONDS
+        utils.logger.warning(
+            f"[SessionPool.quarantine] {self.platform} session {session.session_id} quarantined for "
+            f"{config.SESSION_POOL_QUARANTINE_SECONDS}s, last error: {session.last_error}"
+        )
+
+    async def call(self, method_name: str, *args, **kwargs):
+        """Run one API client method on the next session"""
+        session = await self.acquire()
+        try:
+            result = await getattr(session.client, method_name)(*args, **kwargs)
+        except Exception as e:
+            await self.release(session, e)
+            raise
+        except BaseException:
+            await self.release(session)
+            raise
+        await self.release(session)
+        return result
+
+    def client(self) -> "SessionPoolClient":
+        return SessionPoolClient(self)
+
+    def stats(self) -> List[Dict]:
+        return [session.snapshot() for session in self.sessions]
+
+    async def close(self):
+        for session in self.sessions:
+            close_http_client = getattr(session.client, "close_http_client", None)
+            if close_http_client:
+                try:
+                    await close_http_client()
+                except Exception as e:
+                    utils.logger.error(f"[SessionPool.close] Error closing http client: {e}")
+            if session.owns_context and session.browser_context:
+                try:
+                    await session.browser_context.close()
+                except Exception as e:
+                    if "closed" not in str(e).lower():
+                        utils.logger.error(f"[SessionPool.close] Error closing browser context: {e}")
+        if self.owned_browser:
+            try:
+                await self.owned_browser.close()
+            except Exception as e:
+                if "closed" not in str(e).lower():
+                    utils.logger.error(f"[SessionPool.close] Error closing browser: {e}")
+            self.owned_browser = None
+        self.sessions = []
+
+
+class SessionPoolClient:
+    """
+    Stand-in for a platform API client: every async method runs on a session picked by the pool,
+    other attributes (signer, headers, ...) are those of the primary session's client
+    """
+
+    # Methods bound to the crawler's own browser context, they always run on the primary session
+    PRIMARY_ONLY_METHODS = ("update_cookies", "pong", "close_http_client")
+
+    def __init__(self, pool: SessionPool):
+        self._pool = pool
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._pool.primary.client, name)
+        if name in self.PRIMARY_ONLY_METHODS or not inspect.iscoroutinefunction(attr):
+            return attr
+        return functools.partial(self._pool.call, name)
+
+
+def session_state_path(platform: str, session_id: int) -> str:
+    """Login state (cookies, local storage) of an extra session, kept between runs when SAVE_LOGIN_STATE is on"""
+    return os.path.join(os.getcwd(), "browser_data", f"{config.USER_DATA_DIR % platform}_session_{session_id}.json")
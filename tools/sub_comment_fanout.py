@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/sub_comment_fanout.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : Crawl the reply threads of a note concurrently, with caps per note and per parent comment
+
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import config
+from tools import utils
+
+
+class SubCommentBudget:
+    """Remaining sub-comments of one reply thread, also bounded by the remaining sub-comments of the note"""
+
+    def __init__(self, fanout: "SubCommentFanout", max_count: int):
+        self._fanout = fanout
+        self.remaining = max_count
+
+    @property
+    def exhausted(self) -> bool:
+        return self.remaining <= 0 or self._fanout.remaining <= 0
+
+    def take(self, sub_comments: List[Dict]) -> List[Dict]:
+        """
+        Trim a page of sub-comments to the budget and count it
+        Returns:
+            the sub-comments that may be stored
+        """
+        allowed = sub_comments[:max(0, min(self.remaining, self._fanout.remaining))]
+        self.remaining -= len(allowed)
+        self._fanout.remaining -= len(allowed)
+        self._fanout.results.extend(allowed)
+        return allowed
+
+
+ThreadCrawler = Callable[[SubCommentBudget], Awaitable[None]]
+
+
+class SubCommentFanout:
+    """
+    Runs the reply threads of one note as background tasks while the first-level comment pages are still
+    being paginated. At most `concurrency` threads run at once, every thread gets a SubCommentBudget.
+    The first error of a thread cancels the other threads and is raised by the next submit or on exit,
+    so a note with failed reply threads is not recorded as fully crawled.
+
+    Usage:
+        async with SubCommentFanout() as fanout:
+            for page in first_level_pages:
+                for comment in page:
+                    fanout.submit(functools.partial(crawl_thread, comment))
+        all_sub_comments = fanout.results
+    """
+
+    def __init__(
+        self,
+        max_per_note: Optional[int] = None,
+        max_per_parent: Optional[int] = None,
+        concurrency: Optional[int] = None,
+    ):
+        self.remaining = config.CRAWLER_MAX_SUB_COMMENTS_COUNT_SINGLENOTES if max_per_note is None else max_per_note
+        self.max_per_parent = config.CRAWLER_MAX_SUB_COMMENTS_COUNT_PER_COMMENT if max_per_parent is None else max_per_parent
+        self._semaphore = asyncio.Semaphore(max(1, config.SUB_COMMENT_CONCURRENCY if concurrency is None else concurrency))
+        self._tasks: List[asyncio.Task] = []
+        self.results: List[Dict] = []
+        self._error: Optional[BaseException] = None
+        # Threads that finished without error, by submission order, and the callbacks waiting for them
+        self._finished: Set[int] = set()
+        self._finished_prefix = 0
+        self._milestones: List[Tuple[int, Callable[[], None]]] = []
+
+    async def __aenter__(self) -> "SubCommentFanout":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            for task in self._tasks:
+                task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if exc_type is None and self._error is not None:
+            raise self._error
+
+    def submit(self, crawl_thread: ThreadCrawler):
+        """Schedule one reply thread, returns immediately"""
+        if self._error is not None:
+            raise self._error
+        if self.remaining > 0:
+            self._tasks.append(asyncio.create_task(self._run(len(self._tasks), crawl_thread)))
+
+    def on_done(self, callback: Callable[[], None]):
+        """
+        Call `callback` once every thread submitted so far has finished without error, e.g. to save the cursor
+        of a comment page only after the reply threads of the page were crawled. Callbacks run in order.
+        """
+        self._milestones.append((len(self._tasks), callback))
+        self._run_milestones()
+
+    def _run_milestones(self):
+        while self._milestones and self._error is None and self._milestones[0][0] <= self._finished_prefix:
+            _, callback = self._milestones.pop(0)
+            callback()
+
+    def _finish(self, seq: int):
+        self._finished.add(seq)
+        while self._finished_prefix in self._finished:
+            self._finished.discard(self._finished_prefix)
+            self._finished_prefix += 1
+        self._run_milestones()
+
+    async def _run(self, seq: int, crawl_thread: ThreadCrawler):
+        async with self._semaphore:
+            if self.remaining <= 0:
+                self._finish(seq)
+                return
+            try:
+                await crawl_thread(SubCommentBudget(self, self.max_per_parent))
+                self._finish(seq)
+            except Exception as e:
+                utils.logger.error(f"[SubCommentFanout._run] Crawl sub comments error: {e}")
+                if self._error is None:
+                    # Blocked IP / captcha: the other threads would fail the same way
+                    self._error = e
+                    current = asyncio.current_task()
+                    for task in self._tasks:
+                        if task is not current:
+                            task.cancel()
@@ -22,10 +22,13 @@ import asyncio
 import json
 import logging
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set
 
 import aiofiles
 import jieba
-import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 from wordcloud import WordCloud
 
 import config
@@ -33,6 +36,149 @@ from tools import utils
 
 plot_lock = asyncio.Lock()
 
+# Tokenizer state of the current process (a pool worker, or the main process when WORDCLOUD_WORKERS = 0)
+_tokenizer_stop_words: Set[str] = set()
+_tokenizer_ready = False
+
+
+def load_stop_words(stop_words_file: str) -> Set[str]:
+    with open(stop_words_file, 'r', encoding='utf-8') as f:
+        return set(f.read().strip().split('\n'))
+
+
+def init_tokenizer(stop_words_file: str, custom_words: Iterable[str]):
+    """Load the jieba dictionary and the stop words, runs once per worker process"""
+    global _tokenizer_stop_words, _tokenizer_ready
+    logging.getLogger('jieba').setLevel(logging.WARNING)
+    for word in custom_words:
+        jieba.add_word(word)
+    jieba.initialize()
+    _tokenizer_stop_words = load_stop_words(stop_words_file)
+    _tokenizer_ready = True
+
+
+def count_words(texts: List[str]) -> Counter:
+    """Word counts of one batch of texts, the counts of several batches are merged by adding them up"""
+    counter = Counter()
+    for text in texts:
+        counter.update(word for word in jieba.lcut(text) if word not in _tokenizer_stop_words and len(word.strip()) > 0)
+    return counter
+
+
+def _count_words_in_thread(texts: List[str]) -> Counter:
+    if not _tokenizer_ready:
+        init_tokenizer(config.STOP_WORDS_FILE, config.CUSTOM_WORDS)
+    return count_words(texts)
+
+
+def comment_text(comment: Dict) -> str:
+    """Text of a comment, the field name differs between platforms"""
+    return comment.get('content') or comment.get('comment_text') or comment.get('text') or ''
+
+
+class WordFrequencyCounter:
+    """
+    Running word frequencies of the comments of one platform / crawler type
+    Comments are added while they are stored, every WORDCLOUD_BATCH_SIZE texts are tokenized as one batch in the
+    process pool and the batch counts are added to `counter`, so the word cloud is rendered from `counter`
+    without reading the comments again
+    Uses singleton pattern so every writer of a platform updates the same counter
+    """
+
+    _instances: Dict[str, "WordFrequencyCounter"] = {}
+    _pool: Optional[ProcessPoolExecutor] = None
+
+    @classmethod
+    def get_instance(cls, platform: str, crawler_type: str) -> "WordFrequencyCounter":
+        key = f"{platform}_{crawler_type}"
+        if key not in cls._instances:
+            cls._instances[key] = cls()
+        return cls._instances[key]
+
+    @classmethod
+    def _get_pool(cls) -> Optional[ProcessPoolExecutor]:
+        if config.WORDCLOUD_WORKERS <= 0:
+            return None
+        if cls._pool is None:
+            # jieba loads its dictionary once per worker, not once per batch
+            cls._pool = ProcessPoolExecutor(
+                max_workers=config.WORDCLOUD_WORKERS,
+                initializer=init_tokenizer,
+                initargs=(config.STOP_WORDS_FILE, list(config.CUSTOM_WORDS)),
+            )
+        return cls._pool
+
+    @classmethod
+    async def close_all(cls):
+        """Wait for the running batches and stop the worker processes"""
+        for instance in list(cls._instances.values()):
+            try:
+                await instance.flush()
+            except Exception as e:
+                utils.logger.error(f"[WordFrequencyCounter.close_all] Error counting words: {e}")
+        cls._instances.clear()
+        if cls._pool is not None:
+            cls._pool.shutdown(wait=False, cancel_futures=True)
+            cls._pool = None
+
+    def __init__(self):
+        self.counter: Counter = Counter()
+        # Comments added, including the ones without text, and texts submitted for counting
+        self.item_count = 0
+        self.text_count = 0
+        self.batch_size = max(1, config.WORDCLOUD_BATCH_SIZE)
+        self._buffer: List[str] = []
+        self._pending: Set[asyncio.Future] = set()
+
+    async def add(self, text: str):
+        if not text:
+            return
+        self._buffer.append(text)
+        if len(self._buffer) >= self.batch_size:
+            await self._submit()
+
+    async def add_comment(self, comment: Dict):
+        self.item_count += 1
+        await self.add(comment_text(comment))
+
+    async def add_many(self, texts: Iterable[str]):
+        for text in texts:
+            await self.add(text)
+
+    async def _submit(self):
+        texts, self._buffer = self._buffer, []
+        if not texts:
+            return
+        # Backpressure: at most two batches per worker are queued
+        max_pending = max(1, config.WORDCLOUD_WORKERS) * 2
+        while len(self._pending) >= max_pending:
+            await asyncio.wait(self._pending, return_when=asyncio.FIRST_COMPLETED)
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        if pool is None:
+            future = loop.run_in_executor(None, _count_words_in_thread, texts)
+        else:
+            future = loop.run_in_executor(pool, count_words, texts)
+        self.text_count += len(texts)
+        self._pending.add(future)
+        future.add_done_callback(self._merge)
+
+    def _merge(self, future: asyncio.Future):
+        self._pending.discard(future)
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            utils.logger.error(f"[WordFrequencyCounter._merge] Error counting words: {future.exception()}")
+            return
+        self.counter.update(future.result())
+
+    async def flush(self):
+        """Count the buffered texts and wait until every batch is merged"""
+        await self._submit()
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+
 class AsyncWordCloudGenerator:
     def __init__(self):
         logging.getLogger('jieba').setLevel(logging.WARNING)
@@ -44,18 +190,21 @@ class AsyncWordCloudGenerator:
             jieba.add_word(word)
 
     def load_stop_words(self):
-        with open(self.stop_words_file, 'r', encoding='utf-8') as f:
-            return set(f.read().strip().split('\n'))
+        return load_stop_words(self.stop_words_file)
 
     async def generate_word_frequency_and_cloud(self, data, save_words_prefix):
-        all_text = ' '.join(item['content'] for item in data)
-        words = [word for word in jieba.lcut(all_text) if word not in self.stop_words and len(word.strip()) > 0]
-        word_freq = Counter(words)
-
+        """Count the words of data (dicts with a content field) and render the cloud, tokenized off the event loop"""
+        word_counter = WordFrequencyCounter()
+        await word_counter.add_many(item['content'] for item in data)
+        await word_counter.flush()
+        await self.generate_from_counter(word_counter.counter, save_words_prefix)
+
+    async def generate_from_counter(self, word_freq: Counter, save_words_prefix):
+        """Save the word frequencies and render the cloud from an already counted Counter"""
         # Save word frequency to file
         freq_file = f"{save_words_prefix}_word_freq.json"
         async with aiofiles.open(freq_file, 'w', encoding='utf-8') as file:
-            await file.write(json.dumps(word_freq, ensure_ascii=False, indent=4))
+            await file.write(json.dumps(dict(word_freq.most_common()), ensure_ascii=False, indent=4))
 
         # Try to acquire the plot lock without waiting
         if plot_lock.locked():
@@ -65,9 +214,15 @@ class AsyncWordCloudGenerator:
         await self.generate_word_cloud(word_freq, save_words_prefix)
 
     async def generate_word_cloud(self, word_freq, save_words_prefix):
-        await plot_lock.acquire()
-        top_20_word_freq = {word: freq for word, freq in
-                            sorted(word_freq.items(), key=lambda item: item[1], reverse=True)[:20]}
+        async with plot_lock:
+            top_20_word_freq = dict(Counter(word_freq).most_common(20))
+            if not top_20_word_freq:
+                return
+            # Rendering takes seconds, keep it off the event loop
+            await asyncio.to_thread(self._render_word_cloud, top_20_word_freq, save_words_prefix)
+
+    def _render_word_cloud(self, top_word_freq: Dict[str, int], save_words_prefix):
+        # Object-oriented Figure on an Agg canvas: pyplot keeps global state and needs the main thread on some backends
         wordcloud = WordCloud(
             font_path=config.FONT_PATH,
             width=800,
@@ -78,15 +233,13 @@ class AsyncWordCloudGenerator:
             colormap='viridis',
             contour_color='steelblue',
             contour_width=1
-        ).generate_from_frequencies(top_20_word_freq)
+        ).generate_from_frequencies(top_word_freq)
 
         # Save word cloud image
-        plt.figure(figsize=(10, 5), facecolor='white')
-        plt.imshow(wordcloud, interpolation='bilinear')
-
-        plt.axis('off')
-        plt.tight_layout(pad=0)
-        plt.savefig(f"{save_words_prefix}_word_cloud.png", format='png', dpi=300)
-        plt.close()
-
-        plot_lock.release()
+        figure = Figure(figsize=(10, 5), facecolor='white')
+        FigureCanvasAgg(figure)
+        axes = figure.add_subplot()
+        axes.imshow(wordcloud, interpolation='bilinear')
+        axes.axis('off')
+        figure.tight_layout(pad=0)
+        figure.savefig(f"{save_words_prefix}_word_cloud.png", format='png', dpi=300)